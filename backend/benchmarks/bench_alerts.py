@@ -0,0 +1,123 @@
+"""Benchmark: alert rule evaluation cost per snapshot as the rule count grows.
+
+Compares the compiled engine against resolving each rule's path in the
+snapshot separately. Snapshots are real agent snapshots with jittered
+values so rules keep crossing their thresholds.
+
+Usage:
+    python benchmarks/bench_alerts.py [--rules N ...] [--ticks N]
+"""
+import argparse
+import copy
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent.config_loader import DEFAULT_CONFIG  # noqa: E402
+from agent.main import collect_all_metrics  # noqa: E402
+from alerts.engine import AlertEngine, Rule, RuleSet, WILDCARD  # noqa: E402
+
+PATHS = (
+    'cpu.overall_percent',
+    'cpu.per_core_percent[*]',
+    'cpu.load_average.1min',
+    'cpu.times_percent.iowait',
+    'memory.physical.percent',
+    'memory.swap.percent',
+    'disk.partitions[*].percent',
+    'network.connections.total',
+    'rates.network.interfaces.*.mbps_recv',
+    'rates.disk.per_disk.*.write_iops',
+)
+
+
+def make_rules(count, rng):
+    rules = []
+    for index in range(count):
+        path = PATHS[index % len(PATHS)]
+        op = rng.choice(('>', '>=', '<', '<='))
+        duration = rng.choice(('', ' for 30s', ' for 2m'))
+        rules.append(Rule(f'rule{index}', f'{path} {op} {rng.uniform(0, 100):.1f}{duration}'))
+    return rules
+
+
+def naive_values(value, path):
+    """Resolve one path independently (what a per-rule walk costs)."""
+    if not path:
+        yield value
+        return
+    head, rest = path[0], path[1:]
+    if head == WILDCARD:
+        items = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+        for item in items:
+            yield from naive_values(item, rest)
+    elif isinstance(value, dict) and head in value:
+        yield from naive_values(value[head], rest)
+    elif isinstance(value, list) and isinstance(head, int) and head < len(value):
+        yield from naive_values(value[head], rest)
+
+
+def naive_tick(rules, snapshot):
+    compare = {'>': float.__gt__, '>=': float.__ge__, '<': float.__lt__, '<=': float.__le__}
+    breached = 0
+    for rule in rules:
+        for value in naive_values(snapshot, rule.path):
+            if isinstance(value, (int, float)) and compare[rule.op](float(value), rule.threshold):
+                breached += 1
+    return breached
+
+
+def jitter(snapshot, rng):
+    """Copy of a snapshot with every number scaled by up to +-20%."""
+    if isinstance(snapshot, dict):
+        return {key: jitter(value, rng) for key, value in snapshot.items()}
+    if isinstance(snapshot, list):
+        return [jitter(value, rng) for value in snapshot]
+    if isinstance(snapshot, float):
+        return snapshot * rng.uniform(0.8, 1.2)
+    return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--ticks', type=int, default=200)
+    args = parser.parse_args()
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    collect_all_metrics(config)
+    time.sleep(1)
+    base = collect_all_metrics(config)
+    base.pop('inventory', None)
+    rng = random.Random(1)
+    snapshots = [jitter(base, rng) for _ in range(20)]
+
+    print(f"ticks={args.ticks}")
+    print(f"  {'rules':>6}{'compile ms':>12}{'engine us/tick':>16}{'per-rule us/tick':>18}{'events/tick':>13}")
+    for count in args.rules:
+        rules = make_rules(count, random.Random(count))
+
+        started = time.perf_counter()
+        engine = AlertEngine(RuleSet(rules))
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        events = 0
+        started = time.perf_counter()
+        for tick in range(args.ticks):
+            events += len(engine.evaluate(snapshots[tick % len(snapshots)], now=tick * 5.0))
+        engine_us = (time.perf_counter() - started) / args.ticks * 1e6
+
+        naive_ticks = max(1, args.ticks // 10)
+        started = time.perf_counter()
+        for tick in range(naive_ticks):
+            naive_tick(rules, snapshots[tick % len(snapshots)])
+        naive_us = (time.perf_counter() - started) / naive_ticks * 1e6
+
+        print(f"  {count:>6}{compile_ms:>12.1f}{engine_us:>16.1f}{naive_us:>18.1f}{events / args.ticks:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark: spill and replay throughput of the local payload buffer.
+
+Usage:
+    python benchmarks/bench_buffer.py [--payloads N] [--size BYTES]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent.buffer import MetricBuffer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payloads', type=int, default=100_000)
+    parser.add_argument('--size', type=int, default=4096, help='payload size in bytes')
+    parser.add_argument('--capacity', type=int, default=1000)
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        buffer = MetricBuffer(args.capacity, spill_dir=directory)
+
+        start = time.perf_counter()
+        for _ in range(args.payloads):
+            buffer.append(payload)
+        spill_time = time.perf_counter() - start
+        stats = buffer.stats()
+
+        start = time.perf_counter()
+        replayed = 0
+        while len(buffer):
+            batch = buffer.peek(args.batch)
+            buffer.ack(len(batch))
+            replayed += len(batch)
+        replay_time = time.perf_counter() - start
+        buffer.close()
+
+    megabytes = args.payloads * args.size / 1024 / 1024
+    print(f"payloads={args.payloads} size={args.size}B capacity={args.capacity} "
+          f"spilled={stats['spilled']} ({stats['spill_bytes'] / 1024 / 1024:.1f} MB on disk)")
+    print(f"  append/spill: {args.payloads / spill_time:12.0f} payloads/s  {megabytes / spill_time:8.1f} MB/s")
+    print(f"  replay:       {replayed / replay_time:12.0f} payloads/s  {megabytes / replay_time:8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
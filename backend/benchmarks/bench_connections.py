@@ -0,0 +1,76 @@
+"""Benchmark: connection-state counting on large socket tables.
+
+Generates a synthetic /proc/net/tcp with N sockets and measures the
+streaming counter against materialising one object per socket, then
+compares the /proc path with psutil.net_connections on the live host.
+
+Usage:
+    python benchmarks/bench_connections.py [--sockets N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent.collectors import network  # noqa: E402
+
+
+HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+STATES = ["01"] * 70 + ["06"] * 20 + ["08"] * 5 + ["0A"] * 5
+
+Socket = namedtuple('Socket', 'sl laddr raddr status inode')
+
+
+def write_table(directory, sockets):
+    with open(os.path.join(directory, 'tcp'), 'w') as f:
+        f.write(HEADER)
+        for index in range(sockets):
+            f.write(f"{index:4d}: 0A000001:{index % 65535:04X} 0A000002:01BB {random.choice(STATES)} "
+                    f"00000000:00000000 00:00000000 00000000  1000        0 {index + 1000} 1 "
+                    f"0000000000000000 20 4 30 10 -1\n")
+
+
+def materialise(directory):
+    """Old approach: one object per socket, one pass per state."""
+    sockets = []
+    with open(os.path.join(directory, 'tcp')) as f:
+        next(f)
+        for line in f:
+            fields = line.split()
+            sockets.append(Socket(fields[0], fields[1], fields[2], fields[3], fields[9]))
+    return {
+        state: sum(1 for s in sockets if s.status == state)
+        for state in ("01", "06", "08", "0A")
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sockets', type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_table(directory, args.sockets)
+        print(f"synthetic table: {args.sockets} sockets")
+        print(f"  materialised: {timed(materialise, directory):9.1f} ms")
+        print(f"  streaming:    {timed(network.count_connection_states, directory):9.1f} ms")
+
+    print("live host:")
+    print(f"  psutil:       {timed(network._count_states_psutil):9.1f} ms")
+    print(f"  /proc/net:    {timed(network.count_connection_states):9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
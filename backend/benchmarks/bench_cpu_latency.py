@@ -0,0 +1,56 @@
+"""Benchmark: collection cycle latency of the CPU collector.
+
+Compares the previous blocking implementation (``cpu_percent(interval=1)``)
+with the delta-based :class:`CpuSampler`.
+
+Usage:
+    python benchmarks/bench_cpu_latency.py [--cycles N]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent.collectors import cpu  # noqa: E402
+
+
+def blocking_cycle():
+    """Reproduce the CPU usage part of the old collector."""
+    psutil.cpu_percent(interval=1, percpu=False)
+    psutil.cpu_percent(interval=0, percpu=True)
+    psutil.cpu_times()
+
+
+def measure(func, cycles):
+    """Return per-cycle wall times in milliseconds."""
+    samples = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, samples):
+    print(f"{name:<12} cycles={len(samples):<5} "
+          f"mean={statistics.mean(samples):9.3f} ms  "
+          f"p50={statistics.median(samples):9.3f} ms  "
+          f"max={max(samples):9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=3)
+    args = parser.parse_args()
+
+    report("blocking", measure(blocking_cycle, args.cycles))
+    report("sampler", measure(cpu.collect_cpu_metrics, max(args.cycles, 100)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark: ingest server throughput under a simulated fleet of agents.
+
+Each simulated agent holds a keep-alive connection and posts batches of
+snapshots back to back, as a shipper draining a backlog does. Bodies are
+encoded up front so the clients spend their time on I/O; the clients still
+share the interpreter with the server, so figures are a lower bound.
+
+Usage:
+    python benchmarks/bench_ingest.py [--agents N] [--batch N] [--seconds S]
+        [--format json|ndjson|protobuf] [--max-pending N]
+"""
+import argparse
+import asyncio
+import copy
+import gzip
+import http.client
+import json
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent import protobuf  # noqa: E402
+from agent.config_loader import DEFAULT_CONFIG  # noqa: E402
+from agent.main import collect_all_metrics  # noqa: E402
+from agent.transport import frame_ndjson, serialize_snapshot  # noqa: E402
+from server.app import IngestServer  # noqa: E402
+from server.storage import SQLiteBackend  # noqa: E402
+
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'protobuf': 'application/x-protobuf',
+}
+
+
+def encode_batches(template, host, batch, count, fmt):
+    """Pre-encode ``count`` gzip bodies of ``batch`` snapshots for one host."""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    bodies = []
+    for index in range(count):
+        snapshots = []
+        for offset in range(batch):
+            snapshot = dict(template)
+            snapshot['hostname'] = host
+            snapshot['timestamp'] = (start + timedelta(seconds=5 * (index * batch + offset))).isoformat()
+            snapshots.append(snapshot)
+        if fmt == 'json':
+            body = json.dumps(snapshots).encode('utf-8')
+        elif fmt == 'ndjson':
+            body = frame_ndjson([serialize_snapshot(s) for s in snapshots])
+        else:
+            body = protobuf.frame([protobuf.encode_snapshot(s) for s in snapshots])
+        bodies.append(gzip.compress(body))
+    return bodies
+
+
+def run_agent(port, bodies, content_type, deadline, results):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': content_type, 'Content-Encoding': 'gzip'}
+    index = 0
+    while time.monotonic() < deadline:
+        body = bodies[index % len(bodies)]
+        started = time.perf_counter()
+        connection.request('POST', '/api/metrics', body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        results['latency'].append(time.perf_counter() - started)
+        if response.status == 202:
+            results['accepted_posts'] += 1
+            index += 1
+        else:
+            results['rejected_posts'] += 1
+            # Honour Retry-After scaled down to benchmark time
+            time.sleep(float(response.getheader('Retry-After', 1)) / 100)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=12, help='Snapshots per post')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--format', choices=sorted(CONTENT_TYPES), default='protobuf')
+    parser.add_argument('--max-pending', type=int, default=20000)
+    parser.add_argument('--write-batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    collect_all_metrics(config)
+    template = collect_all_metrics(config)
+    template.pop('inventory', None)
+    template.get('process', {}).pop('top_processes', None)
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SQLiteBackend(str(Path(directory) / 'metrics.db'))
+        server = IngestServer(backend, max_pending=args.max_pending, write_batch_size=args.write_batch_size)
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(server.start('127.0.0.1', 0), loop).result()
+
+        fleet = [encode_batches(template, f'host-{n:04d}', args.batch, 4, args.format) for n in range(args.agents)]
+        results = {'accepted_posts': 0, 'rejected_posts': 0, 'latency': []}
+        deadline = time.monotonic() + args.seconds
+        threads = [
+            threading.Thread(target=run_agent, args=(server.port, bodies, CONTENT_TYPES[args.format], deadline, results))
+            for bodies in fleet
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        received = time.perf_counter() - started
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        drained = time.perf_counter() - started
+        loop.call_soon_threadsafe(loop.stop)
+        backend.close()
+
+    stats = server.stats()
+    latency = sorted(results['latency'])
+    print(f"agents={args.agents} batch={args.batch} format={args.format} seconds={args.seconds}")
+    print(f"  accepted         {stats['accepted']:>10} snapshots ({stats['accepted'] / received:,.0f}/s)")
+    print(f"  committed        {stats['written']:>10} snapshots ({stats['written'] / drained:,.0f}/s incl. drain)")
+    print(f"  transactions     {stats['batches']:>10} (avg {stats['written'] / max(stats['batches'], 1):,.0f} rows)")
+    print(f"  503 responses    {results['rejected_posts']:>10}")
+    if latency:
+        print(f"  post latency ms  p50 {latency[len(latency) // 2] * 1000:.1f}  "
+              f"p99 {latency[int(len(latency) * 0.99)] * 1000:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: memory held by 10k snapshots, nested dicts versus the compact model.
+
+Snapshots are real agent snapshots with every counter and gauge varied,
+so no two snapshots share value objects (as in a buffer filled over
+time). Memory is measured with tracemalloc; the encoded protobuf size is
+shown for reference.
+
+Usage:
+    python benchmarks/bench_model.py [--snapshots N]
+"""
+import argparse
+import copy
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent import protobuf  # noqa: E402
+from agent.config_loader import DEFAULT_CONFIG  # noqa: E402
+from agent.main import collect_all_metrics  # noqa: E402
+from agent.model import Snapshot  # noqa: E402
+
+
+def vary(value, index):
+    """Copy of a snapshot with every number changed by ``index``."""
+    if isinstance(value, dict):
+        return {key: vary(item, index) for key, item in value.items()}
+    if isinstance(value, list):
+        return [vary(item, index) for item in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return value + 1000 + index
+    if isinstance(value, float):
+        return value + index * 1e-3
+    if isinstance(value, str):
+        # Collectors hand out fresh strings every tick
+        return ''.join(value)
+    return value
+
+
+def held(build, count):
+    """Bytes still allocated after building ``count`` objects."""
+    gc.collect()
+    tracemalloc.start()
+    items = [build(index) for index in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--snapshots', type=int, default=10000)
+    args = parser.parse_args()
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    collect_all_metrics(config)
+    time.sleep(1)
+    base = collect_all_metrics(config)
+    base.pop('inventory', None)
+
+    results = {
+        'dict': held(lambda index: vary(base, index), args.snapshots),
+        'model': held(lambda index: Snapshot.from_dict(vary(base, index)), args.snapshots),
+        'protobuf': held(lambda index: protobuf.encode_snapshot(vary(base, index)), args.snapshots),
+    }
+
+    snapshot = Snapshot.from_dict(base)
+    cycles = 2000
+    started = time.perf_counter()
+    for _ in range(cycles):
+        Snapshot.from_dict(base)
+    from_dict_us = (time.perf_counter() - started) / cycles * 1e6
+    started = time.perf_counter()
+    for _ in range(cycles):
+        snapshot.to_dict()
+    to_dict_us = (time.perf_counter() - started) / cycles * 1e6
+
+    print(f"snapshots={args.snapshots} cores={len(base['cpu']['per_core_percent'])} "
+          f"disks={len(base['disk']['per_disk_io'])} interfaces={len(base['network']['interfaces'])}")
+    print(f"  {'form':<10}{'MiB':>10}{'bytes/snapshot':>16}{'vs dict':>9}")
+    for name, size in results.items():
+        print(f"  {name:<10}{size / 2**20:>10.1f}{size / args.snapshots:>16.0f}{size / results['dict']:>8.2f}x")
+    print(f"  from_dict {from_dict_us:.1f} us, to_dict {to_dict_us:.1f} us per snapshot")
+
+
+if __name__ == '__main__':
+    main()
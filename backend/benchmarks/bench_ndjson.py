@@ -0,0 +1,97 @@
+"""Benchmark: snapshots per second encoded as JSON/NDJSON for a large-host payload.
+
+Usage:
+    python benchmarks/bench_ndjson.py [--cores N] [--disks N] [--interfaces N] [--seconds S]
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent import formatter  # noqa: E402
+from agent.config_loader import DEFAULT_CONFIG  # noqa: E402
+from agent.formatter import NdjsonWriter, format_metrics_json  # noqa: E402
+from agent.main import collect_all_metrics  # noqa: E402
+
+
+def large_host_snapshot(cores, disks, interfaces, processes):
+    """Scale a real snapshot up to a large host."""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    collect_all_metrics(config)
+    snapshot = collect_all_metrics(config)
+
+    cpu = snapshot['cpu']
+    cpu['per_core_percent'] = [round(i * 0.37 % 100, 1) for i in range(cores)]
+
+    disk = snapshot['disk']
+    io = next(iter(disk['per_disk_io'].values()), {'read_count': 1, 'write_count': 1})
+    disk['per_disk_io'] = {f'nvme{i}n1': dict(io) for i in range(disks)}
+    partition = disk['partitions'][0] if disk['partitions'] else {}
+    disk['partitions'] = [dict(partition, mountpoint=f'/data{i}') for i in range(disks)]
+
+    network = snapshot['network']
+    nic = next(iter(network['interfaces'].values()))
+    network['interfaces'] = {f'eth{i}': dict(nic) for i in range(interfaces)}
+
+    top = snapshot['top_cpu_processes'][:1] or [{'pid': 1, 'name': 'init', 'cpu_percent': 0.0}]
+    snapshot['top_cpu_processes'] = [dict(top[0], pid=i) for i in range(processes)]
+    return snapshot
+
+
+def measure(write, snapshot, seconds):
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            write(snapshot)
+        count += 50
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cores', type=int, default=256)
+    parser.add_argument('--disks', type=int, default=64)
+    parser.add_argument('--interfaces', type=int, default=64)
+    parser.add_argument('--processes', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration per mode')
+    args = parser.parse_args()
+
+    snapshot = large_host_snapshot(args.cores, args.disks, args.interfaces, args.processes)
+    line = formatter.format_metrics_ndjson(snapshot)
+
+    with open(os.devnull, 'wb') as devnull:
+        writer = NdjsonWriter(devnull, flush_lines=100)
+        modes = {
+            'json (indent=2, print)': lambda m: print(format_metrics_json(m), file=sys.stdout),
+            'ndjson (buffered)': writer.write,
+        }
+
+        print(f"payload: {len(line)} bytes compact, {len(json.dumps(snapshot, indent=2))} bytes indented; "
+              f"encoder: {'orjson' if formatter.orjson else 'json (stdlib)'}")
+        real_stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            results = {name: measure(write, snapshot, args.seconds) for name, write in modes.items()}
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+
+        if formatter.orjson is not None:
+            orjson = formatter.orjson
+            formatter.orjson = None
+            results['ndjson (stdlib fallback)'] = measure(writer.write, snapshot, args.seconds)
+            formatter.orjson = orjson
+
+    for name, rate in results.items():
+        print(f"  {name:<26}{rate:10.0f} snapshots/s")
+
+
+if __name__ == '__main__':
+    main()
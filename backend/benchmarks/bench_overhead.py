@@ -0,0 +1,73 @@
+"""Benchmark: agent overhead (CPU share of one core, RSS, collector latency).
+
+Runs the collection loop at the configured interval, as the agent does,
+and reports the figures of the ``agent`` self-metrics section. Run it on
+a production-like host to check the agent stays under 1% of a core.
+
+Usage:
+    python benchmarks/bench_overhead.py [--interval S] [--seconds S]
+"""
+import argparse
+import copy
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent.config_loader import DEFAULT_CONFIG  # noqa: E402
+from agent.main import collect_all_metrics  # noqa: E402
+
+
+def quantile(bounds, buckets, q):
+    """Upper bucket bound below which a fraction ``q`` of the calls fell."""
+    target = q * sum(buckets)
+    seen = 0
+    for bound, count in zip(list(bounds) + [float('inf')], buckets):
+        seen += count
+        if seen >= target:
+            return bound
+    return float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--interval', type=float, default=5)
+    parser.add_argument('--seconds', type=float, default=60)
+    args = parser.parse_args()
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    first = collect_all_metrics(config)['agent']
+    started = time.monotonic()
+    deadline = started + args.seconds
+    snapshot = None
+    ticks = 0
+    while True:
+        next_tick = started + (ticks + 1) * args.interval
+        if next_tick > deadline:
+            break
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+        snapshot = collect_all_metrics(config)
+        ticks += 1
+    if snapshot is None:
+        parser.error("--seconds must cover at least one interval")
+
+    agent = snapshot['agent']
+    elapsed = time.monotonic() - started
+    cpu = sum(agent['cpu_seconds'].values()) - sum(first['cpu_seconds'].values())
+    bounds = agent['bucket_bounds_ms']
+
+    print(f"interval={args.interval}s ticks={ticks} elapsed={elapsed:.1f}s")
+    print(f"  cpu        {cpu / elapsed * 100:.3f}% of one core ({cpu * 1000 / ticks:.1f} ms CPU per tick)")
+    print(f"  rss        {agent['rss_bytes'] / 2**20:.1f} MiB, {agent['threads']} threads")
+    print(f"  gc         collections {agent['gc']['collections']}, pause {agent['gc']['pause_ms']:.1f} ms total")
+    print(f"  {'function':<26}{'calls':>7}{'mean ms':>10}{'p50 <=':>9}{'p99 <=':>9}{'max ms':>9}")
+    for name, histogram in agent['functions'].items():
+        mean = histogram['sum_ms'] / histogram['count']
+        p50 = quantile(bounds, histogram['buckets'], 0.5)
+        p99 = quantile(bounds, histogram['buckets'], 0.99)
+        print(f"  {name:<26}{histogram['count']:>7}{mean:>10.2f}{p50:>9g}{p99:>9g}{histogram['max_ms']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark: psutil versus direct /proc backend, per collector.
+
+Times every collector with ``backend='psutil'`` and ``backend='procfs'``,
+and separately the counter reads each backend replaces (the part of the
+collector that differs; partitions, frequency and connection counting go
+through the same code on both).
+
+Usage:
+    python benchmarks/bench_procfs.py [--cycles N]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent.collectors import cpu, disk, memory, network  # noqa: E402
+from agent.collectors.procfs import get_procfs  # noqa: E402
+
+
+def measure(func, cycles):
+    """Return per-call wall times in microseconds."""
+    func()
+    samples = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=2000)
+    args = parser.parse_args()
+
+    procfs = get_procfs('procfs')
+    if procfs is None:
+        parser.error("/proc is not available on this system")
+
+    reads = {
+        'cpu': (lambda: (psutil.cpu_times(), psutil.cpu_times(percpu=True), psutil.getloadavg()),
+                lambda: (procfs.cpu_times(), procfs.loadavg())),
+        'memory': (lambda: (psutil.virtual_memory(), psutil.swap_memory()), procfs.memory),
+        'disk': (lambda: (psutil.disk_io_counters(), psutil.disk_io_counters(perdisk=True)), procfs.disk_io),
+        'network': (lambda: (psutil.net_io_counters(pernic=True), psutil.net_io_counters()), procfs.net_io),
+    }
+    collectors = {
+        'cpu': lambda backend: cpu.collect_cpu_metrics(include_static=False, backend=backend),
+        'memory': memory.collect_memory_metrics,
+        'disk': disk.collect_disk_metrics,
+        'network': lambda backend: network.collect_network_metrics(include_static=False, backend=backend),
+    }
+
+    print(f"cycles={args.cycles} (median us per call)")
+    print(f"  {'collector':<10}{'read psutil':>13}{'read procfs':>13}{'speedup':>9}"
+          f"{'full psutil':>13}{'full procfs':>13}{'speedup':>9}")
+    for name, (psutil_read, procfs_read) in reads.items():
+        read_psutil = statistics.median(measure(psutil_read, args.cycles))
+        read_procfs = statistics.median(measure(procfs_read, args.cycles))
+        collect = collectors[name]
+        full_cycles = max(1, args.cycles // 10)
+        full_psutil = statistics.median(measure(lambda: collect(backend='psutil'), full_cycles))
+        full_procfs = statistics.median(measure(lambda: collect(backend='procfs'), full_cycles))
+        print(f"  {name:<10}{read_psutil:>13.1f}{read_procfs:>13.1f}{read_psutil / read_procfs:>8.1f}x"
+              f"{full_psutil:>13.1f}{full_procfs:>13.1f}{full_psutil / full_procfs:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark: encoded size and encode/decode time of protobuf vs JSON snapshots.
+
+``protobuf`` uses the classes generated from metrics.proto when the upb
+runtime is installed; ``schema`` is the pure-Python fallback codec.
+
+Usage:
+    python benchmarks/bench_protobuf.py [--iterations N]
+"""
+import argparse
+import copy
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent import protobuf  # noqa: E402
+from agent.config_loader import DEFAULT_CONFIG  # noqa: E402
+from agent.main import collect_all_metrics  # noqa: E402
+from agent.transport import serialize_snapshot  # noqa: E402
+
+
+def timed(func, arg, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    collect_all_metrics(config)
+    # Second snapshot carries rates; drop the one-off inventory section
+    snapshot = collect_all_metrics(config)
+    snapshot.pop('inventory', None)
+
+    codecs = {
+        'json': (serialize_snapshot, json.loads),
+        'protobuf': (protobuf.encode_snapshot, protobuf.decode_snapshot),
+        'schema': (lambda metrics: protobuf.encode_message(protobuf.ROOT, metrics),
+                   lambda data: protobuf.decode_message(protobuf.ROOT, data)),
+    }
+
+    print(f"iterations={args.iterations} generated_classes={protobuf.metrics_pb2 is not None}")
+    print(f"  {'codec':<10}{'bytes':>8}{'gzip':>8}{'encode us':>12}{'decode us':>12}")
+    for name, (encode, decode) in codecs.items():
+        data = encode(snapshot)
+        encode_us = timed(encode, snapshot, args.iterations)
+        decode_us = timed(decode, data, args.iterations)
+        print(f"  {name:<10}{len(data):>8}{len(gzip.compress(data)):>8}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: append and range-query throughput of the embedded time-series store.
+
+Usage:
+    python benchmarks/bench_timeseries.py [--days N] [--series N]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent.timeseries import TimeSeriesStore  # noqa: E402
+
+
+def disk_usage(directory):
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            total += os.stat(os.path.join(root, name)).st_blocks * 512
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--series', type=int, default=20)
+    parser.add_argument('--step', type=float, default=1.0, help='seconds between samples')
+    args = parser.parse_args()
+
+    samples = int(args.days * 86400 / args.step)
+    names = [f'bench.series_{i}' for i in range(args.series)]
+    start = 1_700_000_000 - 1_700_000_000 % 86400
+    end = start + samples * args.step
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TimeSeriesStore(directory)
+        began = time.perf_counter()
+        for i in range(samples):
+            store.append(start + i * args.step, {name: float(i + n) for n, name in enumerate(names)})
+        store.flush()
+        append_time = time.perf_counter() - began
+
+        print(f"samples={samples} series={args.series} ({args.days:g} days at {args.step:g}s) "
+              f"on disk {disk_usage(directory) / 1024 / 1024:.1f} MB")
+        print(f"  append:        {samples / append_time:10.0f} samples/s  "
+              f"{samples * args.series / append_time:12.0f} values/s")
+
+        for label, tier in (('raw range', 'raw'), ('1m rollup', '1m'), ('1h rollup', '1h')):
+            began = time.perf_counter()
+            timestamps, values = store.query(names[0], start, end, tier=tier)
+            elapsed = time.perf_counter() - began
+            print(f"  {label:<14} {len(values):10d} points in {elapsed * 1000:8.1f} ms")
+
+        # The same raw range as JSON rows, the way a row-oriented log would be read
+        rows = min(samples, 86400)
+        lines = [json.dumps({'t': start + i, **{name: float(i) for name in names}}) for i in range(rows)]
+        began = time.perf_counter()
+        column = [json.loads(line)[names[0]] for line in lines]
+        elapsed = (time.perf_counter() - began) * samples / rows
+        print(f"  JSON rows (est.) {len(column) * samples // rows:8d} points in {elapsed * 1000:8.1f} ms")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: shipping throughput against a local stand-in ingest server.
+
+Compares one request per snapshot with batched, compressed requests over
+pooled keep-alive connections.
+
+Usage:
+    python benchmarks/bench_transport.py [--snapshots N]
+"""
+import argparse
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agent.buffer import MetricBuffer  # noqa: E402
+from agent.config_loader import DEFAULT_CONFIG  # noqa: E402
+from agent.main import collect_all_metrics  # noqa: E402
+from agent.transport import HttpShipper  # noqa: E402
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = 0
+    received = 0
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self.rfile.read(length)
+        Handler.requests += 1
+        Handler.received += length
+        self.send_response(202)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def run(url, snapshot, count, batch_size, compression):
+    Handler.requests = Handler.received = 0
+    shipper = HttpShipper(url, MetricBuffer(capacity=count + 1), batch_size=batch_size,
+                          compression=compression, retry_attempts=0)
+    start = time.perf_counter()
+    for _ in range(count):
+        shipper.submit(snapshot)
+        if len(shipper.buffer) >= batch_size:
+            shipper.send_batch()
+    shipper.flush()
+    elapsed = time.perf_counter() - start
+    print(f"batch={batch_size:<4} compression={compression:<5} "
+          f"{count / elapsed:9.0f} snapshots/s  requests={Handler.requests:<6} "
+          f"bytes={Handler.received / 1024:9.1f} KB  connections={shipper.pool.created}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--snapshots', type=int, default=2000)
+    args = parser.parse_args()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_port}"
+
+    snapshot = collect_all_metrics(DEFAULT_CONFIG.copy())
+
+    run(url, snapshot, args.snapshots, 1, "none")
+    run(url, snapshot, args.snapshots, 50, "none")
+    run(url, snapshot, args.snapshots, 50, "gzip")
+    run(url, snapshot, args.snapshots, 50, "auto")
+
+    httpd.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""Vectorized windowed aggregation of metric series (NumPy)."""
+from typing import Dict, Any, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .rates import COUNTER_LIMITS
+
+
+DEFAULT_STATS = ('min', 'max', 'mean', 'p50', 'p95', 'p99')
+
+# Rows aggregated per pass; bounds the size of the sorted window copy
+# needed for percentiles
+CHUNK_ROWS = 64
+
+
+class SeriesFrame(NamedTuple):
+    """One metric for many hosts on a common time grid."""
+    # Row labels (host names)
+    hosts: Tuple[str, ...]
+    # Grid start (epoch seconds) and spacing
+    start: float
+    step: float
+    # hosts x slots; NaN where a host has no sample
+    values: np.ndarray
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Epoch seconds of each grid slot."""
+        return self.start + self.step * np.arange(self.values.shape[1])
+
+
+def align(
+    timestamps: Sequence[float],
+    values: Sequence[float],
+    start: float,
+    end: float,
+    step: float,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Place irregular samples onto the grid ``start, start + step, ... < end``.
+
+    Each sample goes to the slot its timestamp falls in; the last sample
+    of a slot wins and empty slots are NaN.
+
+    Args:
+        timestamps: Sample times, epoch seconds
+        values: Sample values
+        start: Grid start
+        end: Grid end (exclusive)
+        step: Slot width in seconds
+        dtype: Result dtype (float32 halves memory for large fleets)
+
+    Returns:
+        1-D array of ``ceil((end - start) / step)`` slots
+    """
+    slots = int(np.ceil((end - start) / step))
+    out = np.full(slots, np.nan, dtype=dtype)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    index = np.floor((timestamps - start) / step).astype(np.int64)
+    inside = (index >= 0) & (index < slots)
+    out[index[inside]] = np.asarray(values, dtype=dtype)[inside]
+    return out
+
+
+def load_frame(
+    samples: Mapping[str, Tuple[Sequence[float], Sequence[float]]],
+    start: float,
+    end: float,
+    step: float,
+    dtype=np.float64,
+) -> SeriesFrame:
+    """
+    Build a frame from per-host ``(timestamps, values)`` samples.
+
+    Args:
+        samples: Samples keyed by host
+        start: Grid start, epoch seconds
+        end: Grid end (exclusive)
+        step: Slot width in seconds
+        dtype: Value dtype
+
+    Returns:
+        SeriesFrame with one row per host
+    """
+    hosts = tuple(samples)
+    slots = int(np.ceil((end - start) / step))
+    values = np.empty((len(hosts), slots), dtype=dtype)
+    for row, host in enumerate(hosts):
+        timestamps, series = samples[host]
+        values[row] = align(timestamps, series, start, end, step, dtype)
+    return SeriesFrame(hosts, start, step, values)
+
+
+def load_store_frame(
+    stores: Mapping[str, Any],
+    series: str,
+    start: float,
+    end: float,
+    step: float,
+    tier: Optional[str] = None,
+    stat: str = 'avg',
+) -> SeriesFrame:
+    """
+    Load one series from per-host :class:`~agent.timeseries.TimeSeriesStore`\\ s.
+
+    Args:
+        stores: Stores keyed by host
+        series: Series name
+        start: Grid start, epoch seconds
+        end: Grid end (exclusive)
+        step: Slot width in seconds
+        tier: Store tier; chosen by the store if omitted
+        stat: Rollup statistic for rollup tiers
+
+    Returns:
+        SeriesFrame with one row per host
+    """
+    samples = {}
+    for host, store in stores.items():
+        timestamps, values = store.query(series, start, end, tier=tier, stat=stat)
+        samples[host] = (np.frombuffer(timestamps), np.frombuffer(values))
+    return load_frame(samples, start, end, step)
+
+
+def counter_deltas(previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """
+    Element-wise :func:`agent.rates.counter_delta`.
+
+    Decreases of a counter in the upper half of a 32/64-bit range are
+    treated as wraparound; other decreases (resets) give NaN.
+    """
+    previous = np.asarray(previous, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    delta = current - previous
+    wrapped = delta < 0
+    if wrapped.any():
+        fixed = np.full(delta.shape, np.nan)
+        for limit in COUNTER_LIMITS:
+            in_range = wrapped & (previous >= limit // 2) & (previous < limit)
+            fixed[in_range] = limit - previous[in_range] + current[in_range]
+        delta = np.where(wrapped, fixed, delta)
+    return delta
+
+
+def counter_rate(timestamps: Sequence[float], values: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-second rates of a raw cumulative counter series.
+
+    Accepts the counters of the disk and network collectors (bytes, packets,
+    operations) as stored, including wraparound and resets.
+
+    Args:
+        timestamps: Sample times, epoch seconds
+        values: Counter readings
+
+    Returns:
+        Tuple of (timestamps of the later sample of each pair, rates)
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    elapsed = np.diff(timestamps)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = counter_deltas(values[:-1], values[1:]) / elapsed
+    rates[~(elapsed > 0)] = np.nan
+    return timestamps[1:], rates
+
+
+def rate_frame(frame: SeriesFrame) -> SeriesFrame:
+    """
+    Per-second rates of a frame of counters, slot to slot.
+
+    The first slot and slots next to a gap are NaN.
+    """
+    values = frame.values
+    rates = np.full(values.shape, np.nan, dtype=values.dtype)
+    rates[:, 1:] = counter_deltas(values[:, :-1], values[:, 1:]) / frame.step
+    return frame._replace(values=rates)
+
+
+def _window_percentiles(ordered: np.ndarray, counts: np.ndarray, quantiles: Sequence[float]) -> List[np.ndarray]:
+    """Linear-interpolated percentiles of NaN-padded sorted windows."""
+    result = []
+    valid = counts > 0
+    last = np.maximum(counts - 1, 0)
+    for q in quantiles:
+        position = last * q
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, last)
+        fraction = position - lower
+        low = np.take_along_axis(ordered, lower[..., None], axis=-1)[..., 0]
+        high = np.take_along_axis(ordered, upper[..., None], axis=-1)[..., 0]
+        value = low + (high - low) * fraction
+        result.append(np.where(valid, value, np.nan))
+    return result
+
+
+def windowed(
+    frame: SeriesFrame,
+    window: float,
+    stats: Iterable[str] = DEFAULT_STATS,
+) -> Dict[str, SeriesFrame]:
+    """
+    Aggregate a frame over fixed windows.
+
+    Percentiles are computed by sorting each window once (NaN sorts last)
+    and interpolating between order statistics, so the whole fleet is
+    processed in a few array passes instead of per-window Python loops.
+
+    Args:
+        frame: Input frame
+        window: Window width in seconds; a multiple of ``frame.step``
+        stats: Any of min, max, mean, sum, count, last and pNN
+            (percentile, e.g. p95 or p99.9)
+
+    Returns:
+        One SeriesFrame per statistic, with ``step == window``
+    """
+    stats = tuple(stats)
+    per_window = int(round(window / frame.step))
+    if per_window < 1 or abs(per_window * frame.step - window) > 1e-9 * window:
+        raise ValueError("window must be a positive multiple of the frame step")
+
+    hosts, slots = frame.values.shape
+    windows = -(-slots // per_window)
+    padded = frame.values
+    if windows * per_window != slots:
+        padded = np.full((hosts, windows * per_window), np.nan, dtype=frame.values.dtype)
+        padded[:, :slots] = frame.values
+    cube = padded.reshape(hosts, windows, per_window)
+
+    quantiles = {}
+    for stat in stats:
+        if stat.startswith('p'):
+            quantiles[stat] = float(stat[1:]) / 100
+            if not 0 <= quantiles[stat] <= 1:
+                raise ValueError(f"Invalid percentile {stat}")
+        elif stat not in ('min', 'max', 'mean', 'sum', 'count', 'last'):
+            raise ValueError(f"Unknown statistic {stat}")
+
+    out = {stat: np.empty((hosts, windows), dtype=np.float64) for stat in stats}
+    for first in range(0, hosts, CHUNK_ROWS):
+        chunk = cube[first:first + CHUNK_ROWS]
+        rows = slice(first, first + CHUNK_ROWS)
+        present = ~np.isnan(chunk)
+        counts = present.sum(axis=-1)
+        empty = counts == 0
+        totals = np.where(present, chunk, 0).sum(axis=-1, dtype=np.float64)
+
+        for stat in stats:
+            if stat == 'count':
+                out[stat][rows] = counts
+            elif stat == 'sum':
+                out[stat][rows] = np.where(empty, np.nan, totals)
+            elif stat == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    out[stat][rows] = totals / counts
+            elif stat == 'min':
+                out[stat][rows] = np.where(empty, np.nan, np.where(present, chunk, np.inf).min(axis=-1))
+            elif stat == 'max':
+                out[stat][rows] = np.where(empty, np.nan, np.where(present, chunk, -np.inf).max(axis=-1))
+            elif stat == 'last':
+                last_index = per_window - 1 - np.argmax(present[..., ::-1], axis=-1)
+                last = np.take_along_axis(chunk, last_index[..., None], axis=-1)[..., 0]
+                out[stat][rows] = np.where(empty, np.nan, last)
+
+        if quantiles:
+            ordered = np.sort(chunk, axis=-1)
+            for stat, value in zip(quantiles, _window_percentiles(ordered, counts, list(quantiles.values()))):
+                out[stat][rows] = value
+
+    return {stat: SeriesFrame(frame.hosts, frame.start, window, values) for stat, values in out.items()}
+
+
+def group_by(frame: SeriesFrame, groups: Mapping[str, str], stat: str = 'mean') -> SeriesFrame:
+    """
+    Combine host rows into groups (e.g. by role or datacenter).
+
+    Args:
+        frame: Input frame
+        groups: Group name of each host; hosts not listed are left out
+        stat: mean, sum, min, max or count of the hosts' values per slot
+
+    Returns:
+        SeriesFrame with one row per group, in sorted group order
+    """
+    rows = [index for index, host in enumerate(frame.hosts) if host in groups]
+    labels = np.array([groups[frame.hosts[index]] for index in rows])
+    names, inverse = np.unique(labels, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    values = frame.values[rows][order]
+    boundaries = np.searchsorted(inverse[order], np.arange(len(names)))
+
+    present = ~np.isnan(values)
+    counts = np.add.reduceat(present, boundaries, axis=0)
+    if stat == 'count':
+        result = counts.astype(np.float64)
+    elif stat in ('sum', 'mean'):
+        totals = np.add.reduceat(np.where(present, values, 0), boundaries, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = totals / counts if stat == 'mean' else np.where(counts > 0, totals, np.nan)
+    elif stat == 'min':
+        result = np.fmin.reduceat(values, boundaries, axis=0)
+    elif stat == 'max':
+        result = np.fmax.reduceat(values, boundaries, axis=0)
+    else:
+        raise ValueError(f"Unknown statistic {stat}")
+
+    return SeriesFrame(tuple(str(name) for name in names), frame.start, frame.step, result)
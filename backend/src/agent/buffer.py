@@ -0,0 +1,347 @@
+"""Bounded local buffer for metric payloads with disk spill."""
+import logging
+import mmap
+import os
+import struct
+import zlib
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+
+# Record framing in a segment file: payload length and CRC32 of the payload
+RECORD_HEADER = struct.Struct('<II')
+# Read cursor: segment id and byte offset of the next unread record
+CURSOR = struct.Struct('<QQ')
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.log'
+CURSOR_FILE = 'cursor'
+
+
+def _segment_name(segment_id: int) -> str:
+    return f"{SEGMENT_PREFIX}{segment_id:020d}{SEGMENT_SUFFIX}"
+
+
+def _scan_records(data, offset: int = 0) -> Tuple[int, int]:
+    """
+    Walk valid records from an offset.
+
+    Returns:
+        Tuple of (record count, offset just past the last valid record)
+    """
+    count = 0
+    size = len(data)
+    while offset + RECORD_HEADER.size <= size:
+        length, crc = RECORD_HEADER.unpack_from(data, offset)
+        end = offset + RECORD_HEADER.size + length
+        if end > size or zlib.crc32(data[offset + RECORD_HEADER.size:end]) != crc:
+            break
+        offset = end
+        count += 1
+    return count, offset
+
+
+class SpillLog:
+    """
+    Append-only, segmented on-disk log of payloads.
+
+    Records are appended to the newest segment file and read back through
+    read-only memory maps. The read position is kept in a small cursor
+    file replaced atomically on every acknowledgement, so after a crash
+    the log resumes at the last acknowledged record; a torn record at the
+    tail of the newest segment is truncated on open. Fully consumed
+    segments are deleted, and when the log exceeds ``max_bytes`` the
+    oldest segments are dropped.
+    """
+
+    def __init__(self, directory: str, segment_size: int = 16 * 1024 * 1024,
+                 max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.dropped = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._segments: Deque[int] = deque(sorted(
+            int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        ))
+        self._sizes = {segment_id: os.path.getsize(self._path(segment_id)) for segment_id in self._segments}
+        self._read_segment, self._read_offset = self._load_cursor()
+        self._writer = None
+        self.count = 0
+        self._recover()
+
+    def _path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, _segment_name(segment_id))
+
+    def _load_cursor(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE), 'rb') as f:
+                return CURSOR.unpack(f.read(CURSOR.size))
+        except (OSError, struct.error):
+            return (self._segments[0] if self._segments else 0), 0
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, CURSOR_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(CURSOR.pack(self._read_segment, self._read_offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _recover(self):
+        """Drop consumed segments, truncate a torn tail and count pending records."""
+        while self._segments and self._segments[0] < self._read_segment:
+            self._remove_oldest()
+        if self._segments and self._segments[0] > self._read_segment:
+            self._read_segment, self._read_offset = self._segments[0], 0
+
+        for segment_id in list(self._segments):
+            start = self._read_offset if segment_id == self._read_segment else 0
+            with open(self._path(segment_id), 'rb') as f:
+                data = f.read()
+            count, end = _scan_records(data, start)
+            self.count += count
+            if end < len(data):
+                logging.warning(f"Truncating torn spill segment {segment_id} at {end}")
+                with open(self._path(segment_id), 'r+b') as f:
+                    f.truncate(end)
+                self._sizes[segment_id] = end
+
+    def _remove_oldest(self):
+        segment_id = self._segments.popleft()
+        self._sizes.pop(segment_id, None)
+        if self._writer is not None and self._writer[0] == segment_id:
+            self._writer[1].close()
+            self._writer = None
+        try:
+            os.remove(self._path(segment_id))
+        except FileNotFoundError:
+            pass
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def append_many(self, payloads: List[bytes]):
+        """Append payloads to the newest segment, rotating when it is full."""
+        if not payloads:
+            return
+
+        if not self._segments or self._sizes[self._segments[-1]] >= self.segment_size:
+            segment_id = self._segments[-1] + 1 if self._segments else self._read_segment
+            self._segments.append(segment_id)
+            self._sizes[segment_id] = 0
+            if self._writer is not None:
+                self._writer[1].close()
+            self._writer = None
+
+        segment_id = self._segments[-1]
+        if self._writer is None or self._writer[0] != segment_id:
+            self._writer = (segment_id, open(self._path(segment_id), 'ab'))
+
+        chunk = b''.join(
+            RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+            for payload in payloads
+        )
+        writer = self._writer[1]
+        writer.write(chunk)
+        writer.flush()
+        self._sizes[segment_id] += len(chunk)
+        self.count += len(payloads)
+
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        """Drop the oldest segments while over the size limit."""
+        while len(self._segments) > 1 and self.size_bytes > self.max_bytes:
+            segment_id = self._segments[0]
+            with open(self._path(segment_id), 'rb') as f:
+                data = f.read()
+            start = self._read_offset if segment_id == self._read_segment else 0
+            lost, _ = _scan_records(data, start)
+            self._remove_oldest()
+            self.count -= lost
+            self.dropped += lost
+            self._read_segment, self._read_offset = self._segments[0], 0
+            self._save_cursor()
+            logging.warning(f"Spill log over {self.max_bytes} bytes, dropped {lost} oldest payloads")
+
+    def read(self, max_items: int) -> List[bytes]:
+        """Return up to max_items unacknowledged payloads, oldest first."""
+        items: List[bytes] = []
+        segment_id, offset = self._read_segment, self._read_offset
+
+        for current in self._segments:
+            if current < segment_id or len(items) >= max_items:
+                continue
+            if self._sizes[current] <= offset:
+                offset = 0
+                continue
+            with open(self._path(current), 'rb') as f, \
+                    mmap.mmap(f.fileno(), self._sizes[current], access=mmap.ACCESS_READ) as data:
+                while len(items) < max_items and offset + RECORD_HEADER.size <= len(data):
+                    length, _ = RECORD_HEADER.unpack_from(data, offset)
+                    start = offset + RECORD_HEADER.size
+                    items.append(data[start:start + length])
+                    offset = start + length
+            offset = 0
+
+        return items
+
+    def ack(self, count: int):
+        """Advance the read cursor past count payloads and persist it."""
+        remaining = min(count, self.count)
+        if remaining <= 0:
+            return
+        self.count -= remaining
+
+        while remaining > 0 and self._segments:
+            size = self._sizes[self._read_segment]
+            offset = self._read_offset
+            if offset < size:
+                with open(self._path(self._read_segment), 'rb') as f, \
+                        mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+                    while remaining > 0 and offset < size:
+                        length, _ = RECORD_HEADER.unpack_from(data, offset)
+                        offset += RECORD_HEADER.size + length
+                        remaining -= 1
+            self._read_offset = offset
+
+            # Move on to the next segment once this one is fully consumed
+            if offset >= size and len(self._segments) > 1:
+                self._remove_oldest()
+                self._read_segment, self._read_offset = self._segments[0], 0
+
+        if self.count == 0 and self._segments:
+            # Everything consumed: drop the last segment too and start fresh
+            next_segment = self._segments[-1] + 1
+            while self._segments:
+                self._remove_oldest()
+            self._read_segment, self._read_offset = next_segment, 0
+
+        self._save_cursor()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer[1].close()
+            self._writer = None
+
+
+class MetricBuffer:
+    """
+    Bounded FIFO of serialized snapshots with an on-disk overflow.
+
+    Up to ``capacity`` payloads are kept in an in-memory ring. When it is
+    full, the oldest half of the ring is spilled to a :class:`SpillLog` in
+    one append, so memory stays bounded during long sink outages. Payloads
+    are replayed oldest first: spilled payloads before in-memory ones.
+    Consumers read a batch with :meth:`peek` and remove it with :meth:`ack`
+    only after it was delivered. ``on_drop`` is called whenever payloads
+    are discarded unsent (memory ring or spill log over its limit).
+
+    Payloads are numbered in order; :attr:`head` is the number of the
+    oldest pending one and advances on every ack or drop. Passing the
+    ``head`` seen at peek time to :meth:`ack` keeps an ack that races
+    with a drop from removing payloads that were never sent.
+    """
+
+    def __init__(self, capacity: int, spill_dir: Optional[str] = None,
+                 segment_size: int = 16 * 1024 * 1024, max_spill_bytes: int = 1024 * 1024 * 1024,
+                 on_drop: Optional[Callable[[], None]] = None):
+        self.capacity = capacity
+        self._memory: Deque[bytes] = deque()
+        self._spill = SpillLog(spill_dir, segment_size, max_spill_bytes) if spill_dir else None
+        self.dropped = 0
+        self.on_drop = on_drop
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self._memory) + (self._spill.count if self._spill else 0)
+
+    def append(self, payload: bytes):
+        """Add a payload, spilling or dropping the oldest ones when full."""
+        if len(self._memory) >= self.capacity:
+            if self._spill is not None:
+                spill_count = max(1, self.capacity // 2)
+                lost = self._spill.dropped
+                self._spill.append_many([self._memory.popleft() for _ in range(spill_count)])
+                lost = self._spill.dropped - lost
+                self.head += lost
+                if lost and self.on_drop is not None:
+                    self.on_drop()
+            else:
+                self._memory.popleft()
+                self.dropped += 1
+                self.head += 1
+                if self.on_drop is not None:
+                    self.on_drop()
+        self._memory.append(payload)
+
+    def peek(self, max_items: int) -> List[bytes]:
+        """Return up to max_items of the oldest payloads without removing them."""
+        items: List[bytes] = []
+        if self._spill is not None and self._spill.count:
+            items = self._spill.read(max_items)
+        for payload in self._memory:
+            if len(items) >= max_items:
+                break
+            items.append(payload)
+        return items
+
+    def ack(self, count: int, head: Optional[int] = None):
+        """
+        Remove delivered payloads.
+
+        Args:
+            count: Number of payloads delivered, oldest first
+            head: :attr:`head` when they were read with :meth:`peek`;
+                those dropped since then are not removed a second time
+        """
+        if head is not None:
+            count -= self.head - head
+        count = min(count, len(self))
+        if count <= 0:
+            return
+        self.head += count
+
+        if self._spill is not None and self._spill.count:
+            spilled = min(count, self._spill.count)
+            self._spill.ack(spilled)
+            count -= spilled
+        for _ in range(min(count, len(self._memory))):
+            self._memory.popleft()
+
+    def stats(self):
+        """Return buffer counters for the metrics payload."""
+        return {
+            "memory": len(self._memory),
+            "spilled": self._spill.count if self._spill else 0,
+            "spill_bytes": self._spill.size_bytes if self._spill else 0,
+            "dropped": self.dropped + (self._spill.dropped if self._spill else 0),
+        }
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+
+
+def create_buffer(config) -> MetricBuffer:
+    """
+    Create the payload buffer described by the configuration.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        MetricBuffer instance
+    """
+    return MetricBuffer(
+        capacity=config['buffer_size'],
+        spill_dir=config.get('spill_dir'),
+        segment_size=config.get('spill_segment_size', 16 * 1024 * 1024),
+        max_spill_bytes=config.get('spill_max_bytes', 1024 * 1024 * 1024),
+    )
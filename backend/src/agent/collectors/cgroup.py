@@ -0,0 +1,392 @@
+"""cgroup v2 collector: CPU, memory and I/O usage per cgroup (container)."""
+import heapq
+import os
+import threading
+import time
+from operator import attrgetter
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..rates import counter_delta
+from .procfs import _find_value
+
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# Seconds between full rescans, which re-list every directory and retry
+# files that were missing (a controller enabled after the cgroup was seen)
+RESCAN_INTERVAL = 300.0
+
+# Bits of _Cgroup.missing: files a cgroup does not have (controller not
+# enabled for it), not retried until the next full rescan
+_CPU = 1
+_IO = 2
+_MEMORY = 4
+
+_IO_INDEX = {b'rbytes': 0, b'wbytes': 1, b'rios': 2, b'wios': 3}
+
+_READ_SIZE = 65536
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0)
+
+
+def _read(path: str) -> Optional[bytes]:
+    """Contents of a cgroup file, or None if it cannot be read."""
+    try:
+        fd = os.open(path, _OPEN_FLAGS)
+    except OSError:
+        return None
+    try:
+        data = os.read(fd, _READ_SIZE)
+        if len(data) == _READ_SIZE:
+            chunks = [data]
+            while data:
+                data = os.read(fd, _READ_SIZE)
+                chunks.append(data)
+            data = b''.join(chunks)
+        return data
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def _io_counters(data: bytes) -> Tuple[int, int, int, int]:
+    """Read/write bytes and operations of io.stat, summed over devices."""
+    totals = [0, 0, 0, 0]
+    for line in data.split(b'\n'):
+        for item in line.split()[1:]:
+            key, _, value = item.partition(b'=')
+            index = _IO_INDEX.get(key)
+            if index is not None:
+                totals[index] += int(value)
+    return tuple(totals)
+
+
+def _rate(previous: int, current: int, interval: float) -> float:
+    """Per-second increase of a counter, as ``calculate_iops`` computes it."""
+    return max(0.0, (counter_delta(previous, current) or 0) / interval)
+
+
+class _Cgroup:
+    """Cached state of one cgroup directory."""
+
+    __slots__ = (
+        'path', 'inode', 'signature', 'children', 'missing', 'sampled_at',
+        'cpu', 'cpu_percent', 'throttled_percent',
+        'io', 'read_bytes_per_sec', 'write_bytes_per_sec', 'read_iops', 'write_iops',
+        'memory_current', 'memory_anon', 'memory_file',
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inode = None
+        self.reset()
+
+    def reset(self):
+        """Forget everything known about the directory (new or recreated)."""
+        self.signature = None
+        self.children: Dict[str, '_Cgroup'] = {}
+        self.missing = 0
+        self.sampled_at = None
+        self.cpu = None
+        self.cpu_percent = self.throttled_percent = 0.0
+        self.io = None
+        self.read_bytes_per_sec = self.write_bytes_per_sec = 0.0
+        self.read_iops = self.write_iops = 0.0
+        self.memory_current = self.memory_anon = self.memory_file = None
+
+    @property
+    def io_bytes_per_sec(self) -> float:
+        return self.read_bytes_per_sec + self.write_bytes_per_sec
+
+
+class CgroupTree:
+    """
+    Cached cgroup v2 hierarchy with the last counters of every cgroup.
+
+    The directory tree is kept between scans. Each scan stats every known
+    directory, but lists a directory's children again only when its
+    mtime or link count changed, i.e. when cgroups were added or removed
+    under it; a directory whose inode changed was removed and recreated
+    under the same name and starts over.
+
+    Counter files are read only where they can have changed. ``cpu.stat``
+    and ``io.stat`` are hierarchical and monotonic, so when a cgroup's
+    counters did not move since the last scan, none of its descendants'
+    did either and their files are not read (an idle slice with thousands
+    of cgroups costs one read per file). ``memory.current`` is hierarchical
+    too, though not monotonic: a subtree is read again when its parent's
+    changed, which misses only changes of children that cancel out exactly
+    until the next change or full rescan. ``memory.stat`` is read only
+    when ``memory.current`` changed. Rates are computed from the monotonic time
+    between scans with :func:`~agent.rates.counter_delta`, as
+    :func:`~agent.collectors.disk.calculate_iops` does: 0 for a cgroup
+    seen for the first time and after a counter reset.
+
+    Every ``rescan_interval`` seconds all directories are listed again,
+    files found missing are retried and every ``memory.current`` is read,
+    in case a change went unnoticed.
+
+    Args:
+        root: Mount point of the cgroup v2 hierarchy
+        rescan_interval: Seconds between full rescans
+    """
+
+    def __init__(self, root: str = CGROUP_ROOT, rescan_interval: float = RESCAN_INTERVAL):
+        self.root = root
+        self.rescan_interval = rescan_interval
+        self.count = 0
+        self.listed = 0
+        self.read = 0
+        self._tree = _Cgroup('')
+        self._rescanned_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _file(self, node: _Cgroup, name: str) -> Optional[bytes]:
+        self.read += 1
+        return _read(f"{self.root}{node.path}/{name}")
+
+    def _refresh(self, node: _Cgroup, full: bool) -> bool:
+        """Update a directory's children if they changed; False if it is gone."""
+        directory = self.root + node.path
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return False
+
+        if stat.st_ino != node.inode:
+            node.inode = stat.st_ino
+            node.reset()
+        elif full:
+            node.missing = 0
+
+        signature = (stat.st_mtime_ns, stat.st_nlink)
+        if full or signature != node.signature:
+            try:
+                with os.scandir(directory) as entries:
+                    names = [entry.name for entry in entries if entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                return False
+            self.listed += 1
+            children = node.children
+            node.children = {name: children.get(name) or _Cgroup(f"{node.path}/{name}") for name in names}
+            node.signature = signature
+        return True
+
+    def _read_cpu(self, node: _Cgroup, due: bool, interval: float) -> bool:
+        """Update CPU usage; True if the descendants must be read too."""
+        node.cpu_percent = node.throttled_percent = 0.0
+        if not due and node.cpu is not None:
+            return False
+        if node.missing & _CPU:
+            return True
+        data = self._file(node, 'cpu.stat')
+        if data is None:
+            node.missing |= _CPU
+            node.cpu = None
+            return True
+
+        counters = (_find_value(data, b'usage_usec'), _find_value(data, b'throttled_usec'))
+        previous, node.cpu = node.cpu, counters
+        if counters == previous:
+            return False
+        if previous is not None and interval > 0:
+            # Microseconds per second to percent of one core
+            node.cpu_percent = _rate(previous[0], counters[0], interval) / 1e4
+            node.throttled_percent = _rate(previous[1], counters[1], interval) / 1e4
+        return True
+
+    def _read_io(self, node: _Cgroup, due: bool, interval: float) -> bool:
+        """Update I/O rates; True if the descendants must be read too."""
+        node.read_bytes_per_sec = node.write_bytes_per_sec = 0.0
+        node.read_iops = node.write_iops = 0.0
+        if not due and node.io is not None:
+            return False
+        if node.missing & _IO:
+            return True
+        data = self._file(node, 'io.stat')
+        if data is None:
+            node.missing |= _IO
+            node.io = None
+            return True
+
+        counters = _io_counters(data)
+        previous, node.io = node.io, counters
+        if counters == previous:
+            return False
+        if previous is not None and interval > 0:
+            node.read_bytes_per_sec = _rate(previous[0], counters[0], interval)
+            node.write_bytes_per_sec = _rate(previous[1], counters[1], interval)
+            node.read_iops = _rate(previous[2], counters[2], interval)
+            node.write_iops = _rate(previous[3], counters[3], interval)
+        return True
+
+    def _read_memory(self, node: _Cgroup, due: bool) -> bool:
+        """Update memory usage; True if the descendants must be read too."""
+        if not due and node.memory_current is not None:
+            return False
+        if node.missing & _MEMORY:
+            return True
+        data = self._file(node, 'memory.current')
+        if data is None:
+            node.missing |= _MEMORY
+            node.memory_current = node.memory_anon = node.memory_file = None
+            return True
+
+        current = int(data)
+        if current == node.memory_current:
+            return False
+        node.memory_current = current
+        stat = self._file(node, 'memory.stat')
+        if stat is not None:
+            node.memory_anon = _find_value(stat, b'anon')
+            node.memory_file = _find_value(stat, b'file')
+        return True
+
+    def scan(self, now: Optional[float] = None) -> List[_Cgroup]:
+        """
+        Refresh the tree and the counters of every cgroup that changed.
+
+        Args:
+            now: Monotonic time of the scan; now if omitted
+
+        Returns:
+            The leaf cgroups, where processes (containers, services) live
+        """
+        with self._lock:
+            if now is None:
+                now = time.monotonic()
+            full = self._rescanned_at is None or now - self._rescanned_at >= self.rescan_interval
+            if full:
+                self._rescanned_at = now
+            self.listed = self.read = 0
+
+            leaves = []
+            count = 0
+            stack = [(self._tree, True, True, True)]
+            while stack:
+                node, cpu_due, io_due, memory_due = stack.pop()
+                if not self._refresh(node, full):
+                    # Removed; dropped when its parent is listed again
+                    continue
+
+                interval = now - node.sampled_at if node.sampled_at is not None else 0.0
+                cpu_changed = self._read_cpu(node, cpu_due, interval)
+                io_changed = self._read_io(node, io_due, interval)
+                memory_changed = self._read_memory(node, memory_due or full)
+                node.sampled_at = now
+                count += 1
+
+                if node.children:
+                    due = (cpu_changed, io_changed, memory_changed)
+                    stack.extend((child, *due) for child in node.children.values())
+                elif node is not self._tree:
+                    leaves.append(node)
+
+            # The root cgroup is not counted
+            self.count = count - 1
+            return leaves
+
+    def memory_limit(self, node: _Cgroup) -> Optional[int]:
+        """memory.max of a cgroup in bytes, None if unlimited or unknown."""
+        data = self._file(node, 'memory.max')
+        if data is None or data.startswith(b'max'):
+            return None
+        return int(data)
+
+    def usage(self, node: _Cgroup) -> Dict[str, Any]:
+        """Return the usage entry of one cgroup for the metrics payload."""
+        return {
+            "path": node.path,
+            "cpu_percent": round(node.cpu_percent, 1),
+            "throttled_percent": round(node.throttled_percent, 1),
+            "memory_current": node.memory_current,
+            "memory_anon": node.memory_anon,
+            "memory_file": node.memory_file,
+            "memory_limit": self.memory_limit(node) if node.memory_current is not None else None,
+            "read_bytes_per_sec": node.read_bytes_per_sec,
+            "write_bytes_per_sec": node.write_bytes_per_sec,
+            "read_iops": node.read_iops,
+            "write_iops": node.write_iops,
+        }
+
+
+_trees: Dict[str, CgroupTree] = {}
+_trees_lock = threading.Lock()
+
+
+def get_cgroup_tree(root: str = CGROUP_ROOT) -> Optional[CgroupTree]:
+    """
+    Return the shared tree of a cgroup v2 mount point.
+
+    Args:
+        root: Mount point of the cgroup hierarchy
+
+    Returns:
+        CgroupTree instance, or None if ``root`` is not a cgroup v2
+        hierarchy (no ``cgroup.controllers`` file)
+    """
+    tree = _trees.get(root)
+    if tree is None:
+        if not os.path.exists(os.path.join(root, 'cgroup.controllers')):
+            return None
+        with _trees_lock:
+            tree = _trees.setdefault(root, CgroupTree(root))
+    return tree
+
+
+def _memory_key(node: _Cgroup) -> int:
+    return node.memory_current or 0
+
+
+def collect_cgroup_metrics(
+    limit: int = 5,
+    root: str = CGROUP_ROOT,
+    rescan_interval: float = RESCAN_INTERVAL,
+) -> Optional[Dict[str, Any]]:
+    """
+    Collect the top cgroups (containers) by CPU, memory and I/O.
+
+    The shared :class:`CgroupTree` of ``root`` is reused across calls, so
+    rates reflect the time since the previous collection and unchanged
+    parts of the hierarchy are not read again. Only leaf cgroups are
+    ranked: in cgroup v2 processes live only in leaves, and every parent's
+    usage is the sum of its children's.
+
+    Args:
+        limit: Number of cgroups in each top list
+        root: Mount point of the cgroup v2 hierarchy
+        rescan_interval: Seconds between full rescans of the hierarchy
+
+    Returns:
+        Dictionary containing the cgroup count, the top lists and scan
+        statistics, or None if ``root`` is not a cgroup v2 hierarchy
+    """
+    tree = get_cgroup_tree(root)
+    if tree is None:
+        return None
+    tree.rescan_interval = rescan_interval
+
+    start = time.monotonic()
+    leaves = tree.scan()
+    top = {
+        "top_cpu": heapq.nlargest(limit, leaves, key=attrgetter('cpu_percent')),
+        "top_memory": heapq.nlargest(limit, leaves, key=_memory_key),
+        "top_io": heapq.nlargest(limit, leaves, key=attrgetter('io_bytes_per_sec')),
+    }
+
+    # A cgroup in several lists is described once
+    usages = {}
+    for nodes in top.values():
+        for node in nodes:
+            if node.path not in usages:
+                usages[node.path] = tree.usage(node)
+
+    metrics = {"count": tree.count}
+    for key, nodes in top.items():
+        metrics[key] = [usages[node.path] for node in nodes]
+    metrics["scan"] = {
+        "listed": tree.listed,
+        "read": tree.read,
+        "duration_ms": round((time.monotonic() - start) * 1000, 3),
+    }
+    return metrics
@@ -1,27 +1,161 @@
 """CPU metrics collector."""
 import psutil
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Sequence
 
+from .procfs import ProcFS, get_procfs
+from .process import ProcessTable, scan_processes
+from ..inventory import get_inventory
 
-def collect_cpu_metrics() -> Dict[str, Any]:
+
+def _total_time(times) -> float:
+    """
+    Total CPU time of a ``cpu_times`` tuple, idle time included.
+
+    On Linux guest time is already accounted in user/nice, so it is
+    subtracted the same way psutil does.
+    """
+    total = sum(times)
+    total -= getattr(times, 'guest', 0) or 0
+    total -= getattr(times, 'guest_nice', 0) or 0
+    return total
+
+
+def _percent(part: float, total: float) -> float:
+    """Return part/total as a percentage clamped to 0-100."""
+    if total <= 0:
+        return 0.0
+    return round(min(100.0, max(0.0, part / total * 100)), 1)
+
+
+def _utilisation(previous, current) -> Dict[str, float]:
+    """
+    Compute utilisation between two ``cpu_times`` tuples.
+
+    Args:
+        previous: Earlier snapshot, or None to measure since boot
+        current: Later snapshot
+
+    Returns:
+        Dictionary with busy percent and user/system/idle/iowait breakdown
+    """
+    def delta(field: str) -> float:
+        value = getattr(current, field, 0) or 0
+        if previous is not None:
+            value -= getattr(previous, field, 0) or 0
+        return max(0.0, value)
+
+    total = _total_time(current)
+    if previous is not None:
+        total -= _total_time(previous)
+
+    idle = delta('idle')
+    iowait = delta('iowait')
+
+    return {
+        "busy": _percent(total - idle - iowait, total),
+        "user": _percent(delta('user'), total),
+        "system": _percent(delta('system'), total),
+        "idle": _percent(idle, total),
+        "iowait": _percent(iowait, total) if hasattr(current, 'iowait') else None,
+    }
+
+
+class CpuSampler:
+    """
+    Stateful CPU sampler computing utilisation from ``cpu_times`` deltas.
+
+    The previous overall and per-core snapshots are kept between ticks, so
+    a sample never sleeps: utilisation covers the time since the previous
+    call. The very first sample is measured against boot.
+    """
+
+    def __init__(self):
+        self._previous = None
+        self._previous_per_core: Sequence = ()
+
+    def sample(self, procfs: Optional[ProcFS] = None) -> Dict[str, Any]:
+        """
+        Read current CPU times and compute utilisation since the last call.
+
+        Args:
+            procfs: Read overall and per-core times from /proc/stat in one
+                pass; psutil (two reads) if omitted
+
+        Returns:
+            Dictionary with overall/per-core percent, percent breakdown
+            and the raw overall times
+        """
+        if procfs is not None:
+            return self.update(*procfs.cpu_times())
+        return self.update(psutil.cpu_times(), psutil.cpu_times(percpu=True))
+
+    def update(self, times, per_core_times: Sequence) -> Dict[str, Any]:
+        """
+        Feed externally read CPU times into the sampler.
+
+        Args:
+            times: Overall ``cpu_times`` tuple
+            per_core_times: Sequence of per-core ``cpu_times`` tuples
+
+        Returns:
+            Same dictionary as :meth:`sample`
+        """
+        overall = _utilisation(self._previous, times)
+
+        per_core = []
+        for index, core_times in enumerate(per_core_times):
+            # Cores that appeared since the last tick are measured since boot
+            previous: Optional[Any] = None
+            if index < len(self._previous_per_core):
+                previous = self._previous_per_core[index]
+            per_core.append(_utilisation(previous, core_times)["busy"])
+
+        self._previous = times
+        self._previous_per_core = per_core_times
+
+        return {
+            "overall_percent": overall.pop("busy"),
+            "per_core_percent": per_core,
+            "times_percent": overall,
+            "times": times,
+        }
+
+
+_sampler = CpuSampler()
+
+
+def collect_cpu_metrics(include_static: bool = True, backend: str = 'auto') -> Dict[str, Any]:
     """
     Collect CPU metrics including overall usage, per-core usage, and load averages.
 
+    Usage is computed from the delta to the previous call, so this never
+    blocks waiting for a measurement window. Core counts and frequency
+    limits come from the cached host inventory.
+
+    Args:
+        include_static: Include core counts and frequency limits
+        backend: ``auto``/``procfs`` to read /proc directly on Linux,
+            ``psutil`` to always use psutil
+
     Returns:
         Dictionary containing CPU metrics
     """
-    # Overall CPU usage
-    cpu_percent = psutil.cpu_percent(interval=1, percpu=False)
+    procfs = get_procfs(backend)
+    sample = _sampler.sample(procfs)
 
-    # Per-core CPU usage
-    cpu_percent_per_core = psutil.cpu_percent(interval=0, percpu=True)
+    # Overall and per-core CPU usage since the previous collection
+    cpu_percent = sample["overall_percent"]
+    cpu_percent_per_core = sample["per_core_percent"]
 
     # CPU times (user, system, idle, iowait)
-    cpu_times = psutil.cpu_times()
+    cpu_times = sample["times"]
 
     # Load average (Linux/macOS only)
     try:
-        load_avg_1, load_avg_5, load_avg_15 = psutil.getloadavg()
+        if procfs is not None:
+            load_avg_1, load_avg_5, load_avg_15 = procfs.loadavg()
+        else:
+            load_avg_1, load_avg_5, load_avg_15 = psutil.getloadavg()
     except (AttributeError, OSError):
         # Windows doesn't support getloadavg
         load_avg_1 = load_avg_5 = load_avg_15 = None
@@ -30,16 +164,10 @@ def collect_cpu_metrics() -> Dict[str, Any]:
     try:
         cpu_freq = psutil.cpu_freq()
         freq_current = cpu_freq.current if cpu_freq else None
-        freq_min = cpu_freq.min if cpu_freq else None
-        freq_max = cpu_freq.max if cpu_freq else None
     except (AttributeError, RuntimeError):
-        freq_current = freq_min = freq_max = None
-
-    # CPU count
-    cpu_count_logical = psutil.cpu_count(logical=True)
-    cpu_count_physical = psutil.cpu_count(logical=False)
+        freq_current = None
 
-    return {
+    metrics = {
         "overall_percent": cpu_percent,
         "per_core_percent": cpu_percent_per_core,
         "times": {
@@ -48,6 +176,7 @@ def collect_cpu_metrics() -> Dict[str, Any]:
             "idle": cpu_times.idle,
             "iowait": getattr(cpu_times, 'iowait', None),
         },
+        "times_percent": sample["times_percent"],
         "load_average": {
             "1min": load_avg_1,
             "5min": load_avg_5,
@@ -55,39 +184,36 @@ def collect_cpu_metrics() -> Dict[str, Any]:
         },
         "frequency": {
             "current": freq_current,
-            "min": freq_min,
-            "max": freq_max,
         },
-        "count": {
-            "logical": cpu_count_logical,
-            "physical": cpu_count_physical,
-        }
     }
 
+    if include_static:
+        inventory = get_inventory()
+        metrics["frequency"].update(inventory.cpu_frequency_limits)
+        metrics["count"] = dict(inventory.cpu_count)
+
+    return metrics
 
-def get_top_cpu_processes(limit: int = 5) -> List[Dict[str, Any]]:
+
+def get_top_cpu_processes(limit: int = 5, table: Optional[ProcessTable] = None) -> List[Dict[str, Any]]:
     """
     Get top N processes by CPU usage.
 
     Args:
         limit: Number of processes to return
+        table: Shared process table snapshot; scanned on demand if omitted
 
     Returns:
         List of dictionaries containing process information
     """
-    processes = []
-
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
-        try:
-            pinfo = proc.info
-            processes.append({
-                "pid": pinfo['pid'],
-                "name": pinfo['name'],
-                "cpu_percent": pinfo['cpu_percent'] or 0,
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-
-    # Sort by CPU usage and return top N
-    processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
-    return processes[:limit]
+    if table is None:
+        table = scan_processes()
+
+    return [
+        {
+            "pid": proc["pid"],
+            "name": proc["name"],
+            "cpu_percent": proc["cpu_percent"],
+        }
+        for proc in table.top("cpu_percent", limit)
+    ]
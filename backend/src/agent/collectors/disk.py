@@ -1,34 +1,13 @@
 """Disk metrics collector."""
 import psutil
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
+from .procfs import get_procfs
+from ..rates import counter_delta
 
-def collect_disk_metrics() -> Dict[str, Any]:
-    """
-    Collect disk metrics including usage and I/O statistics.
-
-    Returns:
-        Dictionary containing disk metrics
-    """
-    # Disk partitions and usage
-    partitions = []
-    for partition in psutil.disk_partitions(all=False):
-        try:
-            usage = psutil.disk_usage(partition.mountpoint)
-            partitions.append({
-                "device": partition.device,
-                "mountpoint": partition.mountpoint,
-                "fstype": partition.fstype,
-                "opts": partition.opts,
-                "total": usage.total,
-                "used": usage.used,
-                "free": usage.free,
-                "percent": usage.percent,
-            })
-        except (PermissionError, OSError):
-            # Skip partitions we can't access
-            continue
 
+def _io_counters_psutil() -> Tuple[Optional[Dict[str, int]], Optional[Dict[str, Dict[str, int]]]]:
+    """Total and per-disk I/O counters from psutil."""
     # Disk I/O statistics
     try:
         disk_io = psutil.disk_io_counters(perdisk=False)
@@ -60,6 +39,47 @@ def collect_disk_metrics() -> Dict[str, Any]:
     except (AttributeError, RuntimeError):
         per_disk_stats = None
 
+    return io_stats, per_disk_stats
+
+
+def collect_disk_metrics(backend: str = 'auto') -> Dict[str, Any]:
+    """
+    Collect disk metrics including usage and I/O statistics.
+
+    Args:
+        backend: ``auto``/``procfs`` to read the I/O counters from
+            /proc/diskstats in one pass on Linux, ``psutil`` to always use
+            psutil
+
+    Returns:
+        Dictionary containing disk metrics
+    """
+    # Disk partitions and usage
+    partitions = []
+    for partition in psutil.disk_partitions(all=False):
+        try:
+            usage = psutil.disk_usage(partition.mountpoint)
+            partitions.append({
+                "device": partition.device,
+                "mountpoint": partition.mountpoint,
+                "fstype": partition.fstype,
+                "opts": partition.opts,
+                "total": usage.total,
+                "used": usage.used,
+                "free": usage.free,
+                "percent": usage.percent,
+            })
+        except (PermissionError, OSError):
+            # Skip partitions we can't access
+            continue
+
+    # Counters last: the rate stage times them by when the collector returns
+    procfs = get_procfs(backend)
+    if procfs is not None:
+        io_stats, per_disk_stats = procfs.disk_io()
+    else:
+        io_stats, per_disk_stats = _io_counters_psutil()
+
     return {
         "partitions": partitions,
         "io_stats": io_stats,
@@ -71,6 +91,9 @@ def calculate_iops(previous_io: Dict, current_io: Dict, interval: float) -> Dict
     """
     Calculate IOPS (I/O operations per second) based on two measurements.
 
+    Operation counts that wrapped around are still counted; after a reset
+    (device re-plugged, driver reloaded) the IOPS are 0.
+
     Args:
         previous_io: Previous I/O statistics
         current_io: Current I/O statistics
@@ -82,8 +105,8 @@ def calculate_iops(previous_io: Dict, current_io: Dict, interval: float) -> Dict
     if not previous_io or not current_io or interval <= 0:
         return {"read_iops": 0, "write_iops": 0}
 
-    read_iops = (current_io["read_count"] - previous_io["read_count"]) / interval
-    write_iops = (current_io["write_count"] - previous_io["write_count"]) / interval
+    read_iops = (counter_delta(previous_io["read_count"], current_io["read_count"]) or 0) / interval
+    write_iops = (counter_delta(previous_io["write_count"], current_io["write_count"]) or 0) / interval
 
     return {
         "read_iops": max(0, read_iops),
@@ -1,15 +1,27 @@
 """Memory metrics collector."""
 import psutil
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
+from .procfs import get_procfs
+from .process import ProcessTable, scan_processes
 
-def collect_memory_metrics() -> Dict[str, Any]:
+
+def collect_memory_metrics(backend: str = 'auto') -> Dict[str, Any]:
     """
     Collect memory metrics including physical and swap memory.
 
+    Args:
+        backend: ``auto``/``procfs`` to read /proc directly on Linux,
+            ``psutil`` to always use psutil
+
     Returns:
         Dictionary containing memory metrics
     """
+    procfs = get_procfs(backend)
+    if procfs is not None:
+        physical, swap = procfs.memory()
+        return {"physical": physical, "swap": swap}
+
     # Physical memory
     virtual_mem = psutil.virtual_memory()
 
@@ -38,30 +50,26 @@ def collect_memory_metrics() -> Dict[str, Any]:
     }
 
 
-def get_memory_by_process(limit: int = 5) -> list:
+def get_memory_by_process(limit: int = 5, table: Optional[ProcessTable] = None) -> list:
     """
     Get top N processes by memory usage.
 
     Args:
         limit: Number of processes to return
+        table: Shared process table snapshot; scanned on demand if omitted
 
     Returns:
         List of dictionaries containing process memory information
     """
-    processes = []
-
-    for proc in psutil.process_iter(['pid', 'name', 'memory_info', 'memory_percent']):
-        try:
-            pinfo = proc.info
-            processes.append({
-                "pid": pinfo['pid'],
-                "name": pinfo['name'],
-                "memory_mb": pinfo['memory_info'].rss / 1024 / 1024,  # Convert to MB
-                "memory_percent": pinfo['memory_percent'],
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
+    if table is None:
+        table = scan_processes()
 
-    # Sort by memory usage and return top N
-    processes.sort(key=lambda x: x['memory_percent'], reverse=True)
-    return processes[:limit]
+    return [
+        {
+            "pid": proc["pid"],
+            "name": proc["name"],
+            "memory_mb": proc["memory_rss"] / 1024 / 1024,  # Convert to MB
+            "memory_percent": proc["memory_percent"],
+        }
+        for proc in table.top("memory_percent", limit)
+    ]
@@ -1,15 +1,113 @@
 """Network metrics collector."""
 import psutil
-from typing import Dict, Any
+import os
+from collections import Counter
+from typing import Dict, Any, Iterable, Tuple
+
+from .procfs import get_procfs
+from ..inventory import get_inventory
+from ..rates import counter_delta
+
+
+# TCP state codes as they appear in /proc/net/tcp (include/net/tcp_states.h)
+TCP_STATES = {
+    b'01': 'ESTABLISHED',
+    b'02': 'SYN_SENT',
+    b'03': 'SYN_RECV',
+    b'04': 'FIN_WAIT1',
+    b'05': 'FIN_WAIT2',
+    b'06': 'TIME_WAIT',
+    b'07': 'CLOSE',
+    b'08': 'CLOSE_WAIT',
+    b'09': 'LAST_ACK',
+    b'0A': 'LISTEN',
+    b'0B': 'CLOSING',
+    b'0C': 'SYN_RECV',  # NEW_SYN_RECV: request sockets, reported as SYN_RECV
+}
+
+TCP_STATE_NAMES = (
+    'ESTABLISHED', 'SYN_SENT', 'SYN_RECV', 'FIN_WAIT1', 'FIN_WAIT2', 'TIME_WAIT',
+    'CLOSE', 'CLOSE_WAIT', 'LAST_ACK', 'LISTEN', 'CLOSING',
+)
+
+PROC_NET = '/proc/net'
+
+
+def _socket_states(path: str) -> Iterable[bytes]:
+    """Stream the state column of a /proc/net socket table."""
+    with open(path, 'rb') as f:
+        next(f, None)  # header
+        for line in f:
+            yield line.split(None, 4)[3]
+
+
+def _count_states_proc(proc_net: str) -> Dict[str, Any]:
+    """Count inet socket states by streaming /proc/net/{tcp,tcp6,udp,udp6}."""
+    tcp = Counter()
+    for name in ('tcp', 'tcp6'):
+        path = os.path.join(proc_net, name)
+        if os.path.exists(path):
+            tcp.update(_socket_states(path))
+
+    udp = 0
+    for name in ('udp', 'udp6'):
+        path = os.path.join(proc_net, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                udp += max(0, sum(1 for _ in f) - 1)
+
+    states = dict.fromkeys(TCP_STATE_NAMES, 0)
+    for code, count in tcp.items():
+        if code in TCP_STATES:
+            states[TCP_STATES[code]] += count
+
+    return _connection_summary(states, udp)
+
+
+def _count_states_psutil() -> Dict[str, Any]:
+    """Count inet socket states from psutil in a single pass."""
+    counts = Counter(c.status for c in psutil.net_connections(kind='inet'))
+    udp = counts.pop(psutil.CONN_NONE, 0)
+
+    states = dict.fromkeys(TCP_STATE_NAMES, 0)
+    states.update(counts)
+    return _connection_summary(states, udp)
+
+
+def _connection_summary(states: Dict[str, int], udp: int) -> Dict[str, Any]:
+    """Build the connections section from a TCP state histogram."""
+    return {
+        "established": states.get('ESTABLISHED', 0),
+        "time_wait": states.get('TIME_WAIT', 0),
+        "close_wait": states.get('CLOSE_WAIT', 0),
+        "listen": states.get('LISTEN', 0),
+        "total": sum(states.values()) + udp,
+        "udp": udp,
+        "states": states,
+    }
 
 
-def collect_network_metrics() -> Dict[str, Any]:
+def count_connection_states(proc_net: str = PROC_NET) -> Dict[str, Any]:
     """
-    Collect network metrics including interface traffic and connection status.
+    Summarise inet connections by state without per-socket objects.
+
+    On Linux the kernel socket tables under ``/proc/net`` are streamed and
+    counted in a single pass; elsewhere psutil is used as a fallback.
+
+    Args:
+        proc_net: Directory holding the tcp/tcp6/udp/udp6 tables
 
     Returns:
-        Dictionary containing network metrics
+        Dictionary with the common state counts, the total, the number of
+        UDP sockets and the full TCP state histogram
     """
+    if os.path.exists(os.path.join(proc_net, 'tcp')):
+        return _count_states_proc(proc_net)
+    return _count_states_psutil()
+
+
+def _io_counters_psutil() -> Tuple[Dict[str, Dict[str, int]], Dict[str, int]]:
+    """Per-interface and total counters from psutil."""
     # Network I/O statistics per interface
     net_io = psutil.net_io_counters(pernic=True)
     interfaces = {}
@@ -39,45 +137,62 @@ def collect_network_metrics() -> Dict[str, Any]:
         "dropout": net_io_total.dropout,
     }
 
+    return interfaces, total_stats
+
+
+def collect_network_metrics(include_static: bool = True, backend: str = 'auto') -> Dict[str, Any]:
+    """
+    Collect network metrics including interface traffic and connection status.
+
+    Interface addresses come from the cached host inventory, which is
+    refreshed when the set of interfaces changes.
+
+    Args:
+        include_static: Include interface addresses
+        backend: ``auto``/``procfs`` to read the interface counters from
+            /proc/net/dev in one pass on Linux, ``psutil`` to always use
+            psutil
+
+    Returns:
+        Dictionary containing network metrics
+    """
     # Network connections
     try:
-        connections = psutil.net_connections(kind='inet')
-        connection_stats = {
-            "established": sum(1 for c in connections if c.status == 'ESTABLISHED'),
-            "time_wait": sum(1 for c in connections if c.status == 'TIME_WAIT'),
-            "close_wait": sum(1 for c in connections if c.status == 'CLOSE_WAIT'),
-            "listen": sum(1 for c in connections if c.status == 'LISTEN'),
-            "total": len(connections),
-        }
+        connection_stats = count_connection_states()
     except (psutil.AccessDenied, PermissionError):
         # Requires elevated privileges on some systems
         connection_stats = None
 
-    # Network interface addresses
-    addresses = {}
-    net_if_addrs = psutil.net_if_addrs()
-    for interface_name, addr_list in net_if_addrs.items():
-        addresses[interface_name] = []
-        for addr in addr_list:
-            addresses[interface_name].append({
-                "family": str(addr.family),
-                "address": addr.address,
-                "netmask": addr.netmask,
-                "broadcast": addr.broadcast,
-            })
+    # Counters last: the rate stage times them by when the collector returns
+    procfs = get_procfs(backend)
+    if procfs is not None:
+        interfaces, total_stats = procfs.net_io()
+    else:
+        interfaces, total_stats = _io_counters_psutil()
 
-    return {
+    metrics = {
         "interfaces": interfaces,
         "total": total_stats,
         "connections": connection_stats,
-        "addresses": addresses,
     }
 
+    # Network interface addresses
+    inventory = get_inventory()
+    inventory.maybe_refresh(interfaces=interfaces.keys())
+    if include_static:
+        metrics["addresses"] = inventory.addresses
+
+    return metrics
+
 
 def calculate_bandwidth(previous_net: Dict, current_net: Dict, interval: float) -> Dict[str, Dict[str, float]]:
     """
     Calculate bandwidth usage (bytes/s) based on two measurements.
 
+    Byte counters of 32-bit interface drivers wrap around quickly at high
+    throughput and are handled; an interface whose counters were reset
+    reports 0 for that interval.
+
     Args:
         previous_net: Previous network statistics
         current_net: Current network statistics
@@ -95,8 +210,10 @@ def calculate_bandwidth(previous_net: Dict, current_net: Dict, interval: float)
         if interface_name in previous_net:
             prev_stats = previous_net[interface_name]
 
-            bytes_sent_per_sec = (current_stats["bytes_sent"] - prev_stats["bytes_sent"]) / interval
-            bytes_recv_per_sec = (current_stats["bytes_recv"] - prev_stats["bytes_recv"]) / interval
+            bytes_sent = counter_delta(prev_stats["bytes_sent"], current_stats["bytes_sent"]) or 0
+            bytes_recv = counter_delta(prev_stats["bytes_recv"], current_stats["bytes_recv"]) or 0
+            bytes_sent_per_sec = bytes_sent / interval
+            bytes_recv_per_sec = bytes_recv / interval
 
             bandwidth[interface_name] = {
                 "bytes_sent_per_sec": max(0, bytes_sent_per_sec),
@@ -0,0 +1,223 @@
+"""Process table collector shared by process-level metrics."""
+import heapq
+import time
+from operator import itemgetter
+from typing import Dict, List, Any, Optional, Tuple
+
+import psutil
+
+from .procfs import get_procfs
+
+
+class ProcessTable:
+    """
+    Snapshot of the process table taken once per collection cycle.
+
+    All process-level consumers (top CPU, top memory, ...) select from the
+    same snapshot instead of walking ``/proc`` themselves.
+    """
+
+    def __init__(self, processes: List[Dict[str, Any]], scan_duration: float):
+        self.processes = processes
+        self.scan_duration = scan_duration
+
+    def __len__(self) -> int:
+        return len(self.processes)
+
+    def top(self, key: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Return the top N processes by a numeric field.
+
+        Uses a bounded heap, so the cost is O(n log limit) instead of a
+        full sort of the table.
+
+        Args:
+            key: Process field to rank by
+            limit: Number of processes to return
+
+        Returns:
+            List of process dictionaries, highest value first
+        """
+        return heapq.nlargest(limit, self.processes, key=itemgetter(key))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return scan statistics for the metrics payload."""
+        return {
+            "count": len(self.processes),
+            "duration_ms": round(self.scan_duration * 1000, 3),
+        }
+
+
+class _TrackedProcess:
+    """Registry entry for one live process."""
+
+    __slots__ = ('proc', 'name', 'cmdline', 'username', 'cpu_time', 'sampled_at')
+
+    def __init__(self, proc: psutil.Process):
+        self.proc = proc
+        self.name = _static(proc.name, "")
+        self.cmdline = _static(proc.cmdline, [])
+        self.username = _static(proc.username, None)
+        self.cpu_time = 0.0
+        self.sampled_at = None
+
+
+def _static(getter, default):
+    """Read a static process field once, tolerating permission errors."""
+    try:
+        return getter()
+    except (psutil.AccessDenied, KeyError):
+        return default
+
+
+class ProcessTracker:
+    """
+    Long-lived process registry keyed by (pid, start time).
+
+    ``psutil.Process`` handles and static fields (name, cmdline, username)
+    are kept across cycles, so each scan only reads the counters that
+    change. On Linux that is one read of ``/proc/<pid>/stat`` per process,
+    whose start time also tells a reused pid from the tracked process;
+    elsewhere the counters come from psutil. CPU percent is computed from
+    the CPU time delta to the previous scan; a process seen for the first
+    time reports its lifetime average instead of psutil's meaningless
+    initial 0.0. Entries of processes that exited are dropped on the next
+    scan.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[int, float], _TrackedProcess] = {}
+        self._keys: Dict[int, Tuple[int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, pid: int) -> Optional[_TrackedProcess]:
+        """Return the tracked entry for a pid unless the pid was reused (psutil path)."""
+        key = self._keys.get(pid)
+        if key is None:
+            return None
+
+        entry = self._entries[key]
+        if entry.proc.is_running():
+            return entry
+
+        self._forget(pid)
+        return None
+
+    def _forget(self, pid: int):
+        key = self._keys.pop(pid, None)
+        if key is not None:
+            del self._entries[key]
+
+    def _track(self, pid: int, started: Optional[float] = None) -> _TrackedProcess:
+        """Start tracking a new process, keyed by its start time as the scan reads it."""
+        proc = psutil.Process(pid)
+        entry = _TrackedProcess(proc)
+        key = (pid, proc.create_time() if started is None else started)
+        self._entries[key] = entry
+        self._keys[pid] = key
+        return entry
+
+    def _sample_procfs(self, procfs, pid: int) -> Tuple[_TrackedProcess, Optional[float], int]:
+        cpu_time, started, rss = procfs.process_stat(pid)
+        entry = self._entries.get((pid, started))
+        if entry is None:
+            # New process, or the pid now belongs to another one
+            self._forget(pid)
+            entry = self._track(pid, started)
+        return entry, cpu_time, rss
+
+    def _sample_psutil(self, pid: int) -> Tuple[_TrackedProcess, Optional[float], int]:
+        entry = self._lookup(pid) or self._track(pid)
+        proc = entry.proc
+        with proc.oneshot():
+            try:
+                times = proc.cpu_times()
+                return entry, times.user + times.system, proc.memory_info().rss
+            except psutil.AccessDenied:
+                return entry, None, 0
+
+    def scan(self, backend: str = 'auto') -> ProcessTable:
+        """
+        Refresh the registry and return a snapshot of all live processes.
+
+        Args:
+            backend: ``auto``/``procfs`` to read /proc/<pid>/stat directly
+                on Linux, ``psutil`` to always use psutil
+
+        Returns:
+            ProcessTable snapshot
+        """
+        start = time.monotonic()
+        procfs = get_procfs(backend)
+        total_memory = psutil.virtual_memory().total
+        processes = []
+        seen = set()
+
+        for pid in psutil.pids():
+            try:
+                if procfs is not None:
+                    entry, cpu_time, rss = self._sample_procfs(procfs, pid)
+                else:
+                    entry, cpu_time, rss = self._sample_psutil(pid)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            except psutil.AccessDenied:
+                continue
+            except OSError:
+                # Exited before /proc/<pid>/stat was read
+                continue
+
+            proc = entry.proc
+            seen.add(pid)
+            now = time.monotonic()
+            cpu_percent = 0.0
+
+            if cpu_time is not None:
+                if entry.sampled_at is None:
+                    # First sighting: average over the process lifetime
+                    lifetime = time.time() - proc.create_time()
+                    if lifetime > 0:
+                        cpu_percent = cpu_time / lifetime * 100
+                elif now > entry.sampled_at:
+                    cpu_percent = (cpu_time - entry.cpu_time) / (now - entry.sampled_at) * 100
+                entry.cpu_time = cpu_time
+                entry.sampled_at = now
+
+            processes.append({
+                "pid": pid,
+                "name": entry.name,
+                "username": entry.username,
+                "cmdline": entry.cmdline,
+                "cpu_percent": round(max(0.0, cpu_percent), 1),
+                "memory_rss": rss,
+                "memory_percent": rss / total_memory * 100 if total_memory else 0,
+            })
+
+        # Expire processes that exited since the last scan
+        for pid in list(self._keys):
+            if pid not in seen:
+                del self._entries[self._keys.pop(pid)]
+
+        return ProcessTable(processes, time.monotonic() - start)
+
+
+_tracker = ProcessTracker()
+
+
+def scan_processes(backend: str = 'auto') -> ProcessTable:
+    """
+    Scan the process table once, reading each process a single time.
+
+    The shared :class:`ProcessTracker` is reused across calls, so CPU
+    percent reflects the time since the previous scan.
+
+    Args:
+        backend: ``auto``/``procfs`` to read /proc directly on Linux,
+            ``psutil`` to always use psutil
+
+    Returns:
+        ProcessTable snapshot
+    """
+    return _tracker.scan(backend)
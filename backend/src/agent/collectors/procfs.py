@@ -0,0 +1,423 @@
+"""Direct /proc readers: a Linux fast path for the psutil-based collectors."""
+import os
+import sys
+import threading
+from collections import namedtuple
+from typing import Dict, Any, List, Optional, Tuple
+
+
+PROC = '/proc'
+
+# Files kept open for the lifetime of the agent
+FILES = ('stat', 'meminfo', 'vmstat', 'diskstats', 'net/dev', 'loadavg')
+
+# Pressure stall information (Linux 4.20+ with CONFIG_PSI), opened on
+# first use and only where present
+PRESSURE = ('cpu', 'memory', 'io')
+
+# /proc/vmstat event counters that signal memory saturation; allocstall is
+# summed over its per-zone lines (allocstall_normal, ...) on Linux 4.10+
+VM_EVENTS = ('pgmajfault', 'pswpin', 'pswpout', 'allocstall', 'oom_kill')
+
+# Same fields and units (seconds) as psutil.cpu_times() on Linux
+CpuTimes = namedtuple(
+    'CpuTimes', 'user nice system idle iowait irq softirq steal guest guest_nice'
+)
+
+SECTOR_SIZE = 512
+SWAP_PAGE_SIZE = 4096  # pswpin/pswpout are in 4 KiB pages
+
+try:
+    CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+except (AttributeError, ValueError):
+    CLOCK_TICKS = 100
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError):
+    PAGE_SIZE = 4096
+
+NET_COUNTERS = (
+    'bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+    'errin', 'errout', 'dropin', 'dropout',
+)
+
+DISK_COUNTERS = ('read_count', 'write_count', 'read_bytes', 'write_bytes', 'read_time', 'write_time')
+
+
+def _find_value(data: bytes, key: bytes) -> int:
+    """
+    Value of one ``key value`` line of meminfo or vmstat (0 if absent).
+
+    Finding the few keys needed is cheaper than splitting every line.
+    """
+    prefix = key + b' '
+    if data.startswith(prefix):
+        start = len(prefix)
+    else:
+        start = data.find(b'\n' + prefix)
+        if start < 0:
+            return 0
+        start += len(prefix) + 1
+    end = data.find(b'\n', start)
+    return int(data[start:end if end >= 0 else None].split(None, 1)[0])
+
+
+def _parse_pressure(data: bytes) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Parse a /proc/pressure file: ``some`` and ``full`` lines of stall
+    averages (percent) and the total stall time in microseconds.
+    """
+    result = {"some": None, "full": None}
+    for line in data.split(b'\n'):
+        fields = line.split()
+        if len(fields) < 5:
+            continue
+        values = dict(field.split(b'=', 1) for field in fields[1:])
+        result["some" if fields[0] == b'some' else "full"] = {
+            "avg10": float(values[b'avg10']),
+            "avg60": float(values[b'avg60']),
+            "avg300": float(values[b'avg300']),
+            "total": int(values[b'total']),
+        }
+    return result
+
+
+class ProcFile:
+    """
+    A /proc file kept open and re-read from offset 0 on every call.
+
+    The contents are read with ``preadv`` into a buffer allocated once and
+    grown only when a read fills it, so a steady-state read costs one
+    system call and no allocation besides the returned bytes.
+    """
+
+    def __init__(self, path: str, size: int = 4096):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+
+    def read(self) -> bytes:
+        """Return the current contents of the file."""
+        while True:
+            size = os.preadv(self.fd, [self.buffer], 0)
+            if size < len(self.buffer):
+                return self.view[:size].tobytes()
+            # Filled the buffer: the file may be longer
+            self.view.release()
+            self.buffer = bytearray(len(self.buffer) * 2)
+            self.view = memoryview(self.buffer)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ProcFS:
+    """
+    Readers for /proc/stat, meminfo, vmstat, diskstats, net/dev, loadavg
+    and the /proc/pressure files.
+
+    Every method produces the same values as the psutil call it replaces,
+    but each file is read once per call over a descriptor opened at start,
+    and the total and per-device counters come out of the same read.
+    Device and interface names are decoded once and cached. Unlike psutil,
+    counters are returned raw, without wraparound correction; rates are
+    computed with :func:`~agent.rates.counter_delta`, which handles it.
+
+    Args:
+        root: Mount point of procfs
+        sys_block: Directory listing the block devices (whole disks)
+    """
+
+    def __init__(self, root: str = PROC, sys_block: str = '/sys/block'):
+        self.root = root
+        self.sys_block = sys_block
+        self.files: Dict[str, ProcFile] = {}
+        self._lock = threading.Lock()
+        self._names: Dict[bytes, str] = {}
+        self._storage_devices: Dict[str, bool] = {}
+        self._missing = set()
+        try:
+            for name in FILES:
+                self.files[name] = ProcFile(os.path.join(root, name))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        """Close every descriptor."""
+        for file in self.files.values():
+            file.close()
+        self.files.clear()
+
+    def read(self, name: str) -> bytes:
+        """Read one of :data:`FILES`; safe to call from several collector threads."""
+        file = self.files[name]
+        with self._lock:
+            return file.read()
+
+    def _read_optional(self, name: str) -> Optional[bytes]:
+        """Read a file that may not exist, opening it on first use."""
+        if name in self._missing:
+            return None
+        try:
+            if name not in self.files:
+                with self._lock:
+                    if name not in self.files:
+                        self.files[name] = ProcFile(os.path.join(self.root, name))
+            return self.read(name)
+        except OSError:
+            # Not built in, or disabled at boot (psi=0)
+            self._missing.add(name)
+            return None
+
+    def _name(self, raw: bytes) -> str:
+        name = self._names.get(raw)
+        if name is None:
+            name = self._names[raw] = raw.decode('utf-8', 'replace')
+        return name
+
+    def cpu_times(self) -> Tuple[CpuTimes, List[CpuTimes]]:
+        """
+        Overall and per-core CPU times from a single read of /proc/stat.
+
+        Returns:
+            Tuple of the overall times and the list of per-core times
+        """
+        overall = None
+        per_core = []
+        ticks = CLOCK_TICKS
+        for line in self.read('stat').split(b'\n'):
+            if not line.startswith(b'cpu'):
+                if per_core:
+                    break
+                continue
+            fields = line.split()
+            values = [int(value) / ticks for value in fields[1:11]]
+            values += [0.0] * (10 - len(values))
+            if fields[0] == b'cpu':
+                overall = CpuTimes(*values)
+            else:
+                per_core.append(CpuTimes(*values))
+        return overall, per_core
+
+    def loadavg(self) -> Tuple[float, float, float]:
+        """1, 5 and 15 minute load averages."""
+        fields = self.read('loadavg').split(None, 3)
+        return float(fields[0]), float(fields[1]), float(fields[2])
+
+    def memory(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Physical and swap memory, computed as ``psutil.virtual_memory()``
+        and ``psutil.swap_memory()`` do (the ``free`` tool's definitions).
+
+        Returns:
+            Tuple of the physical and swap sections of the memory metrics
+        """
+        meminfo = self.read('meminfo')
+        kib = 1024
+
+        total = _find_value(meminfo, b'MemTotal:') * kib
+        free = _find_value(meminfo, b'MemFree:') * kib
+        buffers = _find_value(meminfo, b'Buffers:') * kib
+        cached = (_find_value(meminfo, b'Cached:') + _find_value(meminfo, b'SReclaimable:')) * kib
+        shared = (_find_value(meminfo, b'Shmem:') or _find_value(meminfo, b'MemShared:')) * kib
+
+        used = total - free - cached - buffers
+        if used < 0:
+            # Containers can report values inconsistent with the host's
+            used = total - free
+
+        available = _find_value(meminfo, b'MemAvailable:') * kib
+        if not available:
+            # Kernels before 3.14 have no MemAvailable
+            available = free + buffers + cached
+        if available > total:
+            available = free
+
+        physical = {
+            "total": total,
+            "available": available,
+            "used": used,
+            "free": free,
+            "percent": round((total - available) / total * 100, 1) if total else 0.0,
+            "buffers": buffers,
+            "cached": cached,
+            "shared": shared,
+        }
+
+        swap_total = _find_value(meminfo, b'SwapTotal:') * kib
+        swap_free = _find_value(meminfo, b'SwapFree:') * kib
+        swap_used = swap_total - swap_free
+        vmstat = self.read('vmstat')
+        swap = {
+            "total": swap_total,
+            "used": swap_used,
+            "free": swap_free,
+            "percent": round(swap_used / swap_total * 100, 1) if swap_total else 0.0,
+            "sin": _find_value(vmstat, b'pswpin') * SWAP_PAGE_SIZE,
+            "sout": _find_value(vmstat, b'pswpout') * SWAP_PAGE_SIZE,
+        }
+        return physical, swap
+
+    def pressure(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Pressure stall information of the CPU, memory and I/O.
+
+        Returns:
+            Mapping of resource to its ``some`` and ``full`` stall figures
+            (``full`` is None for the CPU before Linux 5.13), or to None
+            where the kernel does not provide PSI
+        """
+        result = {}
+        for resource in PRESSURE:
+            data = self._read_optional('pressure/' + resource)
+            result[resource] = _parse_pressure(data) if data is not None else None
+        return result
+
+    def vm_events(self) -> Dict[str, int]:
+        """
+        The :data:`VM_EVENTS` counters from a single read of /proc/vmstat.
+
+        Returns:
+            Mapping of counter name to its raw value (0 if the kernel does
+            not have it)
+        """
+        vmstat = self.read('vmstat')
+        events = {name: _find_value(vmstat, name.encode()) for name in VM_EVENTS}
+        start = vmstat.find(b'\nallocstall_')
+        while start >= 0:
+            end = vmstat.find(b'\n', start + 1)
+            events['allocstall'] += int(vmstat[start + 1:end if end >= 0 else None].split()[1])
+            start = vmstat.find(b'\nallocstall_', start + 1)
+        return events
+
+    def process_stat(self, pid: int) -> Tuple[float, int, int]:
+        """
+        CPU time, start time and RSS of one process from /proc/<pid>/stat.
+
+        The start time identifies the process: a pid reused by a new
+        process comes with a different one.
+
+        Args:
+            pid: Process id
+
+        Returns:
+            Tuple of (user + system CPU seconds, start time in clock ticks
+            since boot, RSS in bytes)
+
+        Raises:
+            OSError: The process exited
+        """
+        with open(f'{self.root}/{pid}/stat', 'rb') as f:
+            data = f.read()
+        # The command name is in parentheses and may contain either
+        fields = data[data.rindex(b')') + 2:].split()
+        # fields[0] is field 3 (state) of proc(5)
+        cpu_time = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        return cpu_time, int(fields[19]), int(fields[21]) * PAGE_SIZE
+
+    def _is_storage_device(self, name: str) -> bool:
+        """True for whole disks (listed in /sys/block), False for partitions."""
+        device = self._storage_devices.get(name)
+        if device is None:
+            device = os.access(os.path.join(self.sys_block, name.replace('/', '!')), os.F_OK)
+            self._storage_devices[name] = device
+        return device
+
+    def disk_io(self) -> Tuple[Optional[Dict[str, int]], Dict[str, Dict[str, int]]]:
+        """
+        Disk I/O counters from a single read of /proc/diskstats.
+
+        Returns:
+            Tuple of the totals over whole disks (None without any disk)
+            and the counters of every device, partitions included
+        """
+        per_disk = {}
+        totals = [0] * 6
+        found = False
+        for line in self.read('diskstats').split(b'\n'):
+            fields = line.split()
+            if len(fields) >= 14:
+                raw, values = fields[2], fields[3:11]
+                reads, _, read_sectors, read_time, writes, _, write_sectors, write_time = map(int, values)
+            elif len(fields) == 7:
+                # Partition lines of 2.6.25 and older kernels
+                raw = fields[2]
+                reads, read_sectors, writes, write_sectors = map(int, fields[3:])
+                read_time = write_time = 0
+            else:
+                continue
+            counters = (
+                reads, writes, read_sectors * SECTOR_SIZE, write_sectors * SECTOR_SIZE,
+                read_time, write_time,
+            )
+            name = self._name(raw)
+            per_disk[name] = dict(zip(DISK_COUNTERS, counters))
+            if self._is_storage_device(name):
+                found = True
+                for index, value in enumerate(counters):
+                    totals[index] += value
+
+        total = dict(zip(DISK_COUNTERS, totals)) if found else None
+        return total, per_disk
+
+    def net_io(self) -> Tuple[Dict[str, Dict[str, int]], Dict[str, int]]:
+        """
+        Interface counters from a single read of /proc/net/dev.
+
+        Returns:
+            Tuple of the counters per interface and their sum
+        """
+        interfaces = {}
+        totals = [0] * 8
+        for line in self.read('net/dev').split(b'\n')[2:]:
+            colon = line.rfind(b':')
+            if colon <= 0:
+                continue
+            fields = line[colon + 1:].split()
+            counters = (
+                int(fields[8]), int(fields[0]), int(fields[9]), int(fields[1]),
+                int(fields[2]), int(fields[10]), int(fields[3]), int(fields[11]),
+            )
+            interfaces[self._name(line[:colon].strip())] = dict(zip(NET_COUNTERS, counters))
+            for index, value in enumerate(counters):
+                totals[index] += value
+        return interfaces, dict(zip(NET_COUNTERS, totals))
+
+
+_procfs: Optional[ProcFS] = None
+_unavailable = False
+_init_lock = threading.Lock()
+
+
+def get_procfs(backend: str = 'auto') -> Optional[ProcFS]:
+    """
+    Return the shared /proc reader for a collector backend setting.
+
+    Args:
+        backend: ``auto`` or ``procfs`` to read /proc directly where
+            possible, ``psutil`` to always go through psutil
+
+    Returns:
+        ProcFS instance, or None when psutil is to be used (not Linux, or
+        one of the files cannot be opened)
+    """
+    global _procfs, _unavailable
+    if backend == 'psutil' or _unavailable:
+        return None
+    if _procfs is None:
+        with _init_lock:
+            if _procfs is None and not _unavailable:
+                if not sys.platform.startswith('linux') or not hasattr(os, 'preadv'):
+                    _unavailable = True
+                    return None
+                try:
+                    _procfs = ProcFS()
+                except OSError:
+                    _unavailable = True
+                    return None
+    return _procfs
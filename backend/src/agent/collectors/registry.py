@@ -0,0 +1,220 @@
+"""Collector registry: metadata of every collector, imported only when enabled."""
+import importlib
+import logging
+import threading
+from functools import lru_cache, partial
+from importlib import metadata
+from typing import Callable, Dict, Any, List, NamedTuple, Optional, Tuple
+
+
+# Entry point group through which installed packages add collectors; each
+# entry point names a CollectorSpec
+ENTRY_POINT_GROUP = 'agent.collectors'
+
+# Cost classes, cheapest first
+CHEAP = 'cheap'
+MODERATE = 'moderate'
+EXPENSIVE = 'expensive'
+COSTS = (CHEAP, MODERATE, EXPENSIVE)
+
+
+class CollectorSpec(NamedTuple):
+    """
+    Declaration of one collector.
+
+    Nothing here imports the collector: ``target`` is resolved on first
+    use, so a collector that is not enabled costs neither import time nor
+    memory.
+    """
+    # Key under ``collectors`` in agent.yml
+    name: str
+    # ``module:function`` of the collector; a leading dot is relative to
+    # this package
+    target: str
+    # Snapshot key of the collector's result; None when the result only
+    # feeds other sections (the shared process table)
+    section: Optional[str]
+    cost: str = CHEAP
+    # Default interval in seconds; the global interval if None
+    interval: Optional[float] = None
+    # Protobuf message of the section (proto/metrics.proto) and its field
+    # number in Snapshot; sections without one travel in JSON only
+    schema: Optional[str] = None
+    field: Optional[int] = None
+    # Fixed keyword arguments, and keyword arguments taken from the config
+    # (keyword -> config key)
+    kwargs: Optional[Dict[str, Any]] = None
+    options: Optional[Dict[str, str]] = None
+    # Run only while one of these collectors is enabled
+    needed_by: Tuple[str, ...] = ()
+    # Run unless disabled in agent.yml (otherwise only when listed)
+    default_enabled: bool = False
+    # Sections derived from the shared process table: (snapshot key,
+    # ``module:function`` taking (limit, table))
+    process_views: Tuple[Tuple[str, str], ...] = ()
+
+
+BUILTIN = (
+    CollectorSpec(
+        'cpu', '.cpu:collect_cpu_metrics', 'cpu', schema='CpuMetrics', field=3,
+        kwargs={'include_static': False}, options={'backend': 'collector_backend'},
+        process_views=(('top_cpu_processes', '.cpu:get_top_cpu_processes'),),
+    ),
+    CollectorSpec(
+        'memory', '.memory:collect_memory_metrics', 'memory', schema='MemoryMetrics', field=4,
+        options={'backend': 'collector_backend'},
+        process_views=(('top_memory_processes', '.memory:get_memory_by_process'),),
+    ),
+    CollectorSpec(
+        'disk', '.disk:collect_disk_metrics', 'disk', cost=MODERATE, schema='DiskMetrics', field=5,
+        options={'backend': 'collector_backend'},
+    ),
+    CollectorSpec(
+        'network', '.network:collect_network_metrics', 'network', cost=MODERATE, schema='NetworkMetrics', field=6,
+        kwargs={'include_static': False}, options={'backend': 'collector_backend'},
+    ),
+    # One process table scan per tick, shared by every process-level consumer
+    CollectorSpec(
+        'processes', '.process:scan_processes', None, cost=EXPENSIVE,
+        needed_by=('cpu', 'memory'), default_enabled=True, options={'backend': 'collector_backend'},
+    ),
+    CollectorSpec(
+        'saturation', '.saturation:collect_saturation_metrics', 'saturation', schema='SaturationMetrics', field=17,
+    ),
+    CollectorSpec(
+        'cgroups', '.cgroup:collect_cgroup_metrics', 'cgroups', cost=EXPENSIVE, schema='CgroupMetrics', field=16,
+        options={'limit': 'top_processes_limit', 'root': 'cgroup_root', 'rescan_interval': 'cgroup_rescan_interval'},
+    ),
+)
+
+
+@lru_cache(maxsize=None)
+def resolve(target: str) -> Callable:
+    """
+    Import the function a ``module:function`` target names (once).
+
+    Args:
+        target: Target string; a leading dot is relative to this package
+
+    Returns:
+        The function
+    """
+    module_name, _, attribute = target.partition(':')
+    module = importlib.import_module(module_name, package=__package__)
+    return getattr(module, attribute)
+
+
+def _entry_points() -> List[metadata.EntryPoint]:
+    points = metadata.entry_points()
+    if hasattr(points, 'select'):
+        return list(points.select(group=ENTRY_POINT_GROUP))
+    return list(points.get(ENTRY_POINT_GROUP, ()))
+
+
+class CollectorRegistry:
+    """
+    Every known collector and its metadata.
+
+    Built-in collectors are declared in :data:`BUILTIN`. Collectors of
+    installed packages are found through the :data:`ENTRY_POINT_GROUP`
+    entry points, but only when a name that is not built in is asked for,
+    and an entry point is loaded only for a collector enabled in the
+    config. Collector modules are imported on the first :meth:`task`.
+    """
+
+    def __init__(self, specs=BUILTIN):
+        self._specs: Dict[str, CollectorSpec] = {}
+        self._entry_points: Optional[Dict[str, metadata.EntryPoint]] = None
+        self._lock = threading.Lock()
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: CollectorSpec):
+        """
+        Add a collector.
+
+        Args:
+            spec: Collector declaration
+
+        Raises:
+            ValueError: On an unknown cost class
+        """
+        if spec.cost not in COSTS:
+            raise ValueError(f"collector {spec.name}: cost must be one of {', '.join(COSTS)}")
+        self._specs[spec.name] = spec
+
+    def _discover(self) -> Dict[str, metadata.EntryPoint]:
+        with self._lock:
+            if self._entry_points is None:
+                try:
+                    points = _entry_points()
+                except Exception as e:
+                    logging.warning(f"Collector entry point discovery failed: {e}")
+                    points = []
+                self._entry_points = {point.name: point for point in points if point.name not in self._specs}
+        return self._entry_points
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs or name in self._discover()
+
+    def names(self) -> List[str]:
+        """Names of every collector, built-in first, without loading any."""
+        return list(self._specs) + [name for name in self._discover() if name not in self._specs]
+
+    def spec(self, name: str) -> CollectorSpec:
+        """
+        Return a collector's declaration, loading its entry point if needed.
+
+        Args:
+            name: Collector name
+
+        Returns:
+            CollectorSpec
+
+        Raises:
+            KeyError: If no such collector is known
+        """
+        spec = self._specs.get(name)
+        if spec is None:
+            point = self._discover().get(name)
+            if point is None:
+                raise KeyError(name)
+            spec = point.load()
+            if not isinstance(spec, CollectorSpec) or spec.name != name:
+                raise KeyError(f"entry point {name} does not name a CollectorSpec called {name}")
+            self.register(spec)
+        return spec
+
+    def specs(self) -> List[CollectorSpec]:
+        """Declarations of the built-in and already loaded collectors."""
+        return list(self._specs.values())
+
+    def task(self, name: str, config: Dict[str, Any]) -> Callable[[], Any]:
+        """
+        Return a zero-argument callable running one collector.
+
+        Args:
+            name: Collector name
+            config: Configuration dictionary (source of ``options``)
+
+        Returns:
+            The collector function with its arguments bound
+        """
+        spec = self.spec(name)
+        func = resolve(spec.target)
+        kwargs = dict(spec.kwargs or {})
+        for keyword, key in (spec.options or {}).items():
+            if key in config:
+                kwargs[keyword] = config[key]
+        return partial(func, **kwargs) if kwargs else func
+
+
+_registry: Optional[CollectorRegistry] = None
+
+
+def get_registry() -> CollectorRegistry:
+    """Return the shared collector registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        _registry = CollectorRegistry()
+    return _registry
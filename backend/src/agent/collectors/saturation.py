@@ -0,0 +1,35 @@
+"""Saturation collector: pressure stall information and vmstat memory events."""
+from typing import Dict, Any, Optional
+
+from .procfs import get_procfs
+
+
+def collect_saturation_metrics() -> Optional[Dict[str, Any]]:
+    """
+    Collect CPU, memory and I/O saturation.
+
+    Utilisation says how busy a resource is; saturation says how much work
+    waited for it. Reports the pressure stall information of the CPU,
+    memory and I/O (share of time some or all tasks were stalled, averaged
+    by the kernel over 10 s, 60 s and 300 s, and the total stall time) and
+    the vmstat counters of memory pressure: major faults, pages swapped in
+    and out, direct reclaim stalls and OOM kills.
+
+    Counters are reported raw; per-second rates and the stall share over
+    the collection interval are computed by
+    :class:`~agent.rates.RateStage`. Both files are read over the shared
+    descriptors of :func:`~agent.collectors.procfs.get_procfs`, whatever
+    ``collector_backend`` says, since psutil has no equivalent.
+
+    Returns:
+        Dictionary with the ``cpu``, ``memory`` and ``io`` pressure (None
+        where the kernel has no PSI) and the ``vmstat`` counters, or None
+        where /proc is not available
+    """
+    procfs = get_procfs()
+    if procfs is None:
+        return None
+
+    metrics: Dict[str, Any] = procfs.pressure()
+    metrics["vmstat"] = procfs.vm_events()
+    return metrics
@@ -4,6 +4,8 @@ import os
 from pathlib import Path
 from typing import Dict, Any
 
+from .collectors.registry import get_registry
+
 
 DEFAULT_CONFIG = {
     "interval": 5,
@@ -11,8 +13,18 @@ DEFAULT_CONFIG = {
     "retry_attempts": 3,
     "retry_delay": 5,
     "buffer_size": 1000,
+    "spill_dir": None,
+    "spill_segment_size": 16 * 1024 * 1024,
+    "spill_max_bytes": 1024 * 1024 * 1024,
     "use_protobuf": True,
+    "delta_encoding": False,
+    "keyframe_interval": 60,
+    "agent_id": None,
     "timeout": 10,
+    "batch_size": 50,
+    "batch_interval": 10,
+    "compression": "auto",
+    "connection_pool_size": 2,
     "log_level": "INFO",
     "log_file": "agent.log",
     "collectors": {
@@ -20,8 +32,25 @@ DEFAULT_CONFIG = {
         "memory": True,
         "disk": True,
         "network": True,
+        "processes": True,
+        "saturation": True,
+        "cgroups": False,
     },
+    "collector_backend": "auto",
+    "cgroup_root": "/sys/fs/cgroup",
+    "cgroup_rescan_interval": 300,
     "top_processes_limit": 5,
+    "collector_timeout": 5,
+    "collector_timeouts": {},
+    "collector_workers": 4,
+    "inventory_refresh": 3600,
+    "history_dir": None,
+    "alerts_file": None,
+    "self_metrics": True,
+    "serve_host": "0.0.0.0",
+    "serve_port": 9108,
+    "serve_max_label_values": 64,
+    "serve_exclude_devices": ["loop*", "ram*", "veth*", "docker*", "br-*"],
 }
 
 
@@ -63,6 +92,52 @@ def load_config(config_path: str = None) -> Dict[str, Any]:
     return config
 
 
+def collector_intervals(config: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Return the collection interval of every enabled collector.
+
+    Each entry of ``collectors`` is either a boolean or a mapping with
+    ``enabled`` and an optional ``interval``; collectors without their own
+    interval use their registered default, or else the global
+    ``interval``. Collectors registered as enabled by default (the process
+    table scan) run unless configured otherwise, and a collector that is
+    only needed by others (the process table scan by cpu and memory) is
+    dropped when none of them is enabled. Names the registry does not
+    know are ignored here and rejected by :func:`validate_config`.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        Mapping of collector name to interval in seconds
+    """
+    registry = get_registry()
+    intervals = {}
+    collectors = {spec.name: True for spec in registry.specs() if spec.default_enabled}
+    collectors.update(config.get('collectors', {}))
+
+    for name, setting in collectors.items():
+        if isinstance(setting, dict):
+            enabled = setting.get('enabled', True)
+            interval = setting.get('interval')
+        else:
+            enabled = bool(setting)
+            interval = None
+
+        if not enabled or name not in registry:
+            continue
+        if interval is None:
+            interval = registry.spec(name).interval or config['interval']
+        intervals[name] = interval
+
+    for name in list(intervals):
+        needed_by = registry.spec(name).needed_by
+        if needed_by and not any(consumer in intervals for consumer in needed_by):
+            del intervals[name]
+
+    return intervals
+
+
 def validate_config(config: Dict[str, Any]) -> bool:
     """
     Validate configuration values.
@@ -82,10 +157,61 @@ def validate_config(config: Dict[str, Any]) -> bool:
     if config["buffer_size"] <= 0:
         raise ValueError("buffer_size must be greater than 0")
 
+    if config["spill_segment_size"] <= 0:
+        raise ValueError("spill_segment_size must be greater than 0")
+
+    if config["spill_max_bytes"] < config["spill_segment_size"]:
+        raise ValueError("spill_max_bytes must be at least spill_segment_size")
+
     if config["timeout"] <= 0:
         raise ValueError("timeout must be greater than 0")
 
+    if config["batch_size"] <= 0:
+        raise ValueError("batch_size must be greater than 0")
+
+    if config["batch_interval"] <= 0:
+        raise ValueError("batch_interval must be greater than 0")
+
+    if config["compression"] not in ("auto", "zstd", "gzip", "none"):
+        raise ValueError("compression must be one of auto, zstd, gzip, none")
+
+    if not 0 <= config["serve_port"] <= 65535:
+        raise ValueError("serve_port must be between 0 and 65535")
+
+    if config["serve_max_label_values"] < 1:
+        raise ValueError("serve_max_label_values must be at least 1")
+
+    if config["keyframe_interval"] < 1:
+        raise ValueError("keyframe_interval must be at least 1")
+
+    if config["connection_pool_size"] <= 0:
+        raise ValueError("connection_pool_size must be greater than 0")
+
+    if config["collector_backend"] not in ("auto", "procfs", "psutil"):
+        raise ValueError("collector_backend must be one of auto, procfs, psutil")
+
     if config["top_processes_limit"] <= 0:
         raise ValueError("top_processes_limit must be greater than 0")
 
+    if config["cgroup_rescan_interval"] <= 0:
+        raise ValueError("cgroup_rescan_interval must be greater than 0")
+
+    registry = get_registry()
+    for name in config.get("collectors", {}):
+        if name not in registry:
+            raise ValueError(f"collectors.{name} is not a known collector")
+
+    for name, interval in collector_intervals(config).items():
+        if interval <= 0:
+            raise ValueError(f"collectors.{name}.interval must be greater than 0")
+
+    if config["collector_timeout"] <= 0:
+        raise ValueError("collector_timeout must be greater than 0")
+
+    if config["collector_workers"] <= 0:
+        raise ValueError("collector_workers must be greater than 0")
+
+    if config["inventory_refresh"] <= 0:
+        raise ValueError("inventory_refresh must be greater than 0")
+
     return True
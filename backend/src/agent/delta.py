@@ -0,0 +1,380 @@
+"""Delta/dictionary-encoded snapshot stream."""
+import struct
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+
+KEYFRAME = 0x4B  # 'K'
+DELTA = 0x44  # 'D'
+
+# Operations (low two bits of the op word, path id above)
+OP_SET = 0
+OP_ADD = 1  # integer delta against the previous value (zigzag varint)
+OP_DELETE = 2
+
+# Value tags
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3  # zigzag varint
+TAG_FLOAT = 4  # little-endian double
+TAG_STRING = 5  # string dictionary id
+TAG_EMPTY_DICT = 6
+TAG_EMPTY_LIST = 7
+
+_DOUBLE = struct.Struct('<d')
+_MISSING = object()
+
+Path = Tuple[Union[str, int], ...]
+
+
+class StreamGap(Exception):
+    """A delta frame does not follow the frame the decoder last applied."""
+
+
+def _varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def flatten(value: Any, prefix: Path = (), out: Optional[Dict[Path, Any]] = None) -> Dict[Path, Any]:
+    """
+    Flatten a snapshot into ``{path: leaf}``.
+
+    Dict keys become string path components and list positions integer
+    ones; scalars and empty containers are leaves.
+
+    Args:
+        value: Snapshot (or part of it)
+        prefix: Path of ``value``
+        out: Dict to add the leaves to
+
+    Returns:
+        Flat mapping of paths to leaf values
+    """
+    if out is None:
+        out = {}
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            flatten(item, prefix + (str(key),), out)
+    elif isinstance(value, (list, tuple)) and value:
+        for index, item in enumerate(value):
+            flatten(item, prefix + (index,), out)
+    else:
+        out[prefix] = value
+    return out
+
+
+def unflatten(flat: Dict[Path, Any]) -> Any:
+    """
+    Rebuild the nested snapshot from a :func:`flatten` mapping.
+
+    Args:
+        flat: Flat mapping of paths to leaf values
+
+    Returns:
+        Nested dicts and lists
+    """
+    if () in flat:
+        return flat[()]
+
+    root: Dict[Any, Any] = {}
+    for path, value in flat.items():
+        node = root
+        for component in path[:-1]:
+            node = node.setdefault(component, {})
+        node[path[-1]] = value
+
+    def finish(node):
+        if not isinstance(node, dict) or not node:
+            return node
+        if isinstance(next(iter(node)), int):
+            return [finish(node[index]) for index in sorted(node)]
+        return {key: finish(item) for key, item in node.items()}
+
+    return finish(root)
+
+
+class _Frame:
+    """Write side of one frame: new dictionary entries and operations."""
+
+    def __init__(self, strings: Dict[str, int], paths: Dict[Path, int]):
+        self.strings = strings
+        self.paths = paths
+        self.new_strings: List[str] = []
+        self.new_paths: List[Path] = []
+        self.ops = bytearray()
+        self.op_count = 0
+
+    def string_id(self, text: str) -> int:
+        sid = self.strings.get(text)
+        if sid is None:
+            sid = self.strings[text] = len(self.strings)
+            self.new_strings.append(text)
+        return sid
+
+    def path_id(self, path: Path) -> int:
+        pid = self.paths.get(path)
+        if pid is None:
+            for component in path:
+                if isinstance(component, str):
+                    self.string_id(component)
+            pid = self.paths[path] = len(self.paths)
+            self.new_paths.append(path)
+        return pid
+
+    def op(self, path: Path, op: int):
+        _varint(self.path_id(path) << 2 | op, self.ops)
+        self.op_count += 1
+
+    def value(self, value: Any):
+        ops = self.ops
+        if value is None:
+            ops.append(TAG_NONE)
+        elif value is True:
+            ops.append(TAG_TRUE)
+        elif value is False:
+            ops.append(TAG_FALSE)
+        elif isinstance(value, int):
+            ops.append(TAG_INT)
+            _varint(_zigzag(value), ops)
+        elif isinstance(value, float):
+            ops.append(TAG_FLOAT)
+            ops += _DOUBLE.pack(value)
+        elif isinstance(value, dict):
+            ops.append(TAG_EMPTY_DICT)
+        elif isinstance(value, (list, tuple)):
+            ops.append(TAG_EMPTY_LIST)
+        else:
+            ops.append(TAG_STRING)
+            _varint(self.string_id(str(value)), ops)
+
+    def to_bytes(self, kind: int, sequence: int) -> bytes:
+        out = bytearray((kind,))
+        _varint(sequence, out)
+
+        _varint(len(self.new_strings), out)
+        for text in self.new_strings:
+            raw = text.encode('utf-8')
+            _varint(len(raw), out)
+            out += raw
+
+        _varint(len(self.new_paths), out)
+        for path in self.new_paths:
+            _varint(len(path), out)
+            for component in path:
+                if isinstance(component, int):
+                    _varint(component << 1 | 1, out)
+                else:
+                    _varint(self.strings[component] << 1, out)
+
+        _varint(self.op_count, out)
+        out += self.ops
+        return bytes(out)
+
+
+class DeltaEncoder:
+    """
+    Stateful snapshot stream encoder.
+
+    Every ``keyframe_interval``-th frame is a keyframe carrying the whole
+    snapshot and resetting the string and path dictionaries. Frames in
+    between carry only leaves that changed since the previous snapshot:
+    integers as signed varint deltas, other values in full, and deletions
+    for leaves that disappeared. Dict keys and string values are sent once
+    per keyframe period and referenced by id afterwards, so interface and
+    device names, partition lists, addresses and other static sections
+    cost nothing while unchanged.
+    """
+
+    def __init__(self, keyframe_interval: int = 60):
+        self.keyframe_interval = keyframe_interval
+        self.sequence = 0
+        self.keyframes = 0
+        self._strings: Dict[str, int] = {}
+        self._paths: Dict[Path, int] = {}
+        self._previous: Dict[Path, Any] = {}
+        self._since_keyframe: Optional[int] = None
+        # Bumped by force_keyframe(), possibly from another thread while a
+        # frame is being encoded; compared instead of cleared so a request
+        # made mid-encode still applies to the next frame
+        self._resyncs = 0
+        self._resynced = 0
+
+    def force_keyframe(self):
+        """Make the next frame a keyframe (e.g. after frames were lost)."""
+        self._resyncs += 1
+
+    def encode(self, metrics: Dict[str, Any]) -> bytes:
+        """
+        Encode the next snapshot of the stream.
+
+        Args:
+            metrics: Snapshot dictionary
+
+        Returns:
+            Encoded frame
+        """
+        flat = flatten(metrics)
+        resyncs = self._resyncs
+        keyframe = (self._since_keyframe is None or resyncs != self._resynced
+                    or self._since_keyframe + 1 >= self.keyframe_interval)
+
+        if keyframe:
+            self._resynced = resyncs
+            self._strings = {}
+            self._paths = {}
+            frame = _Frame(self._strings, self._paths)
+            for path, value in flat.items():
+                frame.op(path, OP_SET)
+                frame.value(value)
+            self._since_keyframe = 0
+            self.keyframes += 1
+        else:
+            frame = _Frame(self._strings, self._paths)
+            previous = self._previous
+            for path, value in flat.items():
+                old = previous.get(path, _MISSING)
+                if type(old) is type(value) and (old == value or old is value):
+                    continue
+                if type(value) is int and type(old) is int:
+                    frame.op(path, OP_ADD)
+                    _varint(_zigzag(value - old), frame.ops)
+                else:
+                    frame.op(path, OP_SET)
+                    frame.value(value)
+            for path in previous:
+                if path not in flat:
+                    frame.op(path, OP_DELETE)
+            self._since_keyframe += 1
+
+        self._previous = flat
+        self.sequence += 1
+        return frame.to_bytes(KEYFRAME if keyframe else DELTA, self.sequence)
+
+
+class DeltaDecoder:
+    """
+    Rebuild full snapshots from a :class:`DeltaEncoder` stream.
+
+    Delta frames at or before the last applied frame are repeats of a
+    batch re-sent after its response was lost and are skipped with
+    ``None``. A delta frame further ahead than the next one raises
+    :class:`StreamGap`; frames are then skipped with ``None`` until the
+    next keyframe re-synchronizes the stream. Keyframes are always applied,
+    since a restarted agent numbers its stream from the start again.
+    """
+
+    def __init__(self):
+        self.sequence: Optional[int] = None
+        self._strings: List[str] = []
+        self._paths: List[Path] = []
+        self._values: Dict[Path, Any] = {}
+
+    def _read_value(self, data, pos: int) -> Tuple[Any, int]:
+        tag = data[pos]
+        pos += 1
+        if tag == TAG_FLOAT:
+            return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+        if tag == TAG_INT:
+            value, pos = _read_varint(data, pos)
+            return _unzigzag(value), pos
+        if tag == TAG_STRING:
+            sid, pos = _read_varint(data, pos)
+            return self._strings[sid], pos
+        if tag == TAG_NONE:
+            return None, pos
+        if tag == TAG_TRUE:
+            return True, pos
+        if tag == TAG_FALSE:
+            return False, pos
+        if tag == TAG_EMPTY_DICT:
+            return {}, pos
+        if tag == TAG_EMPTY_LIST:
+            return [], pos
+        raise ValueError(f"Unknown value tag {tag}")
+
+    def decode(self, data: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Apply one frame and return the full snapshot it represents.
+
+        Args:
+            data: Encoded frame
+
+        Returns:
+            Snapshot dictionary, or None for an already applied delta
+            frame and while waiting for a keyframe
+
+        Raises:
+            StreamGap: Delta frames were skipped
+        """
+        kind = data[0]
+        sequence, pos = _read_varint(data, 1)
+
+        if kind == KEYFRAME:
+            self._strings = []
+            self._paths = []
+            self._values = {}
+        elif kind == DELTA:
+            if self.sequence is None or sequence <= self.sequence:
+                return None
+            if sequence != self.sequence + 1:
+                expected, self.sequence = self.sequence + 1, None
+                raise StreamGap(f"expected frame {expected}, got {sequence}")
+        else:
+            raise ValueError(f"Unknown frame type {kind}")
+
+        count, pos = _read_varint(data, pos)
+        for _ in range(count):
+            length, pos = _read_varint(data, pos)
+            self._strings.append(bytes(data[pos:pos + length]).decode('utf-8'))
+            pos += length
+
+        count, pos = _read_varint(data, pos)
+        for _ in range(count):
+            length, pos = _read_varint(data, pos)
+            path = []
+            for _ in range(length):
+                component, pos = _read_varint(data, pos)
+                path.append(component >> 1 if component & 1 else self._strings[component >> 1])
+            self._paths.append(tuple(path))
+
+        values = self._values
+        count, pos = _read_varint(data, pos)
+        for _ in range(count):
+            word, pos = _read_varint(data, pos)
+            path = self._paths[word >> 2]
+            op = word & 3
+            if op == OP_SET:
+                values[path], pos = self._read_value(data, pos)
+            elif op == OP_ADD:
+                delta, pos = _read_varint(data, pos)
+                values[path] += _unzigzag(delta)
+            elif op == OP_DELETE:
+                del values[path]
+            else:
+                raise ValueError(f"Unknown operation {op}")
+
+        self.sequence = sequence
+        return unflatten(values)
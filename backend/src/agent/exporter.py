@@ -0,0 +1,394 @@
+"""OpenMetrics exposition of the latest snapshot (--serve)."""
+import fnmatch
+import gzip
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+OTHER = '_other'
+
+# Sections kept from earlier ticks when a collector is not due
+SECTIONS = ('cpu', 'memory', 'disk', 'network', 'saturation', 'collection', 'agent')
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(value)
+    return str(int(value))
+
+
+class _Family:
+    """One metric family: metadata and its samples."""
+
+    def __init__(self, name: str, type_: str, help_: str, unit: str = ''):
+        self.name = name
+        self.type = type_
+        self.help = help_
+        self.unit = unit
+        # (sample name suffix, labels, value)
+        self.samples: List[Tuple[str, Labels, Any]] = []
+
+    def add(self, value, **labels):
+        if value is not None:
+            self.samples.append(('_total' if self.type == 'counter' else '', tuple(labels.items()), value))
+
+    def add_histogram(self, bounds: Sequence[float], buckets: Sequence[int], total: float, **labels):
+        """Add one histogram from per-bucket counts (the last bucket is +Inf)."""
+        cumulative = 0
+        for bound, count in zip(list(bounds) + ['+Inf'], buckets):
+            cumulative += count
+            le = bound if isinstance(bound, str) else repr(float(bound))
+            self.samples.append(('_bucket', tuple(labels.items()) + (('le', le),), cumulative))
+        self.samples.append(('_count', tuple(labels.items()), cumulative))
+        self.samples.append(('_sum', tuple(labels.items()), total))
+
+    def render(self, out: List[str]):
+        if not self.samples:
+            return
+        out.append(f'# TYPE {self.name} {self.type}')
+        if self.unit:
+            out.append(f'# UNIT {self.name} {self.unit}')
+        out.append(f'# HELP {self.name} {self.help}')
+        for suffix, labels, value in self.samples:
+            if labels:
+                text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+                out.append(f'{self.name}{suffix}{{{text}}} {_format_value(value)}')
+            else:
+                out.append(f'{self.name}{suffix} {_format_value(value)}')
+
+
+def limit_labels(
+    items: Dict[str, Any],
+    max_values: int,
+    exclude: Sequence[str] = (),
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """
+    Bound the number of label values of a per-device series.
+
+    Names matching an ``exclude`` glob are dropped. Of the rest, the first
+    ``max_values - 1`` in name order keep their own series (all of them if
+    they fit) and the remainder is returned for folding into one
+    ``_other`` series. Name order keeps the set of series stable between
+    scrapes, so folded counters stay monotonic.
+
+    Args:
+        items: Per-device values keyed by device name
+        max_values: Maximum label values per series, including ``_other``
+        exclude: Glob patterns of names to leave out
+
+    Returns:
+        Tuple of (kept items, folded values)
+    """
+    names = sorted(name for name in items if not any(fnmatch.fnmatchcase(name, p) for p in exclude))
+    if len(names) <= max_values:
+        return {name: items[name] for name in names}, []
+    keep = names[:max(max_values - 1, 0)]
+    return {name: items[name] for name in keep}, [items[name] for name in names[len(keep):]]
+
+
+def _fold(values: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum per-device counter dicts into one."""
+    folded: Dict[str, Any] = {}
+    for value in values:
+        for key, item in value.items():
+            if isinstance(item, (int, float)):
+                folded[key] = folded.get(key, 0) + item
+    return folded
+
+
+def render_openmetrics(
+    metrics: Dict[str, Any],
+    max_label_values: int = 64,
+    exclude_devices: Sequence[str] = (),
+) -> bytes:
+    """
+    Render a snapshot in the OpenMetrics text format.
+
+    Cumulative values (CPU time, disk and network I/O) are exported as
+    counters so the scraper computes rates; everything else is a gauge.
+    Per-core, per-disk and per-interface series are limited to
+    ``max_label_values`` label values each (see :func:`limit_labels`).
+
+    Args:
+        metrics: Snapshot (sections may be missing)
+        max_label_values: Maximum label values per per-device series
+        exclude_devices: Glob patterns of disks and interfaces to leave out
+
+    Returns:
+        UTF-8 encoded exposition ending with ``# EOF``
+    """
+    families: List[_Family] = []
+
+    def family(name, type_, help_, unit=''):
+        new = _Family(name, type_, help_, unit)
+        families.append(new)
+        return new
+
+    cpu = metrics.get('cpu')
+    if cpu:
+        utilisation = family('system_cpu_utilisation_percent', 'gauge', 'CPU utilisation over the last interval.')
+        utilisation.add(cpu.get('overall_percent'))
+
+        cores = {str(index): value for index, value in enumerate(cpu.get('per_core_percent') or [])}
+        kept, folded = limit_labels(cores, max_label_values)
+        per_core = family('system_cpu_core_utilisation_percent', 'gauge',
+                          'Per-core CPU utilisation; cores beyond the label limit are averaged into core="_other".')
+        for core, value in kept.items():
+            per_core.add(value, core=core)
+        if folded:
+            per_core.add(sum(folded) / len(folded), core=OTHER)
+
+        seconds = family('system_cpu_time_seconds', 'counter', 'CPU time spent per mode.', 'seconds')
+        for mode, value in (cpu.get('times') or {}).items():
+            seconds.add(value, mode=mode)
+
+        load = family('system_load_average', 'gauge', 'System load average.')
+        for period, value in (cpu.get('load_average') or {}).items():
+            load.add(value, period=period)
+
+        frequency = family('system_cpu_frequency_megahertz', 'gauge', 'Current CPU frequency.', 'megahertz')
+        frequency.add((cpu.get('frequency') or {}).get('current'))
+
+    memory = metrics.get('memory')
+    if memory:
+        physical = memory.get('physical') or {}
+        memory_bytes = family('system_memory_bytes', 'gauge', 'Physical memory by state.', 'bytes')
+        for state in ('total', 'available', 'used', 'free', 'buffers', 'cached', 'shared'):
+            memory_bytes.add(physical.get(state), state=state)
+        family('system_memory_utilisation_percent', 'gauge', 'Physical memory in use.').add(physical.get('percent'))
+
+        swap = memory.get('swap') or {}
+        swap_bytes = family('system_swap_bytes', 'gauge', 'Swap space by state.', 'bytes')
+        for state in ('total', 'used', 'free'):
+            swap_bytes.add(swap.get(state), state=state)
+        swap_io = family('system_swap_io_bytes', 'counter', 'Bytes swapped in and out.', 'bytes')
+        swap_io.add(swap.get('sin'), direction='in')
+        swap_io.add(swap.get('sout'), direction='out')
+
+    disk = metrics.get('disk')
+    if disk:
+        # Filesystems over the label limit are left out (space is not additive)
+        partitions = {
+            p['mountpoint']: p for p in disk.get('partitions') or []
+            if not any(fnmatch.fnmatchcase(p.get('device', '').rsplit('/', 1)[-1], e) for e in exclude_devices)
+        }
+        kept, _ = limit_labels(partitions, max_label_values)
+        fs_bytes = family('system_filesystem_bytes', 'gauge', 'Filesystem space by state.', 'bytes')
+        for mountpoint, partition in kept.items():
+            labels = dict(mountpoint=mountpoint, device=partition.get('device', ''), fstype=partition.get('fstype', ''))
+            for state in ('total', 'used', 'free'):
+                fs_bytes.add(partition.get(state), state=state, **labels)
+
+        kept, folded = limit_labels(disk.get('per_disk_io') or {}, max_label_values, exclude_devices)
+        if folded:
+            kept[OTHER] = _fold(folded)
+        io_bytes = family('system_disk_io_bytes', 'counter', 'Bytes read from and written to disk.', 'bytes')
+        operations = family('system_disk_operations', 'counter', 'Completed disk reads and writes.')
+        io_time = family('system_disk_io_time_seconds', 'counter', 'Time spent on disk reads and writes.', 'seconds')
+        for device, io in kept.items():
+            for direction in ('read', 'write'):
+                io_bytes.add(io.get(f'{direction}_bytes'), device=device, direction=direction)
+                operations.add(io.get(f'{direction}_count'), device=device, direction=direction)
+                elapsed = io.get(f'{direction}_time')
+                io_time.add(elapsed / 1000 if elapsed is not None else None, device=device, direction=direction)
+
+    network = metrics.get('network')
+    if network:
+        kept, folded = limit_labels(network.get('interfaces') or {}, max_label_values, exclude_devices)
+        if folded:
+            kept[OTHER] = _fold(folded)
+        net_bytes = family('system_network_io_bytes', 'counter', 'Bytes sent and received.', 'bytes')
+        packets = family('system_network_packets', 'counter', 'Packets sent and received.')
+        errors = family('system_network_errors', 'counter', 'Receive and transmit errors.')
+        drops = family('system_network_dropped', 'counter', 'Dropped incoming and outgoing packets.')
+        for interface, io in kept.items():
+            net_bytes.add(io.get('bytes_sent'), interface=interface, direction='transmit')
+            net_bytes.add(io.get('bytes_recv'), interface=interface, direction='receive')
+            packets.add(io.get('packets_sent'), interface=interface, direction='transmit')
+            packets.add(io.get('packets_recv'), interface=interface, direction='receive')
+            errors.add(io.get('errout'), interface=interface, direction='transmit')
+            errors.add(io.get('errin'), interface=interface, direction='receive')
+            drops.add(io.get('dropout'), interface=interface, direction='transmit')
+            drops.add(io.get('dropin'), interface=interface, direction='receive')
+
+        connections = network.get('connections') or {}
+        states = family('system_network_connections', 'gauge', 'TCP sockets by state.')
+        for state, count in sorted((connections.get('states') or {}).items()):
+            states.add(count, state=state.lower())
+
+    saturation = metrics.get('saturation')
+    if saturation:
+        stalled = family('system_pressure_stall_seconds', 'counter',
+                         'Time some or all tasks were stalled waiting for a resource (PSI).', 'seconds')
+        for resource in ('cpu', 'memory', 'io'):
+            for kind, stall in (saturation.get(resource) or {}).items():
+                if stall:
+                    stalled.add(stall['total'] / 1_000_000, resource=resource, kind=kind)
+        events = family('system_vm_events', 'counter', 'Memory pressure events from /proc/vmstat.')
+        for event, count in (saturation.get('vmstat') or {}).items():
+            events.add(count, event=event)
+
+    collection = metrics.get('collection')
+    if collection:
+        duration = family('agent_collector_duration_seconds', 'gauge',
+                          'Wall time of the last run of each collector.', 'seconds')
+        for name, status in sorted(collection.items()):
+            duration.add(status.get('duration_ms', 0) / 1000, collector=name)
+
+    agent = metrics.get('agent')
+    if agent:
+        cpu_seconds = family('agent_cpu_time_seconds', 'counter', 'CPU time used by the agent process.', 'seconds')
+        for mode, value in (agent.get('cpu_seconds') or {}).items():
+            cpu_seconds.add(value, mode=mode)
+        family('agent_cpu_utilisation_percent', 'gauge',
+               'Agent CPU use since the previous snapshot, in percent of one core.').add(agent.get('cpu_percent'))
+        family('agent_resident_memory_bytes', 'gauge', 'Resident set size of the agent.', 'bytes').add(
+            agent.get('rss_bytes'))
+        family('agent_threads', 'gauge', 'Python threads in the agent.').add(agent.get('threads'))
+
+        gc_stats = agent.get('gc') or {}
+        collections = family('agent_gc_collections', 'counter', 'Garbage collections per generation.')
+        for generation, count in enumerate(gc_stats.get('collections') or []):
+            collections.add(count, generation=str(generation))
+        pause = family('agent_gc_pause_seconds', 'counter', 'Time spent in garbage collections.', 'seconds')
+        pause.add(gc_stats['pause_ms'] / 1000 if 'pause_ms' in gc_stats else None)
+
+        bounds = [bound / 1000 for bound in agent.get('bucket_bounds_ms') or []]
+        latency = family('agent_function_duration_seconds', 'histogram',
+                         'Wall time of collector function calls.', 'seconds')
+        for name, histogram in sorted((agent.get('functions') or {}).items()):
+            latency.add_histogram(bounds, histogram['buckets'], histogram['sum_ms'] / 1000, function=name)
+
+    out: List[str] = []
+    for item in families:
+        item.render(out)
+    out.append('# EOF\n')
+    return '\n'.join(out).encode('utf-8')
+
+
+class MetricsPage:
+    """
+    Latest exposition page, rendered at most once per collection tick.
+
+    ``update`` only stores the snapshot; the first scrape after it renders
+    the page (and the gzip variant on first request) and every further
+    scrape until the next tick is served from the cached bytes.
+    """
+
+    def __init__(self, max_label_values: int = 64, exclude_devices: Sequence[str] = ()):
+        self.max_label_values = max_label_values
+        self.exclude_devices = list(exclude_devices)
+        self.renders = 0
+        self._latest: Dict[str, Any] = {}
+        self._cache: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def update(self, metrics: Dict[str, Any]):
+        """Store a new snapshot; sections missing from it keep their last value."""
+        with self._lock:
+            for section in SECTIONS:
+                if section in metrics:
+                    self._latest[section] = metrics[section]
+            self._cache = {}
+
+    def get(self, encoding: Optional[str] = None) -> bytes:
+        """
+        Return the page body.
+
+        Args:
+            encoding: 'gzip' for the compressed variant, None for plain
+
+        Returns:
+            Page bytes
+        """
+        key = encoding or 'identity'
+        with self._lock:
+            body = self._cache.get(key)
+            if body is None:
+                plain = self._cache.get('identity')
+                if plain is None:
+                    plain = self._cache['identity'] = render_openmetrics(
+                        self._latest, self.max_label_values, self.exclude_devices,
+                    )
+                    self.renders += 1
+                body = plain if key == 'identity' else self._cache.setdefault(key, gzip.compress(plain, 6))
+            return body
+
+
+def _accepts_gzip(header: Optional[str]) -> bool:
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() == 'gzip':
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+class MetricsServer:
+    """HTTP listener exposing a :class:`MetricsPage` at ``/metrics``."""
+
+    def __init__(self, page: MetricsPage, host: str = '0.0.0.0', port: int = 9108):
+        self.page = page
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                encoding = 'gzip' if _accepts_gzip(self.headers.get('Accept-Encoding')) else None
+                body = page.get(encoding)
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Vary', 'Accept-Encoding')
+                if encoding:
+                    self.send_header('Content-Encoding', encoding)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("scrape %s: " + format, self.client_address[0], *args)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def create_server(config: Dict[str, Any]) -> MetricsServer:
+    """
+    Create the exposition server from the configuration.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        MetricsServer instance (not started)
+    """
+    page = MetricsPage(
+        max_label_values=config.get('serve_max_label_values', 64),
+        exclude_devices=config.get('serve_exclude_devices', []),
+    )
+    return MetricsServer(page, host=config.get('serve_host', '0.0.0.0'), port=config.get('serve_port', 9108))
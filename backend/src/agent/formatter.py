@@ -1,8 +1,15 @@
 """Output formatter for CLI display."""
 import json
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+from .model import as_dict
+
 
 def format_bytes(bytes_value: int) -> str:
     """
@@ -24,16 +31,23 @@ def format_bytes(bytes_value: int) -> str:
     return f"{bytes_value:.2f} PB"
 
 
+def format_percent(value: float) -> str:
+    """Format a percentage, or "n/a" when it is not available."""
+    return "n/a" if value is None else f"{value:.1f}%"
+
+
 def format_metrics_cli(metrics: Dict[str, Any]) -> str:
     """
     Format metrics for CLI output.
 
     Args:
-        metrics: Dictionary containing all collected metrics
+        metrics: Dictionary containing all collected metrics, or a
+            compact :class:`~agent.model.Snapshot`
 
     Returns:
         Formatted string for display
     """
+    metrics = as_dict(metrics)
     lines = []
     lines.append("=" * 80)
     lines.append(f"System Metrics - {metrics['timestamp']}")
@@ -50,7 +64,9 @@ def format_metrics_cli(metrics: Dict[str, Any]) -> str:
                         f"{cpu['load_average']['5min']:.2f} (5m), "
                         f"{cpu['load_average']['15min']:.2f} (15m)")
 
-        lines.append(f"  Cores: {cpu['count']['logical']} logical, {cpu['count']['physical']} physical")
+        count = cpu.get('count') or metrics.get('inventory', {}).get('cpu', {}).get('count')
+        if count:
+            lines.append(f"  Cores: {count['logical']} logical, {count['physical']} physical")
 
         if cpu.get('per_core_percent'):
             core_usage = ', '.join([f"{p:.1f}%" for p in cpu['per_core_percent']])
@@ -83,6 +99,12 @@ def format_metrics_cli(metrics: Dict[str, Any]) -> str:
             io = disk['io_stats']
             lines.append(f"  I/O: Read {format_bytes(io['read_bytes'])}, Write {format_bytes(io['write_bytes'])}")
 
+        disk_rates = metrics.get('rates', {}).get('disk', {}).get('total')
+        if disk_rates:
+            lines.append(f"  Rate: {disk_rates['read_iops']:.1f} read IOPS, {disk_rates['write_iops']:.1f} write IOPS, "
+                         f"{format_bytes(disk_rates['read_bytes_per_sec'])}/s read, "
+                         f"{format_bytes(disk_rates['write_bytes_per_sec'])}/s write")
+
     # Network Metrics
     if 'network' in metrics:
         net = metrics['network']
@@ -95,10 +117,73 @@ def format_metrics_cli(metrics: Dict[str, Any]) -> str:
         lines.append(f"    Errors: {total['errin']} in, {total['errout']} out")
         lines.append(f"    Drops: {total['dropin']} in, {total['dropout']} out")
 
+        net_rates = metrics.get('rates', {}).get('network', {}).get('total')
+        if net_rates:
+            lines.append(f"  Bandwidth: {net_rates['mbps_sent']:.2f} Mbps sent, {net_rates['mbps_recv']:.2f} Mbps received")
+
         if net['connections']:
             conn = net['connections']
             lines.append(f"  Connections: {conn['total']} total, {conn['established']} established")
 
+    saturation_rates = metrics.get('rates', {}).get('saturation')
+    if saturation_rates:
+        lines.append("\n[Saturation]")
+        lines.append(f"  Stalled: CPU {format_percent(saturation_rates['cpu_some_percent'])}, "
+                     f"memory {format_percent(saturation_rates['memory_some_percent'])} "
+                     f"({format_percent(saturation_rates['memory_full_percent'])} full), "
+                     f"I/O {format_percent(saturation_rates['io_some_percent'])} "
+                     f"({format_percent(saturation_rates['io_full_percent'])} full)")
+        lines.append(f"  Major faults {saturation_rates['pgmajfault_per_sec']:.1f}/s, "
+                     f"reclaim stalls {saturation_rates['allocstall_per_sec']:.1f}/s, "
+                     f"swap {saturation_rates['pswpin_per_sec']:.1f} in / "
+                     f"{saturation_rates['pswpout_per_sec']:.1f} out pages/s")
+
+    if 'process_scan' in metrics:
+        scan = metrics['process_scan']
+        lines.append("\n[Processes]")
+        lines.append(f"  Scanned {scan['count']} processes in {scan['duration_ms']:.1f} ms")
+
+    if metrics.get('cgroups'):
+        cgroups = metrics['cgroups']
+        lines.append("\n[Cgroups]")
+        lines.append(f"  {cgroups['count']} cgroups, scanned in {cgroups['scan']['duration_ms']:.1f} ms")
+        for usage in cgroups['top_cpu']:
+            lines.append(f"  CPU {usage['cpu_percent']:5.1f}%  {usage['path']}")
+        for usage in cgroups['top_memory']:
+            lines.append(f"  Memory {format_bytes(usage['memory_current'])}  {usage['path']}")
+        for usage in cgroups['top_io']:
+            lines.append(f"  I/O {format_bytes(usage['read_bytes_per_sec'] + usage['write_bytes_per_sec'])}/s  "
+                         f"{usage['path']}")
+
+    if 'collection' in metrics:
+        timings = []
+        for name, result in metrics['collection'].items():
+            timing = f"{name} {result['duration_ms']:.1f} ms"
+            if result['status'] != 'ok':
+                timing += f" ({result['status']})"
+            timings.append(timing)
+        lines.append(f"\n[Collectors] {', '.join(timings)}")
+
+    if 'agent' in metrics:
+        agent = metrics['agent']
+        overhead = [f"CPU {agent['cpu_percent']:.2f}% of a core" if 'cpu_percent' in agent else "CPU n/a"]
+        if 'rss_bytes' in agent:
+            overhead.append(f"RSS {format_bytes(agent['rss_bytes'])}")
+        gc_stats = agent['gc']
+        overhead.append(f"GC {'/'.join(str(count) for count in gc_stats['collections'])} "
+                        f"({gc_stats['pause_ms']:.1f} ms)")
+        lines.append(f"[Agent] {', '.join(overhead)}")
+        for name, histogram in agent['functions'].items():
+            if histogram['count']:
+                lines.append(f"  {name}: avg {histogram['sum_ms'] / histogram['count']:.1f} ms, "
+                             f"max {histogram['max_ms']:.1f} ms ({histogram['count']} calls)")
+
+    if 'scheduler' in metrics:
+        sched = metrics['scheduler']
+        lines.append(f"[Scheduler] jitter {sched['jitter_last_ms']:.1f} ms "
+                     f"(max {sched['jitter_max_ms']:.1f} ms), "
+                     f"{sched['overruns']} overruns, {sched['skipped_ticks']} skipped ticks")
+
     lines.append("=" * 80)
     return '\n'.join(lines)
 
@@ -108,9 +193,60 @@ def format_metrics_json(metrics: Dict[str, Any]) -> str:
     Format metrics as JSON.
 
     Args:
-        metrics: Dictionary containing all collected metrics
+        metrics: Dictionary containing all collected metrics, or a
+            compact :class:`~agent.model.Snapshot`
 
     Returns:
         JSON string
     """
-    return json.dumps(metrics, indent=2, default=str)
+    return json.dumps(as_dict(metrics), indent=2, default=str)
+
+
+# Snapshots hold only JSON-native values, so no default= fallback is needed
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, check_circular=False)
+
+
+def format_metrics_ndjson(metrics: Dict[str, Any]) -> bytes:
+    """
+    Format metrics as one compact NDJSON line.
+
+    Uses orjson when installed, the stdlib encoder otherwise.
+
+    Args:
+        metrics: Dictionary containing all collected metrics, or a
+            compact :class:`~agent.model.Snapshot`
+
+    Returns:
+        UTF-8 encoded JSON line including the trailing newline
+    """
+    metrics = as_dict(metrics)
+    if orjson is not None:
+        return orjson.dumps(metrics, option=orjson.OPT_APPEND_NEWLINE)
+    return (_COMPACT_ENCODER.encode(metrics) + '\n').encode('utf-8')
+
+
+class NdjsonWriter:
+    """
+    Write snapshots as NDJSON lines to a binary stream.
+
+    Lines are written to the stream's buffer and flushed every
+    ``flush_lines`` snapshots, so a consumer tailing the output always
+    sees complete lines.
+    """
+
+    def __init__(self, stream: BinaryIO, flush_lines: int = 1):
+        self.stream = stream
+        self.flush_lines = flush_lines
+        self._pending = 0
+
+    def write(self, metrics: Dict[str, Any]):
+        """Append one snapshot line."""
+        self.stream.write(format_metrics_ndjson(metrics))
+        self._pending += 1
+        if self._pending >= self.flush_lines:
+            self.flush()
+
+    def flush(self):
+        """Flush buffered lines to the stream."""
+        self.stream.flush()
+        self._pending = 0
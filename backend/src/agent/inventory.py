@@ -0,0 +1,152 @@
+"""Static host metadata cache."""
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional
+
+import psutil
+
+
+def _read_addresses() -> Dict[str, list]:
+    """Read interface addresses from the system."""
+    addresses = {}
+    for interface_name, addr_list in psutil.net_if_addrs().items():
+        addresses[interface_name] = [
+            {
+                "family": str(addr.family),
+                "address": addr.address,
+                "netmask": addr.netmask,
+                "broadcast": addr.broadcast,
+            }
+            for addr in addr_list
+        ]
+    return addresses
+
+
+def _read_cpu_frequency_limits() -> Dict[str, Optional[float]]:
+    """Read CPU frequency limits from the system."""
+    try:
+        cpu_freq = psutil.cpu_freq()
+    except (AttributeError, RuntimeError):
+        cpu_freq = None
+
+    return {
+        "min": cpu_freq.min if cpu_freq else None,
+        "max": cpu_freq.max if cpu_freq else None,
+    }
+
+
+class HostInventory:
+    """
+    Cache of host metadata that almost never changes.
+
+    Hostname, boot time, CPU core counts, CPU frequency limits and
+    interface addresses are read once and then refreshed only when the
+    refresh period elapses or when the set of network interfaces seen by
+    the network collector changes. ``version`` is bumped whenever the
+    cached data actually changes, so the agent can send the inventory
+    once per session and again only after a change.
+    """
+
+    def __init__(self, refresh_interval: float = 3600):
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._data: Dict[str, Any] = {}
+        self._interfaces: Optional[frozenset] = None
+        self._refreshed_at = 0.0
+        self._refreshed_wall = 0.0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Re-read all static host metadata."""
+        addresses = _read_addresses()
+        data = {
+            "hostname": socket.gethostname(),
+            "boot_time": psutil.boot_time(),
+            "cpu": {
+                "count": {
+                    "logical": psutil.cpu_count(logical=True),
+                    "physical": psutil.cpu_count(logical=False),
+                },
+                "frequency": _read_cpu_frequency_limits(),
+            },
+            "network": {
+                "addresses": addresses,
+            },
+        }
+
+        with self._lock:
+            if data != self._data:
+                self._data = data
+                self.version += 1
+            self._refreshed_at = time.monotonic()
+            self._refreshed_wall = time.time()
+
+    def maybe_refresh(self, interfaces: Optional[Iterable[str]] = None) -> bool:
+        """
+        Refresh if the cache expired or the interface set changed.
+
+        Args:
+            interfaces: Interface names currently seen (e.g. from
+                ``/proc/net/dev``); compared against the cached set
+
+        Returns:
+            True if a refresh was performed
+        """
+        expired = time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+        changed = False
+        if interfaces is not None:
+            interfaces = frozenset(interfaces)
+            changed = self._interfaces is not None and interfaces != self._interfaces
+            self._interfaces = interfaces
+
+        if expired or changed:
+            self.refresh()
+            return True
+        return False
+
+    @property
+    def hostname(self) -> str:
+        return self._data["hostname"]
+
+    @property
+    def cpu_count(self) -> Dict[str, Optional[int]]:
+        return self._data["cpu"]["count"]
+
+    @property
+    def cpu_frequency_limits(self) -> Dict[str, Optional[float]]:
+        return self._data["cpu"]["frequency"]
+
+    @property
+    def addresses(self) -> Dict[str, list]:
+        return self._data["network"]["addresses"]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the inventory section for the metrics payload."""
+        with self._lock:
+            data = dict(self._data)
+            data["version"] = self.version
+            data["refreshed_at"] = datetime.utcfromtimestamp(self._refreshed_wall).isoformat()
+        return data
+
+
+_inventory: Optional[HostInventory] = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory() -> HostInventory:
+    """
+    Return the process-wide host inventory, filling it on first use.
+
+    Returns:
+        HostInventory instance
+    """
+    global _inventory
+    if _inventory is None:
+        with _inventory_lock:
+            if _inventory is None:
+                _inventory = HostInventory()
+    return _inventory
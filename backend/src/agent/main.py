@@ -4,19 +4,34 @@ import logging
 import argparse
 import sys
 from datetime import datetime
-from typing import Dict, Any
-
-from .config_loader import load_config, validate_config
-from .formatter import format_metrics_cli, format_metrics_json
-from .collectors import cpu, memory, disk, network
-
-
-def setup_logging(config: Dict[str, Any]) -> logging.Logger:
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+from .config_loader import load_config, validate_config, collector_intervals
+from .exporter import create_server
+from .formatter import format_metrics_cli, format_metrics_json, NdjsonWriter
+from .buffer import create_buffer
+from .inventory import get_inventory
+from .rates import COUNTER_SECTIONS, RateStage
+from .runner import CollectorRunner
+from .scheduler import FixedRateScheduler, CollectorSchedule
+from .selfstats import SelfMonitor
+from .timeseries import TimeSeriesStore, snapshot_time
+from .transport import create_shipper
+from .collectors.registry import COSTS, get_registry, resolve
+
+try:
+    from ..alerts.engine import Alert, AlertEngine, load_rules
+except ImportError:  # agent imported as a top-level package (PYTHONPATH=src)
+    from alerts.engine import Alert, AlertEngine, load_rules
+
+
+def setup_logging(config: Dict[str, Any], stream=None) -> logging.Logger:
     """
     Setup logging configuration.
 
     Args:
         config: Configuration dictionary
+        stream: Console stream for log records (stdout if omitted)
 
     Returns:
         Logger instance
@@ -27,7 +42,7 @@ def setup_logging(config: Dict[str, Any]) -> logging.Logger:
         level=log_level,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.StreamHandler(sys.stdout),
+            logging.StreamHandler(stream or sys.stdout),
             logging.FileHandler(config['log_file'])
         ]
     )
@@ -35,54 +50,203 @@ def setup_logging(config: Dict[str, Any]) -> logging.Logger:
     return logging.getLogger('agent')
 
 
-def collect_all_metrics(config: Dict[str, Any]) -> Dict[str, Any]:
+_runner: Optional[CollectorRunner] = None
+_sent_inventory_version = 0
+_rate_stage = RateStage()
+_self_monitor: Optional[SelfMonitor] = None
+
+
+def get_self_monitor() -> SelfMonitor:
+    """Return the shared self-instrumentation monitor, creating it on first use."""
+    global _self_monitor
+    if _self_monitor is None:
+        _self_monitor = SelfMonitor()
+    return _self_monitor
+
+
+def get_runner(config: Dict[str, Any]) -> CollectorRunner:
+    """
+    Return the shared collector runner, creating it on first use.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        CollectorRunner instance
+    """
+    global _runner
+    if _runner is None:
+        _runner = CollectorRunner(max_workers=config.get('collector_workers', 4))
+    return _runner
+
+
+def _stamp_read_time(func: Callable[[], Any], section: str, read_at: Dict[str, float]) -> Callable[[], Any]:
+    """Wrap a collector task to record when it returned its counters."""
+    def task():
+        result = func()
+        read_at[section] = time.monotonic()
+        return result
+
+    return task
+
+
+def collect_all_metrics(
+    config: Dict[str, Any],
+    runner: Optional[CollectorRunner] = None,
+    timestamp: Optional[float] = None,
+    due: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
     """
     Collect all enabled metrics.
 
+    Collectors run concurrently, each with its own deadline. A collector
+    that misses the deadline is left out of the snapshot and marked as
+    timed out in the ``collection`` section, which also records the wall
+    time of every collector.
+
+    Static host data (core counts, frequency limits, interface addresses)
+    is not repeated per collector; it is attached as the ``inventory``
+    section to the first snapshot and to any snapshot after it changed.
+
+    Collectors come from the collector registry and are imported the
+    first time they are enabled; the sections derived from the shared
+    process table (top processes) are added for enabled collectors that
+    declare them.
+
+    With ``self_metrics`` enabled every collector function is timed and
+    the ``agent`` section reports the agent's own overhead (see
+    :class:`~agent.selfstats.SelfMonitor`).
+
     Args:
         config: Configuration dictionary
+        runner: Collector runner to use; the shared runner if omitted
+        timestamp: Scheduled tick time (epoch seconds); now if omitted
+        due: Collectors to run on this tick; every enabled collector if
+            omitted. Sections of collectors that are not due are absent.
 
     Returns:
         Dictionary containing all metrics with timestamp
     """
+    global _sent_inventory_version
+
+    started = time.perf_counter()
+    monitor = get_self_monitor() if config.get('self_metrics', True) else None
+
+    inventory = get_inventory()
+    inventory.refresh_interval = config.get('inventory_refresh', 3600)
+    inventory.maybe_refresh()
+
+    if timestamp is None:
+        collected_at = datetime.utcnow()
+    else:
+        collected_at = datetime.utcfromtimestamp(timestamp)
+
     metrics = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "hostname": __import__('socket').gethostname(),
+        "timestamp": collected_at.isoformat(),
+        "hostname": inventory.hostname,
     }
 
-    collectors_config = config.get('collectors', {})
+    configured = collector_intervals(config)
+    enabled = configured
+    if due is not None:
+        enabled = {name: configured[name] for name in due if name in configured}
+    limit = config.get('top_processes_limit', 5)
+    registry = get_registry()
+
+    # Expensive collectors are started first so they finish sooner
+    tasks = {}
+    for name in sorted(enabled, key=lambda name: -COSTS.index(registry.spec(name).cost)):
+        tasks[name] = registry.task(name, config)
+
+    if monitor is not None:
+        tasks = {name: monitor.timed(func) for name, func in tasks.items()}
+
+    # Rates use the time each counter section was read, not the end of
+    # the cycle, which waits for the slowest collector
+    read_at: Dict[str, float] = {}
+    for name in tasks:
+        section = registry.spec(name).section
+        if section in COUNTER_SECTIONS:
+            tasks[name] = _stamp_read_time(tasks[name], section, read_at)
+
+    if runner is None:
+        runner = get_runner(config)
+    results, status = runner.run(
+        tasks,
+        timeout=config.get('collector_timeout', 5),
+        timeouts=config.get('collector_timeouts'),
+    )
 
-    try:
-        if collectors_config.get('cpu', True):
-            metrics['cpu'] = cpu.collect_cpu_metrics()
-            metrics['top_cpu_processes'] = cpu.get_top_cpu_processes(
-                limit=config.get('top_processes_limit', 5)
-            )
-    except Exception as e:
-        logging.error(f"Failed to collect CPU metrics: {e}")
+    for spec in registry.specs():
+        if spec.section is not None and spec.name in results:
+            metrics[spec.section] = results[spec.name]
+
+    # Per-second rates from the raw counters, computed once at the edge
+    rates = _rate_stage.process(metrics, now=time.monotonic(), read_at=read_at)
+    if rates:
+        metrics['rates'] = rates
+
+    process_table = results.get('processes')
+    if process_table is not None:
+        metrics['process_scan'] = process_table.stats()
+        for spec in registry.specs():
+            if spec.name not in configured:
+                continue
+            for section, target in spec.process_views:
+                view = resolve(target)
+                if monitor is not None:
+                    view = monitor.timed(view)
+                metrics[section] = view(limit, process_table)
+
+    # Static host data is sent once per session and again only when it
+    # changed, including changes noticed by the collectors on this tick
+    if inventory.version != _sent_inventory_version:
+        metrics['inventory'] = inventory.as_dict()
+        _sent_inventory_version = inventory.version
+
+    metrics['collection'] = status
+
+    if monitor is not None:
+        monitor.observe('collect_all_metrics', time.perf_counter() - started)
+        metrics['agent'] = monitor.stats()
 
-    try:
-        if collectors_config.get('memory', True):
-            metrics['memory'] = memory.collect_memory_metrics()
-            metrics['top_memory_processes'] = memory.get_memory_by_process(
-                limit=config.get('top_processes_limit', 5)
-            )
-    except Exception as e:
-        logging.error(f"Failed to collect memory metrics: {e}")
+    return metrics
 
-    try:
-        if collectors_config.get('disk', True):
-            metrics['disk'] = disk.collect_disk_metrics()
-    except Exception as e:
-        logging.error(f"Failed to collect disk metrics: {e}")
 
-    try:
-        if collectors_config.get('network', True):
-            metrics['network'] = network.collect_network_metrics()
-    except Exception as e:
-        logging.error(f"Failed to collect network metrics: {e}")
+def create_alert_engine(config: Dict[str, Any]) -> Optional[AlertEngine]:
+    """
+    Compile the agent's alert rules.
 
-    return metrics
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        AlertEngine for ``alerts_file``, or None when it is not set
+    """
+    if not config.get('alerts_file'):
+        return None
+    return AlertEngine(load_rules(config['alerts_file']))
+
+
+def evaluate_alerts(engine: AlertEngine, metrics: Dict[str, Any], logger: logging.Logger) -> List[Alert]:
+    """
+    Run a snapshot through the alert rules and log the notifications.
+
+    Args:
+        engine: Alert engine of this agent
+        metrics: Snapshot produced by ``collect_all_metrics``
+        logger: Logger receiving one warning per notification
+
+    Returns:
+        Notifications due at this snapshot
+    """
+    alerts = engine.evaluate(metrics, now=snapshot_time(metrics))
+    for alert in alerts:
+        logger.warning(
+            f"Alert {alert.state}: {alert.rule}[{alert.instance}] "
+            f"({alert.severity}, {alert.expr}, value={alert.value})"
+        )
+    return alerts
 
 
 def main():
@@ -106,9 +270,19 @@ def main():
     parser.add_argument(
         '--format',
         type=str,
-        choices=['cli', 'json'],
+        choices=['cli', 'json', 'ndjson'],
         default='cli',
-        help='Output format (cli or json)'
+        help='Output format (cli, json or ndjson - one compact line per snapshot)'
+    )
+    parser.add_argument(
+        '--ship',
+        action='store_true',
+        help='Send snapshots to server_url in batches'
+    )
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Expose the latest snapshot in OpenMetrics format at /metrics'
     )
 
     args = parser.parse_args()
@@ -127,35 +301,70 @@ def main():
         print(f"Configuration error: {e}")
         sys.exit(1)
 
-    # Setup logging
-    logger = setup_logging(config)
+    # Setup logging; keep stdout pure NDJSON for machine consumers
+    logger = setup_logging(config, stream=sys.stderr if args.format == 'ndjson' else None)
 
     logger.info("Starting System Resource Metrics Agent")
     logger.info(f"Configuration: interval={config['interval']}s")
+    logger.info(f"Collector intervals: {collector_intervals(config)}")
+
+    shipper = None
+    if args.ship:
+        shipper = create_shipper(config, create_buffer(config))
+        shipper.start()
+        logger.info(f"Shipping metrics to {config['server_url']}")
+
+    server = None
+    if args.serve:
+        server = create_server(config)
+        server.start()
+        logger.info(f"Serving metrics on http://{config['serve_host']}:{server.address[1]}/metrics")
+
+    history = None
+    if config.get('history_dir'):
+        history = TimeSeriesStore(config['history_dir'])
+        logger.info(f"Recording history in {config['history_dir']}")
+
+    alert_engine = create_alert_engine(config)
+    if alert_engine is not None:
+        logger.info(f"Evaluating {len(alert_engine.rules.rules)} alert rules from {config['alerts_file']}")
+
+    writer = NdjsonWriter(sys.stdout.buffer) if args.format == 'ndjson' else None
+
+    def emit(metrics: Dict[str, Any]):
+        if shipper is not None:
+            metrics['transport'] = shipper.stats()
+            shipper.submit(metrics)
+        if server is not None:
+            server.page.update(metrics)
+        if history is not None:
+            history.append_snapshot(metrics)
+        if alert_engine is not None:
+            evaluate_alerts(alert_engine, metrics, logger)
+
+        if writer is not None:
+            writer.write(metrics)
+        elif args.format == 'json':
+            print(format_metrics_json(metrics))
+        else:
+            print(format_metrics_cli(metrics))
 
     try:
         if args.once:
             # Collect metrics once and exit
-            metrics = collect_all_metrics(config)
-
-            if args.format == 'json':
-                print(format_metrics_json(metrics))
-            else:
-                print(format_metrics_cli(metrics))
+            emit(collect_all_metrics(config))
 
         else:
             # Continuous collection
             logger.info("Entering continuous collection mode. Press Ctrl+C to stop.")
 
-            while True:
-                metrics = collect_all_metrics(config)
-
-                if args.format == 'json':
-                    print(format_metrics_json(metrics))
-                else:
-                    print(format_metrics_cli(metrics))
+            schedule = CollectorSchedule(collector_intervals(config))
+            scheduler = FixedRateScheduler(schedule.base_interval)
 
-                time.sleep(config['interval'])
+            for tick in scheduler:
+                metrics = collect_all_metrics(config, timestamp=tick, due=schedule.due(tick))
+                metrics['scheduler'] = scheduler.stats()
+                emit(metrics)
 
     except KeyboardInterrupt:
         logger.info("Shutting down agent")
@@ -163,6 +372,13 @@ def main():
     except Exception as e:
         logger.error(f"Unexpected error: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        if shipper is not None:
+            shipper.stop(flush=True)
+        if server is not None:
+            server.stop()
+        if history is not None:
+            history.close()
 
 
 if __name__ == '__main__':
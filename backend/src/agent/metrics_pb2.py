@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: metrics.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'metrics.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rmetrics.proto\x12\nmetrics.v1\"\xa8\x06\n\x08Snapshot\x12\x11\n\ttimestamp\x18\x01 \x01(\t\x12\x10\n\x08hostname\x18\x02 \x01(\t\x12#\n\x03\x63pu\x18\x03 \x01(\x0b\x32\x16.metrics.v1.CpuMetrics\x12)\n\x06memory\x18\x04 \x01(\x0b\x32\x19.metrics.v1.MemoryMetrics\x12%\n\x04\x64isk\x18\x05 \x01(\x0b\x32\x17.metrics.v1.DiskMetrics\x12+\n\x07network\x18\x06 \x01(\x0b\x32\x1a.metrics.v1.NetworkMetrics\x12\x31\n\x11top_cpu_processes\x18\x07 \x03(\x0b\x32\x16.metrics.v1.ProcessCpu\x12\x37\n\x14top_memory_processes\x18\x08 \x03(\x0b\x32\x19.metrics.v1.ProcessMemory\x12-\n\x0cprocess_scan\x18\t \x01(\x0b\x32\x17.metrics.v1.ProcessScan\x12 \n\x05rates\x18\n \x01(\x0b\x32\x11.metrics.v1.Rates\x12(\n\tinventory\x18\x0b \x01(\x0b\x32\x15.metrics.v1.Inventory\x12\x38\n\ncollection\x18\x0c \x03(\x0b\x32$.metrics.v1.Snapshot.CollectionEntry\x12-\n\tscheduler\x18\r \x01(\x0b\x32\x1a.metrics.v1.SchedulerStats\x12-\n\ttransport\x18\x0e \x01(\x0b\x32\x1a.metrics.v1.TransportStats\x12%\n\x05\x61gent\x18\x0f \x01(\x0b\x32\x16.metrics.v1.AgentStats\x12*\n\x07\x63groups\x18\x10 \x01(\x0b\x32\x19.metrics.v1.CgroupMetrics\x12\x31\n\nsaturation\x18\x11 \x01(\x0b\x32\x1d.metrics.v1.SaturationMetrics\x1aN\n\x0f\x43ollectionEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12*\n\x05value\x18\x02 \x01(\x0b\x32\x1b.metrics.v1.CollectorStatus:\x02\x38\x01\"\xb2\x02\n\nCpuMetrics\x12\x1c\n\x0foverall_percent\x18\x01 \x01(\x01H\x00\x88\x01\x01\x12\x18\n\x10per_core_percent\x18\x02 \x03(\x01\x12#\n\x05times\x18\x03 \x01(\x0b\x32\x14.metrics.v1.CpuTimes\x12\x32\n\rtimes_percent\x18\x04 \x01(\x0b\x32\x1b.metrics.v1.CpuTimesPercent\x12-\n\x0cload_average\x18\x05 \x01(\x0b\x32\x17.metrics.v1.LoadAverage\x12+\n\tfrequency\x18\x06 \x01(\x0b\x32\x18.metrics.v1.CpuFrequency\x12#\n\x05\x63ount\x18\x07 \x01(\x0b\x32\x14.metrics.v1.CpuCountB\x12\n\x10_overall_percent\"\x82\x01\n\x08\x43puTimes\x12\x11\n\x04user\x18\x01 \x01(\x01H\x00\x88\x01\x01\x12\x13\n\x06system\x18\x02 \x01(\x01H\x01\x88\x01\x01\x12\x11\n\x04idle\x18\x03 \x01(\x01H\x02\x88\x01\x01\x12\x13\n\x06iowait\x18\x04 \x01(\x01H\x03\x88\x01\x01\x42\x07\n\x05_userB\t\n\x07_systemB\x07\n\x05_idleB\t\n\x07_iowait\"\x89\x01\n\x0f\x43puTimesPercent\x12\x11\n\x04user\x18\x01 \x01(\x01H\x00\x88\x01\x01\x12\x13\n\x06system\x18\x02 \x01(\x01H\x01\x88\x01\x01\x12\x11\n\x04idle\x18\x03 \x01(\x01H\x02\x88\x01\x01\x12\x13\n\x06iowait\x18\x04 \x01(\x01H\x03\x88\x01\x01\x42\x07\n\x05_userB\t\n\x07_systemB\x07\n\x05_idleB\t\n\x07_iowait\"}\n\x0bLoadAverage\x12\x14\n\x07one_min\x18\x01 \x01(\x01H\x00\x88\x01\x01\x12\x15\n\x08\x66ive_min\x18\x02 \x01(\x01H\x01\x88\x01\x01\x12\x18\n\x0b\x66ifteen_min\x18\x03 \x01(\x01H\x02\x88\x01\x01\x42\n\n\x08_one_minB\x0b\n\t_five_minB\x0e\n\x0c_fifteen_min\"d\n\x0c\x43puFrequency\x12\x14\n\x07\x63urrent\x18\x01 \x01(\x01H\x00\x88\x01\x01\x12\x10\n\x03min\x18\x02 \x01(\x01H\x01\x88\x01\x01\x12\x10\n\x03max\x18\x03 \x01(\x01H\x02\x88\x01\x01\x42\n\n\x08_currentB\x06\n\x04_minB\x06\n\x04_max\"P\n\x08\x43puCount\x12\x14\n\x07logical\x18\x01 \x01(\rH\x00\x88\x01\x01\x12\x15\n\x08physical\x18\x02 \x01(\rH\x01\x88\x01\x01\x42\n\n\x08_logicalB\x0b\n\t_physical\"c\n\rMemoryMetrics\x12,\n\x08physical\x18\x01 \x01(\x0b\x32\x1a.metrics.v1.PhysicalMemory\x12$\n\x04swap\x18\x02 \x01(\x0b\x32\x16.metrics.v1.SwapMemory\"\xc1\x01\n\x0ePhysicalMemory\x12\r\n\x05total\x18\x01 \x01(\x04\x12\x11\n\tavailable\x18\x02 \x01(\x04\x12\x0c\n\x04used\x18\x03 \x01(\x04\x12\x0c\n\x04\x66ree\x18\x04 \x01(\x04\x12\x0f\n\x07percent\x18\x05 \x01(\x01\x12\x14\n\x07\x62uffers\x18\x06 \x01(\x04H\x00\x88\x01\x01\x12\x13\n\x06\x63\x61\x63hed\x18\x07 \x01(\x04H\x01\x88\x01\x01\x12\x13\n\x06shared\x18\x08 \x01(\x04H\x02\x88\x01\x01\x42\n\n\x08_buffersB\t\n\x07_cachedB\t\n\x07_shared\"c\n\nSwapMemory\x12\r\n\x05total\x18\x01 \x01(\x04\x12\x0c\n\x04used\x18\x02 \x01(\x04\x12\x0c\n\x04\x66ree\x18\x03 \x01(\x04\x12\x0f\n\x07percent\x18\x04 \x01(\x01\x12\x0b\n\x03sin\x18\x05 \x01(\x04\x12\x0c\n\x04sout\x18\x06 \x01(\x04\"\xe1\x01\n\x0b\x44iskMetrics\x12)\n\npartitions\x18\x01 \x03(\x0b\x32\x15.metrics.v1.Partition\x12$\n\x08io_stats\x18\x02 \x01(\x0b\x32\x12.metrics.v1.DiskIo\x12;\n\x0bper_disk_io\x18\x03 \x03(\x0b\x32&.metrics.v1.DiskMetrics.PerDiskIoEntry\x1a\x44\n\x0ePerDiskIoEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12!\n\x05value\x18\x02 \x01(\x0b\x32\x12.metrics.v1.DiskIo:\x02\x38\x01\"\x89\x01\n\tPartition\x12\x0e\n\x06\x64\x65vice\x18\x01 \x01(\t\x12\x12\n\nmountpoint\x18\x02 \x01(\t\x12\x0e\n\x06\x66stype\x18\x03 \x01(\t\x12\x0c\n\x04opts\x18\x04 \x01(\t\x12\r\n\x05total\x18\x05 \x01(\x04\x12\x0c\n\x04used\x18\x06 \x01(\x04\x12\x0c\n\x04\x66ree\x18\x07 \x01(\x04\x12\x0f\n\x07percent\x18\x08 \x01(\x01\"\x81\x01\n\x06\x44iskIo\x12\x12\n\nread_count\x18\x01 \x01(\x04\x12\x13\n\x0bwrite_count\x18\x02 \x01(\x04\x12\x12\n\nread_bytes\x18\x03 \x01(\x04\x12\x13\n\x0bwrite_bytes\x18\x04 \x01(\x04\x12\x11\n\tread_time\x18\x05 \x01(\x04\x12\x12\n\nwrite_time\x18\x06 \x01(\x04\"\xef\x02\n\x0eNetworkMetrics\x12>\n\ninterfaces\x18\x01 \x03(\x0b\x32*.metrics.v1.NetworkMetrics.InterfacesEntry\x12 \n\x05total\x18\x02 \x01(\x0b\x32\x11.metrics.v1.NetIo\x12,\n\x0b\x63onnections\x18\x03 \x01(\x0b\x32\x17.metrics.v1.Connections\x12<\n\taddresses\x18\x04 \x03(\x0b\x32).metrics.v1.NetworkMetrics.AddressesEntry\x1a\x44\n\x0fInterfacesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12 \n\x05value\x18\x02 \x01(\x0b\x32\x11.metrics.v1.NetIo:\x02\x38\x01\x1aI\n\x0e\x41\x64\x64ressesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12&\n\x05value\x18\x02 \x01(\x0b\x32\x17.metrics.v1.AddressList:\x02\x38\x01\"\x9b\x01\n\x05NetIo\x12\x12\n\nbytes_sent\x18\x01 \x01(\x04\x12\x12\n\nbytes_recv\x18\x02 \x01(\x04\x12\x14\n\x0cpackets_sent\x18\x03 \x01(\x04\x12\x14\n\x0cpackets_recv\x18\x04 \x01(\x04\x12\r\n\x05\x65rrin\x18\x05 \x01(\x04\x12\x0e\n\x06\x65rrout\x18\x06 \x01(\x04\x12\x0e\n\x06\x64ropin\x18\x07 \x01(\x04\x12\x0f\n\x07\x64ropout\x18\x08 \x01(\x04\"\xd9\x01\n\x0b\x43onnections\x12\x13\n\x0b\x65stablished\x18\x01 \x01(\x04\x12\x11\n\ttime_wait\x18\x02 \x01(\x04\x12\x12\n\nclose_wait\x18\x03 \x01(\x04\x12\x0e\n\x06listen\x18\x04 \x01(\x04\x12\r\n\x05total\x18\x05 \x01(\x04\x12\x0b\n\x03udp\x18\x06 \x01(\x04\x12\x33\n\x06states\x18\x07 \x03(\x0b\x32#.metrics.v1.Connections.StatesEntry\x1a-\n\x0bStatesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x04:\x02\x38\x01\"5\n\x0b\x41\x64\x64ressList\x12&\n\taddresses\x18\x01 \x03(\x0b\x32\x13.metrics.v1.Address\"\x93\x01\n\x07\x41\x64\x64ress\x12\x13\n\x06\x66\x61mily\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x14\n\x07\x61\x64\x64ress\x18\x02 \x01(\tH\x01\x88\x01\x01\x12\x14\n\x07netmask\x18\x03 \x01(\tH\x02\x88\x01\x01\x12\x16\n\tbroadcast\x18\x04 \x01(\tH\x03\x88\x01\x01\x42\t\n\x07_familyB\n\n\x08_addressB\n\n\x08_netmaskB\x0c\n\n_broadcast\"<\n\nProcessCpu\x12\x0b\n\x03pid\x18\x01 \x01(\r\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x13\n\x0b\x63pu_percent\x18\x03 \x01(\x01\"U\n\rProcessMemory\x12\x0b\n\x03pid\x18\x01 \x01(\r\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x11\n\tmemory_mb\x18\x03 \x01(\x01\x12\x16\n\x0ememory_percent\x18\x04 \x01(\x01\"1\n\x0bProcessScan\x12\r\n\x05\x63ount\x18\x01 \x01(\x04\x12\x13\n\x0b\x64uration_ms\x18\x02 \x01(\x01\"\xab\x01\n\x05Rates\x12#\n\x04\x64isk\x18\x01 \x01(\x0b\x32\x15.metrics.v1.DiskRates\x12)\n\x07network\x18\x02 \x01(\x0b\x32\x18.metrics.v1.NetworkRates\x12\"\n\x04swap\x18\x03 \x01(\x0b\x32\x14.metrics.v1.SwapRate\x12.\n\nsaturation\x18\x04 \x01(\x0b\x32\x1a.metrics.v1.SaturationRate\"\xac\x01\n\tDiskRates\x12#\n\x05total\x18\x01 \x01(\x0b\x32\x14.metrics.v1.DiskRate\x12\x34\n\x08per_disk\x18\x02 \x03(\x0b\x32\".metrics.v1.DiskRates.PerDiskEntry\x1a\x44\n\x0cPerDiskEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12#\n\x05value\x18\x02 \x01(\x0b\x32\x14.metrics.v1.DiskRate:\x02\x38\x01\"j\n\x08\x44iskRate\x12\x11\n\tread_iops\x18\x01 \x01(\x01\x12\x12\n\nwrite_iops\x18\x02 \x01(\x01\x12\x1a\n\x12read_bytes_per_sec\x18\x03 \x01(\x01\x12\x1b\n\x13write_bytes_per_sec\x18\x04 \x01(\x01\"\xb8\x01\n\x0cNetworkRates\x12\"\n\x05total\x18\x01 \x01(\x0b\x32\x13.metrics.v1.NetRate\x12<\n\ninterfaces\x18\x02 \x03(\x0b\x32(.metrics.v1.NetworkRates.InterfacesEntry\x1a\x46\n\x0fInterfacesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\"\n\x05value\x18\x02 \x01(\x0b\x32\x13.metrics.v1.NetRate:\x02\x38\x01\"\xd2\x01\n\x07NetRate\x12\x1a\n\x12\x62ytes_sent_per_sec\x18\x01 \x01(\x01\x12\x1a\n\x12\x62ytes_recv_per_sec\x18\x02 \x01(\x01\x12\x11\n\tmbps_sent\x18\x03 \x01(\x01\x12\x11\n\tmbps_recv\x18\x04 \x01(\x01\x12\x1c\n\x14packets_sent_per_sec\x18\x05 \x01(\x01\x12\x1c\n\x14packets_recv_per_sec\x18\x06 \x01(\x01\x12\x16\n\x0e\x65rrors_per_sec\x18\x07 \x01(\x01\x12\x15\n\rdrops_per_sec\x18\x08 \x01(\x01\"A\n\x08SwapRate\x12\x19\n\x11sin_bytes_per_sec\x18\x01 \x01(\x01\x12\x1a\n\x12sout_bytes_per_sec\x18\x02 \x01(\x01\"\xd3\x03\n\x0eSaturationRate\x12\x1d\n\x10\x63pu_some_percent\x18\x01 \x01(\x01H\x00\x88\x01\x01\x12\x1d\n\x10\x63pu_full_percent\x18\x02 \x01(\x01H\x01\x88\x01\x01\x12 \n\x13memory_some_percent\x18\x03 \x01(\x01H\x02\x88\x01\x01\x12 \n\x13memory_full_percent\x18\x04 \x01(\x01H\x03\x88\x01\x01\x12\x1c\n\x0fio_some_percent\x18\x05 \x01(\x01H\x04\x88\x01\x01\x12\x1c\n\x0fio_full_percent\x18\x06 \x01(\x01H\x05\x88\x01\x01\x12\x1a\n\x12pgmajfault_per_sec\x18\x07 \x01(\x01\x12\x16\n\x0epswpin_per_sec\x18\x08 \x01(\x01\x12\x17\n\x0fpswpout_per_sec\x18\t \x01(\x01\x12\x1a\n\x12\x61llocstall_per_sec\x18\n \x01(\x01\x12\x18\n\x10oom_kill_per_sec\x18\x0b \x01(\x01\x42\x13\n\x11_cpu_some_percentB\x13\n\x11_cpu_full_percentB\x16\n\x14_memory_some_percentB\x16\n\x14_memory_full_percentB\x12\n\x10_io_some_percentB\x12\n\x10_io_full_percent\"\xad\x01\n\tInventory\x12\x10\n\x08hostname\x18\x01 \x01(\t\x12\x11\n\tboot_time\x18\x02 \x01(\x01\x12%\n\x03\x63pu\x18\x03 \x01(\x0b\x32\x18.metrics.v1.InventoryCpu\x12-\n\x07network\x18\x04 \x01(\x0b\x32\x1c.metrics.v1.InventoryNetwork\x12\x0f\n\x07version\x18\x05 \x01(\x04\x12\x14\n\x0crefreshed_at\x18\x06 \x01(\t\"`\n\x0cInventoryCpu\x12#\n\x05\x63ount\x18\x01 \x01(\x0b\x32\x14.metrics.v1.CpuCount\x12+\n\tfrequency\x18\x02 \x01(\x0b\x32\x18.metrics.v1.CpuFrequency\"\x9d\x01\n\x10InventoryNetwork\x12>\n\taddresses\x18\x01 \x03(\x0b\x32+.metrics.v1.InventoryNetwork.AddressesEntry\x1aI\n\x0e\x41\x64\x64ressesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12&\n\x05value\x18\x02 \x01(\x0b\x32\x17.metrics.v1.AddressList:\x02\x38\x01\"6\n\x0f\x43ollectorStatus\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x13\n\x0b\x64uration_ms\x18\x02 \x01(\x01\"\xe4\x02\n\nAgentStats\x12\x30\n\x0b\x63pu_seconds\x18\x01 \x01(\x0b\x32\x1b.metrics.v1.AgentCpuSeconds\x12\x18\n\x0b\x63pu_percent\x18\x02 \x01(\x01H\x00\x88\x01\x01\x12\x16\n\trss_bytes\x18\x03 \x01(\x04H\x01\x88\x01\x01\x12\x0f\n\x07threads\x18\x04 \x01(\r\x12\x1f\n\x02gc\x18\x05 \x01(\x0b\x32\x13.metrics.v1.GcStats\x12\x18\n\x10\x62ucket_bounds_ms\x18\x06 \x03(\x01\x12\x38\n\tfunctions\x18\x07 \x03(\x0b\x32%.metrics.v1.AgentStats.FunctionsEntry\x1aN\n\x0e\x46unctionsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12+\n\x05value\x18\x02 \x01(\x0b\x32\x1c.metrics.v1.LatencyHistogram:\x02\x38\x01\x42\x0e\n\x0c_cpu_percentB\x0c\n\n_rss_bytes\"/\n\x0f\x41gentCpuSeconds\x12\x0c\n\x04user\x18\x01 \x01(\x01\x12\x0e\n\x06system\x18\x02 \x01(\x01\"Z\n\x07GcStats\x12\x13\n\x0b\x63ollections\x18\x01 \x03(\x04\x12\x11\n\tcollected\x18\x02 \x01(\x04\x12\x15\n\runcollectable\x18\x03 \x01(\x04\x12\x10\n\x08pause_ms\x18\x04 \x01(\x01\"R\n\x10LatencyHistogram\x12\r\n\x05\x63ount\x18\x01 \x01(\x04\x12\x0e\n\x06sum_ms\x18\x02 \x01(\x01\x12\x0e\n\x06max_ms\x18\x03 \x01(\x01\x12\x0f\n\x07\x62uckets\x18\x04 \x03(\x04\"\xa1\x01\n\x0eSchedulerStats\x12\x10\n\x08interval\x18\x01 \x01(\x01\x12\r\n\x05ticks\x18\x02 \x01(\x04\x12\x10\n\x08overruns\x18\x03 \x01(\x04\x12\x15\n\rskipped_ticks\x18\x04 \x01(\x04\x12\x16\n\x0ejitter_last_ms\x18\x05 \x01(\x01\x12\x15\n\rjitter_max_ms\x18\x06 \x01(\x01\x12\x16\n\x0ejitter_mean_ms\x18\x07 \x01(\x01\"\xb0\x01\n\x0eTransportStats\x12\x14\n\x0csent_batches\x18\x01 \x01(\x04\x12\x16\n\x0esent_snapshots\x18\x02 \x01(\x04\x12\x17\n\x0f\x66\x61iled_attempts\x18\x03 \x01(\x04\x12\x12\n\nbytes_sent\x18\x04 \x01(\x04\x12\x1a\n\x12\x63onnections_opened\x18\x05 \x01(\x04\x12\'\n\x06\x62uffer\x18\x06 \x01(\x0b\x32\x17.metrics.v1.BufferStats\"T\n\x0b\x42ufferStats\x12\x0e\n\x06memory\x18\x01 \x01(\x04\x12\x0f\n\x07spilled\x18\x02 \x01(\x04\x12\x13\n\x0bspill_bytes\x18\x03 \x01(\x04\x12\x0f\n\x07\x64ropped\x18\x04 \x01(\x04\"\xa4\x01\n\x11SaturationMetrics\x12!\n\x03\x63pu\x18\x01 \x01(\x0b\x32\x14.metrics.v1.Pressure\x12$\n\x06memory\x18\x02 \x01(\x0b\x32\x14.metrics.v1.Pressure\x12 \n\x02io\x18\x03 \x01(\x0b\x32\x14.metrics.v1.Pressure\x12$\n\x06vmstat\x18\x04 \x01(\x0b\x32\x14.metrics.v1.VmEvents\"\\\n\x08Pressure\x12\'\n\x04some\x18\x01 \x01(\x0b\x32\x19.metrics.v1.PressureStall\x12\'\n\x04\x66ull\x18\x02 \x01(\x0b\x32\x19.metrics.v1.PressureStall\"L\n\rPressureStall\x12\r\n\x05\x61vg10\x18\x01 \x01(\x01\x12\r\n\x05\x61vg60\x18\x02 \x01(\x01\x12\x0e\n\x06\x61vg300\x18\x03 \x01(\x01\x12\r\n\x05total\x18\x04 \x01(\x04\"e\n\x08VmEvents\x12\x12\n\npgmajfault\x18\x01 \x01(\x04\x12\x0e\n\x06pswpin\x18\x02 \x01(\x04\x12\x0f\n\x07pswpout\x18\x03 \x01(\x04\x12\x12\n\nallocstall\x18\x04 \x01(\x04\x12\x10\n\x08oom_kill\x18\x05 \x01(\x04\"\xc4\x01\n\rCgroupMetrics\x12\r\n\x05\x63ount\x18\x01 \x01(\x04\x12(\n\x07top_cpu\x18\x02 \x03(\x0b\x32\x17.metrics.v1.CgroupUsage\x12+\n\ntop_memory\x18\x03 \x03(\x0b\x32\x17.metrics.v1.CgroupUsage\x12\'\n\x06top_io\x18\x04 \x03(\x0b\x32\x17.metrics.v1.CgroupUsage\x12$\n\x04scan\x18\x05 \x01(\x0b\x32\x16.metrics.v1.CgroupScan\"\xdb\x02\n\x0b\x43groupUsage\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\x13\n\x0b\x63pu_percent\x18\x02 \x01(\x01\x12\x19\n\x11throttled_percent\x18\x03 \x01(\x01\x12\x1b\n\x0ememory_current\x18\x04 \x01(\x04H\x00\x88\x01\x01\x12\x18\n\x0bmemory_anon\x18\x05 \x01(\x04H\x01\x88\x01\x01\x12\x18\n\x0bmemory_file\x18\x06 \x01(\x04H\x02\x88\x01\x01\x12\x19\n\x0cmemory_limit\x18\x07 \x01(\x04H\x03\x88\x01\x01\x12\x1a\n\x12read_bytes_per_sec\x18\x08 \x01(\x01\x12\x1b\n\x13write_bytes_per_sec\x18\t \x01(\x01\x12\x11\n\tread_iops\x18\n \x01(\x01\x12\x12\n\nwrite_iops\x18\x0b \x01(\x01\x42\x11\n\x0f_memory_currentB\x0e\n\x0c_memory_anonB\x0e\n\x0c_memory_fileB\x0f\n\r_memory_limit\"?\n\nCgroupScan\x12\x0e\n\x06listed\x18\x01 \x01(\x04\x12\x0c\n\x04read\x18\x02 \x01(\x04\x12\x13\n\x0b\x64uration_ms\x18\x03 \x01(\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'metrics_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_SNAPSHOT_COLLECTIONENTRY']._loaded_options = None
+  _globals['_SNAPSHOT_COLLECTIONENTRY']._serialized_options = b'8\001'
+  _globals['_DISKMETRICS_PERDISKIOENTRY']._loaded_options = None
+  _globals['_DISKMETRICS_PERDISKIOENTRY']._serialized_options = b'8\001'
+  _globals['_NETWORKMETRICS_INTERFACESENTRY']._loaded_options = None
+  _globals['_NETWORKMETRICS_INTERFACESENTRY']._serialized_options = b'8\001'
+  _globals['_NETWORKMETRICS_ADDRESSESENTRY']._loaded_options = None
+  _globals['_NETWORKMETRICS_ADDRESSESENTRY']._serialized_options = b'8\001'
+  _globals['_CONNECTIONS_STATESENTRY']._loaded_options = None
+  _globals['_CONNECTIONS_STATESENTRY']._serialized_options = b'8\001'
+  _globals['_DISKRATES_PERDISKENTRY']._loaded_options = None
+  _globals['_DISKRATES_PERDISKENTRY']._serialized_options = b'8\001'
+  _globals['_NETWORKRATES_INTERFACESENTRY']._loaded_options = None
+  _globals['_NETWORKRATES_INTERFACESENTRY']._serialized_options = b'8\001'
+  _globals['_INVENTORYNETWORK_ADDRESSESENTRY']._loaded_options = None
+  _globals['_INVENTORYNETWORK_ADDRESSESENTRY']._serialized_options = b'8\001'
+  _globals['_AGENTSTATS_FUNCTIONSENTRY']._loaded_options = None
+  _globals['_AGENTSTATS_FUNCTIONSENTRY']._serialized_options = b'8\001'
+  _globals['_SNAPSHOT']._serialized_start=30
+  _globals['_SNAPSHOT']._serialized_end=838
+  _globals['_SNAPSHOT_COLLECTIONENTRY']._serialized_start=760
+  _globals['_SNAPSHOT_COLLECTIONENTRY']._serialized_end=838
+  _globals['_CPUMETRICS']._serialized_start=841
+  _globals['_CPUMETRICS']._serialized_end=1147
+  _globals['_CPUTIMES']._serialized_start=1150
+  _globals['_CPUTIMES']._serialized_end=1280
+  _globals['_CPUTIMESPERCENT']._serialized_start=1283
+  _globals['_CPUTIMESPERCENT']._serialized_end=1420
+  _globals['_LOADAVERAGE']._serialized_start=1422
+  _globals['_LOADAVERAGE']._serialized_end=1547
+  _globals['_CPUFREQUENCY']._serialized_start=1549
+  _globals['_CPUFREQUENCY']._serialized_end=1649
+  _globals['_CPUCOUNT']._serialized_start=1651
+  _globals['_CPUCOUNT']._serialized_end=1731
+  _globals['_MEMORYMETRICS']._serialized_start=1733
+  _globals['_MEMORYMETRICS']._serialized_end=1832
+  _globals['_PHYSICALMEMORY']._serialized_start=1835
+  _globals['_PHYSICALMEMORY']._serialized_end=2028
+  _globals['_SWAPMEMORY']._serialized_start=2030
+  _globals['_SWAPMEMORY']._serialized_end=2129
+  _globals['_DISKMETRICS']._serialized_start=2132
+  _globals['_DISKMETRICS']._serialized_end=2357
+  _globals['_DISKMETRICS_PERDISKIOENTRY']._serialized_start=2289
+  _globals['_DISKMETRICS_PERDISKIOENTRY']._serialized_end=2357
+  _globals['_PARTITION']._serialized_start=2360
+  _globals['_PARTITION']._serialized_end=2497
+  _globals['_DISKIO']._serialized_start=2500
+  _globals['_DISKIO']._serialized_end=2629
+  _globals['_NETWORKMETRICS']._serialized_start=2632
+  _globals['_NETWORKMETRICS']._serialized_end=2999
+  _globals['_NETWORKMETRICS_INTERFACESENTRY']._serialized_start=2856
+  _globals['_NETWORKMETRICS_INTERFACESENTRY']._serialized_end=2924
+  _globals['_NETWORKMETRICS_ADDRESSESENTRY']._serialized_start=2926
+  _globals['_NETWORKMETRICS_ADDRESSESENTRY']._serialized_end=2999
+  _globals['_NETIO']._serialized_start=3002
+  _globals['_NETIO']._serialized_end=3157
+  _globals['_CONNECTIONS']._serialized_start=3160
+  _globals['_CONNECTIONS']._serialized_end=3377
+  _globals['_CONNECTIONS_STATESENTRY']._serialized_start=3332
+  _globals['_CONNECTIONS_STATESENTRY']._serialized_end=3377
+  _globals['_ADDRESSLIST']._serialized_start=3379
+  _globals['_ADDRESSLIST']._serialized_end=3432
+  _globals['_ADDRESS']._serialized_start=3435
+  _globals['_ADDRESS']._serialized_end=3582
+  _globals['_PROCESSCPU']._serialized_start=3584
+  _globals['_PROCESSCPU']._serialized_end=3644
+  _globals['_PROCESSMEMORY']._serialized_start=3646
+  _globals['_PROCESSMEMORY']._serialized_end=3731
+  _globals['_PROCESSSCAN']._serialized_start=3733
+  _globals['_PROCESSSCAN']._serialized_end=3782
+  _globals['_RATES']._serialized_start=3785
+  _globals['_RATES']._serialized_end=3956
+  _globals['_DISKRATES']._serialized_start=3959
+  _globals['_DISKRATES']._serialized_end=4131
+  _globals['_DISKRATES_PERDISKENTRY']._serialized_start=4063
+  _globals['_DISKRATES_PERDISKENTRY']._serialized_end=4131
+  _globals['_DISKRATE']._serialized_start=4133
+  _globals['_DISKRATE']._serialized_end=4239
+  _globals['_NETWORKRATES']._serialized_start=4242
+  _globals['_NETWORKRATES']._serialized_end=4426
+  _globals['_NETWORKRATES_INTERFACESENTRY']._serialized_start=4356
+  _globals['_NETWORKRATES_INTERFACESENTRY']._serialized_end=4426
+  _globals['_NETRATE']._serialized_start=4429
+  _globals['_NETRATE']._serialized_end=4639
+  _globals['_SWAPRATE']._serialized_start=4641
+  _globals['_SWAPRATE']._serialized_end=4706
+  _globals['_SATURATIONRATE']._serialized_start=4709
+  _globals['_SATURATIONRATE']._serialized_end=5176
+  _globals['_INVENTORY']._serialized_start=5179
+  _globals['_INVENTORY']._serialized_end=5352
+  _globals['_INVENTORYCPU']._serialized_start=5354
+  _globals['_INVENTORYCPU']._serialized_end=5450
+  _globals['_INVENTORYNETWORK']._serialized_start=5453
+  _globals['_INVENTORYNETWORK']._serialized_end=5610
+  _globals['_INVENTORYNETWORK_ADDRESSESENTRY']._serialized_start=2926
+  _globals['_INVENTORYNETWORK_ADDRESSESENTRY']._serialized_end=2999
+  _globals['_COLLECTORSTATUS']._serialized_start=5612
+  _globals['_COLLECTORSTATUS']._serialized_end=5666
+  _globals['_AGENTSTATS']._serialized_start=5669
+  _globals['_AGENTSTATS']._serialized_end=6025
+  _globals['_AGENTSTATS_FUNCTIONSENTRY']._serialized_start=5917
+  _globals['_AGENTSTATS_FUNCTIONSENTRY']._serialized_end=5995
+  _globals['_AGENTCPUSECONDS']._serialized_start=6027
+  _globals['_AGENTCPUSECONDS']._serialized_end=6074
+  _globals['_GCSTATS']._serialized_start=6076
+  _globals['_GCSTATS']._serialized_end=6166
+  _globals['_LATENCYHISTOGRAM']._serialized_start=6168
+  _globals['_LATENCYHISTOGRAM']._serialized_end=6250
+  _globals['_SCHEDULERSTATS']._serialized_start=6253
+  _globals['_SCHEDULERSTATS']._serialized_end=6414
+  _globals['_TRANSPORTSTATS']._serialized_start=6417
+  _globals['_TRANSPORTSTATS']._serialized_end=6593
+  _globals['_BUFFERSTATS']._serialized_start=6595
+  _globals['_BUFFERSTATS']._serialized_end=6679
+  _globals['_SATURATIONMETRICS']._serialized_start=6682
+  _globals['_SATURATIONMETRICS']._serialized_end=6846
+  _globals['_PRESSURE']._serialized_start=6848
+  _globals['_PRESSURE']._serialized_end=6940
+  _globals['_PRESSURESTALL']._serialized_start=6942
+  _globals['_PRESSURESTALL']._serialized_end=7018
+  _globals['_VMEVENTS']._serialized_start=7020
+  _globals['_VMEVENTS']._serialized_end=7121
+  _globals['_CGROUPMETRICS']._serialized_start=7124
+  _globals['_CGROUPMETRICS']._serialized_end=7320
+  _globals['_CGROUPUSAGE']._serialized_start=7323
+  _globals['_CGROUPUSAGE']._serialized_end=7670
+  _globals['_CGROUPSCAN']._serialized_start=7672
+  _globals['_CGROUPSCAN']._serialized_end=7735
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,363 @@
+"""Compact snapshot model: __slots__ and array-backed records generated from the protobuf schema."""
+import sys
+from array import array
+from typing import Dict, Any, Iterator, Tuple, Type
+
+from .protobuf import SCHEMA, SCALARS, WRAPPERS, ROOT, DOUBLE, UINT64, UINT32, STRING, SINGULAR, REPEATED, MAP, Field
+
+
+_MISSING = object()
+
+# Python type and array typecode of the numeric scalar types
+_NUMERIC = {DOUBLE: (float, 'd'), UINT64: (int, 'Q'), UINT32: (int, 'Q')}
+
+
+class Record:
+    """
+    Fixed-field record for one message of the snapshot schema.
+
+    One subclass per message of :data:`~agent.protobuf.SCHEMA` is
+    generated with a slot per field, so field names are stored once per
+    class instead of as keys of every snapshot's dicts. Repeated numbers
+    (per-core usage, histogram buckets) are held in arrays, strings that
+    repeat between snapshots (device names, mount points, map keys) are
+    interned, and keys the schema does not know are kept aside, so
+    :meth:`to_dict` returns exactly the dict the record was built from.
+
+    Records answer the read-only mapping calls serializers use (``get``,
+    ``[]``, ``in``, ``keys``, ``items``) with the stored values, without
+    building dicts, so :func:`~agent.protobuf.encode_message` encodes them
+    directly.
+    """
+
+    __slots__ = ('_extra',)
+
+    message = ''
+    fields: Tuple[Field, ...] = ()
+    _slots: Tuple[str, ...] = ()
+    _slot_of: Dict[str, str] = {}
+    _field_of: Dict[str, Field] = {}
+
+    @classmethod
+    def from_dict(cls, value):
+        """
+        Build a record from a snapshot section dict.
+
+        Args:
+            value: Section dict
+
+        Returns:
+            Record, or ``value`` unchanged when it is not a dict
+        """
+        if not isinstance(value, dict):
+            return value
+        record = cls.__new__(cls)
+        slot_of = cls._slot_of
+        for key, item in value.items():
+            slot = slot_of.get(key)
+            if slot is None:
+                try:
+                    record._extra[key] = item
+                except AttributeError:
+                    record._extra = {key: item}
+            else:
+                setattr(record, slot, _pack(cls._field_of[key], item))
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the section as the dict the collectors produce."""
+        result = {}
+        for field, slot in zip(self.fields, self._slots):
+            item = getattr(self, slot, _MISSING)
+            if item is not _MISSING:
+                result[field.key] = _unpack(field, item)
+        extra = getattr(self, '_extra', None)
+        if extra:
+            result.update(extra)
+        return result
+
+    def get(self, key: str, default=None):
+        slot = self._slot_of.get(key)
+        if slot is None:
+            return getattr(self, '_extra', {}).get(key, default)
+        return getattr(self, slot, default)
+
+    def __getitem__(self, key: str):
+        item = self.get(key, _MISSING)
+        if item is _MISSING:
+            raise KeyError(key)
+        return item
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> Iterator[str]:
+        for field, slot in zip(self.fields, self._slots):
+            if hasattr(self, slot):
+                yield field.key
+        yield from getattr(self, '_extra', ())
+
+    __iter__ = keys
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in self.keys():
+            yield key, self[key]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.keys())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Record) else other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class ArrayRecord(Record):
+    """
+    Record of a message made only of plain numbers of one type (disk and
+    interface counters, rates, memory figures), backed by a single
+    ``array`` instead of a number object per field.
+
+    A dict that does not fit exactly (a missing, None or differently
+    typed value) is stored as the slot-based record of the same message,
+    so :meth:`to_dict` still returns it unchanged.
+    """
+
+    __slots__ = ('_values',)
+
+    _type: type = int
+    _typecode = 'Q'
+    _index: Dict[str, int] = {}
+    _fallback: Type[Record] = Record
+
+    @classmethod
+    def from_dict(cls, value):
+        if not isinstance(value, dict) or len(value) != len(cls.fields):
+            return cls._fallback.from_dict(value)
+        try:
+            values = [value[key] for key in cls._slots]
+            if any(type(item) is not cls._type for item in values):
+                raise TypeError
+            values = array(cls._typecode, values)
+        except (KeyError, TypeError, OverflowError):
+            return cls._fallback.from_dict(value)
+        record = cls.__new__(cls)
+        record._values = values
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._slots, self._values))
+
+    def get(self, key: str, default=None):
+        index = self._index.get(key)
+        if index is None:
+            return default
+        return self._values[index]
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    __iter__ = keys
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the values in schema order."""
+        return memoryview(self._values)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _pack(field: Field, value):
+    """Convert one dict value into its compact form."""
+    if value is None:
+        return None
+    type_, label = field.type, field.label
+
+    if type_ in SCALARS:
+        if label == REPEATED and type_ in _NUMERIC and isinstance(value, list):
+            python_type, typecode = _NUMERIC[type_]
+            if all(type(item) is python_type for item in value):
+                try:
+                    return array(typecode, value)
+                except OverflowError:
+                    pass
+            return value
+        if label == MAP and isinstance(value, dict):
+            return {_intern(key): item for key, item in value.items()}
+        if type_ == STRING:
+            return _intern(value)
+        return value
+
+    if label == MAP:
+        if not isinstance(value, dict):
+            return value
+        return {_intern(key): _pack_message(type_, item) for key, item in value.items()}
+    if label == REPEATED:
+        return tuple(_pack_message(type_, item) for item in value) if isinstance(value, list) else value
+    return _pack_message(type_, value)
+
+
+def _pack_message(message: str, value):
+    if message in WRAPPERS:
+        # Held in snapshots as the plain list of its single repeated field
+        record = RECORDS[SCHEMA[message][0].type]
+        return tuple(record.from_dict(item) for item in value) if isinstance(value, list) else value
+    return RECORDS[message].from_dict(value)
+
+
+def _plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    if isinstance(value, array):
+        return value.tolist()
+    return value
+
+
+def _unpack(field: Field, value):
+    """Inverse of :func:`_pack`."""
+    if field.label == MAP and isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    return _plain(value)
+
+
+def _record_classes(message: str) -> Type[Record]:
+    fields = tuple(SCHEMA[message])
+    slots = tuple(field.name or field.key for field in fields)
+    namespace = {
+        'message': message,
+        'fields': fields,
+        '_slots': slots,
+        '_slot_of': {field.key: slot for field, slot in zip(fields, slots)},
+        '_field_of': {field.key: field for field in fields},
+    }
+    record = type(message, (Record,), dict(namespace, __slots__=slots))
+
+    types = {field.type for field in fields}
+    if len(types) == 1 and types <= set(_NUMERIC) and all(field.label == SINGULAR for field in fields):
+        python_type, typecode = _NUMERIC[types.pop()]
+        return type(message, (ArrayRecord,), dict(
+            namespace,
+            __slots__=(),
+            _type=python_type,
+            _typecode=typecode,
+            _index={field.key: index for index, field in enumerate(fields)},
+            _fallback=record,
+        ))
+    return record
+
+
+RECORDS: Dict[str, Type[Record]] = {
+    message: _record_classes(message) for message in SCHEMA if message != ROOT and message not in WRAPPERS
+}
+
+_FIELDS = {field.key: field for field in SCHEMA[ROOT]}
+
+# Key orders seen so far, shared by every snapshot with the same layout
+_KEY_ORDERS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+class Snapshot:
+    """
+    Compact form of a ``collect_all_metrics`` snapshot.
+
+    Every section the schema describes is held as records (see
+    :class:`Record`); sections it does not describe are kept as given.
+    :meth:`to_dict` returns a dict equal to the one the snapshot was built
+    from, keys in the same order, so everything written against the dict
+    layout keeps working, while serializers can read the snapshot through
+    the mapping calls without that conversion.
+    """
+
+    __slots__ = tuple(_FIELDS) + ('sections', '_order')
+
+    @classmethod
+    def from_dict(cls, metrics: Dict[str, Any]) -> 'Snapshot':
+        """
+        Build a compact snapshot.
+
+        Args:
+            metrics: Snapshot dictionary from ``collect_all_metrics``
+
+        Returns:
+            Snapshot instance
+        """
+        snapshot = cls.__new__(cls)
+        sections = {}
+        for key, value in metrics.items():
+            field = _FIELDS.get(key)
+            if field is None:
+                sections[key] = value
+            elif key == 'timestamp':
+                # Unique per snapshot, not worth interning
+                snapshot.timestamp = value
+            else:
+                setattr(snapshot, key, _pack(field, value))
+        snapshot.sections = sections
+        order = tuple(metrics)
+        snapshot._order = _KEY_ORDERS.setdefault(order, order)
+        return snapshot
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the snapshot in the ``collect_all_metrics`` dict layout."""
+        result = {}
+        for key in self._order:
+            field = _FIELDS.get(key)
+            if field is None:
+                result[key] = self.sections[key]
+            else:
+                result[key] = _unpack(field, getattr(self, key))
+        return result
+
+    def get(self, key: str, default=None):
+        if key in _FIELDS:
+            return getattr(self, key, default)
+        return self.sections.get(key, default)
+
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._order
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._order)
+
+    __iter__ = keys
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in self._order:
+            yield key, self.get(key)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Snapshot, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Snapshot) else other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Snapshot(hostname={self.get('hostname')!r}, timestamp={self.get('timestamp')!r})"
+
+
+def as_dict(metrics) -> Dict[str, Any]:
+    """Return a snapshot dict, converting a :class:`Snapshot` if needed."""
+    if isinstance(metrics, Snapshot):
+        return metrics.to_dict()
+    return metrics
@@ -0,0 +1,902 @@
+"""Protobuf wire codec for snapshots (schema: proto/metrics.proto)."""
+import struct
+import sys
+from array import array
+from operator import attrgetter
+from typing import Dict, Any, Callable, Iterator, List, NamedTuple, Optional, Union
+
+from .collectors.registry import BUILTIN
+
+try:
+    from google.protobuf.internal import api_implementation
+    from . import metrics_pb2
+except Exception:  # optional dependency; the generated code also needs a recent runtime
+    metrics_pb2 = None
+else:
+    if api_implementation.Type() == 'python':
+        # The pure-Python runtime is slower than the codec below
+        metrics_pb2 = None
+
+
+# Field labels
+SINGULAR = 'singular'
+OPTIONAL = 'optional'
+REPEATED = 'repeated'
+MAP = 'map'
+
+# Scalar types
+DOUBLE = 'double'
+UINT64 = 'uint64'
+UINT32 = 'uint32'
+STRING = 'string'
+
+SCALARS = (DOUBLE, UINT64, UINT32, STRING)
+
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH = 2
+WIRE_FIXED32 = 5
+
+_DOUBLE = struct.Struct('<d')
+
+_UINT_LIMITS = {UINT64: 1 << 64, UINT32: 1 << 32}
+
+_NATIVE_DOUBLES = sys.byteorder == 'little' and array('d').itemsize == 8
+
+
+class EncodeError(ValueError):
+    """A snapshot value does not fit the type of its schema field."""
+
+    def __init__(self, reason: str, path: tuple = ()):
+        self.reason = reason
+        self.path = path
+        super().__init__(f"{'.'.join(path)}: {reason}" if path else reason)
+
+
+class Field(NamedTuple):
+    """One field of a message: wire number, snapshot dict key and type."""
+    number: int
+    key: str
+    type: str
+    label: str = SINGULAR
+    # Proto field name when it differs from the dict key
+    name: Optional[str] = None
+    # Leave the key out of decoded dicts when the field is absent, instead
+    # of filling None / an empty value (sections that are not always sent)
+    omit: bool = False
+
+
+def _f(number, key, type_, label=SINGULAR, name=None, omit=False) -> Field:
+    return Field(number, key, type_, label, name, omit)
+
+
+# Mirrors proto/metrics.proto. A message listed in WRAPPERS is represented
+# in snapshots by the plain list held in its single repeated field.
+SCHEMA: Dict[str, List[Field]] = {
+    'Snapshot': sorted([
+        _f(1, 'timestamp', STRING),
+        _f(2, 'hostname', STRING),
+        _f(7, 'top_cpu_processes', 'ProcessCpu', REPEATED, omit=True),
+        _f(8, 'top_memory_processes', 'ProcessMemory', REPEATED, omit=True),
+        _f(9, 'process_scan', 'ProcessScan', omit=True),
+        _f(10, 'rates', 'Rates', omit=True),
+        _f(11, 'inventory', 'Inventory', omit=True),
+        _f(12, 'collection', 'CollectorStatus', MAP, omit=True),
+        _f(13, 'scheduler', 'SchedulerStats', omit=True),
+        _f(14, 'transport', 'TransportStats', omit=True),
+        _f(15, 'agent', 'AgentStats', omit=True),
+        # Collector sections, declared with the collectors
+        *(_f(spec.field, spec.section, spec.schema, omit=True) for spec in BUILTIN if spec.schema),
+    ], key=lambda field: field.number),
+    'CpuMetrics': [
+        _f(1, 'overall_percent', DOUBLE, OPTIONAL),
+        _f(2, 'per_core_percent', DOUBLE, REPEATED),
+        _f(3, 'times', 'CpuTimes'),
+        _f(4, 'times_percent', 'CpuTimesPercent'),
+        _f(5, 'load_average', 'LoadAverage'),
+        _f(6, 'frequency', 'CpuFrequency'),
+        _f(7, 'count', 'CpuCount', omit=True),
+    ],
+    'CpuTimes': [
+        _f(1, 'user', DOUBLE, OPTIONAL),
+        _f(2, 'system', DOUBLE, OPTIONAL),
+        _f(3, 'idle', DOUBLE, OPTIONAL),
+        _f(4, 'iowait', DOUBLE, OPTIONAL),
+    ],
+    'CpuTimesPercent': [
+        _f(1, 'user', DOUBLE, OPTIONAL),
+        _f(2, 'system', DOUBLE, OPTIONAL),
+        _f(3, 'idle', DOUBLE, OPTIONAL),
+        _f(4, 'iowait', DOUBLE, OPTIONAL),
+    ],
+    'LoadAverage': [
+        _f(1, '1min', DOUBLE, OPTIONAL, name='one_min'),
+        _f(2, '5min', DOUBLE, OPTIONAL, name='five_min'),
+        _f(3, '15min', DOUBLE, OPTIONAL, name='fifteen_min'),
+    ],
+    'CpuFrequency': [
+        _f(1, 'current', DOUBLE, OPTIONAL),
+        _f(2, 'min', DOUBLE, OPTIONAL, omit=True),
+        _f(3, 'max', DOUBLE, OPTIONAL, omit=True),
+    ],
+    'CpuCount': [
+        _f(1, 'logical', UINT32, OPTIONAL),
+        _f(2, 'physical', UINT32, OPTIONAL),
+    ],
+    'MemoryMetrics': [
+        _f(1, 'physical', 'PhysicalMemory'),
+        _f(2, 'swap', 'SwapMemory'),
+    ],
+    'PhysicalMemory': [
+        _f(1, 'total', UINT64),
+        _f(2, 'available', UINT64),
+        _f(3, 'used', UINT64),
+        _f(4, 'free', UINT64),
+        _f(5, 'percent', DOUBLE),
+        _f(6, 'buffers', UINT64, OPTIONAL),
+        _f(7, 'cached', UINT64, OPTIONAL),
+        _f(8, 'shared', UINT64, OPTIONAL),
+    ],
+    'SwapMemory': [
+        _f(1, 'total', UINT64),
+        _f(2, 'used', UINT64),
+        _f(3, 'free', UINT64),
+        _f(4, 'percent', DOUBLE),
+        _f(5, 'sin', UINT64),
+        _f(6, 'sout', UINT64),
+    ],
+    'DiskMetrics': [
+        _f(1, 'partitions', 'Partition', REPEATED),
+        _f(2, 'io_stats', 'DiskIo'),
+        _f(3, 'per_disk_io', 'DiskIo', MAP),
+    ],
+    'Partition': [
+        _f(1, 'device', STRING),
+        _f(2, 'mountpoint', STRING),
+        _f(3, 'fstype', STRING),
+        _f(4, 'opts', STRING),
+        _f(5, 'total', UINT64),
+        _f(6, 'used', UINT64),
+        _f(7, 'free', UINT64),
+        _f(8, 'percent', DOUBLE),
+    ],
+    'DiskIo': [
+        _f(1, 'read_count', UINT64),
+        _f(2, 'write_count', UINT64),
+        _f(3, 'read_bytes', UINT64),
+        _f(4, 'write_bytes', UINT64),
+        _f(5, 'read_time', UINT64),
+        _f(6, 'write_time', UINT64),
+    ],
+    'NetworkMetrics': [
+        _f(1, 'interfaces', 'NetIo', MAP),
+        _f(2, 'total', 'NetIo'),
+        _f(3, 'connections', 'Connections'),
+        _f(4, 'addresses', 'AddressList', MAP, omit=True),
+    ],
+    'NetIo': [
+        _f(1, 'bytes_sent', UINT64),
+        _f(2, 'bytes_recv', UINT64),
+        _f(3, 'packets_sent', UINT64),
+        _f(4, 'packets_recv', UINT64),
+        _f(5, 'errin', UINT64),
+        _f(6, 'errout', UINT64),
+        _f(7, 'dropin', UINT64),
+        _f(8, 'dropout', UINT64),
+    ],
+    'Connections': [
+        _f(1, 'established', UINT64),
+        _f(2, 'time_wait', UINT64),
+        _f(3, 'close_wait', UINT64),
+        _f(4, 'listen', UINT64),
+        _f(5, 'total', UINT64),
+        _f(6, 'udp', UINT64),
+        _f(7, 'states', UINT64, MAP),
+    ],
+    'AddressList': [
+        _f(1, 'addresses', 'Address', REPEATED),
+    ],
+    'Address': [
+        _f(1, 'family', STRING, OPTIONAL),
+        _f(2, 'address', STRING, OPTIONAL),
+        _f(3, 'netmask', STRING, OPTIONAL),
+        _f(4, 'broadcast', STRING, OPTIONAL),
+    ],
+    'ProcessCpu': [
+        _f(1, 'pid', UINT32),
+        _f(2, 'name', STRING),
+        _f(3, 'cpu_percent', DOUBLE),
+    ],
+    'ProcessMemory': [
+        _f(1, 'pid', UINT32),
+        _f(2, 'name', STRING),
+        _f(3, 'memory_mb', DOUBLE),
+        _f(4, 'memory_percent', DOUBLE),
+    ],
+    'ProcessScan': [
+        _f(1, 'count', UINT64),
+        _f(2, 'duration_ms', DOUBLE),
+    ],
+    'Rates': [
+        _f(1, 'disk', 'DiskRates', omit=True),
+        _f(2, 'network', 'NetworkRates', omit=True),
+        _f(3, 'swap', 'SwapRate', omit=True),
+        _f(4, 'saturation', 'SaturationRate', omit=True),
+    ],
+    'DiskRates': [
+        _f(1, 'total', 'DiskRate', omit=True),
+        _f(2, 'per_disk', 'DiskRate', MAP, omit=True),
+    ],
+    'DiskRate': [
+        _f(1, 'read_iops', DOUBLE),
+        _f(2, 'write_iops', DOUBLE),
+        _f(3, 'read_bytes_per_sec', DOUBLE),
+        _f(4, 'write_bytes_per_sec', DOUBLE),
+    ],
+    'NetworkRates': [
+        _f(1, 'total', 'NetRate', omit=True),
+        _f(2, 'interfaces', 'NetRate', MAP, omit=True),
+    ],
+    'NetRate': [
+        _f(1, 'bytes_sent_per_sec', DOUBLE),
+        _f(2, 'bytes_recv_per_sec', DOUBLE),
+        _f(3, 'mbps_sent', DOUBLE),
+        _f(4, 'mbps_recv', DOUBLE),
+        _f(5, 'packets_sent_per_sec', DOUBLE),
+        _f(6, 'packets_recv_per_sec', DOUBLE),
+        _f(7, 'errors_per_sec', DOUBLE),
+        _f(8, 'drops_per_sec', DOUBLE),
+    ],
+    'SwapRate': [
+        _f(1, 'sin_bytes_per_sec', DOUBLE),
+        _f(2, 'sout_bytes_per_sec', DOUBLE),
+    ],
+    'SaturationRate': [
+        _f(1, 'cpu_some_percent', DOUBLE, OPTIONAL),
+        _f(2, 'cpu_full_percent', DOUBLE, OPTIONAL),
+        _f(3, 'memory_some_percent', DOUBLE, OPTIONAL),
+        _f(4, 'memory_full_percent', DOUBLE, OPTIONAL),
+        _f(5, 'io_some_percent', DOUBLE, OPTIONAL),
+        _f(6, 'io_full_percent', DOUBLE, OPTIONAL),
+        _f(7, 'pgmajfault_per_sec', DOUBLE),
+        _f(8, 'pswpin_per_sec', DOUBLE),
+        _f(9, 'pswpout_per_sec', DOUBLE),
+        _f(10, 'allocstall_per_sec', DOUBLE),
+        _f(11, 'oom_kill_per_sec', DOUBLE),
+    ],
+    'Inventory': [
+        _f(1, 'hostname', STRING),
+        _f(2, 'boot_time', DOUBLE),
+        _f(3, 'cpu', 'InventoryCpu'),
+        _f(4, 'network', 'InventoryNetwork'),
+        _f(5, 'version', UINT64),
+        _f(6, 'refreshed_at', STRING),
+    ],
+    'InventoryCpu': [
+        _f(1, 'count', 'CpuCount'),
+        _f(2, 'frequency', 'CpuFrequency'),
+    ],
+    'InventoryNetwork': [
+        _f(1, 'addresses', 'AddressList', MAP),
+    ],
+    'CollectorStatus': [
+        _f(1, 'status', STRING),
+        _f(2, 'duration_ms', DOUBLE),
+    ],
+    'AgentStats': [
+        _f(1, 'cpu_seconds', 'AgentCpuSeconds'),
+        _f(2, 'cpu_percent', DOUBLE, OPTIONAL, omit=True),
+        _f(3, 'rss_bytes', UINT64, OPTIONAL, omit=True),
+        _f(4, 'threads', UINT32),
+        _f(5, 'gc', 'GcStats'),
+        _f(6, 'bucket_bounds_ms', DOUBLE, REPEATED),
+        _f(7, 'functions', 'LatencyHistogram', MAP),
+    ],
+    'AgentCpuSeconds': [
+        _f(1, 'user', DOUBLE),
+        _f(2, 'system', DOUBLE),
+    ],
+    'GcStats': [
+        _f(1, 'collections', UINT64, REPEATED),
+        _f(2, 'collected', UINT64),
+        _f(3, 'uncollectable', UINT64),
+        _f(4, 'pause_ms', DOUBLE),
+    ],
+    'LatencyHistogram': [
+        _f(1, 'count', UINT64),
+        _f(2, 'sum_ms', DOUBLE),
+        _f(3, 'max_ms', DOUBLE),
+        _f(4, 'buckets', UINT64, REPEATED),
+    ],
+    'SchedulerStats': [
+        _f(1, 'interval', DOUBLE),
+        _f(2, 'ticks', UINT64),
+        _f(3, 'overruns', UINT64),
+        _f(4, 'skipped_ticks', UINT64),
+        _f(5, 'jitter_last_ms', DOUBLE),
+        _f(6, 'jitter_max_ms', DOUBLE),
+        _f(7, 'jitter_mean_ms', DOUBLE),
+    ],
+    'TransportStats': [
+        _f(1, 'sent_batches', UINT64),
+        _f(2, 'sent_snapshots', UINT64),
+        _f(3, 'failed_attempts', UINT64),
+        _f(4, 'bytes_sent', UINT64),
+        _f(5, 'connections_opened', UINT64),
+        _f(6, 'buffer', 'BufferStats'),
+    ],
+    'BufferStats': [
+        _f(1, 'memory', UINT64),
+        _f(2, 'spilled', UINT64),
+        _f(3, 'spill_bytes', UINT64),
+        _f(4, 'dropped', UINT64),
+    ],
+    'SaturationMetrics': [
+        _f(1, 'cpu', 'Pressure'),
+        _f(2, 'memory', 'Pressure'),
+        _f(3, 'io', 'Pressure'),
+        _f(4, 'vmstat', 'VmEvents'),
+    ],
+    'Pressure': [
+        _f(1, 'some', 'PressureStall'),
+        _f(2, 'full', 'PressureStall'),
+    ],
+    'PressureStall': [
+        _f(1, 'avg10', DOUBLE),
+        _f(2, 'avg60', DOUBLE),
+        _f(3, 'avg300', DOUBLE),
+        _f(4, 'total', UINT64),
+    ],
+    'VmEvents': [
+        _f(1, 'pgmajfault', UINT64),
+        _f(2, 'pswpin', UINT64),
+        _f(3, 'pswpout', UINT64),
+        _f(4, 'allocstall', UINT64),
+        _f(5, 'oom_kill', UINT64),
+    ],
+    'CgroupMetrics': [
+        _f(1, 'count', UINT64),
+        _f(2, 'top_cpu', 'CgroupUsage', REPEATED),
+        _f(3, 'top_memory', 'CgroupUsage', REPEATED),
+        _f(4, 'top_io', 'CgroupUsage', REPEATED),
+        _f(5, 'scan', 'CgroupScan'),
+    ],
+    'CgroupUsage': [
+        _f(1, 'path', STRING),
+        _f(2, 'cpu_percent', DOUBLE),
+        _f(3, 'throttled_percent', DOUBLE),
+        _f(4, 'memory_current', UINT64, OPTIONAL),
+        _f(5, 'memory_anon', UINT64, OPTIONAL),
+        _f(6, 'memory_file', UINT64, OPTIONAL),
+        _f(7, 'memory_limit', UINT64, OPTIONAL),
+        _f(8, 'read_bytes_per_sec', DOUBLE),
+        _f(9, 'write_bytes_per_sec', DOUBLE),
+        _f(10, 'read_iops', DOUBLE),
+        _f(11, 'write_iops', DOUBLE),
+    ],
+    'CgroupScan': [
+        _f(1, 'listed', UINT64),
+        _f(2, 'read', UINT64),
+        _f(3, 'duration_ms', DOUBLE),
+    ],
+}
+
+WRAPPERS = {'AddressList'}
+
+ROOT = 'Snapshot'
+
+
+# --- Wire primitives ---
+
+def _varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data, pos: int):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _wire_type(type_: str) -> int:
+    if type_ == DOUBLE:
+        return WIRE_FIXED64
+    if type_ in (UINT64, UINT32):
+        return WIRE_VARINT
+    return WIRE_LENGTH
+
+
+class _Compiled(NamedTuple):
+    """Field with precomputed tag bytes."""
+    field: Field
+    tag: bytes
+    packed_tag: bytes
+
+
+def _compile() -> Dict[str, List[_Compiled]]:
+    compiled = {}
+    for message, fields in SCHEMA.items():
+        compiled[message] = [
+            _Compiled(
+                field,
+                _varint(field.number << 3 | _wire_type(field.type)),
+                _varint(field.number << 3 | WIRE_LENGTH),
+            )
+            for field in fields
+        ]
+    return compiled
+
+
+_COMPILED = _compile()
+
+_MAP_KEY_TAG = _varint(1 << 3 | WIRE_LENGTH)
+
+
+# --- Encoding ---
+
+def _uint(type_: str, value) -> bytes:
+    number = int(value)
+    if not 0 <= number < _UINT_LIMITS[type_]:
+        raise EncodeError(f"{value!r} out of {type_} range")
+    return _varint(number)
+
+
+def _encode_scalar(type_: str, value, out: bytearray):
+    if type_ == DOUBLE:
+        out += _DOUBLE.pack(value)
+    elif type_ == STRING:
+        raw = value.encode('utf-8') if isinstance(value, str) else bytes(value)
+        out += _varint(len(raw))
+        out += raw
+    else:
+        out += _uint(type_, value)
+
+
+def _encode_value(type_: str, value, out: bytearray):
+    """Encode a scalar, or a length-prefixed sub-message."""
+    if type_ in SCALARS:
+        _encode_scalar(type_, value, out)
+    else:
+        body = encode_message(type_, value)
+        out += _varint(len(body))
+        out += body
+
+
+def encode_message(message: str, value: Union[Dict[str, Any], list]) -> bytes:
+    """
+    Encode a snapshot dict (or a section of it) as a protobuf message.
+
+    The dict is walked directly against the schema; no intermediate message
+    objects are built. Compact snapshot records (:mod:`agent.model`) are
+    read the same way.
+
+    Args:
+        message: Message name from the schema
+        value: Dict with the snapshot keys of that message, or a record
+
+    Returns:
+        Serialized message bytes
+
+    Raises:
+        EncodeError: A value does not fit its field (e.g. a negative
+            counter in an unsigned field); the message names the field
+    """
+    if message in WRAPPERS:
+        value = {_COMPILED[message][0].field.key: value}
+
+    out = bytearray()
+    for compiled in _COMPILED[message]:
+        field = compiled.field
+        item = value.get(field.key)
+        if item is None:
+            continue
+        label = field.label
+
+        try:
+            if label == SINGULAR:
+                # proto3 implicit presence: defaults are not written
+                if field.type in SCALARS and not item:
+                    continue
+                out += compiled.tag
+                _encode_value(field.type, item, out)
+            elif label == OPTIONAL:
+                out += compiled.tag
+                _encode_value(field.type, item, out)
+            elif label == REPEATED:
+                if not item:
+                    continue
+                if field.type == DOUBLE:
+                    out += compiled.packed_tag
+                    out += _varint(8 * len(item))
+                    if isinstance(item, array) and _NATIVE_DOUBLES:
+                        # Already in wire format (compact snapshot records)
+                        out += item
+                    else:
+                        out += struct.pack(f'<{len(item)}d', *item)
+                elif field.type in (UINT64, UINT32):
+                    # Packed, as proto3 writes repeated scalars
+                    packed = bytearray()
+                    for element in item:
+                        packed += _uint(field.type, element)
+                    out += compiled.packed_tag
+                    out += _varint(len(packed))
+                    out += packed
+                else:
+                    for element in item:
+                        out += compiled.tag
+                        _encode_value(field.type, element, out)
+            else:  # MAP
+                value_tag = _varint(2 << 3 | _wire_type(field.type))
+                for key, element in item.items():
+                    entry = bytearray(_MAP_KEY_TAG)
+                    _encode_scalar(STRING, str(key), entry)
+                    if element is not None:
+                        entry += value_tag
+                        _encode_value(field.type, element, entry)
+                    out += compiled.packed_tag
+                    out += _varint(len(entry))
+                    out += entry
+        except EncodeError as e:
+            raise EncodeError(e.reason, (field.key,) + e.path) from None
+
+    return bytes(out)
+
+
+def encode_snapshot(metrics: Dict[str, Any]) -> bytes:
+    """
+    Encode a snapshot from ``collect_all_metrics`` as a Snapshot message.
+
+    Uses the classes generated from metrics.proto when the upb-backed
+    protobuf runtime is installed; snapshots those refuse (keys the schema
+    does not know, floats in integer fields) and installs without it go
+    through :func:`encode_message`.
+
+    Args:
+        metrics: Snapshot dictionary, or a compact
+            :class:`~agent.model.Snapshot`
+
+    Returns:
+        Serialized Snapshot message
+
+    Raises:
+        EncodeError: A value does not fit its field
+    """
+    if metrics_pb2 is not None:
+        fields = metrics.to_dict() if hasattr(metrics, 'to_dict') else metrics
+        try:
+            return metrics_pb2.Snapshot(**_TO_FIELDS[ROOT](fields)).SerializeToString()
+        except (TypeError, ValueError):
+            pass
+    return encode_message(ROOT, metrics)
+
+
+# --- Decoding ---
+
+def _default(field: Field):
+    if field.label == OPTIONAL or field.type not in SCALARS:
+        return None
+    if field.type == STRING:
+        return ""
+    if field.type == DOUBLE:
+        return 0.0
+    return 0
+
+
+class _Layout(NamedTuple):
+    """Per-message decoding tables."""
+    fields: Dict[int, Field]
+    # Values of absent singular/optional fields (immutable)
+    defaults: Dict[str, Any]
+    # Repeated and map fields, pre-filled with fresh containers
+    lists: List[str]
+    maps: List[str]
+    # Container keys dropped again when left empty
+    omitted_containers: List[str]
+
+
+def _layouts() -> Dict[str, _Layout]:
+    layouts = {}
+    for message, fields in SCHEMA.items():
+        layouts[message] = _Layout(
+            fields={field.number: field for field in fields},
+            defaults={
+                field.key: _default(field) for field in fields
+                if field.label in (SINGULAR, OPTIONAL) and not field.omit
+            },
+            lists=[field.key for field in fields if field.label == REPEATED],
+            maps=[field.key for field in fields if field.label == MAP],
+            omitted_containers=[
+                field.key for field in fields if field.label in (REPEATED, MAP) and field.omit
+            ],
+        )
+    return layouts
+
+
+_LAYOUTS = _layouts()
+
+
+def _skip(data, pos: int, wire_type: int) -> int:
+    if wire_type == WIRE_VARINT:
+        return _read_varint(data, pos)[1]
+    if wire_type == WIRE_FIXED64:
+        return pos + 8
+    if wire_type == WIRE_FIXED32:
+        return pos + 4
+    if wire_type == WIRE_LENGTH:
+        length, pos = _read_varint(data, pos)
+        return pos + length
+    raise ValueError(f"Unsupported wire type {wire_type}")
+
+
+def _decode_value(type_: str, data, pos: int):
+    if type_ == DOUBLE:
+        return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+    length = data[pos]
+    if length < 0x80:
+        pos += 1
+    else:
+        length, pos = _read_varint(data, pos)
+    if type_ == UINT64 or type_ == UINT32:
+        return length, pos
+    end = pos + length
+    if type_ == STRING:
+        return str(data[pos:end], 'utf-8'), end
+    return decode_message(type_, data, pos, end), end
+
+
+def _decode_map_entry(type_: str, data, pos: int, end: int):
+    key, value = "", None
+    while pos < end:
+        tag, pos = _read_varint(data, pos)
+        if tag >> 3 == 1:
+            key, pos = _decode_value(STRING, data, pos)
+        elif tag >> 3 == 2:
+            value, pos = _decode_value(type_, data, pos)
+        else:
+            pos = _skip(data, pos, tag & 7)
+    if value is None:
+        value = decode_message(type_, b'', 0, 0) if type_ not in SCALARS else 0
+    return key, value
+
+
+def decode_message(message: str, data, pos: int = 0, end: Optional[int] = None):
+    """
+    Decode a protobuf message into the snapshot dict layout.
+
+    Absent fields decode like the collectors report missing values: None
+    for optional fields and sub-messages, 0/"" for plain scalars, empty
+    containers for repeated and map fields; sections flagged ``omit`` are
+    left out.
+
+    Args:
+        message: Message name from the schema
+        data: Buffer holding the message
+        pos: Start offset
+        end: End offset; end of the buffer if omitted
+
+    Returns:
+        Dict with snapshot keys (a list for wrapper messages)
+    """
+    if end is None:
+        end = len(data)
+    layout = _LAYOUTS[message]
+    fields = layout.fields
+    result = dict(layout.defaults)
+    for key in layout.lists:
+        result[key] = []
+    for key in layout.maps:
+        result[key] = {}
+
+    while pos < end:
+        tag = data[pos]
+        if tag < 0x80:
+            pos += 1
+        else:
+            tag, pos = _read_varint(data, pos)
+        wire_type = tag & 7
+        field = fields.get(tag >> 3)
+        if field is None:
+            pos = _skip(data, pos, wire_type)
+            continue
+
+        label = field.label
+        if label == REPEATED:
+            if field.type == DOUBLE and wire_type == WIRE_LENGTH:
+                length, pos = _read_varint(data, pos)
+                result[field.key].extend(struct.unpack_from(f'<{length // 8}d', data, pos))
+                pos += length
+            elif wire_type == WIRE_LENGTH and field.type in (UINT64, UINT32):
+                length, pos = _read_varint(data, pos)
+                packed_end = pos + length
+                items = result[field.key]
+                while pos < packed_end:
+                    item, pos = _read_varint(data, pos)
+                    items.append(item)
+            else:
+                item, pos = _decode_value(field.type, data, pos)
+                result[field.key].append(item)
+        elif label == MAP:
+            length, pos = _read_varint(data, pos)
+            key, value = _decode_map_entry(field.type, data, pos, pos + length)
+            result[field.key][key] = value
+            pos += length
+        else:
+            result[field.key], pos = _decode_value(field.type, data, pos)
+
+    for key in layout.omitted_containers:
+        if not result[key]:
+            del result[key]
+
+    if message in WRAPPERS:
+        return result[SCHEMA[message][0].key]
+    return result
+
+
+def decode_snapshot(data: bytes) -> Dict[str, Any]:
+    """
+    Decode a Snapshot message into the ``collect_all_metrics`` layout.
+
+    Parsed by the generated classes when available, by
+    :func:`decode_message` otherwise; both give the same dict.
+
+    Args:
+        data: Serialized Snapshot message
+
+    Returns:
+        Snapshot dictionary
+    """
+    if metrics_pb2 is not None:
+        return _FROM_MESSAGE[ROOT](metrics_pb2.Snapshot.FromString(data))
+    return decode_message(ROOT, data)
+
+
+# --- Generated classes ---
+#
+# With the upb runtime, parsing and serializing run in C and only the
+# mapping between dicts and messages is Python. Section dicts are passed
+# to the generated constructors as they are, except for messages with
+# renamed or wrapped fields; messages are read back with one attrgetter
+# call for all plain scalar fields.
+
+def _rewritten(message: str, memo: Dict[str, bool]) -> bool:
+    """Whether snapshot dicts of a message need rewriting for its constructor."""
+    if message not in memo:
+        memo[message] = False
+        memo[message] = message in WRAPPERS or any(
+            field.name or (field.type not in SCALARS and _rewritten(field.type, memo))
+            for field in SCHEMA[message]
+        )
+    return memo[message]
+
+
+def _to_fields_function(message: str, rewritten: Dict[str, bool],
+                        functions: Dict[str, Callable]) -> Callable[[Any], Dict[str, Any]]:
+    steps = [
+        (field.key, field.name or field.key, field.label,
+         field.type if field.type not in SCALARS and rewritten[field.type] else None)
+        for field in SCHEMA[message]
+    ]
+    wrapper = steps[0][0] if message in WRAPPERS else None
+
+    def to_fields(value):
+        if wrapper is not None:
+            value = {wrapper: value}
+        result = {}
+        for key, name, label, sub in steps:
+            item = value.get(key)
+            if item is None:
+                continue
+            if sub is not None:
+                convert = functions[sub]
+                if label == REPEATED:
+                    item = [convert(element) for element in item]
+                elif label == MAP:
+                    item = {k: element if element is None else convert(element) for k, element in item.items()}
+                else:
+                    item = convert(item)
+            result[name] = item
+        return result
+
+    return to_fields
+
+
+def _from_message_function(message: str, functions: Dict[str, Callable]) -> Callable[[Any], Any]:
+    plain = [field for field in SCHEMA[message] if field.label == SINGULAR and field.type in SCALARS
+             and not field.omit]
+    keys = [field.key for field in plain]
+    getter = attrgetter(*(field.name or field.key for field in plain)) if plain else None
+    steps = [
+        (field.key, field.name or field.key, field.label, field.type, field.type in SCALARS, field.omit)
+        for field in SCHEMA[message] if field not in plain
+    ]
+    wrapper = SCHEMA[message][0].key if message in WRAPPERS else None
+
+    if not steps and len(plain) > 1:
+        return lambda msg: dict(zip(keys, getter(msg)))
+
+    def from_message(msg):
+        if getter is None:
+            result = {}
+        elif len(keys) == 1:
+            result = {keys[0]: getter(msg)}
+        else:
+            result = dict(zip(keys, getter(msg)))
+        for key, name, label, type_, scalar, omit in steps:
+            value = getattr(msg, name)
+            if label == REPEATED:
+                if scalar:
+                    value = list(value)
+                else:
+                    convert = functions[type_]
+                    value = [convert(element) for element in value]
+                if omit and not value:
+                    continue
+            elif label == MAP:
+                if scalar:
+                    value = dict(value)
+                else:
+                    # Keys and lookups run in C; items() iterates in Python
+                    convert = functions[type_]
+                    value = {k: convert(value[k]) for k in value}
+                if omit and not value:
+                    continue
+            elif not msg.HasField(name):
+                if omit:
+                    continue
+                value = None
+            elif not scalar:
+                value = functions[type_](value)
+            result[key] = value
+        if wrapper is not None:
+            return result[wrapper]
+        return result
+
+    return from_message
+
+
+def _compile_generated():
+    rewritten: Dict[str, bool] = {}
+    for message in SCHEMA:
+        _rewritten(message, rewritten)
+    to_fields: Dict[str, Callable] = {}
+    from_message: Dict[str, Callable] = {}
+    for message in SCHEMA:
+        if rewritten[message]:
+            to_fields[message] = _to_fields_function(message, rewritten, to_fields)
+        from_message[message] = _from_message_function(message, from_message)
+    if ROOT not in to_fields:
+        to_fields[ROOT] = lambda value: value
+    return to_fields, from_message
+
+
+_TO_FIELDS, _FROM_MESSAGE = _compile_generated()
+
+
+# --- Batch framing ---
+
+def frame(payloads: List[bytes]) -> bytes:
+    """Join encoded messages into one length-delimited stream."""
+    return b''.join(_varint(len(payload)) + payload for payload in payloads)
+
+
+def unframe(data: bytes) -> Iterator[memoryview]:
+    """Split a length-delimited stream into message buffers."""
+    view = memoryview(data)
+    pos = 0
+    while pos < len(view):
+        length, pos = _read_varint(view, pos)
+        yield view[pos:pos + length]
+        pos += length
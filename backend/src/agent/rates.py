@@ -0,0 +1,260 @@
+"""Per-second rate computation for monotonic counters."""
+import time
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+
+# Counter widths the kernel exposes; a counter in the upper half of its
+# range that goes backwards is assumed to have wrapped, anything else is
+# treated as a reset (reboot, driver reload, device re-plugged)
+COUNTER_LIMITS = (2 ** 32, 2 ** 64)
+
+
+def counter_delta(previous: int, current: int) -> Optional[int]:
+    """
+    Difference between two readings of a monotonic counter.
+
+    Args:
+        previous: Earlier reading
+        current: Later reading
+
+    Returns:
+        Increase of the counter, accounting for 32/64-bit wraparound, or
+        None if the counter was reset
+    """
+    if current >= previous:
+        return current - previous
+
+    for limit in COUNTER_LIMITS:
+        if limit // 2 <= previous < limit:
+            return limit - previous + current
+
+    return None
+
+
+class RateTracker:
+    """
+    Turn successive counter readings into per-second rates.
+
+    Only the last reading of each key is kept, as a tuple of integers with
+    its monotonic timestamp, never the snapshot it came from.
+    """
+
+    def __init__(self):
+        self._previous: Dict[Any, Tuple[float, Tuple[int, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._previous)
+
+    def update(self, key: Any, counters: Sequence[Optional[int]], now: float) -> Optional[Tuple[Optional[float], ...]]:
+        """
+        Record a reading and return rates since the previous one.
+
+        Args:
+            key: Identity of the counter set (e.g. ``("disk", "sda")``)
+            counters: Current counter values, always in the same order;
+                None for a counter the system does not provide
+            now: Monotonic time of the reading
+
+        Returns:
+            Per-second rate for each counter (None where either reading is
+            missing), or None on the first reading, after a reset or when
+            no time has elapsed
+        """
+        counters = tuple(counters)
+        previous = self._previous.get(key)
+        self._previous[key] = (now, counters)
+
+        if previous is None or len(previous[1]) != len(counters):
+            return None
+
+        interval = now - previous[0]
+        if interval <= 0:
+            return None
+
+        rates = []
+        for before, after in zip(previous[1], counters):
+            if before is None or after is None:
+                rates.append(None)
+                continue
+            delta = counter_delta(before, after)
+            if delta is None:
+                return None
+            rates.append(delta / interval)
+        return tuple(rates)
+
+    def prune(self, keep) -> None:
+        """Forget keys for which ``keep(key)`` is false."""
+        for key in [key for key in self._previous if not keep(key)]:
+            del self._previous[key]
+
+
+DISK_FIELDS = ("read_count", "write_count", "read_bytes", "write_bytes")
+NETWORK_FIELDS = ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv",
+                  "errin", "errout", "dropin", "dropout")
+SWAP_FIELDS = ("sin", "sout")
+PRESSURE_FIELDS = ("cpu_some", "cpu_full", "memory_some", "memory_full", "io_some", "io_full")
+VM_EVENT_FIELDS = ("pgmajfault", "pswpin", "pswpout", "allocstall", "oom_kill")
+SATURATION_FIELDS = PRESSURE_FIELDS + VM_EVENT_FIELDS
+
+# Snapshot sections whose counters the stage turns into rates
+COUNTER_SECTIONS = ('disk', 'network', 'memory', 'saturation')
+
+
+def _disk_rates(rates: Tuple[float, ...]) -> Dict[str, float]:
+    read_iops, write_iops, read_bytes, write_bytes = rates
+    return {
+        "read_iops": read_iops,
+        "write_iops": write_iops,
+        "read_bytes_per_sec": read_bytes,
+        "write_bytes_per_sec": write_bytes,
+    }
+
+
+def _network_rates(rates: Tuple[float, ...]) -> Dict[str, float]:
+    sent, recv, packets_sent, packets_recv, errin, errout, dropin, dropout = rates
+    return {
+        "bytes_sent_per_sec": sent,
+        "bytes_recv_per_sec": recv,
+        "mbps_sent": sent * 8 / 1_000_000,
+        "mbps_recv": recv * 8 / 1_000_000,
+        "packets_sent_per_sec": packets_sent,
+        "packets_recv_per_sec": packets_recv,
+        "errors_per_sec": errin + errout,
+        "drops_per_sec": dropin + dropout,
+    }
+
+
+def _swap_rates(rates: Tuple[float, ...]) -> Dict[str, float]:
+    sin, sout = rates
+    return {
+        "sin_bytes_per_sec": sin,
+        "sout_bytes_per_sec": sout,
+    }
+
+
+def _saturation_counters(saturation: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """Flatten the stall totals and vmstat counters of the saturation section."""
+    counters = dict(saturation.get("vmstat") or {})
+    for field in PRESSURE_FIELDS:
+        resource, kind = field.split("_")
+        # No PSI (or no CPU "full" line): unknown, not zero stall time
+        counters[field] = ((saturation.get(resource) or {}).get(kind) or {}).get("total")
+    return counters
+
+
+def _stall_percent(rate: Optional[float]) -> Optional[float]:
+    # Stall totals are in microseconds: per second, / 1e4 is percent of time
+    return None if rate is None else rate / 1e4
+
+
+def _saturation_rates(rates: Tuple[Optional[float], ...]) -> Dict[str, Optional[float]]:
+    (cpu_some, cpu_full, memory_some, memory_full, io_some, io_full,
+     pgmajfault, pswpin, pswpout, allocstall, oom_kill) = rates
+    return {
+        "cpu_some_percent": _stall_percent(cpu_some),
+        "cpu_full_percent": _stall_percent(cpu_full),
+        "memory_some_percent": _stall_percent(memory_some),
+        "memory_full_percent": _stall_percent(memory_full),
+        "io_some_percent": _stall_percent(io_some),
+        "io_full_percent": _stall_percent(io_full),
+        "pgmajfault_per_sec": pgmajfault,
+        "pswpin_per_sec": pswpin,
+        "pswpout_per_sec": pswpout,
+        "allocstall_per_sec": allocstall,
+        "oom_kill_per_sec": oom_kill,
+    }
+
+
+class RateStage:
+    """
+    Pipeline stage adding a ``rates`` section to each snapshot.
+
+    Computes per-disk and total IOPS/throughput, per-interface and total
+    bandwidth, swap-in/out rates, and stall shares and memory event rates
+    from the raw counters of the disk, network, memory and saturation
+    sections, using the measured monotonic interval
+    between the readings of each counter set.
+    """
+
+    def __init__(self):
+        self._tracker = RateTracker()
+
+    def _group(self, group: str, entries: Dict[str, Dict[str, Any]], fields, build, now) -> Dict[str, Any]:
+        result = {}
+        for name, stats in entries.items():
+            if stats is None:
+                continue
+            rates = self._tracker.update((group, name), (stats[field] for field in fields), now)
+            if rates is not None:
+                result[name] = build(rates)
+
+        # Forget devices that disappeared
+        self._tracker.prune(lambda key: key[0] != group or key[1] in entries)
+        return result
+
+    def process(
+        self,
+        metrics: Dict[str, Any],
+        now: Optional[float] = None,
+        read_at: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Compute rates for the counter sections present in a snapshot.
+
+        Args:
+            metrics: Snapshot produced by ``collect_all_metrics``
+            now: Monotonic time the counters were read; now if omitted
+            read_at: Monotonic time each section's counters were read, by
+                section name; ``now`` for sections not listed
+
+        Returns:
+            Rates section; empty when no section has a previous reading
+        """
+        if now is None:
+            now = time.monotonic()
+        read_at = read_at or {}
+        rates: Dict[str, Any] = {}
+
+        disk = metrics.get('disk')
+        if disk:
+            when = read_at.get('disk', now)
+            section = {}
+            total = self._group("disk", {"total": disk.get('io_stats')}, DISK_FIELDS, _disk_rates, when)
+            if total:
+                section["total"] = total["total"]
+            per_disk = self._group("disk_per_disk", disk.get('per_disk_io') or {}, DISK_FIELDS, _disk_rates, when)
+            if per_disk:
+                section["per_disk"] = per_disk
+            if section:
+                rates["disk"] = section
+
+        network = metrics.get('network')
+        if network:
+            when = read_at.get('network', now)
+            section = {}
+            total = self._group("network", {"total": network.get('total')}, NETWORK_FIELDS, _network_rates, when)
+            if total:
+                section["total"] = total["total"]
+            interfaces = self._group("network_interfaces", network.get('interfaces') or {},
+                                     NETWORK_FIELDS, _network_rates, when)
+            if interfaces:
+                section["interfaces"] = interfaces
+            if section:
+                rates["network"] = section
+
+        memory = metrics.get('memory')
+        if memory:
+            when = read_at.get('memory', now)
+            swap = self._group("swap", {"swap": memory.get('swap')}, SWAP_FIELDS, _swap_rates, when)
+            if swap:
+                rates["swap"] = swap["swap"]
+
+        saturation = metrics.get('saturation')
+        if saturation:
+            when = read_at.get('saturation', now)
+            counters = {"saturation": _saturation_counters(saturation)}
+            saturation_rates = self._group("saturation", counters, SATURATION_FIELDS, _saturation_rates, when)
+            if saturation_rates:
+                rates["saturation"] = saturation_rates["saturation"]
+
+        return rates
@@ -0,0 +1,132 @@
+"""Concurrent collector execution with per-collector deadlines."""
+import logging
+import queue
+import threading
+import time
+# A different class from the builtin TimeoutError before Python 3.11
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Callable, Optional, Tuple
+
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+
+
+class CollectorRunner:
+    """
+    Run collector functions in parallel on a bounded pool of worker threads.
+
+    Each collector gets a deadline. A collector that misses it is reported
+    as timed out and the cycle continues without it; its call keeps running
+    in the background and the collector is not submitted again until that
+    call returns, so a hung call (e.g. ``disk_usage`` on a dead NFS mount)
+    occupies at most one worker.
+
+    Workers are daemon threads so a hung collector never blocks shutdown.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._in_flight: Dict[str, Future] = {}
+        self._workers = []
+
+        for index in range(max_workers):
+            worker = threading.Thread(
+                target=self._work,
+                name=f"collector-{index}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self):
+        """Worker loop executing submitted collector calls."""
+        while True:
+            future, func = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.monotonic()
+            try:
+                result = func()
+            except BaseException as e:
+                future.duration = time.monotonic() - started
+                future.set_exception(e)
+            else:
+                future.duration = time.monotonic() - started
+                future.set_result(result)
+
+    def _submit(self, name: str, func: Callable[[], Any]) -> Optional[Future]:
+        """Submit a collector unless its previous call is still running."""
+        previous = self._in_flight.get(name)
+        if previous is not None and not previous.done():
+            return None
+
+        future: Future = Future()
+        self._in_flight[name] = future
+        self._queue.put((future, func))
+        return future
+
+    def run(
+        self,
+        tasks: Dict[str, Callable[[], Any]],
+        timeout: float,
+        timeouts: Optional[Dict[str, float]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        Run collectors concurrently and wait for each up to its deadline.
+
+        Args:
+            tasks: Mapping of collector name to a zero-argument callable
+            timeout: Default deadline in seconds for each collector
+            timeouts: Optional per-collector deadline overrides
+
+        Returns:
+            Tuple of (results, status) where results holds the return value
+            of every collector that finished in time and status holds
+            ``{"status": ..., "duration_ms": ...}`` for every collector
+        """
+        timeouts = timeouts or {}
+        start = time.monotonic()
+        futures = {name: self._submit(name, func) for name, func in tasks.items()}
+
+        results: Dict[str, Any] = {}
+        status: Dict[str, Dict[str, Any]] = {}
+
+        # Wait on the earliest deadline first so no collector waits longer than its own
+        order = sorted(futures, key=lambda name: timeouts.get(name, timeout))
+        for name in order:
+            future = futures[name]
+            deadline = start + timeouts.get(name, timeout)
+
+            if future is None:
+                state = STATUS_TIMEOUT
+                logging.warning(f"Collector {name} is still running from a previous cycle")
+            else:
+                try:
+                    results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                    state = STATUS_OK
+                except FutureTimeoutError as e:
+                    if future.done() and future.exception() is e:
+                        # Raised by the collector itself (the builtin class from 3.11)
+                        state = STATUS_ERROR
+                        logging.error(f"Failed to collect {name} metrics: {e}")
+                    else:
+                        state = STATUS_TIMEOUT
+                        logging.warning(f"Collector {name} missed its deadline")
+                except Exception as e:
+                    state = STATUS_ERROR
+                    logging.error(f"Failed to collect {name} metrics: {e}")
+
+            # Only finished calls have a duration; a running one is still going
+            if future is not None and future.done():
+                duration = future.duration
+            else:
+                duration = time.monotonic() - start
+
+            status[name] = {
+                "status": state,
+                "duration_ms": round(duration * 1000, 3),
+            }
+
+        return results, status
@@ -0,0 +1,136 @@
+"""Drift-free fixed-rate scheduler for the collection loop."""
+import math
+import time
+from functools import reduce
+from typing import Dict, Any, Callable, Iterator, List
+
+
+class FixedRateScheduler:
+    """
+    Fire on fixed, aligned tick boundaries measured on the monotonic clock.
+
+    Ticks are aligned to multiples of the interval on the wall clock (a 5s
+    interval fires at :00, :05, :10, ...) and then advanced on the monotonic
+    clock, so collection and formatting time never adds to the period. When
+    a cycle runs past the next boundary, the missed ticks are skipped and
+    the next future boundary is used: samples stay on the grid and the
+    scheduler never bursts to catch up.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+
+        self.interval = interval
+        self._clock = clock
+        self._sleep = sleep
+
+        # Map the monotonic clock onto the next aligned wall-clock boundary
+        now, wall = clock(), wall_clock()
+        delay = (interval - wall % interval) % interval
+        self._origin = now + delay
+        self._origin_wall = wall + delay
+        self._index = 0
+
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self._jitter_last = 0.0
+        self._jitter_max = 0.0
+        self._jitter_total = 0.0
+
+    def _deadline(self, index: int) -> float:
+        return self._origin + index * self.interval
+
+    def wait(self) -> float:
+        """
+        Sleep until the next tick boundary.
+
+        Returns:
+            Wall-clock time (epoch seconds) of the scheduled tick
+        """
+        now = self._clock()
+        deadline = self._deadline(self._index)
+
+        if now > deadline:
+            # The previous cycle ran past this boundary: skip to the next one
+            target = math.ceil((now - self._origin) / self.interval)
+            self.overruns += 1
+            self.skipped += target - self._index
+            self._index = target
+            deadline = self._deadline(self._index)
+
+        if deadline > now:
+            self._sleep(deadline - now)
+
+        jitter = max(0.0, self._clock() - deadline)
+        self._jitter_last = jitter
+        self._jitter_max = max(self._jitter_max, jitter)
+        self._jitter_total += jitter
+        self.ticks += 1
+
+        scheduled = self._origin_wall + self._index * self.interval
+        self._index += 1
+        return scheduled
+
+    def __iter__(self) -> Iterator[float]:
+        while True:
+            yield self.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return scheduler counters for the metrics payload."""
+        return {
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped,
+            "jitter_last_ms": round(self._jitter_last * 1000, 3),
+            "jitter_max_ms": round(self._jitter_max * 1000, 3),
+            "jitter_mean_ms": round(self._jitter_total / self.ticks * 1000, 3) if self.ticks else 0.0,
+        }
+
+
+class CollectorSchedule:
+    """
+    Tiered sampling plan for collectors with independent intervals.
+
+    The base tick is the greatest common divisor of all collector intervals
+    (at millisecond resolution). On each tick only the collectors whose
+    interval boundary was reached are due; a collector is always due on
+    the first tick and after skipped ticks it runs once, not once per
+    missed boundary.
+    """
+
+    def __init__(self, intervals: Dict[str, float]):
+        self.intervals = dict(intervals)
+        self._next_due: Dict[str, float] = {}
+
+        millis = [max(1, round(interval * 1000)) for interval in self.intervals.values()]
+        self.base_interval = reduce(math.gcd, millis) / 1000 if millis else 1.0
+
+    def due(self, tick: float) -> List[str]:
+        """
+        Return the collectors due at a scheduled tick.
+
+        Args:
+            tick: Scheduled wall-clock time (epoch seconds) of the tick
+
+        Returns:
+            List of collector names to run on this tick
+        """
+        due = []
+        # Tolerate float error in tick arithmetic
+        now = tick + 1e-6
+
+        for name, interval in self.intervals.items():
+            if now >= self._next_due.get(name, 0.0):
+                due.append(name)
+                self._next_due[name] = (math.floor(now / interval) + 1) * interval
+
+        return due
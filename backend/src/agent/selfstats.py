@@ -0,0 +1,172 @@
+"""Self-instrumentation: the agent's own CPU, memory, GC and collector latency."""
+import functools
+import gc
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Any, Callable, Optional, Sequence
+
+import psutil
+
+
+# Upper bounds (ms) of the latency histogram buckets; a last bucket
+# counts everything slower
+DEFAULT_BOUNDS_MS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (counts per bucket, not cumulative)."""
+
+    __slots__ = ('bounds', 'buckets', 'count', 'sum_ms', 'max_ms')
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        """Record one duration in milliseconds."""
+        self.buckets[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": list(self.buckets),
+        }
+
+
+class SelfMonitor:
+    """
+    Measure what the agent itself costs.
+
+    Collector functions wrapped with :meth:`timed` (or run through
+    :meth:`call`) feed one latency histogram per function name; they may
+    run on any thread. :meth:`stats` returns the ``agent`` snapshot
+    section: process CPU time and its share of one core since the previous
+    call, RSS, thread count, garbage collector activity including the time
+    spent in collections, and the histograms. All values except
+    ``cpu_percent`` are cumulative since start, so consumers can diff any
+    two snapshots.
+    """
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS_MS):
+        self.bounds = tuple(bounds)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._process = psutil.Process()
+        self._previous: Optional[tuple] = None
+
+        self._gc_started = 0.0
+        self.gc_pause = 0.0
+        gc.callbacks.append(self._on_gc)
+
+    def close(self):
+        """Stop timing garbage collections."""
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _on_gc(self, phase: str, info: Dict[str, Any]):
+        if phase == 'start':
+            self._gc_started = time.perf_counter()
+        else:
+            self.gc_pause += time.perf_counter() - self._gc_started
+
+    def observe(self, name: str, seconds: float):
+        """
+        Record one call duration.
+
+        Args:
+            name: Function name
+            seconds: Wall time of the call
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram(self.bounds)
+            histogram.observe(seconds * 1000)
+
+    def timed(self, func: Callable, name: Optional[str] = None) -> Callable:
+        """
+        Wrap a function so every call is recorded under its name.
+
+        Args:
+            func: Function (or ``functools.partial``) to wrap
+            name: Histogram name; the function's ``__name__`` if omitted
+
+        Returns:
+            Wrapped callable
+        """
+        if name is None:
+            name = getattr(func, 'func', func).__name__
+
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(name, time.perf_counter() - started)
+
+        return functools.update_wrapper(wrapper, getattr(func, 'func', func))
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Call ``func`` once, recording its duration under its name."""
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.observe(func.__name__, time.perf_counter() - started)
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Build the ``agent`` snapshot section.
+
+        Args:
+            now: Monotonic time of the reading; now if omitted
+
+        Returns:
+            Self-metrics dictionary
+        """
+        if now is None:
+            now = time.monotonic()
+        times = os.times()
+        cpu_seconds = times.user + times.system
+
+        section: Dict[str, Any] = {
+            "cpu_seconds": {"user": round(times.user, 3), "system": round(times.system, 3)},
+        }
+        if self._previous is not None:
+            previous_time, previous_cpu = self._previous
+            elapsed = now - previous_time
+            if elapsed > 0:
+                # Share of one core, so 1.0 means 1% of a core
+                section["cpu_percent"] = round((cpu_seconds - previous_cpu) / elapsed * 100, 3)
+        self._previous = (now, cpu_seconds)
+
+        try:
+            section["rss_bytes"] = self._process.memory_info().rss
+        except psutil.Error:
+            pass
+        section["threads"] = threading.active_count()
+
+        generations = gc.get_stats()
+        section["gc"] = {
+            "collections": [generation["collections"] for generation in generations],
+            "collected": sum(generation["collected"] for generation in generations),
+            "uncollectable": sum(generation["uncollectable"] for generation in generations),
+            "pause_ms": round(self.gc_pause * 1000, 3),
+        }
+
+        with self._lock:
+            functions = {name: histogram.as_dict() for name, histogram in sorted(self._histograms.items())}
+        section["bucket_bounds_ms"] = list(self.bounds)
+        section["functions"] = functions
+        return section
@@ -0,0 +1,505 @@
+"""Embedded columnar time-series store with 1m/1h rollups."""
+import array
+import logging
+import math
+import mmap
+import os
+import shutil
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, unquote
+
+
+logger = logging.getLogger(__name__)
+
+COLUMN_SUFFIX = '.col'
+TIMESTAMP_COLUMN = '@ts'
+ROLLUP_STATS = ('min', 'max', 'avg', 'last', 'count')
+
+NAN = float('nan')
+
+# Snapshot sections that are not numeric time series
+SKIPPED_SECTIONS = ('inventory', 'top_cpu_processes', 'top_memory_processes')
+
+# Latency histogram layout of the agent section: the bounds are constant
+# and per-bucket counts would add a series per bucket of every function
+SKIPPED_KEYS = ('bucket_bounds_ms', 'buckets')
+
+
+class Tier(NamedTuple):
+    """Storage tier: raw samples (resolution 0) or a rollup."""
+    name: str
+    # Rollup bucket width in seconds; 0 for raw samples
+    resolution: int
+    retention: int
+    # Time span of one segment; retention drops whole segments
+    segment_seconds: int
+    # Rows per segment
+    capacity: int
+
+
+DAY = 86400
+
+# Retention tiers of docs/plan.md: raw 7 days, 1m rollups 30 days,
+# 1h rollups 1 year. Raw segments hold up to one sample per second.
+DEFAULT_TIERS = (
+    Tier('raw', 0, 7 * DAY, 6 * 3600, 6 * 3600),
+    Tier('1m', 60, 30 * DAY, DAY, DAY // 60),
+    Tier('1h', 3600, 365 * DAY, 30 * DAY, 30 * 24),
+)
+
+
+def numeric_fields(metrics: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Flatten the numeric leaves of a snapshot into dotted series names.
+
+    Lists of numbers become indexed series (``cpu.per_core_percent.3``);
+    lists of records (partitions, top processes), the inventory and the
+    agent's histogram buckets are not time series and are skipped.
+
+    Args:
+        metrics: Snapshot dictionary
+
+    Returns:
+        Mapping of series name to value
+    """
+    fields: Dict[str, float] = {}
+
+    def walk(value, prefix):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in SKIPPED_KEYS:
+                    continue
+                walk(item, f"{prefix}.{key}" if prefix else str(key))
+        elif isinstance(value, (list, tuple)):
+            for index, item in enumerate(value):
+                if isinstance(item, (dict, list, tuple)):
+                    return
+                walk(item, f"{prefix}.{index}")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            fields[prefix] = float(value)
+
+    for section, value in metrics.items():
+        if section not in SKIPPED_SECTIONS:
+            walk(value, section)
+    return fields
+
+
+def snapshot_time(metrics: Dict[str, Any]) -> float:
+    """Epoch seconds of a snapshot's UTC ``timestamp``."""
+    return datetime.fromisoformat(metrics['timestamp']).replace(tzinfo=timezone.utc).timestamp()
+
+
+class _Column:
+    """Fixed-width float64 column in a memory-mapped, preallocated file."""
+
+    def __init__(self, path: str, capacity: int, writable: bool):
+        size = capacity * 8
+        flags = os.O_RDWR | os.O_CREAT if writable else os.O_RDONLY
+        fd = os.open(path, flags, 0o644)
+        try:
+            if writable and os.fstat(fd).st_size < size:
+                # Sparse file: pages are only allocated once written
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self.values = memoryview(self._mmap).cast('d')
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        self.values.release()
+        self._mmap.close()
+
+
+class Segment:
+    """
+    One time slice of a tier: a timestamp column plus one column per series.
+
+    Every column is a file of ``capacity`` float64 slots; row ``i`` of all
+    columns belongs to timestamp ``i``. Columns that appear mid-segment are
+    backfilled with NaN. The row count is not stored separately: unused
+    timestamp slots are zero, so it is found by binary search on open.
+    """
+
+    def __init__(self, directory: str, start: int, capacity: int, writable: bool = False):
+        self.directory = directory
+        self.start = start
+        self.capacity = capacity
+        self.writable = writable
+        if writable:
+            os.makedirs(directory, exist_ok=True)
+        self._columns: Dict[str, _Column] = {}
+        self.timestamps = self._open(TIMESTAMP_COLUMN).values
+        self.rows = self._count_rows()
+        self._series = set(self._list_series())
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, quote(name, safe='') + COLUMN_SUFFIX)
+
+    def _open(self, name: str) -> _Column:
+        column = _Column(self._path(name), self.capacity, self.writable)
+        self._columns[name] = column
+        return column
+
+    def _count_rows(self) -> int:
+        low, high = 0, self.capacity
+        timestamps = self.timestamps
+        while low < high:
+            middle = (low + high) // 2
+            if timestamps[middle] > 0:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _list_series(self) -> List[str]:
+        return [
+            unquote(name[:-len(COLUMN_SUFFIX)]) for name in os.listdir(self.directory)
+            if name.endswith(COLUMN_SUFFIX) and name != quote(TIMESTAMP_COLUMN, safe='') + COLUMN_SUFFIX
+        ]
+
+    def column(self, name: str, create: bool = False) -> Optional[memoryview]:
+        """
+        Values of one series, or None if the segment does not hold it.
+
+        Args:
+            name: Series name
+            create: Create the column (NaN up to the current row) if missing
+        """
+        column = self._columns.get(name)
+        if column is None:
+            if not os.path.exists(self._path(name)):
+                if not create:
+                    return None
+                column = self._open(name)
+                column.values[:self.rows] = array.array('d', [NAN]) * self.rows
+                self._series.add(name)
+            else:
+                column = self._open(name)
+        return column.values
+
+    def write_row(self, row: int, timestamp: float, values: Dict[str, float]):
+        """Write (or overwrite) one row; columns not in ``values`` get NaN."""
+        for name in self._series - values.keys():
+            self.column(name)[row] = NAN
+        for name, value in values.items():
+            self.column(name, create=True)[row] = value
+        self.timestamps[row] = timestamp
+        self.rows = max(self.rows, row + 1)
+
+    def series(self) -> List[str]:
+        """Names of the series stored in this segment."""
+        return sorted(self._series)
+
+    def row_range(self, start: float, end: float) -> Tuple[int, int]:
+        """Rows with ``start <= timestamp < end``."""
+        timestamps = self.timestamps[:self.rows]
+        return bisect_left(timestamps, start), bisect_left(timestamps, end)
+
+    def flush(self):
+        """Write dirty pages of all open columns back to their files."""
+        for column in self._columns.values():
+            column.flush()
+
+    def close(self):
+        if self.writable:
+            self.flush()
+        self.timestamps = None
+        for column in self._columns.values():
+            column.close()
+        self._columns = {}
+
+
+class _Rollup:
+    """Running min/max/avg/last of every series in the current bucket."""
+
+    def __init__(self):
+        self.bucket: Optional[int] = None
+        self.stats: Dict[str, List[float]] = {}
+
+    def add(self, values: Dict[str, float]):
+        stats = self.stats
+        for name, value in values.items():
+            if value != value:  # NaN
+                continue
+            current = stats.get(name)
+            if current is None:
+                stats[name] = [value, value, value, 1, value]
+            else:
+                if value < current[0]:
+                    current[0] = value
+                if value > current[1]:
+                    current[1] = value
+                current[2] += value
+                current[3] += 1
+                current[4] = value
+
+    def row(self) -> Dict[str, float]:
+        row = {}
+        for name, (low, high, total, count, last) in self.stats.items():
+            row[f'{name}:min'] = low
+            row[f'{name}:max'] = high
+            row[f'{name}:avg'] = total / count
+            row[f'{name}:last'] = last
+            row[f'{name}:count'] = count
+        return row
+
+
+def _merge_rollup(existing: Dict[str, float], new: Dict[str, float]) -> Dict[str, float]:
+    """Combine a bucket row written before a restart with the rest of the bucket."""
+    merged = dict(existing)
+    merged.update(new)
+    for key in new:
+        if not key.endswith(':count'):
+            continue
+        name = key[:-len(':count')]
+        old_count = existing.get(key, NAN)
+        if old_count != old_count:  # series absent from the earlier row
+            continue
+        count = new[key]
+        merged[f'{name}:min'] = min(existing[f'{name}:min'], new[f'{name}:min'])
+        merged[f'{name}:max'] = max(existing[f'{name}:max'], new[f'{name}:max'])
+        merged[f'{name}:avg'] = (existing[f'{name}:avg'] * old_count + new[f'{name}:avg'] * count) / (old_count + count)
+        merged[key] = old_count + count
+    return merged
+
+
+class TimeSeriesStore:
+    """
+    Append-only columnar store for snapshot history.
+
+    Samples go to the raw tier and are rolled up incrementally into the 1m
+    and 1h tiers as they arrive (min/max/avg/last per bucket). Whenever a
+    bucket of the finest rollup tier closes, the open buckets of every
+    rollup tier are written as well, so an agent that dies without
+    :meth:`close` loses at most one such bucket of rollups. Each tier is a directory of segments covering fixed
+    time spans; expired data is removed by deleting whole segment
+    directories. Range queries binary-search the timestamp column of the
+    overlapping segments and copy column slices, without parsing rows.
+
+    The store has a single writer; queries may run in the same process.
+    """
+
+    def __init__(self, directory: str, tiers=DEFAULT_TIERS):
+        self.directory = directory
+        self.tiers = {tier.name: tier for tier in tiers}
+        self._writers: Dict[str, Segment] = {}
+        self._rollups = {tier.name: _Rollup() for tier in tiers if tier.resolution}
+        # Closing one of its buckets writes the open buckets of all rollups
+        self._flush_tier = min((tier for tier in tiers if tier.resolution),
+                               key=lambda tier: tier.resolution, default=None)
+        self._last_time: Optional[float] = None
+        self.dropped = 0
+        for tier in tiers:
+            os.makedirs(os.path.join(directory, tier.name), exist_ok=True)
+
+    # --- Segments ---
+
+    def _segment_dir(self, tier: Tier, start: int) -> str:
+        return os.path.join(self.directory, tier.name, f'{start:012d}')
+
+    def _segment_starts(self, tier: Tier) -> List[int]:
+        return sorted(int(name) for name in os.listdir(os.path.join(self.directory, tier.name)) if name.isdigit())
+
+    def _writer(self, tier: Tier, timestamp: float) -> Segment:
+        start = int(timestamp) - int(timestamp) % tier.segment_seconds
+        segment = self._writers.get(tier.name)
+        if segment is None or segment.start != start:
+            if segment is not None:
+                segment.close()
+            segment = Segment(self._segment_dir(tier, start), start, tier.capacity, writable=True)
+            self._writers[tier.name] = segment
+            self.expire(timestamp, tier)
+        return segment
+
+    def expire(self, now: float, tier: Optional[Tier] = None) -> int:
+        """
+        Delete segments that ended before their tier's retention window.
+
+        The segment currently written to is kept until the writer moves on.
+
+        Args:
+            now: Current epoch seconds
+            tier: Tier to expire; all tiers if omitted
+
+        Returns:
+            Number of segments deleted
+        """
+        removed = 0
+        for item in [tier] if tier else self.tiers.values():
+            writer = self._writers.get(item.name)
+            for start in self._segment_starts(item):
+                if writer is not None and writer.start == start:
+                    continue
+                if start + item.segment_seconds <= now - item.retention:
+                    shutil.rmtree(self._segment_dir(item, start), ignore_errors=True)
+                    removed += 1
+        return removed
+
+    # --- Writing ---
+
+    def append(self, timestamp: float, values: Dict[str, float]) -> bool:
+        """
+        Append one sample of several series.
+
+        Args:
+            timestamp: Epoch seconds; must not go backwards
+            values: Series values
+
+        Returns:
+            False if the sample was dropped (out of order, or the raw
+            segment is full)
+        """
+        if self._last_time is not None and timestamp <= self._last_time:
+            self.dropped += 1
+            return False
+
+        raw = self.tiers['raw']
+        segment = self._writer(raw, timestamp)
+        if segment.rows and segment.timestamps[segment.rows - 1] >= timestamp:
+            self.dropped += 1
+            return False
+        if segment.rows >= segment.capacity:
+            if self.dropped == 0:
+                logger.warning("Raw segment full; dropping samples until the next segment")
+            self.dropped += 1
+            return False
+        segment.write_row(segment.rows, timestamp, values)
+        self._last_time = timestamp
+
+        flush_tier = self._flush_tier
+        if flush_tier is not None:
+            bucket = self._rollups[flush_tier.name].bucket
+            if bucket is not None and int(timestamp) - bucket >= flush_tier.resolution:
+                # Into the mapped pages only: they outlive the process
+                # without an msync of every column
+                self._write_open_rollups()
+
+        for name, rollup in self._rollups.items():
+            tier = self.tiers[name]
+            bucket = int(timestamp) - int(timestamp) % tier.resolution
+            if rollup.bucket is not None and rollup.bucket != bucket:
+                self._flush_rollup(tier, rollup)
+            rollup.bucket = bucket
+            rollup.add(values)
+        return True
+
+    def append_snapshot(self, metrics: Dict[str, Any]) -> bool:
+        """Append the numeric fields of a snapshot at its timestamp."""
+        return self.append(snapshot_time(metrics), numeric_fields(metrics))
+
+    def _flush_rollup(self, tier: Tier, rollup: _Rollup):
+        if rollup.bucket is None or not rollup.stats:
+            return
+        segment = self._writer(tier, rollup.bucket)
+        row = rollup.row()
+        index = segment.rows
+        if index and segment.timestamps[index - 1] == rollup.bucket:
+            # Bucket partially written before a restart
+            index -= 1
+            existing = {name: segment.column(name)[index] for name in segment.series()}
+            row = _merge_rollup(existing, row)
+        if index < segment.capacity:
+            segment.write_row(index, rollup.bucket, row)
+        rollup.bucket = None
+        rollup.stats = {}
+
+    def _write_open_rollups(self):
+        for name, rollup in self._rollups.items():
+            bucket = rollup.bucket
+            self._flush_rollup(self.tiers[name], rollup)
+            # Keep accumulating into the same bucket after a flush
+            rollup.bucket = bucket
+
+    def flush(self):
+        """Write the open rollup buckets and flush all columns to disk."""
+        self._write_open_rollups()
+        for segment in self._writers.values():
+            segment.flush()
+
+    def close(self):
+        """Flush open buckets and close all segments."""
+        self.flush()
+        for segment in self._writers.values():
+            segment.close()
+        self._writers = {}
+
+    # --- Reading ---
+
+    def choose_tier(self, start: float, now: float) -> Tier:
+        """Finest tier whose retention still covers ``start``."""
+        for tier in sorted(self.tiers.values(), key=lambda t: t.resolution):
+            if start >= now - tier.retention:
+                return tier
+        return max(self.tiers.values(), key=lambda t: t.resolution)
+
+    def _segments(self, tier: Tier, start: float, end: float) -> Iterator[Segment]:
+        for segment_start in self._segment_starts(tier):
+            if segment_start + tier.segment_seconds <= start or segment_start >= end:
+                continue
+            writer = self._writers.get(tier.name)
+            if writer is not None and writer.start == segment_start:
+                yield writer
+            else:
+                segment = Segment(self._segment_dir(tier, segment_start), segment_start, tier.capacity)
+                try:
+                    yield segment
+                finally:
+                    segment.close()
+
+    def query(
+        self,
+        series: str,
+        start: float,
+        end: float,
+        tier: Optional[str] = None,
+        stat: str = 'avg',
+        now: Optional[float] = None,
+    ) -> Tuple[array.array, array.array]:
+        """
+        Read one series over ``[start, end)``.
+
+        Args:
+            series: Series name (see :func:`numeric_fields`)
+            start: Range start, epoch seconds
+            end: Range end, epoch seconds
+            tier: Tier name; the finest tier retaining ``start`` if omitted
+            stat: Rollup statistic (min, max, avg, last, count); ignored
+                for raw samples
+            now: Current time for tier selection; the range end if omitted
+
+        Returns:
+            Tuple of (timestamps, values) arrays of doubles; NaN marks
+            samples in which the series was absent
+        """
+        if stat not in ROLLUP_STATS:
+            raise ValueError(f"stat must be one of {', '.join(ROLLUP_STATS)}")
+        selected = self.tiers[tier] if tier else self.choose_tier(start, end if now is None else now)
+        name = series if selected.resolution == 0 else f'{series}:{stat}'
+
+        timestamps = array.array('d')
+        values = array.array('d')
+        for segment in self._segments(selected, start, end):
+            low, high = segment.row_range(start, end)
+            if low == high:
+                continue
+            timestamps.frombytes(segment.timestamps[low:high].cast('B'))
+            column = segment.column(name)
+            if column is None:
+                values.extend(array.array('d', [NAN]) * (high - low))
+            else:
+                values.frombytes(column[low:high].cast('B'))
+        return timestamps, values
+
+    def series(self, tier: str = 'raw') -> List[str]:
+        """Names of all series stored in a tier."""
+        names = set()
+        for segment in self._segments(self.tiers[tier], -math.inf, math.inf):
+            names.update(segment.series())
+        if self.tiers[tier].resolution:
+            names = {name.rsplit(':', 1)[0] for name in names}
+        return sorted(names)
@@ -0,0 +1,372 @@
+"""Batched, compressed HTTP shipping of metric payloads."""
+import gzip
+import http.client
+import json
+import logging
+import queue
+import random
+import socket
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import protobuf
+from .buffer import MetricBuffer
+from .delta import DeltaEncoder
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+METRICS_PATH = "/api/metrics"
+
+
+def serialize_snapshot(metrics: Dict[str, Any]) -> bytes:
+    """Serialize a snapshot as one compact JSON document."""
+    return json.dumps(metrics, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def frame_ndjson(payloads: List[bytes]) -> bytes:
+    """Join JSON payloads into one newline-delimited body."""
+    return b'\n'.join(payloads) + b'\n'
+
+
+def get_compressor(name: str) -> Tuple[Optional[str], Callable[[bytes], bytes]]:
+    """
+    Return the content encoding and compress function for a setting.
+
+    Args:
+        name: ``zstd``, ``gzip``, ``none`` or ``auto`` (zstd if installed,
+            gzip otherwise)
+
+    Returns:
+        Tuple of (Content-Encoding value or None, compress function)
+    """
+    if name == 'auto':
+        name = 'zstd' if zstandard is not None else 'gzip'
+
+    if name == 'zstd':
+        if zstandard is None:
+            raise ValueError("compression 'zstd' requires the zstandard package")
+        compressor = zstandard.ZstdCompressor(level=3)
+        return 'zstd', compressor.compress
+    if name == 'gzip':
+        return 'gzip', lambda body: gzip.compress(body, compresslevel=6)
+    if name == 'none':
+        return None, lambda body: body
+
+    raise ValueError(f"Unknown compression: {name}")
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 300.0) -> float:
+    """
+    Jittered exponential backoff delay ("full jitter").
+
+    Args:
+        attempt: Zero-based retry number
+        base: Base delay in seconds
+        cap: Upper bound of the exponential term
+
+    Returns:
+        Delay in seconds, uniformly drawn from [0, min(cap, base * 2**attempt)]
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ConnectionPool:
+    """Small pool of keep-alive HTTP connections to one server."""
+
+    def __init__(self, server_url: str, size: int = 2, timeout: float = 10):
+        parts = urlsplit(server_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported server_url scheme: {parts.scheme}")
+
+        self._factory = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._host = parts.hostname
+        self._port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self._timeout = timeout
+        self._idle: "queue.LifoQueue" = queue.LifoQueue(maxsize=size)
+        self.created = 0
+
+    def acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            self.created += 1
+            return self._factory(self._host, self._port, timeout=self._timeout)
+
+    def release(self, connection: http.client.HTTPConnection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class HttpShipper:
+    """
+    Ship buffered snapshots to the server in batches.
+
+    Snapshots are serialized and appended to a :class:`MetricBuffer`. A
+    background thread sends a batch once ``batch_size`` snapshots are
+    pending or ``batch_interval`` seconds passed since the last send. Each
+    batch is one POST of framed payloads (newline-delimited JSON, or
+    length-delimited protobuf), compressed and sent over a pooled
+    keep-alive connection. Failed sends are retried with jittered
+    exponential backoff; while the server stays unreachable the payloads
+    remain in the buffer (spilling to disk if configured) and are replayed
+    oldest first once it recovers.
+
+    Payloads dropped unsent (a batch the server rejected, or the buffer
+    overflowing) are reported to ``on_drop``; a stateful serializer such
+    as :class:`DeltaEncoder` uses it to start over with a keyframe.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        buffer: MetricBuffer,
+        batch_size: int = 50,
+        batch_interval: float = 10,
+        compression: str = 'auto',
+        retry_attempts: int = 3,
+        retry_delay: float = 5,
+        timeout: float = 10,
+        pool_size: int = 2,
+        serializer: Callable[[Dict[str, Any]], bytes] = serialize_snapshot,
+        content_type: str = 'application/x-ndjson',
+        framer: Callable[[List[bytes]], bytes] = frame_ndjson,
+        on_drop: Optional[Callable[[], None]] = None,
+        agent_id: Optional[str] = None,
+    ):
+        self.buffer = buffer
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay
+        self.serializer = serializer
+        self.content_type = content_type
+        self.framer = framer
+        self.on_drop = on_drop
+        buffer.on_drop = on_drop
+        self.agent_id = agent_id
+        self.encoding, self._compress = get_compressor(compression)
+        self.pool = ConnectionPool(server_url, size=pool_size, timeout=timeout)
+        self.path = self.pool.base_path + METRICS_PATH
+
+        self.sent_batches = 0
+        self.sent_snapshots = 0
+        self.failed_attempts = 0
+        self.bytes_sent = 0
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_send = time.monotonic()
+
+    def submit(self, metrics: Dict[str, Any]):
+        """Queue a snapshot for shipping."""
+        payload = self.serializer(metrics)
+        with self._lock:
+            self.buffer.append(payload)
+            pending = len(self.buffer)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _encode_batch(self, payloads: List[bytes]) -> bytes:
+        return self._compress(self.framer(payloads))
+
+    def _post(self, body: bytes) -> int:
+        """POST one body; returns the HTTP status or raises on I/O errors."""
+        headers = {
+            'Content-Type': self.content_type,
+            'Content-Length': str(len(body)),
+        }
+        if self.encoding:
+            headers['Content-Encoding'] = self.encoding
+        if self.agent_id:
+            headers['X-Agent-Id'] = self.agent_id
+
+        connection = self.pool.acquire()
+        try:
+            connection.request('POST', self.path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.release(connection)
+        return response.status
+
+    def send_batch(self) -> bool:
+        """
+        Send the oldest pending batch, retrying with backoff.
+
+        Returns:
+            True if a batch was delivered (or nothing was pending)
+        """
+        with self._lock:
+            head = self.buffer.head
+            payloads = self.buffer.peek(self.batch_size)
+        if not payloads:
+            return True
+
+        body = self._encode_batch(payloads)
+
+        for attempt in range(self.retry_attempts + 1):
+            if attempt:
+                if self._stop.wait(backoff_delay(attempt - 1, self.retry_delay)):
+                    return False
+            try:
+                status = self._post(body)
+            except (OSError, http.client.HTTPException) as e:
+                self.failed_attempts += 1
+                logging.warning(f"Failed to send metrics batch: {e}")
+                continue
+
+            if 200 <= status < 300 or (400 <= status < 500 and status not in (408, 429)):
+                if status >= 400:
+                    # The server will never accept this batch; don't block the queue on it
+                    logging.error(f"Server rejected metrics batch with HTTP {status}, dropping it")
+                else:
+                    self.sent_batches += 1
+                    self.sent_snapshots += len(payloads)
+                    self.bytes_sent += len(body)
+                with self._lock:
+                    # Only what is still pending of this batch: the buffer
+                    # may have dropped its oldest payloads meanwhile
+                    self.buffer.ack(len(payloads), head)
+                    if status >= 400 and self.on_drop is not None:
+                        self.on_drop()
+                self._last_send = time.monotonic()
+                return True
+
+            self.failed_attempts += 1
+            logging.warning(f"Server returned HTTP {status} for metrics batch")
+
+        return False
+
+    def flush(self) -> bool:
+        """Send every pending batch; stops at the first undeliverable one."""
+        while True:
+            with self._lock:
+                pending = len(self.buffer)
+            if not pending:
+                return True
+            if not self.send_batch():
+                return False
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            timeout = max(0.0, self._last_send + self.batch_interval - time.monotonic())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+
+            with self._lock:
+                pending = len(self.buffer)
+            due = time.monotonic() - self._last_send >= self.batch_interval
+            if not pending or (pending < self.batch_size and not due):
+                continue
+
+            if self.flush():
+                failures = 0
+            else:
+                # Server unreachable: keep buffering and back off before replaying
+                self._last_send = time.monotonic()
+                self._stop.wait(backoff_delay(failures, self.retry_delay))
+                failures += 1
+
+    def start(self):
+        """Start the background sender thread."""
+        self._thread = threading.Thread(target=self._run, name='shipper', daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True):
+        """Stop the sender thread, optionally flushing pending batches first."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        if flush:
+            self._stop.clear()
+            self.retry_attempts = 0
+            self.flush()
+            self._stop.set()
+        self.pool.close()
+        self.buffer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return shipping counters for the metrics payload."""
+        with self._lock:
+            buffered = self.buffer.stats()
+        return {
+            "sent_batches": self.sent_batches,
+            "sent_snapshots": self.sent_snapshots,
+            "failed_attempts": self.failed_attempts,
+            "bytes_sent": self.bytes_sent,
+            "connections_opened": self.pool.created,
+            "buffer": buffered,
+        }
+
+
+def create_shipper(config: Dict[str, Any], buffer: MetricBuffer) -> HttpShipper:
+    """
+    Create an HTTP shipper from the configuration.
+
+    Args:
+        config: Configuration dictionary
+        buffer: Buffer holding pending payloads
+
+    Returns:
+        HttpShipper instance (not started)
+    """
+    if config.get('delta_encoding'):
+        # Stateful stream; frames use the same varint length prefix
+        encoder = DeltaEncoder(config.get('keyframe_interval', 60))
+        encoding = dict(
+            serializer=encoder.encode,
+            content_type='application/x-metrics-delta',
+            framer=protobuf.frame,
+            on_drop=encoder.force_keyframe,
+        )
+    elif config.get('use_protobuf'):
+        encoding = dict(
+            serializer=protobuf.encode_snapshot,
+            content_type='application/x-protobuf',
+            framer=protobuf.frame,
+        )
+    else:
+        encoding = {}
+
+    return HttpShipper(
+        server_url=config['server_url'],
+        buffer=buffer,
+        batch_size=config.get('batch_size', 50),
+        batch_interval=config.get('batch_interval', 10),
+        compression=config.get('compression', 'auto'),
+        retry_attempts=config['retry_attempts'],
+        retry_delay=config['retry_delay'],
+        timeout=config['timeout'],
+        pool_size=config.get('connection_pool_size', 2),
+        # Identifies the delta stream across pooled connections and NAT
+        agent_id=config.get('agent_id') or socket.gethostname(),
+        **encoding,
+    )
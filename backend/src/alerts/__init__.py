@@ -0,0 +1 @@
+"""Threshold alerting on metric snapshots."""
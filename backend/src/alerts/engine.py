@@ -0,0 +1,496 @@
+"""Threshold alert rules evaluated incrementally on each snapshot."""
+import heapq
+import re
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import yaml
+
+
+SEVERITIES = ('info', 'warning', 'critical', 'emergency')
+
+# Default minimum time between two notifications of the same alert
+DEFAULT_COOLDOWN = 300.0
+
+# Keys identifying a list element (e.g. a partition) in alert instances
+INSTANCE_KEYS = ('mountpoint', 'device', 'name', 'interface', 'pid')
+
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)\s*(ms|s|m|h|d)?$')
+_RULE = re.compile(
+    r'^\s*(?P<path>[^\s<>=!]+)\s*(?P<op>>=|<=|==|!=|>|<)\s*(?P<threshold>[-+]?[\d.]+(?:[eE][-+]?\d+)?)'
+    r'(?:\s+for\s+(?P<duration>\S+))?\s*$'
+)
+_KEY = re.compile(r'([^.\[\]]+)')
+_INDEX = re.compile(r'\[(\*|\d+)\]')
+
+WILDCARD = '*'
+
+PathComponent = Union[str, int]
+
+
+class Alert(NamedTuple):
+    """Notification produced by :meth:`AlertEngine.evaluate`."""
+    rule: str
+    # Matched element for wildcard rules (e.g. '/' or 'eth0'), '' otherwise
+    instance: str
+    severity: str
+    # 'firing' or 'resolved'
+    state: str
+    value: Optional[float]
+    expr: str
+    # Time the condition started to hold
+    since: float
+    timestamp: float
+
+
+def parse_duration(text: Union[str, int, float, None]) -> float:
+    """
+    Parse a duration such as ``90``, ``30s``, ``2m`` or ``1h``.
+
+    Args:
+        text: Duration; plain numbers are seconds
+
+    Returns:
+        Seconds
+    """
+    if text is None:
+        return 0.0
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _DURATION.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {text}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2) or 's']
+
+
+def parse_path(text: str) -> Tuple[PathComponent, ...]:
+    """
+    Parse a snapshot path such as ``disk.partitions[*].percent``.
+
+    ``[n]`` selects a list element, ``[*]`` every list element and a
+    ``*`` component every value of a dict (``network.interfaces.*.errin``).
+
+    Args:
+        text: Dotted path
+
+    Returns:
+        Path components; ints are list indexes
+    """
+    path: List[PathComponent] = []
+    position = 0
+    while position < len(text):
+        match = _INDEX.match(text, position)
+        if match is None:
+            match = _KEY.match(text, position + 1 if path and text[position] == '.' else position)
+            if match is None or (path and text[position] != '.'):
+                raise ValueError(f"Invalid path: {text}")
+            path.append(match.group(1))
+        else:
+            path.append(WILDCARD if match.group(1) == WILDCARD else int(match.group(1)))
+        position = match.end()
+    if not path:
+        raise ValueError(f"Invalid path: {text}")
+    return tuple(path)
+
+
+def parse_rule(expr: str) -> Tuple[Tuple[PathComponent, ...], str, float, float]:
+    """
+    Parse a rule expression ``<path> <op> <threshold> [for <duration>]``.
+
+    Args:
+        expr: Expression, e.g. ``cpu.overall_percent > 90 for 2m``
+
+    Returns:
+        Tuple of (path, operator, threshold, duration in seconds)
+    """
+    match = _RULE.match(expr)
+    if not match:
+        raise ValueError(f"Invalid rule expression: {expr}")
+    return (
+        parse_path(match.group('path')),
+        match.group('op'),
+        float(match.group('threshold')),
+        parse_duration(match.group('duration')),
+    )
+
+
+class Rule:
+    """One compiled rule."""
+
+    __slots__ = ('name', 'expr', 'severity', 'cooldown', 'path', 'op', 'threshold', 'duration')
+
+    def __init__(self, name: str, expr: str, severity: str = 'warning', cooldown: float = DEFAULT_COOLDOWN):
+        if severity not in SEVERITIES:
+            raise ValueError(f"Rule {name}: severity must be one of {', '.join(SEVERITIES)}")
+        self.name = name
+        self.expr = expr
+        self.severity = severity
+        self.cooldown = cooldown
+        self.path, self.op, self.threshold, self.duration = parse_rule(expr)
+
+
+class _Group:
+    """
+    Rules comparing the same path in the same direction.
+
+    Rules are kept sorted by threshold so the set of breached rules for a
+    value is one contiguous slice found by bisection: a prefix for ``>``
+    and ``>=``, a suffix for ``<`` and ``<=``. ``==`` and ``!=`` rules get
+    a group of their own.
+    """
+
+    __slots__ = ('index', 'rules', 'breached', 'section')
+
+    def __init__(self, index: int, rules: List[Rule]):
+        self.index = index
+        # Top-level snapshot section the path starts in
+        self.section = rules[0].path[0]
+        op = rules[0].op
+        if op in ('>', '>='):
+            # '>=' t breaches iff (t, 0) < (v, 1); '>' t iff (t, 1) < (v, 1)
+            rules.sort(key=lambda rule: (rule.threshold, rule.op == '>'))
+            keys = [(rule.threshold, rule.op == '>') for rule in rules]
+
+            def breached(value: float) -> Tuple[int, int]:
+                return 0, bisect_left(keys, (value, True))
+        elif op in ('<', '<='):
+            # '<=' t breaches iff (t, 1) > (v, 0); '<' t iff (t, 0) > (v, 0)
+            rules.sort(key=lambda rule: (rule.threshold, rule.op == '<='))
+            keys = [(rule.threshold, rule.op == '<=') for rule in rules]
+            count = len(keys)
+
+            def breached(value: float) -> Tuple[int, int]:
+                return bisect_right(keys, (value, False)), count
+        else:
+            threshold = rules[0].threshold
+            equal = op == '=='
+
+            def breached(value: float) -> Tuple[int, int]:
+                return (0, 1) if (value == threshold) is equal else (0, 0)
+
+        self.rules = rules
+        self.breached = breached
+
+
+class RuleSet:
+    """
+    Rules compiled into a single snapshot walker.
+
+    All rule paths are merged into one trie that is turned into nested
+    closures at load time, so each tick walks the snapshot once, visiting
+    every shared prefix (``disk.partitions[*]``) a single time no matter
+    how many rules hang below it. Each leaf reports its value to the
+    threshold groups attached to it.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+        names = set()
+        for rule in self.rules:
+            if rule.name in names:
+                raise ValueError(f"Duplicate rule name: {rule.name}")
+            names.add(rule.name)
+
+        by_leaf: Dict[Tuple[Tuple[PathComponent, ...], str], List[Rule]] = {}
+        for rule in self.rules:
+            direction = {'>': 'above', '>=': 'above', '<': 'below', '<=': 'below'}.get(rule.op, rule.name)
+            by_leaf.setdefault((rule.path, direction), []).append(rule)
+        self.groups = [_Group(index, rules) for index, rules in enumerate(by_leaf.values())]
+
+        trie: Dict[str, Any] = {'children': {}, 'groups': []}
+        for group in self.groups:
+            node = trie
+            for component in group.rules[0].path:
+                node = node['children'].setdefault(component, {'children': {}, 'groups': []})
+            node['groups'].append(group)
+        self._walk = self._compile(trie)
+
+    def walk(self, snapshot: Dict[str, Any], observe: Callable[[_Group, str, Any], None]):
+        """
+        Visit every rule leaf present in a snapshot.
+
+        Args:
+            snapshot: Snapshot dictionary
+            observe: Called with (group, instance, value) for each leaf
+        """
+        self._walk(snapshot, '', observe)
+
+    def _compile(self, node: Dict[str, Any]) -> Callable[[Any, str, Callable], None]:
+        groups = tuple(node['groups'])
+        keyed = tuple((key, self._compile(child)) for key, child in node['children'].items() if key != WILDCARD)
+        wildcard = node['children'].get(WILDCARD)
+        each = self._compile(wildcard) if wildcard is not None else None
+
+        if not groups and each is None and len(keyed) == 1 and isinstance(keyed[0][0], str):
+            # Plain dict step, the bulk of most paths
+            key, child = keyed[0]
+
+            def visit(value, instance, observe):
+                if isinstance(value, dict):
+                    item = value.get(key)
+                    if item is not None:
+                        child(item, instance, observe)
+
+            return visit
+
+        def visit(value, instance, observe):
+            for group in groups:
+                observe(group, instance, value)
+            if keyed:
+                if isinstance(value, dict):
+                    for key, child in keyed:
+                        item = value.get(key)
+                        if item is not None:
+                            child(item, instance, observe)
+                elif isinstance(value, list):
+                    for key, child in keyed:
+                        if isinstance(key, int) and key < len(value):
+                            child(value[key], instance, observe)
+            if each is not None:
+                if isinstance(value, dict):
+                    for key, item in value.items():
+                        each(item, _join(instance, key), observe)
+                elif isinstance(value, list):
+                    for index, item in enumerate(value):
+                        each(item, _join(instance, _element_name(item, index)), observe)
+
+        return visit
+
+
+def _element_name(item: Any, index: int) -> str:
+    if isinstance(item, dict):
+        for key in INSTANCE_KEYS:
+            name = item.get(key)
+            if name is not None:
+                return str(name)
+    return str(index)
+
+
+def _join(instance: str, key: Any) -> str:
+    return f"{instance},{key}" if instance else str(key)
+
+
+class _InstanceState:
+    """Evaluation state of one group for one instance."""
+
+    __slots__ = ('start', 'stop', 'seen', 'value', 'quiet_after', 'since', 'firing', 'last_sent', 'generation')
+
+    def __init__(self, size: int):
+        # Breached slice of the group's rules
+        self.start = 0
+        self.stop = 0
+        self.seen = 0
+        self.value: Optional[float] = None
+        # No rule of the group is within its cooldown after this time
+        self.quiet_after = float('-inf')
+        self.since = [0.0] * size
+        self.firing = [False] * size
+        self.last_sent = [float('-inf')] * size
+        # Token of the rule's pending deadline; stale heap entries don't match
+        self.generation = [0] * size
+
+
+class AlertEngine:
+    """
+    Evaluate a :class:`RuleSet` against one host's stream of snapshots.
+
+    Per tick a leaf value costs one bisection of its threshold group, and
+    only rules whose breached/clear state changed are touched. State is
+    kept only for (group, instance) pairs that are breached or within a
+    notification cooldown, and is constant-size per rule: when the
+    condition started to hold, whether it fires and when it was last
+    notified. ``for`` durations and cooldowns are deadlines in a heap, so
+    a rule that stays breached costs nothing until its deadline passes.
+
+    An alert notifies when its condition has held for the rule's duration,
+    again every ``cooldown`` seconds while it keeps firing, and once when
+    it resolves. Re-firing within ``cooldown`` of the previous notification
+    (flapping) is held back until the cooldown has passed.
+
+    Snapshots only carry the sections whose collectors were due, so a
+    rule whose top-level section is absent keeps its state (and its
+    ``for`` window keeps running) until the section is sent again.
+    Breached states are indexed by section: a value that vanished from a
+    present section (unmounted disk, removed interface) is found among the
+    breached states of that section only, and idle states are dropped
+    from a heap of cooldown ends, so no tick scans every state.
+    """
+
+    def __init__(self, rules: RuleSet):
+        self.rules = rules
+        self._states: Dict[Tuple[int, str], _InstanceState] = {}
+        # section -> breached states of rules starting in that section
+        self._breached: Dict[str, Dict[Tuple[int, str], _InstanceState]] = {}
+        # (quiet_after, key) of states that stopped being breached
+        self._idle: List[Tuple[float, Tuple[int, str]]] = []
+        self._deadlines: List[Tuple[float, int, Tuple[int, str], int]] = []
+        self._sequence = 0
+        self._tick = 0
+        self._now = 0.0
+        self._events: List[Alert] = []
+
+    def evaluate(self, snapshot: Dict[str, Any], now: Optional[float] = None) -> List[Alert]:
+        """
+        Feed the next snapshot.
+
+        Args:
+            snapshot: Snapshot dictionary
+            now: Snapshot time, epoch seconds; current time if omitted
+
+        Returns:
+            Notifications due at this tick, most severe first
+        """
+        self._now = time.time() if now is None else now
+        self._tick += 1
+        self._events = []
+        self.rules.walk(snapshot, self._observe)
+
+        for section, breached in self._breached.items():
+            # A section absent from the snapshot was not due this tick
+            # (collectors run at their own intervals): keep its states
+            if snapshot.get(section) is None:
+                continue
+            vanished = [(key, state) for key, state in breached.items() if state.seen != self._tick]
+            for key, state in vanished:
+                self._update(key, state, 0, 0)
+
+        idle = self._idle
+        while idle and idle[0][0] <= self._now:
+            _, key = heapq.heappop(idle)
+            state = self._states.get(key)
+            # Breached again since, or pushed before a later cooldown
+            if state is not None and state.start == state.stop and state.quiet_after <= self._now:
+                del self._states[key]
+
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= self._now:
+            _, generation, key, rule = heapq.heappop(deadlines)
+            state = self._states.get(key)
+            if state is not None and state.generation[rule] == generation:
+                self._due(key, state, rule)
+
+        events = self._events
+        events.sort(key=lambda alert: -SEVERITIES.index(alert.severity))
+        return events
+
+    def active(self) -> List[Alert]:
+        """Alerts currently firing."""
+        alerts = []
+        groups = self.rules.groups
+        for (group_index, instance), state in self._states.items():
+            rules = groups[group_index].rules
+            for rule in range(state.start, state.stop):
+                if state.firing[rule]:
+                    alerts.append(self._alert(rules[rule], instance, state, rule, 'firing'))
+        return alerts
+
+    def _observe(self, group: _Group, instance: str, value: Any):
+        if type(value) is bool or not isinstance(value, (int, float)):
+            return
+        start, stop = group.breached(value)
+        key = (group.index, instance)
+        state = self._states.get(key)
+        if state is None:
+            if start == stop:
+                return
+            state = self._states[key] = _InstanceState(len(group.rules))
+        state.seen = self._tick
+        state.value = value
+        if start != state.start or stop != state.stop:
+            self._update(key, state, start, stop)
+
+    def _update(self, key: Tuple[int, str], state: _InstanceState, start: int, stop: int):
+        old_start, old_stop = state.start, state.stop
+        # Both slices are contiguous: the difference is at most two runs
+        for rule in range(old_start, min(old_stop, start)):
+            self._clear(key, state, rule)
+        for rule in range(max(old_start, stop), old_stop):
+            self._clear(key, state, rule)
+        for rule in range(start, min(stop, old_start)):
+            self._breach(key, state, rule)
+        for rule in range(max(start, old_stop), stop):
+            self._breach(key, state, rule)
+        state.start, state.stop = start, stop
+
+        if (old_start == old_stop) != (start == stop):
+            section = self.rules.groups[key[0]].section
+            if start == stop:
+                del self._breached[section][key]
+                heapq.heappush(self._idle, (state.quiet_after, key))
+            else:
+                self._breached.setdefault(section, {})[key] = state
+
+    def _schedule(self, when: float, key: Tuple[int, str], state: _InstanceState, rule: int):
+        self._sequence += 1
+        state.generation[rule] = self._sequence
+        heapq.heappush(self._deadlines, (when, self._sequence, key, rule))
+
+    def _breach(self, key: Tuple[int, str], state: _InstanceState, rule: int):
+        state.since[rule] = self._now
+        self._schedule(self._now + self.rules.groups[key[0]].rules[rule].duration, key, state, rule)
+
+    def _clear(self, key: Tuple[int, str], state: _InstanceState, rule: int):
+        state.generation[rule] = 0
+        if state.firing[rule]:
+            state.firing[rule] = False
+            if state.last_sent[rule] >= state.since[rule]:
+                self._events.append(self._alert(self.rules.groups[key[0]].rules[rule], key[1], state, rule, 'resolved'))
+
+    def _due(self, key: Tuple[int, str], state: _InstanceState, rule: int):
+        spec = self.rules.groups[key[0]].rules[rule]
+        state.firing[rule] = True
+        next_allowed = state.last_sent[rule] + spec.cooldown
+        if self._now >= next_allowed:
+            state.last_sent[rule] = self._now
+            self._events.append(self._alert(spec, key[1], state, rule, 'firing'))
+            next_allowed = self._now + spec.cooldown
+            state.quiet_after = max(state.quiet_after, next_allowed)
+        self._schedule(next_allowed, key, state, rule)
+
+    def _alert(self, spec: Rule, instance: str, state: _InstanceState, rule: int, status: str) -> Alert:
+        return Alert(spec.name, instance, spec.severity, status, state.value, spec.expr, state.since[rule], self._now)
+
+
+def build_rules(config: Dict[str, Any]) -> RuleSet:
+    """
+    Compile rules from an alerts configuration.
+
+    Args:
+        config: Mapping with a ``rules`` list (name, expr, severity,
+            cooldown) and optional ``defaults`` (severity, cooldown)
+
+    Returns:
+        RuleSet
+    """
+    defaults = config.get('defaults') or {}
+    default_severity = defaults.get('severity', 'warning')
+    default_cooldown = parse_duration(defaults.get('cooldown', DEFAULT_COOLDOWN))
+
+    rules = []
+    for entry in config.get('rules') or []:
+        if 'name' not in entry or 'expr' not in entry:
+            raise ValueError(f"Rule needs a name and an expr: {entry}")
+        cooldown = entry.get('cooldown')
+        rules.append(Rule(
+            entry['name'],
+            entry['expr'],
+            severity=entry.get('severity', default_severity),
+            cooldown=default_cooldown if cooldown is None else parse_duration(cooldown),
+        ))
+    return RuleSet(rules)
+
+
+def load_rules(path: str) -> RuleSet:
+    """
+    Load and compile rules from a YAML file (see ``config/alerts.yml``).
+
+    Args:
+        path: Path to the alerts file
+
+    Returns:
+        RuleSet
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return build_rules(yaml.safe_load(f) or {})
@@ -0,0 +1 @@
+"""Ingest server package for agent payloads."""
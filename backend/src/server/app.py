@@ -0,0 +1,531 @@
+"""Asyncio HTTP ingest server for agent snapshots."""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from alerts.engine import Alert, AlertEngine, RuleSet, load_rules
+
+from .ingest import MAX_DECOMPRESSED_SIZE, PayloadDecoder, PayloadError, PayloadTooLarge
+from .storage import StorageBackend, Row
+
+
+logger = logging.getLogger(__name__)
+
+# Bounds on request heads; bodies are bounded by max_body_size
+MAX_LINE = 8192
+MAX_HEADERS = 100
+
+DEFAULT_HISTORY_WINDOW = 3600
+DEFAULT_HISTORY_LIMIT = 1000
+MAX_HISTORY_LIMIT = 10000
+
+# Delay before a failed batch write is retried
+WRITE_RETRY_DELAY = 1.0
+
+# Alert notifications kept for /api/alerts
+RECENT_ALERTS = 1000
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+class HttpError(Exception):
+    """Ends a request with an error status and a JSON message."""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _json_response(payload: Any, status: int = 200) -> Response:
+    return status, {'Content-Type': 'application/json'}, json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def _raw_json_response(body: bytes, status: int = 200) -> Response:
+    return status, {'Content-Type': 'application/json'}, body
+
+
+def _parse_time(value: Optional[str], default: float) -> float:
+    """Parse a query time given as epoch seconds or ISO 8601."""
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HttpError(400, f"Invalid time: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _parse_int(value: Optional[str], default: int, name: str) -> int:
+    if value is None or value == '':
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise HttpError(400, f"Invalid {name}: {value}")
+    if number < 0:
+        raise HttpError(400, f"{name} must be non-negative")
+    return number
+
+
+def _encode_rows(decoded: List[Tuple[str, float, Dict[str, Any]]]) -> List[Row]:
+    """Serialize decoded snapshots for storage (runs on a worker thread)."""
+    dumps = json.dumps
+    return [(host, ts, dumps(snapshot, separators=(',', ':'))) for host, ts, snapshot in decoded]
+
+
+def _alert_dict(host: str, alert: Alert) -> Dict[str, Any]:
+    entry = alert._asdict()
+    entry['host'] = host
+    entry['since'] = datetime.fromtimestamp(alert.since, timezone.utc).isoformat()
+    entry['timestamp'] = datetime.fromtimestamp(alert.timestamp, timezone.utc).isoformat()
+    return entry
+
+
+class HostAlerts:
+    """Alert engine of one host; snapshots older than the last one are skipped."""
+
+    def __init__(self, rules: RuleSet):
+        self.lock = threading.Lock()
+        self.engine = AlertEngine(rules)
+        self.last = float('-inf')
+
+
+def _select_sections(data: str, sections: List[str]) -> Dict[str, Any]:
+    snapshot = json.loads(data)
+    selected = {'hostname': snapshot.get('hostname'), 'timestamp': snapshot.get('timestamp')}
+    for section in sections:
+        if section in snapshot:
+            selected[section] = snapshot[section]
+    return selected
+
+
+class IngestServer:
+    """
+    Receive agent snapshots over HTTP and store them in batches.
+
+    Request bodies are decoded, validated and serialized on a thread pool
+    so the event loop only moves bytes. Accepted rows go onto a queue that
+    a single writer task drains: everything queued while the previous
+    transaction was committing is written in the next one (up to
+    ``write_batch_size`` rows), so transactions grow with load instead of
+    the number of transactions.
+
+    Rows accepted but not yet committed are counted; once the count
+    reaches ``max_pending`` further posts are answered with 503 and a
+    Retry-After header before their bodies are decoded, which the agent's
+    shipper treats as a retryable failure and keeps the batch buffered.
+    Posts decoded concurrently reserve their rows once the body is parsed
+    (before delta stream state changes), so together they cannot push the
+    count past ``max_pending``; only a single batch arriving at an empty
+    queue may be larger.
+
+    The latest snapshot of each host is kept in memory and serves
+    ``/api/metrics/current`` without touching the database. With ``rules``
+    each snapshot is also run through the host's alert engine right after
+    decoding; notifications are logged and listed by ``/api/alerts``.
+    """
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        max_pending: int = 20000,
+        write_batch_size: int = 5000,
+        retry_after: int = 5,
+        max_body_size: int = 32 * 1024 * 1024,
+        decode_workers: int = 4,
+        rules: Optional[RuleSet] = None,
+        max_decompressed_size: int = MAX_DECOMPRESSED_SIZE,
+    ):
+        self.backend = backend
+        self.max_pending = max_pending
+        self.write_batch_size = write_batch_size
+        self.retry_after = retry_after
+        self.max_body_size = max_body_size
+        self.decoder = PayloadDecoder(max_decompressed_size)
+        self.rules = rules
+        self._alerts: Dict[str, HostAlerts] = {}
+        self._alerts_lock = threading.Lock()
+        self.recent_alerts: deque = deque(maxlen=RECENT_ALERTS)
+
+        self._decode_executor = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix='ingest-decode')
+        # One writer thread: the backend sees a single writer
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-write')
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+        # host -> (epoch seconds, snapshot JSON)
+        self.current: Dict[str, Tuple[float, str]] = {}
+        self.pending = 0
+        # Rows of posts being decoded; guarded by _admission with pending
+        self.reserved = 0
+        self._admission = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+
+    @property
+    def port(self) -> int:
+        """Port the server is bound to."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str = '0.0.0.0', port: int = 8000):
+        """
+        Start the writer task and listen for connections.
+
+        Args:
+            host: Address to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_loop())
+        self._server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_LINE)
+        logger.info(f"Ingest server listening on {host}:{self.port}")
+
+    async def stop(self):
+        """Stop accepting connections, commit queued rows and shut down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._queue is not None:
+            await self._queue.join()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+        self._decode_executor.shutdown(wait=True)
+        self._write_executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Ingest counters."""
+        return {
+            'pending': self.pending,
+            'reserved': self.reserved,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'written': self.written,
+            'batches': self.batches,
+            'write_errors': self.write_errors,
+            'stream_gaps': self.decoder.stream_gaps,
+            'hosts': len(self.current),
+        }
+
+    # -- write path -----------------------------------------------------
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            rows = list(await queue.get())
+            taken = 1
+            while len(rows) < self.write_batch_size and not queue.empty():
+                rows.extend(queue.get_nowait())
+                taken += 1
+
+            while True:
+                try:
+                    await loop.run_in_executor(self._write_executor, self.backend.write_batch, rows)
+                    break
+                except Exception as e:
+                    # Keep the rows pending (agents see 503 once full) and retry
+                    self.write_errors += 1
+                    logger.error(f"Failed to write {len(rows)} snapshots: {e}")
+                    await asyncio.sleep(WRITE_RETRY_DELAY)
+
+            with self._admission:
+                self.pending -= len(rows)
+            self.written += len(rows)
+            self.batches += 1
+            for _ in range(taken):
+                queue.task_done()
+
+    def _reserve(self, count: int):
+        """Claim queue room for a parsed body (runs on a decode worker)."""
+        with self._admission:
+            queued = self.pending + self.reserved
+            if queued and queued + count > self.max_pending:
+                self.rejected += 1
+                raise HttpError(503, "Write queue full", {'Retry-After': str(self.retry_after)})
+            self.reserved += count
+
+    def _accept(self, rows: List[Row], reserved: int):
+        current = self.current
+        for host, ts, data in rows:
+            latest = current.get(host)
+            if latest is None or ts >= latest[0]:
+                current[host] = (ts, data)
+        with self._admission:
+            self.reserved -= reserved
+            self.pending += len(rows)
+        self.accepted += len(rows)
+        self._queue.put_nowait(rows)
+
+    # -- HTTP -------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await self._send(writer, *_json_response({'error': str(e)}, e.status), keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                try:
+                    status, response_headers, response_body = await self._dispatch(
+                        method, target, headers, body
+                    )
+                except HttpError as e:
+                    status, response_headers, response_body = _json_response({'error': str(e)}, e.status)
+                    response_headers.update(e.headers)
+                except Exception:
+                    logger.exception(f"Error handling {method} {target}")
+                    status, response_headers, response_body = _json_response({'error': 'internal error'}, 500)
+
+                await self._send(writer, status, response_headers, response_body, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        try:
+            line = await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HttpError(414, "Request line too long")
+        if not line:
+            return None
+        try:
+            method, target, _version = line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADERS + 1):
+            try:
+                line = await reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                raise HttpError(431, "Header line too long")
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HttpError(431, "Too many headers")
+
+        if 'transfer-encoding' in headers:
+            raise HttpError(411, "Chunked bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > self.max_body_size:
+            raise HttpError(413, f"Body larger than {self.max_body_size} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, headers: Dict[str, str], body: bytes,
+                    keep_alive: bool = True):
+        head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        headers['Content-Length'] = str(len(body))
+        if not keep_alive:
+            headers['Connection'] = 'close'
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Response:
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/') or '/'
+
+        routes = {
+            '/api/metrics': ('POST', self._post_metrics),
+            '/api/metrics/current': ('GET', self._get_current),
+            '/api/metrics/history': ('GET', self._get_history),
+            '/api/servers': ('GET', self._get_servers),
+            '/api/alerts': ('GET', self._get_alerts),
+            '/api/stats': ('GET', self._get_stats),
+        }
+        route = routes.get(path)
+        if route is None:
+            raise HttpError(404, f"No route for {path}")
+        if method != route[0]:
+            raise HttpError(405, f"{path} accepts {route[0]}", {'Allow': route[0]})
+        if method == 'POST':
+            return await route[1](headers, body)
+        return await route[1](query)
+
+    # -- endpoints --------------------------------------------------------
+
+    async def _post_metrics(self, headers: Dict[str, str], body: bytes) -> Response:
+        if self.pending + self.reserved >= self.max_pending:
+            self.rejected += 1
+            raise HttpError(503, "Write queue full", {'Retry-After': str(self.retry_after)})
+
+        loop = asyncio.get_running_loop()
+        try:
+            rows, reserved = await loop.run_in_executor(self._decode_executor, self._decode, headers, body)
+        except PayloadTooLarge as e:
+            raise HttpError(413, str(e))
+        except PayloadError as e:
+            raise HttpError(400, str(e))
+
+        self._accept(rows, reserved)
+        return _json_response({'accepted': len(rows)}, 202)
+
+    def _decode(self, headers: Dict[str, str], body: bytes) -> Tuple[List[Row], int]:
+        reserved = 0
+
+        def reserve(count: int):
+            nonlocal reserved
+            self._reserve(count)
+            reserved = count
+
+        try:
+            decoded = self.decoder.decode(
+                body,
+                headers.get('content-type'),
+                headers.get('content-encoding'),
+                # Delta streams are per agent; agents spread a stream over
+                # several pooled connections and may share an address (NAT)
+                stream_key=headers.get('x-agent-id'),
+                reserve=reserve,
+            )
+            if self.rules is not None:
+                self._evaluate_alerts(decoded)
+            return _encode_rows(decoded), reserved
+        except BaseException:
+            with self._admission:
+                self.reserved -= reserved
+            raise
+
+    def _evaluate_alerts(self, decoded: List[Tuple[str, float, Dict[str, Any]]]):
+        for host, ts, snapshot in sorted(decoded, key=lambda row: row[1]):
+            with self._alerts_lock:
+                host_alerts = self._alerts.get(host)
+                if host_alerts is None:
+                    host_alerts = self._alerts[host] = HostAlerts(self.rules)
+            with host_alerts.lock:
+                # Retried batches may repeat or reorder snapshots
+                if ts <= host_alerts.last:
+                    continue
+                host_alerts.last = ts
+                alerts = host_alerts.engine.evaluate(snapshot, now=ts)
+            for alert in alerts:
+                logger.warning(
+                    f"Alert {alert.state}: {alert.rule}[{alert.instance}] on {host} "
+                    f"({alert.severity}, {alert.expr}, value={alert.value})"
+                )
+                self.recent_alerts.append((host, alert))
+
+    async def _get_current(self, query: Dict[str, str]) -> Response:
+        host = query.get('host')
+        if host is not None:
+            latest = self.current.get(host)
+            if latest is None:
+                raise HttpError(404, f"No metrics for {host}")
+            return _raw_json_response(latest[1].encode('utf-8'))
+        body = '[' + ','.join(data for _, (_, data) in sorted(self.current.items())) + ']'
+        return _raw_json_response(body.encode('utf-8'))
+
+    async def _get_history(self, query: Dict[str, str]) -> Response:
+        host = query.get('host')
+        if not host:
+            raise HttpError(400, "host is required")
+        end = _parse_time(query.get('end'), time.time())
+        start = _parse_time(query.get('start'), end - DEFAULT_HISTORY_WINDOW)
+        limit = min(_parse_int(query.get('limit'), DEFAULT_HISTORY_LIMIT, 'limit'), MAX_HISTORY_LIMIT)
+        offset = _parse_int(query.get('offset'), 0, 'offset')
+        sections = [section for section in query.get('metric', '').split(',') if section]
+
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(
+            self._decode_executor, self.backend.history, host, start, end, limit, offset
+        )
+
+        if sections:
+            snapshots = await loop.run_in_executor(
+                self._decode_executor, lambda: [_select_sections(data, sections) for _, data in rows]
+            )
+            return _json_response({'host': host, 'start': start, 'end': end, 'snapshots': snapshots})
+
+        # Stored rows are already JSON; splice them in without re-encoding
+        head = json.dumps({'host': host, 'start': start, 'end': end}, separators=(',', ':'))[:-1]
+        body = head + ',"snapshots":[' + ','.join(data for _, data in rows) + ']}'
+        return _raw_json_response(body.encode('utf-8'))
+
+    async def _get_servers(self, query: Dict[str, str]) -> Response:
+        loop = asyncio.get_running_loop()
+        last_seen = dict(await loop.run_in_executor(self._decode_executor, self.backend.hosts))
+        for host, (ts, _) in self.current.items():
+            last_seen[host] = max(ts, last_seen.get(host, ts))
+        servers = [
+            {'hostname': host, 'last_seen': datetime.fromtimestamp(ts, timezone.utc).isoformat()}
+            for host, ts in sorted(last_seen.items())
+        ]
+        return _json_response(servers)
+
+    async def _get_alerts(self, query: Dict[str, str]) -> Response:
+        with self._alerts_lock:
+            engines = list(self._alerts.items())
+        active = []
+        for host, host_alerts in sorted(engines):
+            with host_alerts.lock:
+                active.extend(_alert_dict(host, alert) for alert in host_alerts.engine.active())
+        recent = [_alert_dict(host, alert) for host, alert in list(self.recent_alerts)]
+        return _json_response({'active': active, 'recent': recent})
+
+    async def _get_stats(self, query: Dict[str, str]) -> Response:
+        return _json_response(self.stats())
+
+
+def create_server(config: Dict[str, Any], backend: StorageBackend) -> IngestServer:
+    """
+    Create an ingest server from configuration.
+
+    Alert rules are loaded from ``alerts_file`` when set.
+
+    Args:
+        config: Server configuration dictionary
+        backend: Storage backend
+
+    Returns:
+        IngestServer instance (not started)
+    """
+    return IngestServer(
+        backend,
+        max_pending=config['max_pending'],
+        write_batch_size=config['write_batch_size'],
+        retry_after=config['retry_after'],
+        max_body_size=config['max_body_size'],
+        decode_workers=config['decode_workers'],
+        rules=load_rules(config['alerts_file']) if config.get('alerts_file') else None,
+    )
@@ -0,0 +1,76 @@
+"""Configuration loader for the ingest server."""
+import yaml
+import os
+from pathlib import Path
+from typing import Dict, Any
+
+
+DEFAULT_CONFIG = {
+    "host": "0.0.0.0",
+    "port": 8000,
+    "database_url": "sqlite:///metrics.db",
+    # Snapshots accepted but not yet committed; beyond this agents get 503
+    "max_pending": 20000,
+    # Rows per database transaction
+    "write_batch_size": 5000,
+    "retry_after": 5,
+    "max_body_size": 32 * 1024 * 1024,
+    "decode_workers": 4,
+    # Alert rules (see config/alerts.yml); no alerting if unset
+    "alerts_file": None,
+    "log_level": "INFO",
+}
+
+
+def load_config(config_path: str = None) -> Dict[str, Any]:
+    """
+    Load server configuration from a YAML file.
+
+    Args:
+        config_path: Path to the configuration file; config/server.yml if
+            omitted and present
+
+    Returns:
+        Dictionary containing configuration values
+    """
+    config = DEFAULT_CONFIG.copy()
+
+    if config_path is None:
+        for path in (
+            Path(__file__).parent.parent.parent / "config" / "server.yml",
+            Path("config/server.yml"),
+        ):
+            if path.exists():
+                config_path = str(path)
+                break
+
+    if config_path and os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            user_config = yaml.safe_load(f)
+            if user_config:
+                config.update(user_config)
+
+    return config
+
+
+def validate_config(config: Dict[str, Any]) -> bool:
+    """
+    Validate configuration values.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        True if valid, raises ValueError otherwise
+    """
+    for key in ("max_pending", "write_batch_size", "max_body_size", "decode_workers"):
+        if config[key] <= 0:
+            raise ValueError(f"{key} must be greater than 0")
+
+    if config["retry_after"] < 0:
+        raise ValueError("retry_after must be non-negative")
+
+    if "://" not in config["database_url"]:
+        raise ValueError("database_url must look like <backend>://<location>")
+
+    return True
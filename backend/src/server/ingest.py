@@ -0,0 +1,199 @@
+"""Decoding and validation of agent payloads."""
+import json
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from agent import protobuf
+from agent.delta import DeltaDecoder, StreamGap
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+# Upper bound on a decompressed request body; compression ratios of
+# 1000:1 would otherwise let a small post exhaust a decode worker's memory
+MAX_DECOMPRESSED_SIZE = 256 * 1024 * 1024
+
+
+class PayloadError(ValueError):
+    """Request body that cannot be accepted (answered with 400)."""
+
+
+class PayloadTooLarge(PayloadError):
+    """Request body that decompresses beyond the limit (answered with 413)."""
+
+
+def _gunzip(body: bytes, limit: int) -> bytes:
+    """Decompress (possibly multi-member) gzip data, stopping past ``limit`` bytes."""
+    chunks = []
+    size = 0
+    while body:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunk = decompressor.decompress(body, limit + 1 - size)
+        size += len(chunk)
+        if size > limit:
+            raise PayloadTooLarge(f"Body decompresses to more than {limit} bytes")
+        if not decompressor.eof:
+            raise PayloadError("Invalid gzip body: truncated stream")
+        chunks.append(chunk)
+        body = decompressor.unused_data
+    return b''.join(chunks)
+
+
+def decompress(body: bytes, encoding: Optional[str], limit: int = MAX_DECOMPRESSED_SIZE) -> bytes:
+    """
+    Undo the request's Content-Encoding.
+
+    Args:
+        body: Raw request body
+        encoding: Content-Encoding header value
+        limit: Largest accepted decompressed size in bytes
+
+    Returns:
+        Decompressed body
+
+    Raises:
+        PayloadTooLarge: The body decompresses beyond ``limit``
+        PayloadError: The body is not valid for its encoding
+    """
+    if not encoding or encoding == 'identity':
+        return body
+    try:
+        if encoding == 'gzip':
+            return _gunzip(body, limit)
+        if encoding == 'zstd' and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(body, max_output_size=limit)
+    except PayloadError:
+        raise
+    except Exception as e:
+        raise PayloadError(f"Invalid {encoding} body: {e}")
+    raise PayloadError(f"Unsupported Content-Encoding: {encoding}")
+
+
+def snapshot_key(snapshot: Any) -> Tuple[str, float]:
+    """
+    Validate a snapshot and return its host and time.
+
+    Args:
+        snapshot: Decoded snapshot
+
+    Returns:
+        Tuple of (hostname, epoch seconds)
+    """
+    if not isinstance(snapshot, dict):
+        raise PayloadError("Snapshot must be an object")
+    host = snapshot.get('hostname')
+    if not isinstance(host, str) or not host:
+        raise PayloadError("Snapshot without hostname")
+    try:
+        collected = datetime.fromisoformat(snapshot['timestamp'])
+    except (KeyError, TypeError, ValueError):
+        raise PayloadError(f"Snapshot from {host} without a valid timestamp")
+    if collected.tzinfo is None:
+        collected = collected.replace(tzinfo=timezone.utc)
+    return host, collected.timestamp()
+
+
+class PayloadDecoder:
+    """
+    Turn request bodies in any format the agent ships into snapshots.
+
+    Supported content types: JSON (one snapshot or a list), NDJSON,
+    length-delimited protobuf and the delta stream. Delta streams are
+    stateful; one decoder is kept per stream key (the agent's
+    ``X-Agent-Id``).
+    """
+
+    def __init__(self, max_decompressed_size: int = MAX_DECOMPRESSED_SIZE):
+        self.max_decompressed_size = max_decompressed_size
+        self._streams: Dict[str, Tuple[threading.Lock, DeltaDecoder]] = {}
+        self._streams_lock = threading.Lock()
+        self.stream_gaps = 0
+
+    def _stream(self, key: str) -> Tuple[threading.Lock, DeltaDecoder]:
+        with self._streams_lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._streams[key] = (threading.Lock(), DeltaDecoder())
+            return stream
+
+    def decode(
+        self,
+        body: bytes,
+        content_type: Optional[str],
+        content_encoding: Optional[str] = None,
+        stream_key: Optional[str] = None,
+        reserve: Optional[Callable[[int], None]] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Decode and validate one request body.
+
+        Args:
+            body: Raw request body
+            content_type: Content-Type header value
+            content_encoding: Content-Encoding header value
+            stream_key: Identity of the sender, required for delta streams
+            reserve: Called with the number of snapshots (delta frames) in
+                the body once it is parsed, before any delta stream state
+                changes; may raise to refuse the body
+
+        Returns:
+            List of (hostname, epoch seconds, snapshot)
+
+        Raises:
+            PayloadTooLarge: The body decompresses beyond the size limit
+            PayloadError: The body is malformed or a snapshot is invalid
+        """
+        body = decompress(body, content_encoding, self.max_decompressed_size)
+        media_type = (content_type or 'application/json').split(';', 1)[0].strip().lower()
+
+        try:
+            if media_type == 'application/x-ndjson':
+                snapshots = [json.loads(line) for line in body.splitlines() if line.strip()]
+            elif media_type == 'application/json':
+                decoded = json.loads(body)
+                snapshots = decoded if isinstance(decoded, list) else [decoded]
+            elif media_type == 'application/x-protobuf':
+                snapshots = [protobuf.decode_snapshot(message) for message in protobuf.unframe(body)]
+            elif media_type == 'application/x-metrics-delta':
+                if not stream_key:
+                    raise PayloadError("Delta stream without X-Agent-Id")
+                snapshots = None
+                frames = list(protobuf.unframe(body))
+            else:
+                raise PayloadError(f"Unsupported Content-Type: {media_type}")
+        except PayloadError:
+            raise
+        except Exception as e:
+            raise PayloadError(f"Malformed {media_type} body: {e}")
+
+        if reserve is not None:
+            reserve(len(frames) if snapshots is None else len(snapshots))
+        if snapshots is None:
+            try:
+                snapshots = self._decode_delta(frames, stream_key)
+            except PayloadError:
+                raise
+            except Exception as e:
+                raise PayloadError(f"Malformed {media_type} body: {e}")
+
+        return [snapshot_key(snapshot) + (snapshot,) for snapshot in snapshots]
+
+    def _decode_delta(self, frames: List[bytes], stream_key: str) -> List[Dict[str, Any]]:
+        lock, decoder = self._stream(stream_key)
+        snapshots = []
+        with lock:
+            for frame in frames:
+                try:
+                    snapshot = decoder.decode(frame)
+                except StreamGap:
+                    # Frames were lost; wait for the next keyframe
+                    self.stream_gaps += 1
+                    continue
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        return snapshots
@@ -0,0 +1,86 @@
+"""Ingest server entry point."""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+from .app import create_server
+from .config import load_config, validate_config
+from .storage import create_backend
+
+
+async def serve(config):
+    """
+    Run the ingest server until SIGINT/SIGTERM.
+
+    Args:
+        config: Server configuration dictionary
+    """
+    logger = logging.getLogger('server')
+    backend = create_backend(config['database_url'])
+    server = create_server(config, backend)
+    await server.start(config['host'], config['port'])
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+    await stopped.wait()
+
+    logger.info("Shutting down; committing queued snapshots")
+    await server.stop()
+    backend.close()
+    logger.info(f"Ingest stats: {server.stats()}")
+
+
+def main():
+    """Main entry point for the ingest server."""
+    parser = argparse.ArgumentParser(description='System Resource Metrics Ingest Server')
+    parser.add_argument(
+        '--config',
+        type=str,
+        help='Path to configuration file'
+    )
+    parser.add_argument(
+        '--host',
+        type=str,
+        help='Address to bind'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        help='Port to listen on'
+    )
+    parser.add_argument(
+        '--database-url',
+        type=str,
+        help='Storage backend URL (e.g. sqlite:///metrics.db)'
+    )
+
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.host:
+        config['host'] = args.host
+    if args.port is not None:
+        config['port'] = args.port
+    if args.database_url:
+        config['database_url'] = args.database_url
+
+    try:
+        validate_config(config)
+    except ValueError as e:
+        print(f"Configuration error: {e}")
+        sys.exit(1)
+
+    logging.basicConfig(
+        level=getattr(logging, config['log_level'].upper(), logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+
+    asyncio.run(serve(config))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Snapshot storage backends."""
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple, Type
+
+
+# (host, epoch seconds, snapshot JSON)
+Row = Tuple[str, float, str]
+
+
+class StorageBackend(ABC):
+    """
+    Interface of snapshot storage backends.
+
+    Methods are blocking and are called from worker threads: writes from a
+    single writer thread, reads from any thread. A backend missing one of
+    the abstract methods cannot be instantiated.
+    """
+
+    @abstractmethod
+    def write_batch(self, rows: List[Row]):
+        """Store rows in one transaction."""
+
+    @abstractmethod
+    def history(self, host: str, start: float, end: float, limit: int, offset: int = 0) -> List[Tuple[float, str]]:
+        """Snapshots of a host with ``start <= ts < end``, oldest first."""
+
+    @abstractmethod
+    def hosts(self) -> List[Tuple[str, float]]:
+        """Known hosts with the time of their latest stored snapshot."""
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    SQLite in WAL mode: one write connection committing large batches and
+    a separate read connection, so history queries do not block ingest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._writer = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints; a crash loses at most the last batches
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots (host TEXT NOT NULL, ts REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self._create_unique_index()
+
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._read_lock = threading.Lock()
+
+    def _create_unique_index(self):
+        """One row per (host, ts), so batches retried after a lost response are not stored twice."""
+        writer = self._writer
+        if writer.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'snapshots_host_ts_unique'"
+        ).fetchone():
+            return
+        # Databases from before the unique index may hold duplicates
+        writer.execute("BEGIN")
+        writer.execute(
+            "DELETE FROM snapshots WHERE rowid NOT IN (SELECT MIN(rowid) FROM snapshots GROUP BY host, ts)"
+        )
+        writer.execute("DROP INDEX IF EXISTS snapshots_host_ts")
+        writer.execute("CREATE UNIQUE INDEX snapshots_host_ts_unique ON snapshots (host, ts)")
+        writer.execute("COMMIT")
+
+    def write_batch(self, rows: List[Row]):
+        writer = self._writer
+        writer.execute("BEGIN")
+        try:
+            writer.executemany("INSERT OR IGNORE INTO snapshots (host, ts, data) VALUES (?, ?, ?)", rows)
+        except Exception:
+            writer.execute("ROLLBACK")
+            raise
+        writer.execute("COMMIT")
+
+    def history(self, host: str, start: float, end: float, limit: int, offset: int = 0) -> List[Tuple[float, str]]:
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT ts, data FROM snapshots WHERE host = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ? OFFSET ?",
+                (host, start, end, limit, offset),
+            ).fetchall()
+
+    def hosts(self) -> List[Tuple[str, float]]:
+        with self._read_lock:
+            return self._reader.execute("SELECT host, MAX(ts) FROM snapshots GROUP BY host ORDER BY host").fetchall()
+
+    def close(self):
+        self._reader.close()
+        self._writer.close()
+
+
+BACKENDS: Dict[str, Type[StorageBackend]] = {
+    'sqlite': SQLiteBackend,
+}
+
+
+def create_backend(url: str) -> StorageBackend:
+    """
+    Create a storage backend from a URL.
+
+    ``sqlite:///relative.db`` and ``sqlite:////absolute/path.db`` select
+    SQLite; other schemes are looked up in :data:`BACKENDS`, which further
+    backends register themselves in.
+
+    Args:
+        url: Backend URL
+
+    Returns:
+        StorageBackend instance
+    """
+    scheme, _, location = url.partition('://')
+    backend = BACKENDS.get(scheme)
+    if backend is None:
+        raise ValueError(f"Unknown storage backend: {scheme}")
+    if location.startswith('/'):
+        location = location[1:]
+    return backend(location)
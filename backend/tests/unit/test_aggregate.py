@@ -0,0 +1,122 @@
+"""Unit tests for vectorized aggregation."""
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.aggregate import (
+    SeriesFrame, align, counter_rate, group_by, load_frame, load_store_frame, rate_frame, windowed,
+)
+from agent.rates import counter_delta
+from agent.timeseries import TimeSeriesStore
+
+
+def test_align():
+    """Test that irregular samples land in grid slots."""
+    grid = align([100.2, 101.9, 103.0, 99.0, 110.0], [1, 2, 3, 4, 5], start=100, end=105, step=1)
+
+    assert grid[0] == 1.0 and grid[1] == 2.0
+    assert math.isnan(grid[2]) and grid[3] == 3.0 and math.isnan(grid[4])
+
+
+def test_windowed_matches_numpy_reference():
+    """Test window statistics against nan-aware NumPy reductions."""
+    rng = np.random.default_rng(1)
+    values = rng.random((5, 120)) * 100
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[0, :60] = np.nan
+    frame = SeriesFrame(tuple("abcde"), 0.0, 1.0, values)
+
+    result = windowed(frame, 60, stats=("min", "max", "mean", "p50", "p95", "count", "sum"))
+    cube = values.reshape(5, 2, 60)
+
+    with np.errstate(all="ignore"), pytest.warns(RuntimeWarning):
+        expected = {
+            "min": np.nanmin(cube, axis=-1),
+            "max": np.nanmax(cube, axis=-1),
+            "mean": np.nanmean(cube, axis=-1),
+            "p50": np.nanpercentile(cube, 50, axis=-1),
+            "p95": np.nanpercentile(cube, 95, axis=-1),
+        }
+    for stat, reference in expected.items():
+        np.testing.assert_allclose(result[stat].values, reference, equal_nan=True)
+    assert result["count"].values[0, 0] == 0
+    assert math.isnan(result["sum"].values[0, 0])
+    assert result["mean"].step == 60
+
+
+def test_windowed_partial_last_window():
+    """Test padding of a trailing partial window and the last statistic."""
+    frame = SeriesFrame(("a",), 0.0, 10.0, np.array([[1.0, 2.0, 3.0, 4.0, np.nan]]))
+
+    result = windowed(frame, 30, stats=("last", "count"))
+
+    assert result["last"].values.tolist() == [[3.0, 4.0]]
+    assert result["count"].values.tolist() == [[3.0, 1.0]]
+
+
+def test_windowed_rejects_bad_input():
+    """Test validation of window width and statistic names."""
+    frame = SeriesFrame(("a",), 0.0, 10.0, np.zeros((1, 6)))
+
+    with pytest.raises(ValueError):
+        windowed(frame, 15)
+    with pytest.raises(ValueError):
+        windowed(frame, 30, stats=("median",))
+
+
+def test_counter_rate_matches_rate_stage():
+    """Test wraparound and reset handling against rates.counter_delta."""
+    readings = [100, 300, 2**32 - 100, 50, 10, 2**63 + 5, 7]
+    timestamps = [0, 2, 4, 6, 8, 10, 12]
+
+    _, rates = counter_rate(timestamps, readings)
+
+    for index, rate in enumerate(rates):
+        expected = counter_delta(readings[index], readings[index + 1])
+        if expected is None:
+            assert math.isnan(rate)
+        else:
+            assert rate == pytest.approx(expected / 2)
+
+
+def test_rate_frame():
+    """Test slot-to-slot rates of a counter frame."""
+    frame = SeriesFrame(("a",), 0.0, 5.0, np.array([[0.0, 50.0, np.nan, 100.0, 150.0]]))
+
+    rates = rate_frame(frame).values[0]
+
+    assert math.isnan(rates[0]) and rates[1] == 10.0
+    assert math.isnan(rates[2]) and math.isnan(rates[3]) and rates[4] == 10.0
+
+
+def test_group_by():
+    """Test combining host rows into groups."""
+    values = np.array([[1.0, np.nan], [3.0, 4.0], [10.0, 20.0]])
+    frame = SeriesFrame(("web-1", "web-2", "db-1"), 0.0, 1.0, values)
+    groups = {"web-1": "web", "web-2": "web", "db-1": "db"}
+
+    mean = group_by(frame, groups)
+    assert mean.hosts == ("db", "web")
+    assert mean.values.tolist() == [[10.0, 20.0], [2.0, 4.0]]
+    assert group_by(frame, groups, "max").values.tolist() == [[10.0, 20.0], [3.0, 4.0]]
+    assert group_by(frame, groups, "count").values.tolist() == [[1.0, 1.0], [2.0, 1.0]]
+
+
+def test_load_frames(tmp_path):
+    """Test loading per-host samples and time-series stores."""
+    frame = load_frame({"a": ([0, 1], [5, 6]), "b": ([1], [7])}, start=0, end=2, step=1)
+    assert frame.hosts == ("a", "b")
+    assert frame.values[0].tolist() == [5.0, 6.0] and frame.values[1, 1] == 7.0
+
+    store = TimeSeriesStore(str(tmp_path))
+    for i in range(10):
+        store.append(1_700_000_000 + i, {"cpu": float(i)})
+    loaded = load_store_frame({"host": store}, "cpu", 1_700_000_000, 1_700_000_010, 2, tier="raw")
+    assert loaded.values.tolist() == [[1.0, 3.0, 5.0, 7.0, 9.0]]
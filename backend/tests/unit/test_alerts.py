@@ -0,0 +1,181 @@
+"""Unit tests for the alert rule engine."""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from alerts.engine import AlertEngine, Rule, RuleSet, build_rules, load_rules, parse_duration, parse_path, parse_rule
+
+
+def snapshot(cpu=10.0, partitions=(("/", 50.0),), errors=None):
+    metrics = {
+        "cpu": {"overall_percent": cpu, "per_core_percent": [cpu, cpu / 2]},
+        "disk": {"partitions": [{"device": "/dev/sda1", "mountpoint": m, "percent": p} for m, p in partitions]},
+    }
+    if errors is not None:
+        metrics["rates"] = {"network": {"interfaces": {name: {"errors_per_sec": e} for name, e in errors.items()}}}
+    return metrics
+
+
+def engine(*rules):
+    return AlertEngine(RuleSet(Rule(name, expr, **options) for name, expr, options in rules))
+
+
+def states(alerts):
+    return [(a.rule, a.instance, a.state) for a in alerts]
+
+
+def test_parse():
+    assert parse_path("disk.partitions[*].percent") == ("disk", "partitions", "*", "percent")
+    assert parse_path("network.interfaces.*.errin") == ("network", "interfaces", "*", "errin")
+    assert parse_path("cpu.per_core_percent[1]") == ("cpu", "per_core_percent", 1)
+    assert parse_rule("cpu.overall_percent > 90 for 2m") == (("cpu", "overall_percent"), ">", 90.0, 120.0)
+    assert parse_rule("memory.swap.percent<=1e1") == (("memory", "swap", "percent"), "<=", 10.0, 0.0)
+    assert parse_duration("500ms") == 0.5
+    assert parse_duration(30) == 30.0
+    for bad in ("cpu >", "cpu.overall_percent ~ 3", "cpu > 1 for ever", "cpu..x > 1", "cpu[x] > 1"):
+        with pytest.raises(ValueError):
+            parse_rule(bad)
+
+
+def test_fires_after_duration_and_resolves():
+    alerts = engine(("cpu_high", "cpu.overall_percent > 90 for 2m", {}))
+    assert alerts.evaluate(snapshot(cpu=95), now=0) == []
+    assert alerts.evaluate(snapshot(cpu=95), now=60) == []
+    fired = alerts.evaluate(snapshot(cpu=96), now=120)
+    assert states(fired) == [("cpu_high", "", "firing")]
+    assert fired[0].value == 96 and fired[0].since == 0
+    assert states(alerts.active()) == [("cpu_high", "", "firing")]
+    assert states(alerts.evaluate(snapshot(cpu=50), now=180)) == [("cpu_high", "", "resolved")]
+    assert alerts.active() == []
+
+
+def test_interrupted_condition_restarts_window():
+    alerts = engine(("cpu_high", "cpu.overall_percent > 90 for 2m", {}))
+    alerts.evaluate(snapshot(cpu=95), now=0)
+    alerts.evaluate(snapshot(cpu=50), now=100)
+    assert alerts.evaluate(snapshot(cpu=95), now=110) == []
+    assert alerts.evaluate(snapshot(cpu=95), now=200) == []
+    assert states(alerts.evaluate(snapshot(cpu=95), now=230)) == [("cpu_high", "", "firing")]
+
+
+def test_sections_not_due_keep_state():
+    alerts = engine(("disk_full", "disk.partitions[*].percent > 90", {"cooldown": 3600}),
+                    ("disk_full_2m", "disk.partitions[*].percent > 90 for 2m", {"cooldown": 3600}))
+    fired = []
+    # 5 s ticks, disk collected once a minute
+    for now in range(0, 600, 5):
+        metrics = snapshot(partitions=(("/", 99.0),))
+        if now % 60:
+            del metrics["disk"]
+        fired += states(alerts.evaluate(metrics, now=now))
+    assert fired == [("disk_full", "/", "firing"), ("disk_full_2m", "/", "firing")]
+    assert len(alerts.active()) == 2
+
+    # Section present, partition gone (unmounted): resolved
+    resolved = alerts.evaluate(snapshot(partitions=()), now=600)
+    assert sorted(states(resolved)) == [("disk_full", "/", "resolved"), ("disk_full_2m", "/", "resolved")]
+
+
+def test_cooldown_deduplicates():
+    alerts = engine(("cpu_high", "cpu.overall_percent > 90", {"cooldown": 300}))
+    assert len(alerts.evaluate(snapshot(cpu=95), now=0)) == 1
+    assert alerts.evaluate(snapshot(cpu=95), now=100) == []
+    # Reminder once the cooldown has passed
+    assert states(alerts.evaluate(snapshot(cpu=95), now=300)) == [("cpu_high", "", "firing")]
+
+    # Flapping: resolves, but re-firing is held back until the cooldown ends
+    assert states(alerts.evaluate(snapshot(cpu=50), now=310)) == [("cpu_high", "", "resolved")]
+    assert alerts.evaluate(snapshot(cpu=95), now=320) == []
+    assert alerts.evaluate(snapshot(cpu=95), now=400) == []
+    assert states(alerts.evaluate(snapshot(cpu=95), now=600)) == [("cpu_high", "", "firing")]
+
+
+def test_wildcards_alert_per_instance():
+    alerts = engine(
+        ("disk_full", "disk.partitions[*].percent > 95", {}),
+        ("nic_errors", "rates.network.interfaces.*.errors_per_sec > 1", {}),
+    )
+    fired = alerts.evaluate(snapshot(partitions=(("/", 99.0), ("/data", 50.0)), errors={"eth0": 5.0, "lo": 0.0}), now=0)
+    assert sorted(states(fired)) == [("disk_full", "/", "firing"), ("nic_errors", "eth0", "firing")]
+
+    # An unmounted partition resolves its alert
+    resolved = alerts.evaluate(snapshot(partitions=(("/data", 50.0),), errors={"eth0": 5.0}), now=10)
+    assert states(resolved) == [("disk_full", "/", "resolved")]
+
+
+def test_threshold_levels_and_operators():
+    alerts = engine(
+        ("warn", "cpu.overall_percent >= 80", {"severity": "warning"}),
+        ("crit", "cpu.overall_percent > 90", {"severity": "critical"}),
+        ("idle", "cpu.overall_percent < 5", {"severity": "info"}),
+        ("core0_full", "cpu.per_core_percent[0] == 100", {}),
+    )
+    assert states(alerts.evaluate(snapshot(cpu=80), now=0)) == [("warn", "", "firing")]
+    # Most severe first
+    assert states(alerts.evaluate(snapshot(cpu=100), now=10)) == [("crit", "", "firing"), ("core0_full", "", "firing")]
+    assert sorted(states(alerts.evaluate(snapshot(cpu=1), now=20))) == [
+        ("core0_full", "", "resolved"), ("crit", "", "resolved"), ("idle", "", "firing"), ("warn", "", "resolved"),
+    ]
+
+
+def test_non_numeric_values_are_ignored():
+    alerts = engine(("cpu_high", "cpu.overall_percent > 90", {}))
+    assert alerts.evaluate({"cpu": {"overall_percent": None}}, now=0) == []
+    assert alerts.evaluate({"cpu": "unavailable"}, now=1) == []
+    assert alerts.evaluate({}, now=2) == []
+
+
+def test_state_only_for_breached_instances():
+    alerts = engine(("disk_full", "disk.partitions[*].percent > 95", {"cooldown": 60}))
+    partitions = tuple((f"/mnt/{n}", 10.0) for n in range(100))
+    alerts.evaluate(snapshot(partitions=partitions + (("/", 99.0),)), now=0)
+    assert len(alerts._states) == 1
+    alerts.evaluate(snapshot(partitions=partitions), now=10)
+    # Kept through the cooldown, then dropped
+    alerts.evaluate(snapshot(partitions=partitions), now=100)
+    assert alerts._states == {}
+
+
+def test_sweep_visits_breached_states_of_present_sections():
+    alerts = engine(
+        ("disk_full", "disk.partitions[*].percent > 95", {"cooldown": 60}),
+        ("cpu_high", "cpu.overall_percent > 90", {"cooldown": 60}),
+    )
+    partitions = tuple((f"/mnt/{n}", 10.0) for n in range(100))
+    alerts.evaluate(snapshot(cpu=99, partitions=partitions + (("/", 99.0), ("/data", 99.0))), now=0)
+    assert {section: len(states) for section, states in alerts._breached.items()} == {"disk": 2, "cpu": 1}
+
+    # /data unmounted while the cpu section was not due
+    disk_only = {"disk": snapshot(partitions=partitions + (("/", 99.0),))["disk"]}
+    assert states(alerts.evaluate(disk_only, now=10)) == [("disk_full", "/data", "resolved")]
+    assert {section: len(states) for section, states in alerts._breached.items()} == {"disk": 1, "cpu": 1}
+    # The resolved instance is kept through its cooldown, then dropped
+    assert len(alerts._states) == 3
+    alerts.evaluate(disk_only, now=60)
+    assert len(alerts._states) == 2
+
+
+def test_build_rules(tmp_path):
+    path = tmp_path / "alerts.yml"
+    path.write_text(
+        "defaults:\n  cooldown: 10m\n"
+        "rules:\n"
+        "  - name: cpu\n    expr: cpu.overall_percent > 90 for 2m\n    severity: critical\n"
+        "  - name: disk\n    expr: disk.partitions[*].percent > 80\n    cooldown: 30s\n"
+    )
+    rules = load_rules(str(path))
+    assert [(r.name, r.severity, r.cooldown) for r in rules.rules] == [("cpu", "critical", 600.0), ("disk", "warning", 30.0)]
+
+    with pytest.raises(ValueError):
+        build_rules({"rules": [{"name": "a", "expr": "cpu > 1"}, {"name": "a", "expr": "cpu > 2"}]})
+    with pytest.raises(ValueError):
+        build_rules({"rules": [{"name": "a", "expr": "cpu > 1", "severity": "urgent"}]})
+
+
+def test_shipped_rules_load():
+    rules = load_rules(str(Path(__file__).parent.parent.parent / "config" / "alerts.yml"))
+    assert len(rules.rules) > 0
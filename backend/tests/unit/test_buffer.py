@@ -0,0 +1,156 @@
+"""Unit tests for local metric buffer."""
+import pytest
+import sys
+import os
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.buffer import MetricBuffer, SpillLog
+
+
+def _payloads(count, start=0):
+    return [f"snapshot-{i}".encode() for i in range(start, start + count)]
+
+
+def test_memory_only_buffer_drops_oldest():
+    """Test that a buffer without spill directory stays bounded."""
+    buffer = MetricBuffer(capacity=3)
+    for payload in _payloads(5):
+        buffer.append(payload)
+
+    assert len(buffer) == 3
+    assert buffer.peek(10) == _payloads(3, start=2)
+    assert buffer.stats()["dropped"] == 2
+
+
+def test_drops_are_reported():
+    """Test that on_drop is called when payloads are discarded unsent."""
+    drops = []
+    buffer = MetricBuffer(capacity=2, on_drop=lambda: drops.append(len(buffer)))
+    for payload in _payloads(4):
+        buffer.append(payload)
+    assert len(drops) == 2
+
+
+def test_peek_and_ack():
+    """Test that peek does not consume and ack does."""
+    buffer = MetricBuffer(capacity=10)
+    for payload in _payloads(4):
+        buffer.append(payload)
+
+    assert buffer.peek(2) == _payloads(2)
+    assert buffer.peek(2) == _payloads(2)
+    buffer.ack(2)
+    assert buffer.peek(10) == _payloads(2, start=2)
+
+
+def test_ack_after_drop_keeps_unsent():
+    """Test that payloads dropped during a send are not acknowledged twice."""
+    buffer = MetricBuffer(capacity=3)
+    for payload in _payloads(3):
+        buffer.append(payload)
+
+    head = buffer.head
+    sent = buffer.peek(2)
+    # Two more arrive while the batch is in flight; the oldest two are dropped
+    buffer.append(b"snapshot-3")
+    buffer.append(b"snapshot-4")
+    buffer.ack(len(sent), head)
+    assert buffer.peek(10) == _payloads(3, start=2)
+
+    head = buffer.head
+    buffer.ack(1, head)
+    assert buffer.peek(10) == _payloads(2, start=3)
+
+
+def test_spill_preserves_order(tmp_path):
+    """Test that spilled payloads replay oldest first, before memory."""
+    buffer = MetricBuffer(capacity=4, spill_dir=str(tmp_path))
+    for payload in _payloads(20):
+        buffer.append(payload)
+
+    assert len(buffer) == 20
+    assert buffer.stats()["memory"] <= 4
+
+    replayed = []
+    while len(buffer):
+        batch = buffer.peek(3)
+        replayed.extend(batch)
+        buffer.ack(len(batch))
+
+    assert replayed == _payloads(20)
+    assert buffer.stats()["spill_bytes"] == 0
+
+
+def test_spill_log_rotates_segments(tmp_path):
+    """Test segment rotation and deletion of consumed segments."""
+    log = SpillLog(str(tmp_path), segment_size=64)
+    for payload in _payloads(10):
+        log.append_many([payload])
+
+    segments = [name for name in os.listdir(tmp_path) if name.startswith("segment-")]
+    assert len(segments) > 1
+
+    assert log.read(10) == _payloads(10)
+    log.ack(6)
+    assert log.read(10) == _payloads(4, start=6)
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("segment-")]) < len(segments)
+
+
+def test_spill_log_survives_restart(tmp_path):
+    """Test that acknowledged offsets persist across reopen."""
+    log = SpillLog(str(tmp_path), segment_size=64)
+    log.append_many(_payloads(10))
+    log.ack(4)
+    log.close()
+
+    reopened = SpillLog(str(tmp_path), segment_size=64)
+    assert reopened.count == 6
+    assert reopened.read(10) == _payloads(6, start=4)
+
+
+def test_spill_log_truncates_torn_record(tmp_path):
+    """Test recovery from a partially written record."""
+    log = SpillLog(str(tmp_path))
+    log.append_many(_payloads(3))
+    log.close()
+
+    segment = next(p for p in tmp_path.iterdir() if p.name.startswith("segment-"))
+    with open(segment, "ab") as f:
+        f.write(b"\x40\x00\x00\x00garbage")
+
+    reopened = SpillLog(str(tmp_path))
+    assert reopened.count == 3
+    assert reopened.read(10) == _payloads(3)
+
+    reopened.append_many([b"after"])
+    assert reopened.read(10) == _payloads(3) + [b"after"]
+
+
+def test_spill_log_size_limit(tmp_path):
+    """Test that the oldest segments are dropped past the size limit."""
+    log = SpillLog(str(tmp_path), segment_size=64, max_bytes=200)
+    for payload in _payloads(50):
+        log.append_many([payload])
+
+    assert log.size_bytes <= 200 + 64
+    assert log.dropped > 0
+    assert log.count == 50 - log.dropped
+    assert log.read(100)[-1] == b"snapshot-49"
+
+
+def test_spill_limit_drops_are_reported(tmp_path):
+    """Test that on_drop is called when the spill log drops segments."""
+    drops = []
+    buffer = MetricBuffer(capacity=2, spill_dir=str(tmp_path), segment_size=64,
+                          max_spill_bytes=200, on_drop=lambda: drops.append(len(buffer)))
+    for payload in _payloads(10):
+        buffer.append(payload)
+    assert not drops
+
+    for payload in _payloads(40, start=10):
+        buffer.append(payload)
+    assert drops
+    assert buffer.stats()["dropped"] > 0
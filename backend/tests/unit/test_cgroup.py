@@ -0,0 +1,180 @@
+"""Unit tests for the cgroup v2 collector."""
+import copy
+import shutil
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent import protobuf
+from agent.collectors.cgroup import CgroupTree, collect_cgroup_metrics
+from agent.config_loader import DEFAULT_CONFIG
+from agent.main import collect_all_metrics
+
+
+def make_cgroup(path, usage=0, throttled=0, memory=None, anon=0, rbytes=0, wios=0, limit=None):
+    path.mkdir(parents=True, exist_ok=True)
+    write_cgroup(path, usage, throttled, memory, anon, rbytes, wios, limit)
+    return path
+
+
+def write_cgroup(path, usage=0, throttled=0, memory=None, anon=0, rbytes=0, wios=0, limit=None):
+    (path / "cpu.stat").write_text(
+        f"usage_usec {usage}\nuser_usec {usage}\nsystem_usec 0\n"
+        f"nr_periods 0\nnr_throttled 0\nthrottled_usec {throttled}\n"
+    )
+    (path / "io.stat").write_text(f"8:0 rbytes={rbytes} wbytes=0 rios=0 wios={wios} dbytes=0 dios=0\n"
+                                  if rbytes or wios else "")
+    if memory is not None:
+        (path / "memory.current").write_text(f"{memory}\n")
+        (path / "memory.stat").write_text(f"anon {anon}\nfile {memory - anon}\nanon_thp 0\n")
+        (path / "memory.max").write_text("max\n" if limit is None else f"{limit}\n")
+
+
+def make_root(tmp_path):
+    root = tmp_path / "cgroup"
+    make_cgroup(root, usage=1000)
+    (root / "cgroup.controllers").write_text("cpu io memory\n")
+    return root
+
+
+def test_rates_of_leaf_cgroups(tmp_path):
+    root = make_root(tmp_path)
+    slice_ = make_cgroup(root / "system.slice", usage=100, memory=300)
+    web = make_cgroup(slice_ / "web.scope", usage=100, memory=300, anon=200, rbytes=0)
+    make_cgroup(root / "idle.scope", memory=10)
+
+    tree = CgroupTree(str(root))
+    leaves = tree.scan(now=0.0)
+    assert sorted(node.path for node in leaves) == ["/idle.scope", "/system.slice/web.scope"]
+    assert tree.count == 3
+    # First sighting: no rates yet
+    assert all(node.cpu_percent == 0.0 for node in leaves)
+
+    # Parents' counters include their children's, as in the kernel
+    write_cgroup(root, usage=3_000_000, rbytes=4096, wios=10)
+    write_cgroup(slice_, usage=2_000_100, memory=500, rbytes=4096, wios=10)
+    write_cgroup(web, usage=2_000_100, throttled=500_000, memory=500, anon=400, rbytes=4096, wios=10)
+    leaves = {node.path: node for node in tree.scan(now=2.0)}
+
+    web_node = leaves["/system.slice/web.scope"]
+    assert web_node.cpu_percent == 100.0
+    assert web_node.throttled_percent == 25.0
+    assert web_node.read_bytes_per_sec == 2048.0
+    assert web_node.write_iops == 5.0
+    assert (web_node.memory_current, web_node.memory_anon, web_node.memory_file) == (500, 400, 100)
+    assert leaves["/idle.scope"].cpu_percent == 0.0
+
+
+def test_unchanged_subtrees_are_not_read(tmp_path):
+    root = make_root(tmp_path)
+    make_cgroup(root / "idle.slice", usage=100, memory=2000)
+    for index in range(20):
+        make_cgroup(root / "idle.slice" / f"c{index}.scope", usage=5, memory=100)
+    make_cgroup(root / "busy.scope", usage=5, memory=100)
+
+    tree = CgroupTree(str(root))
+    tree.scan(now=0.0)
+    first_read = tree.read
+
+    # Nothing changed: cpu.stat and io.stat of the root, memory.current of
+    # its children (the root has none), and no directory is listed
+    tree.scan(now=1.0)
+    assert tree.listed == 0
+    assert tree.read == 2 + 2
+    assert tree.read < first_read
+
+    # Only the busy cgroup's branch is read again
+    write_cgroup(root, usage=2000)
+    write_cgroup(root / "busy.scope", usage=1005, memory=100)
+    leaves = {node.path: node for node in tree.scan(now=2.0)}
+    assert leaves["/busy.scope"].cpu_percent == 0.1
+    # The root's files, cpu.stat and memory.current of both of its
+    # children; idle.slice did not change, so its children are skipped
+    assert tree.read == 2 + 2 + 2
+
+    # A full rescan reads memory.current everywhere, and retries the root's
+    tree.rescan_interval = 0
+    tree.scan(now=3.0)
+    assert tree.read == 2 + 1 + 22
+
+
+def test_added_removed_and_recreated_cgroups(tmp_path):
+    root = make_root(tmp_path)
+    make_cgroup(root / "a.scope", usage=10)
+    make_cgroup(root / "b.scope", usage=10)
+
+    tree = CgroupTree(str(root))
+    tree.scan(now=0.0)
+
+    shutil.rmtree(root / "b.scope")
+    make_cgroup(root / "c.scope", usage=10)
+    leaves = tree.scan(now=1.0)
+    assert sorted(node.path for node in leaves) == ["/a.scope", "/c.scope"]
+    # The root and the new cgroup
+    assert tree.listed == 2 and tree.count == 2
+
+    # Recreated under the same name: counters start over instead of
+    # producing a rate against the old cgroup's (cgroupfs never reuses an
+    # inode number; keep the old directory so this file system cannot either)
+    (root / "a.scope").rename(tmp_path / "removed.scope")
+    make_cgroup(root / "a.scope", usage=5_000_000)
+    write_cgroup(root, usage=9_000_000)
+    leaves = {node.path: node for node in tree.scan(now=2.0)}
+    assert leaves["/a.scope"].cpu_percent == 0.0
+    assert leaves["/a.scope"].cpu == (5_000_000, 0)
+
+
+def test_missing_controller_files_retried_on_rescan(tmp_path):
+    root = make_root(tmp_path)
+    leaf = make_cgroup(root / "a.scope", usage=10)
+
+    tree = CgroupTree(str(root), rescan_interval=10)
+    node = tree.scan(now=0.0)[0]
+    assert node.memory_current is None
+
+    (leaf / "memory.current").write_text("42\n")
+    (leaf / "memory.stat").write_text("anon 40\nfile 2\n")
+    assert tree.scan(now=5.0)[0].memory_current is None
+    assert tree.scan(now=10.0)[0].memory_current == 42
+
+
+def test_collect_top_cgroups(tmp_path):
+    root = make_root(tmp_path)
+    for index in range(4):
+        make_cgroup(root / f"c{index}.scope", usage=0, memory=(index + 1) * 100, limit=1000)
+
+    assert collect_cgroup_metrics(root=str(tmp_path)) is None
+
+    collect_cgroup_metrics(limit=2, root=str(root))
+    write_cgroup(root, usage=10_000_000, rbytes=10 * 4096)
+    for index in range(4):
+        write_cgroup(root / f"c{index}.scope", usage=index * 1000, memory=(index + 1) * 100,
+                     rbytes=(4 - index) * 4096, limit=1000)
+    metrics = collect_cgroup_metrics(limit=2, root=str(root))
+
+    assert metrics["count"] == 4
+    assert [usage["path"] for usage in metrics["top_cpu"]] == ["/c3.scope", "/c2.scope"]
+    assert [usage["path"] for usage in metrics["top_memory"]] == ["/c3.scope", "/c2.scope"]
+    assert [usage["path"] for usage in metrics["top_io"]] == ["/c0.scope", "/c1.scope"]
+    assert metrics["top_memory"][0]["memory_current"] == 400
+    assert metrics["top_memory"][0]["memory_limit"] == 1000
+    assert metrics["scan"]["read"] > 0
+
+    snapshot = {"timestamp": "2026-01-01T00:00:00", "hostname": "host", "cgroups": metrics}
+    assert protobuf.decode_snapshot(protobuf.encode_snapshot(snapshot)) == snapshot
+
+
+def test_enabled_through_config(tmp_path):
+    root = make_root(tmp_path)
+    make_cgroup(root / "a.scope", usage=10, memory=100)
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    assert "cgroups" not in collect_all_metrics(config)
+
+    config["collectors"] = {"cgroups": True}
+    config["cgroup_root"] = str(root)
+    metrics = collect_all_metrics(config)
+    assert metrics["cgroups"]["count"] == 1
+    assert metrics["collection"]["cgroups"]["status"] == "ok"
@@ -8,7 +8,7 @@ import os
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
-from agent.config_loader import load_config, validate_config, DEFAULT_CONFIG
+from agent.config_loader import load_config, validate_config, collector_intervals, DEFAULT_CONFIG
 
 
 def test_load_default_config():
@@ -83,3 +83,64 @@ def test_validate_config_invalid_timeout():
 
     with pytest.raises(ValueError, match="timeout must be greater than 0"):
         validate_config(config)
+
+
+def test_validate_config_invalid_keyframe_interval():
+    """Test validation with invalid keyframe interval."""
+    config = DEFAULT_CONFIG.copy()
+    config["keyframe_interval"] = 0
+
+    with pytest.raises(ValueError, match="keyframe_interval must be at least 1"):
+        validate_config(config)
+
+
+def test_validate_config_invalid_serve_port():
+    """Test validation with out-of-range exposition port."""
+    config = DEFAULT_CONFIG.copy()
+    config["serve_port"] = 70000
+
+    with pytest.raises(ValueError, match="serve_port must be between 0 and 65535"):
+        validate_config(config)
+
+
+def test_collector_intervals_defaults():
+    """Test that boolean collectors use the global interval."""
+    config = DEFAULT_CONFIG.copy()
+
+    intervals = collector_intervals(config)
+
+    assert intervals == {
+        "cpu": 5, "memory": 5, "disk": 5, "network": 5, "processes": 5, "saturation": 5,
+    }
+
+
+def test_collector_intervals_per_collector():
+    """Test per-collector intervals and disabled collectors."""
+    config = DEFAULT_CONFIG.copy()
+    config["collectors"] = {
+        "cpu": {"interval": 1},
+        "memory": True,
+        "disk": {"enabled": True, "interval": 60},
+        "network": {"enabled": False, "interval": 5},
+    }
+
+    intervals = collector_intervals(config)
+
+    assert intervals == {"cpu": 1, "memory": 5, "disk": 60, "processes": 5}
+
+
+def test_collector_intervals_processes_need_consumer():
+    """Test that the process scan is dropped without cpu or memory."""
+    config = DEFAULT_CONFIG.copy()
+    config["collectors"] = {"cpu": False, "memory": False, "disk": True, "processes": True}
+
+    assert "processes" not in collector_intervals(config)
+
+
+def test_validate_config_invalid_collector_interval():
+    """Test validation with invalid per-collector interval."""
+    config = DEFAULT_CONFIG.copy()
+    config["collectors"] = {"cpu": {"interval": 0}}
+
+    with pytest.raises(ValueError, match="collectors.cpu.interval must be greater than 0"):
+        validate_config(config)
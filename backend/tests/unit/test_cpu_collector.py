@@ -79,3 +79,56 @@ def test_cpu_metrics_consistency():
 
     # CPU count should be the same
     assert metrics1["count"] == metrics2["count"]
+
+
+def _times(user, system, idle, iowait=0.0):
+    """Build a cpu_times-like tuple for sampler tests."""
+    from collections import namedtuple
+    scputimes = namedtuple('scputimes', ['user', 'system', 'idle', 'iowait'])
+    return scputimes(user, system, idle, iowait)
+
+
+def test_cpu_sampler_uses_deltas():
+    """Test that the sampler computes utilisation between two ticks."""
+    sampler = cpu.CpuSampler()
+    sampler.update(_times(100, 50, 800, 50), [_times(50, 25, 400, 25)])
+
+    # 100 seconds pass: 30 user, 10 system, 50 idle, 10 iowait
+    sample = sampler.update(_times(130, 60, 850, 60), [_times(80, 35, 400, 35)])
+
+    assert sample["overall_percent"] == 40.0
+    assert sample["times_percent"]["user"] == 30.0
+    assert sample["times_percent"]["system"] == 10.0
+    assert sample["times_percent"]["idle"] == 50.0
+    assert sample["times_percent"]["iowait"] == 10.0
+    assert sample["per_core_percent"] == [80.0]
+
+
+def test_cpu_sampler_first_sample_since_boot():
+    """Test that the first sample is measured against boot."""
+    sampler = cpu.CpuSampler()
+    sample = sampler.update(_times(20, 5, 75), [_times(20, 5, 75), _times(0, 0, 100)])
+
+    assert sample["overall_percent"] == 25.0
+    assert sample["per_core_percent"] == [25.0, 0.0]
+
+
+def test_cpu_sampler_idle_interval():
+    """Test that a tick with no elapsed CPU time reports zero usage."""
+    sampler = cpu.CpuSampler()
+    sampler.update(_times(10, 10, 10), [])
+    sample = sampler.update(_times(10, 10, 10), [])
+
+    assert sample["overall_percent"] == 0.0
+
+
+def test_collect_cpu_metrics_does_not_block():
+    """Test that collection no longer waits for a one second window."""
+    import time
+
+    start = time.monotonic()
+    metrics = cpu.collect_cpu_metrics()
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5
+    assert "times_percent" in metrics
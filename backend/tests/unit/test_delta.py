@@ -0,0 +1,129 @@
+"""Unit tests for delta-encoded snapshot stream."""
+import pytest
+import copy
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.delta import DeltaDecoder, DeltaEncoder, StreamGap, flatten, unflatten
+
+
+def snapshot(tick):
+    return {
+        "timestamp": f"2024-01-01T00:00:{tick:02d}",
+        "hostname": "web-1",
+        "cpu": {"overall_percent": 10.0 + tick, "per_core_percent": [1.5, 2.5], "load_average": {"1min": None}},
+        "disk": {
+            "partitions": [{"device": "/dev/sda1", "mountpoint": "/", "total": 100 * 2**30, "percent": 40.0}],
+            "per_disk_io": {"sda": {"read_bytes": 2**40 + tick * 4096, "write_count": 1000 + tick}},
+        },
+        "network": {
+            "interfaces": {"eth0": {"bytes_sent": 5_000_000 + tick * 1500, "dropin": 0}},
+            "connections": {"states": {}},
+        },
+        "top_cpu_processes": [],
+    }
+
+
+def test_flatten_round_trip():
+    """Test that unflatten restores nested dicts, lists and empty containers."""
+    value = snapshot(1)
+
+    assert unflatten(flatten(value)) == value
+
+
+def test_stream_round_trip():
+    """Test that the decoder rebuilds every snapshot of the stream."""
+    encoder = DeltaEncoder(keyframe_interval=4)
+    decoder = DeltaDecoder()
+
+    for tick in range(10):
+        value = snapshot(tick)
+        if tick == 5:
+            value["network"]["interfaces"]["wlan0"] = {"bytes_sent": 1}
+            del value["disk"]["per_disk_io"]
+            value["cpu"]["load_average"]["1min"] = 0.5
+        assert decoder.decode(encoder.encode(value)) == value
+
+    assert encoder.keyframes == 3
+
+
+def test_delta_frames_are_small():
+    """Test that unchanged fields and names are not repeated."""
+    encoder = DeltaEncoder()
+    keyframe = encoder.encode(snapshot(0))
+    delta = encoder.encode(snapshot(1))
+
+    assert len(delta) < len(keyframe) / 3
+    assert b"eth0" in keyframe and b"eth0" not in delta
+    assert b"/dev/sda1" not in delta
+
+
+def test_counter_deltas_are_varints():
+    """Test that counter increments are sent as deltas, not full values."""
+    encoder = DeltaEncoder()
+    encoder.encode({"bytes": 2**60})
+    frame = encoder.encode({"bytes": 2**60 + 1})
+
+    # header, empty dictionaries, one op word and a one-byte delta
+    assert frame == b"D\x02\x00\x00\x01\x01\x02"
+
+
+def test_gap_waits_for_keyframe():
+    """Test resynchronization after a lost frame."""
+    encoder = DeltaEncoder(keyframe_interval=3)
+    decoder = DeltaDecoder()
+    frames = [encoder.encode(snapshot(tick)) for tick in range(4)]
+
+    decoder.decode(frames[0])
+    with pytest.raises(StreamGap):
+        decoder.decode(frames[2])
+    assert decoder.decode(frames[3]) == snapshot(3)
+
+
+def test_repeated_frames_are_skipped():
+    """Test that frames re-sent after a lost response leave the stream intact."""
+    encoder = DeltaEncoder(keyframe_interval=60)
+    decoder = DeltaDecoder()
+    frames = [encoder.encode(snapshot(tick)) for tick in range(5)]
+
+    for tick in range(3):
+        decoder.decode(frames[tick])
+    assert decoder.decode(frames[1]) is None
+    assert decoder.decode(frames[2]) is None
+    assert decoder.decode(frames[3]) == snapshot(3)
+    # A repeated keyframe re-applies the frames after it
+    assert decoder.decode(frames[0]) == snapshot(0)
+    for tick in range(1, 5):
+        assert decoder.decode(frames[tick]) == snapshot(tick)
+
+
+def test_decoder_starting_mid_stream():
+    """Test that delta frames before the first keyframe are skipped."""
+    encoder = DeltaEncoder(keyframe_interval=2)
+    frames = [encoder.encode(snapshot(tick)) for tick in range(3)]
+    decoder = DeltaDecoder()
+
+    assert decoder.decode(frames[1]) is None
+    assert decoder.decode(frames[2]) == snapshot(2)
+
+
+def test_force_keyframe():
+    """Test that force_keyframe starts a new keyframe period."""
+    encoder = DeltaEncoder()
+    encoder.encode(snapshot(0))
+    encoder.force_keyframe()
+    frame = encoder.encode(snapshot(1))
+
+    assert DeltaDecoder().decode(frame) == snapshot(1)
+
+
+def test_type_changes_are_sent_in_full():
+    """Test that int/float/bool transitions keep their types."""
+    encoder = DeltaEncoder()
+    decoder = DeltaDecoder()
+    for value in ({"v": 1}, {"v": 1.0}, {"v": True}, {"v": 2}, {"v": None}):
+        decoded = decoder.decode(encoder.encode(copy.deepcopy(value)))
+        assert decoded == value and type(decoded["v"]) is type(value["v"])
@@ -106,3 +106,13 @@ def test_calculate_iops_none_values():
 
     assert iops["read_iops"] == 0
     assert iops["write_iops"] == 0
+
+
+def test_calculate_iops_wraparound():
+    """Test IOPS calculation across a 32-bit counter wrap."""
+    previous_io = {"read_count": 2 ** 32 - 50, "write_count": 0}
+    current_io = {"read_count": 50, "write_count": 0}
+
+    iops = disk.calculate_iops(previous_io, current_io, 10.0)
+
+    assert iops["read_iops"] == 10.0
@@ -0,0 +1,170 @@
+"""Unit tests for OpenMetrics exporter."""
+import gzip
+import sys
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.exporter import MetricsPage, MetricsServer, limit_labels, render_openmetrics
+
+
+def snapshot(cores=2, disks=("sda",), interfaces=("eth0",)):
+    io = {"read_count": 1, "write_count": 2, "read_bytes": 512, "write_bytes": 1024, "read_time": 1500, "write_time": 0}
+    nic = {"bytes_sent": 10, "bytes_recv": 20, "packets_sent": 1, "packets_recv": 2,
+           "errin": 0, "errout": 0, "dropin": 3, "dropout": 0}
+    return {
+        "cpu": {
+            "overall_percent": 12.5,
+            "per_core_percent": [float(i) for i in range(cores)],
+            "times": {"user": 10.0, "system": 5.0, "idle": 100.0, "iowait": None},
+            "load_average": {"1min": 0.5, "5min": 0.25, "15min": 0.1},
+            "frequency": {"current": 2400.0},
+        },
+        "memory": {"physical": {"total": 1000, "used": 400, "percent": 40.0}, "swap": {"total": 0, "sin": 0}},
+        "disk": {
+            "partitions": [{"device": "/dev/sda1", "mountpoint": "/", "fstype": "ext4", "total": 100, "used": 40, "free": 60}],
+            "per_disk_io": {name: dict(io) for name in disks},
+        },
+        "network": {
+            "interfaces": {name: dict(nic) for name in interfaces},
+            "connections": {"states": {"ESTABLISHED": 3, "LISTEN": 2}},
+        },
+        "collection": {"cpu": {"status": "ok", "duration_ms": 1.5}},
+        "agent": {
+            "cpu_seconds": {"user": 2.0, "system": 0.5},
+            "cpu_percent": 0.3,
+            "rss_bytes": 1000,
+            "threads": 5,
+            "gc": {"collections": [7, 1, 0], "collected": 3, "uncollectable": 0, "pause_ms": 2.0},
+            "bucket_bounds_ms": [1.0, 10.0],
+            "functions": {"collect_cpu_metrics": {"count": 4, "sum_ms": 12.0, "max_ms": 9.0, "buckets": [1, 3, 0]}},
+        },
+    }
+
+
+def test_render_openmetrics():
+    """Test family metadata, counters and label rendering."""
+    text = render_openmetrics(snapshot()).decode()
+    lines = text.splitlines()
+
+    assert text.endswith("# EOF\n")
+    assert "# TYPE system_cpu_time_seconds counter" in lines
+    assert 'system_cpu_time_seconds_total{mode="user"} 10.0' in lines
+    assert not any('mode="iowait"' in line for line in lines)
+    assert 'system_cpu_core_utilisation_percent{core="1"} 1.0' in lines
+    assert 'system_disk_io_time_seconds_total{device="sda",direction="read"} 1.5' in lines
+    assert 'system_network_dropped_total{interface="eth0",direction="receive"} 3' in lines
+    assert 'system_network_connections{state="listen"} 2' in lines
+    assert 'system_memory_bytes{state="used"} 400' in lines
+    assert 'agent_collector_duration_seconds{collector="cpu"} 0.0015' in lines
+
+
+def test_render_agent_overhead():
+    """Test self-metrics counters and the collector latency histogram."""
+    lines = render_openmetrics(snapshot()).decode().splitlines()
+
+    assert 'agent_cpu_time_seconds_total{mode="user"} 2.0' in lines
+    assert "agent_cpu_utilisation_percent 0.3" in lines
+    assert 'agent_gc_collections_total{generation="0"} 7' in lines
+    assert "# TYPE agent_function_duration_seconds histogram" in lines
+    assert 'agent_function_duration_seconds_bucket{function="collect_cpu_metrics",le="0.001"} 1' in lines
+    assert 'agent_function_duration_seconds_bucket{function="collect_cpu_metrics",le="0.01"} 4' in lines
+    assert 'agent_function_duration_seconds_bucket{function="collect_cpu_metrics",le="+Inf"} 4' in lines
+    assert 'agent_function_duration_seconds_count{function="collect_cpu_metrics"} 4' in lines
+    assert 'agent_function_duration_seconds_sum{function="collect_cpu_metrics"} 0.012' in lines
+
+
+def test_render_skips_missing_sections():
+    """Test that a partial snapshot renders only its sections."""
+    text = render_openmetrics({"memory": snapshot()["memory"]}).decode()
+
+    assert "system_memory_bytes" in text and "system_cpu" not in text
+
+
+def test_label_values_are_escaped():
+    """Test escaping of quotes and backslashes in label values."""
+    metrics = {"network": {"interfaces": {'we"ird\\': {"bytes_sent": 1}}}}
+
+    assert 'interface="we\\"ird\\\\"' in render_openmetrics(metrics).decode()
+
+
+def test_limit_labels():
+    """Test exclusion and folding of per-device series."""
+    items = {f"disk{i}": i for i in range(5)}
+    items["loop0"] = 99
+
+    kept, folded = limit_labels(items, 3, exclude=["loop*"])
+
+    assert list(kept) == ["disk0", "disk1"]
+    assert folded == [2, 3, 4]
+    assert limit_labels(items, 10, exclude=["loop*"])[1] == []
+
+
+def test_cardinality_limit_folds_counters():
+    """Test that devices over the limit are summed into _other."""
+    text = render_openmetrics(snapshot(cores=8, disks=("sda", "sdb", "sdc", "loop0")), max_label_values=2,
+                              exclude_devices=["loop*"]).decode()
+
+    assert 'system_disk_io_bytes_total{device="sda",direction="read"} 512' in text
+    assert 'system_disk_io_bytes_total{device="_other",direction="read"} 1024' in text
+    assert "loop0" not in text and 'device="sdb"' not in text
+    assert 'system_cpu_core_utilisation_percent{core="_other"} 4.0' in text
+
+
+def test_page_renders_once_per_update():
+    """Test that scrapes between ticks are served from the cache."""
+    page = MetricsPage()
+    page.update(snapshot())
+    first = page.get()
+    for _ in range(5):
+        assert page.get() is first
+        page.get("gzip")
+    assert page.renders == 1
+
+    page.update({"cpu": dict(snapshot()["cpu"], overall_percent=99.0)})
+    second = page.get()
+    assert page.renders == 2
+    assert b"system_cpu_utilisation_percent 99.0" in second
+    # Sections not collected on this tick keep their last value
+    assert b"system_memory_bytes" in second
+
+
+@pytest.fixture
+def server():
+    page = MetricsPage()
+    page.update(snapshot())
+    server = MetricsServer(page, host="127.0.0.1", port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def scrape(server, path="/metrics", **headers):
+    url = f"http://127.0.0.1:{server.address[1]}{path}"
+    return urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=5)
+
+
+def test_server_negotiates_gzip(server):
+    """Test plain and gzip-encoded scrapes."""
+    plain = scrape(server)
+    assert plain.headers["Content-Type"].startswith("application/openmetrics-text")
+    assert plain.headers.get("Content-Encoding") is None
+    body = plain.read()
+
+    compressed = scrape(server, **{"Accept-Encoding": "gzip, deflate"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.read()) == body
+
+    refused = scrape(server, **{"Accept-Encoding": "gzip;q=0"})
+    assert refused.headers.get("Content-Encoding") is None
+
+
+def test_server_unknown_path(server):
+    """Test that only /metrics is served."""
+    with pytest.raises(urllib.error.HTTPError) as error:
+        scrape(server, "/")
+    assert error.value.code == 404
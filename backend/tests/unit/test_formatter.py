@@ -0,0 +1,54 @@
+"""Unit tests for output formatter."""
+import io
+import json
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent import formatter
+from agent.formatter import NdjsonWriter, format_metrics_ndjson
+
+
+SNAPSHOT = {"timestamp": "2024-01-01T00:00:00", "hostname": "hôst", "cpu": {"per_core_percent": [1.5, 2.0]}}
+
+
+def test_format_metrics_ndjson():
+    """Test that a snapshot becomes one compact line."""
+    line = format_metrics_ndjson(SNAPSHOT)
+
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert b": " not in line and b", " not in line
+    assert json.loads(line) == SNAPSHOT
+
+
+def test_format_metrics_ndjson_stdlib_fallback(monkeypatch):
+    """Test the encoder without orjson installed."""
+    monkeypatch.setattr(formatter, "orjson", None)
+
+    assert format_metrics_ndjson(SNAPSHOT) == (
+        '{"timestamp":"2024-01-01T00:00:00","hostname":"hôst","cpu":{"per_core_percent":[1.5,2.0]}}\n'
+    ).encode("utf-8")
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+
+
+def test_ndjson_writer_flushes_every_n_lines():
+    """Test that the writer flushes complete lines in groups."""
+    stream = CountingStream()
+    writer = NdjsonWriter(stream, flush_lines=2)
+    for _ in range(5):
+        writer.write(SNAPSHOT)
+
+    assert stream.flushes == 2
+    writer.flush()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 5 and all(json.loads(line) == SNAPSHOT for line in lines)
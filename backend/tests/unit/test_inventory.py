@@ -0,0 +1,55 @@
+"""Unit tests for host inventory cache."""
+import pytest
+import sys
+import socket
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.inventory import HostInventory, get_inventory
+
+
+def test_inventory_contents():
+    """Test that static host data is filled at creation."""
+    inventory = HostInventory()
+    data = inventory.as_dict()
+
+    assert data["hostname"] == socket.gethostname()
+    assert data["version"] == 1
+    assert data["cpu"]["count"]["logical"] > 0
+    assert "min" in data["cpu"]["frequency"]
+    assert isinstance(data["network"]["addresses"], dict)
+    assert inventory.hostname == data["hostname"]
+
+
+def test_inventory_version_stable_without_change():
+    """Test that refreshing unchanged data keeps the version."""
+    inventory = HostInventory()
+    inventory.refresh()
+
+    assert inventory.version == 1
+
+
+def test_inventory_refreshes_on_interface_change():
+    """Test that a changed interface set triggers a refresh."""
+    inventory = HostInventory(refresh_interval=3600)
+
+    assert inventory.maybe_refresh(interfaces=["lo", "eth0"]) is False
+    assert inventory.maybe_refresh(interfaces=["lo", "eth0"]) is False
+    assert inventory.maybe_refresh(interfaces=["lo", "eth0", "eth1"]) is True
+    assert inventory.maybe_refresh(interfaces=["lo", "eth0", "eth1"]) is False
+
+
+def test_inventory_refreshes_on_timer():
+    """Test that an expired cache is refreshed."""
+    inventory = HostInventory(refresh_interval=3600)
+    assert inventory.maybe_refresh() is False
+
+    inventory.refresh_interval = 0
+    assert inventory.maybe_refresh() is True
+
+
+def test_get_inventory_is_shared():
+    """Test that the process-wide inventory is created once."""
+    assert get_inventory() is get_inventory()
@@ -0,0 +1,107 @@
+"""Unit tests for agent main module."""
+import logging
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.config_loader import DEFAULT_CONFIG
+from agent.inventory import get_inventory
+from agent.main import collect_all_metrics, create_alert_engine, evaluate_alerts
+
+
+def test_collect_all_metrics():
+    """Test collecting a full snapshot."""
+    metrics = collect_all_metrics(DEFAULT_CONFIG.copy())
+
+    for section in ("cpu", "memory", "disk", "network", "process_scan"):
+        assert section in metrics
+
+    for name in ("cpu", "memory", "disk", "network", "processes"):
+        assert metrics["collection"][name]["status"] == "ok"
+        assert metrics["collection"][name]["duration_ms"] >= 0
+
+
+def test_collect_all_metrics_self_metrics():
+    """Test that the agent reports its own overhead and collector latencies."""
+    metrics = collect_all_metrics(DEFAULT_CONFIG.copy())
+
+    functions = metrics["agent"]["functions"]
+    for name in ("collect_cpu_metrics", "collect_memory_metrics", "collect_disk_metrics",
+                 "collect_network_metrics", "scan_processes", "get_top_cpu_processes", "collect_all_metrics"):
+        assert functions[name]["count"] >= 1
+        assert sum(functions[name]["buckets"]) == functions[name]["count"]
+
+    config = DEFAULT_CONFIG.copy()
+    config["self_metrics"] = False
+    assert "agent" not in collect_all_metrics(config)
+
+
+def test_collect_all_metrics_disabled_collectors():
+    """Test that disabled collectors are neither run nor reported."""
+    config = DEFAULT_CONFIG.copy()
+    config["collectors"] = {"cpu": False, "memory": False, "disk": True, "network": False}
+
+    metrics = collect_all_metrics(config)
+
+    assert "disk" in metrics
+    assert "cpu" not in metrics
+    assert "top_cpu_processes" not in metrics
+    assert set(metrics["collection"]) == {"disk"}
+
+
+def test_collect_all_metrics_uses_scheduled_timestamp():
+    """Test that the snapshot is stamped with the scheduled tick time."""
+    config = DEFAULT_CONFIG.copy()
+    config["collectors"] = {"cpu": False, "memory": False, "disk": False, "network": False}
+
+    metrics = collect_all_metrics(config, timestamp=1700000005.0)
+
+    assert metrics["timestamp"] == "2023-11-14T22:13:25"
+
+
+def test_collect_all_metrics_due_collectors():
+    """Test that only collectors due on a tick are collected."""
+    metrics = collect_all_metrics(DEFAULT_CONFIG.copy(), due=["cpu", "network"])
+
+    assert "cpu" in metrics
+    assert "network" in metrics
+    assert "disk" not in metrics
+    assert "top_cpu_processes" not in metrics
+    assert set(metrics["collection"]) == {"cpu", "network"}
+
+
+def test_inventory_sent_once_per_session():
+    """Test that static host data is only attached when it changed."""
+    config = DEFAULT_CONFIG.copy()
+
+    collect_all_metrics(config)
+    metrics = collect_all_metrics(config)
+
+    assert "inventory" not in metrics
+    assert "count" not in metrics["cpu"]
+    assert "addresses" not in metrics["network"]
+
+    get_inventory().version += 1
+    metrics = collect_all_metrics(config)
+
+    assert metrics["inventory"]["cpu"]["count"]["logical"] > 0
+
+
+def test_alerts_evaluated_on_agent_snapshots(tmp_path, caplog):
+    """Test that alerts_file rules run on the agent's own snapshots."""
+    config = DEFAULT_CONFIG.copy()
+    assert create_alert_engine(config) is None
+
+    rules = tmp_path / "alerts.yml"
+    rules.write_text("rules:\n  - name: cpu_seen\n    expr: cpu.overall_percent >= 0\n")
+    config["alerts_file"] = str(rules)
+    engine = create_alert_engine(config)
+
+    logger = logging.getLogger("agent")
+    with caplog.at_level(logging.WARNING, logger="agent"):
+        alerts = evaluate_alerts(engine, collect_all_metrics(config), logger)
+    assert [(alert.rule, alert.state) for alert in alerts] == [("cpu_seen", "firing")]
+    assert "Alert firing: cpu_seen" in caplog.text
@@ -0,0 +1,76 @@
+"""Unit tests for the compact snapshot model."""
+import copy
+import json
+import sys
+from array import array
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent import protobuf
+from agent.config_loader import DEFAULT_CONFIG
+from agent.formatter import format_metrics_cli, format_metrics_ndjson
+from agent.main import collect_all_metrics
+from agent.model import ArrayRecord, Record, Snapshot, as_dict
+
+
+def test_round_trip_real_snapshot():
+    metrics = collect_all_metrics(copy.deepcopy(DEFAULT_CONFIG))
+    snapshot = Snapshot.from_dict(metrics)
+
+    assert snapshot.to_dict() == metrics
+    # Same key order, so serialized output is unchanged
+    assert json.dumps(snapshot.to_dict()) == json.dumps(metrics)
+    assert format_metrics_cli(snapshot) == format_metrics_cli(metrics)
+    assert format_metrics_ndjson(snapshot) == format_metrics_ndjson(metrics)
+    # Same bytes as the dict, and the schema codec reads the records directly
+    assert protobuf.encode_snapshot(snapshot) == protobuf.encode_snapshot(metrics)
+    assert protobuf.encode_message(protobuf.ROOT, snapshot) == protobuf.encode_message(protobuf.ROOT, metrics)
+
+
+def test_sections_are_records():
+    metrics = {
+        "timestamp": "2026-01-01T00:00:00",
+        "hostname": "web-1",
+        "cpu": {"overall_percent": 12.5, "per_core_percent": [10.0, 15.0]},
+        "network": {
+            "interfaces": {"eth0": dict.fromkeys(("bytes_sent", "bytes_recv", "packets_sent", "packets_recv",
+                                                  "errin", "errout", "dropin", "dropout"), 7)},
+            "total": None,
+        },
+    }
+    snapshot = Snapshot.from_dict(metrics)
+
+    assert isinstance(snapshot.cpu, Record)
+    assert isinstance(snapshot.cpu["per_core_percent"], array)
+    eth0 = snapshot.network["interfaces"]["eth0"]
+    assert isinstance(eth0, ArrayRecord)
+    assert eth0["bytes_recv"] == 7 and "errin" in eth0
+    assert eth0.view().tolist() == [7] * 8
+    assert snapshot.network["total"] is None
+    assert "memory" not in snapshot and snapshot.get("memory") is None
+    assert list(snapshot) == ["timestamp", "hostname", "cpu", "network"]
+    assert snapshot == metrics
+
+
+def test_values_that_do_not_fit_are_kept():
+    metrics = {
+        "timestamp": "2026-01-01T00:00:00",
+        "hostname": "web-1",
+        # Mixed int/float and missing fields fall back to slot records
+        "rates": {"disk": {"total": {"read_iops": 0, "write_iops": 1.5}}},
+        "memory": {"physical": {"total": 100, "percent": None, "note": "extra key"}},
+        "custom": {"anything": [1, 2]},
+    }
+    snapshot = Snapshot.from_dict(metrics)
+    assert snapshot.to_dict() == metrics
+    assert json.dumps(snapshot.to_dict()) == json.dumps(metrics)
+    assert snapshot["custom"] == {"anything": [1, 2]}
+    assert as_dict(snapshot) == metrics and as_dict(metrics) is metrics
+
+
+def test_from_decoded_protobuf():
+    metrics = collect_all_metrics(copy.deepcopy(DEFAULT_CONFIG))
+    decoded = protobuf.decode_snapshot(protobuf.encode_snapshot(metrics))
+    assert Snapshot.from_dict(decoded).to_dict() == decoded
@@ -105,3 +105,42 @@ def test_calculate_bandwidth_none_values():
     bandwidth = network.calculate_bandwidth(None, None, 5.0)
 
     assert bandwidth == {}
+
+
+TCP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+
+
+def _tcp_line(index, state):
+    return (f"{index:4d}: 0100007F:1F90 0100007F:C350 {state} 00000000:00000000 "
+            f"00:00000000 00000000  1000        0 {index + 100} 1 0000000000000000 20 4 30 10 -1\n")
+
+
+def test_count_connection_states_from_proc(tmp_path):
+    """Test streaming state counts from /proc/net socket tables."""
+    (tmp_path / "tcp").write_text(
+        TCP_HEADER + _tcp_line(0, "0A") + _tcp_line(1, "01") + _tcp_line(2, "01") + _tcp_line(3, "06")
+    )
+    (tmp_path / "tcp6").write_text(TCP_HEADER + _tcp_line(0, "08") + _tcp_line(1, "0C"))
+    (tmp_path / "udp").write_text(TCP_HEADER + _tcp_line(0, "07"))
+    (tmp_path / "udp6").write_text(TCP_HEADER)
+
+    stats = network.count_connection_states(str(tmp_path))
+
+    assert stats["established"] == 2
+    assert stats["listen"] == 1
+    assert stats["time_wait"] == 1
+    assert stats["close_wait"] == 1
+    assert stats["udp"] == 1
+    assert stats["total"] == 7
+    assert stats["states"]["SYN_RECV"] == 1
+    assert stats["states"]["FIN_WAIT2"] == 0
+    assert len(stats["states"]) == len(network.TCP_STATE_NAMES)
+
+
+def test_count_connection_states_matches_psutil():
+    """Test that the /proc path and the psutil fallback agree on the schema."""
+    proc_stats = network.count_connection_states()
+    psutil_stats = network._count_states_psutil()
+
+    assert set(proc_stats) == set(psutil_stats)
+    assert set(proc_stats["states"]) == set(psutil_stats["states"])
@@ -0,0 +1,146 @@
+"""Unit tests for process table collector."""
+import pytest
+import sys
+import os
+import subprocess
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.collectors import process, cpu, memory
+
+
+def test_scan_processes():
+    """Test scanning the process table."""
+    table = process.scan_processes()
+
+    assert len(table) > 0
+    assert table.scan_duration >= 0
+
+    for proc in table.processes:
+        assert isinstance(proc["pid"], int)
+        assert isinstance(proc["name"], str)
+        assert isinstance(proc["cpu_percent"], (int, float))
+        assert isinstance(proc["memory_rss"], int)
+        assert isinstance(proc["memory_percent"], (int, float))
+
+
+def test_process_table_top():
+    """Test top N selection from a process table."""
+    table = process.ProcessTable([
+        {"pid": 1, "name": "a", "cpu_percent": 5.0},
+        {"pid": 2, "name": "b", "cpu_percent": 50.0},
+        {"pid": 3, "name": "c", "cpu_percent": 20.0},
+        {"pid": 4, "name": "d", "cpu_percent": 0.0},
+    ], 0.01)
+
+    top = table.top("cpu_percent", 2)
+
+    assert [p["pid"] for p in top] == [2, 3]
+
+
+def test_process_table_stats():
+    """Test scan statistics reported in the payload."""
+    table = process.ProcessTable([{"pid": 1}], 0.0125)
+
+    assert table.stats() == {"count": 1, "duration_ms": 12.5}
+
+
+def test_consumers_share_table():
+    """Test that CPU and memory top lists read from the same snapshot."""
+    table = process.ProcessTable([
+        {"pid": 10, "name": "x", "cpu_percent": 90.0, "memory_rss": 1048576, "memory_percent": 1.0},
+        {"pid": 11, "name": "y", "cpu_percent": 1.0, "memory_rss": 2097152, "memory_percent": 2.0},
+    ], 0.0)
+
+    top_cpu = cpu.get_top_cpu_processes(limit=1, table=table)
+    top_mem = memory.get_memory_by_process(limit=1, table=table)
+
+    assert top_cpu == [{"pid": 10, "name": "x", "cpu_percent": 90.0}]
+    assert top_mem[0]["pid"] == 11
+    assert top_mem[0]["memory_mb"] == 2.0
+
+
+def test_process_tracker_reuses_entries():
+    """Test that the tracker keeps static fields across scans."""
+    tracker = process.ProcessTracker()
+    first = {p["pid"]: p for p in tracker.scan().processes}
+    tracked = len(tracker)
+    second = {p["pid"]: p for p in tracker.scan().processes}
+
+    assert os.getpid() in first
+    assert os.getpid() in second
+    assert first[os.getpid()]["name"] == second[os.getpid()]["name"]
+    assert len(tracker) <= tracked + 5
+
+
+def test_process_tracker_measures_cpu_delta():
+    """Test that CPU percent of a busy process is non-zero after two scans."""
+    tracker = process.ProcessTracker()
+    tracker.scan()
+
+    deadline = time.monotonic() + 0.2
+    while time.monotonic() < deadline:
+        pass
+
+    table = tracker.scan()
+    me = next(p for p in table.processes if p["pid"] == os.getpid())
+
+    assert me["cpu_percent"] > 10
+
+
+def test_process_tracker_expires_exited_processes():
+    """Test that exited processes are removed from the registry."""
+    tracker = process.ProcessTracker()
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        tracker.scan()
+        assert child.pid in tracker._keys
+    finally:
+        child.kill()
+        child.wait()
+
+    tracker.scan()
+    assert child.pid not in tracker._keys
+
+
+class FakeProcFS:
+    """Serves /proc/<pid>/stat values for the tracker."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def process_stat(self, pid):
+        if pid not in self.stats:
+            raise FileNotFoundError(pid)
+        return self.stats[pid]
+
+
+def test_process_tracker_detects_reused_pid_from_stat(monkeypatch):
+    """Test that a reused pid is told apart by the start time read with the counters."""
+    pid = os.getpid()
+    fake = FakeProcFS({pid: (1.0, 1000, 4096)})
+    monkeypatch.setattr(process, "get_procfs", lambda backend: fake)
+    monkeypatch.setattr(process.psutil, "pids", lambda: [pid])
+    # The scan's own read identifies the process: no extra /proc reads
+    monkeypatch.setattr(process.psutil.Process, "is_running",
+                        lambda self: pytest.fail("is_running called during scan"))
+
+    tracker = process.ProcessTracker()
+    tracker.scan()
+    entry = tracker._entries[(pid, 1000)]
+    fake.stats[pid] = (2.0, 1000, 4096)
+    tracker.scan()
+    assert tracker._entries[(pid, 1000)] is entry
+
+    # Same pid, another process
+    fake.stats[pid] = (0.5, 2000, 4096)
+    tracker.scan()
+    assert list(tracker._entries) == [(pid, 2000)]
+    assert tracker._entries[(pid, 2000)] is not entry
+
+    del fake.stats[pid]
+    assert len(tracker.scan()) == 0
+    assert len(tracker) == 0
@@ -0,0 +1,175 @@
+"""Unit tests for the direct /proc collector backend."""
+import os
+import sys
+from pathlib import Path
+
+import psutil
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.collectors import cpu, disk, memory, network
+from agent.collectors.procfs import CLOCK_TICKS, PAGE_SIZE, ProcFile, ProcFS, get_procfs
+
+linux = pytest.mark.skipif(get_procfs() is None, reason="requires a readable /proc")
+
+STAT = """cpu  100 0 50 800 10 0 5 0 0 0
+cpu0 60 0 30 400 5 0 3 0 0 0
+cpu1 40 0 20 400 5 0 2 0 0 0
+intr 12345 0 0
+ctxt 999
+"""
+
+MEMINFO = """MemTotal:        1000 kB
+MemFree:          200 kB
+MemAvailable:     500 kB
+Buffers:           50 kB
+Cached:           150 kB
+Shmem:             10 kB
+SReclaimable:      20 kB
+SwapTotal:        400 kB
+SwapFree:         300 kB
+"""
+
+VMSTAT = """nr_free_pages 50
+pswpin 3
+pswpout 7
+"""
+
+DISKSTATS = """   8       0 sda 10 0 80 5 20 0 160 7 0 12 12 0 0 0 0
+   8       1 sda1 4 0 16 2 6 0 48 3 0 5 5 0 0 0 0
+ 259       0 nvme0n1 1 0 8 1 2 0 16 1 0 2 2 0 0 0 0
+"""
+
+NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:     100       1    0    0    0     0          0         0      100       1    0    0    0     0       0          0
+  eth0:    5000      40    2    1    0     0          0         0     3000      30    3    4    0     0       0          0
+"""
+
+
+@pytest.fixture
+def fake_proc(tmp_path):
+    proc = tmp_path / "proc"
+    (proc / "net").mkdir(parents=True)
+    for name, text in (("stat", STAT), ("meminfo", MEMINFO), ("vmstat", VMSTAT), ("diskstats", DISKSTATS),
+                       ("net/dev", NET_DEV), ("loadavg", "0.50 0.25 0.10 1/100 1234\n")):
+        (proc / name).write_text(text)
+    sys_block = tmp_path / "block"
+    for device in ("sda", "nvme0n1"):
+        (sys_block / device).mkdir(parents=True)
+    procfs = ProcFS(str(proc), str(sys_block))
+    yield procfs, proc
+    procfs.close()
+
+
+def test_parse(fake_proc):
+    procfs, _ = fake_proc
+    overall, per_core = procfs.cpu_times()
+    assert overall.user == 100 / CLOCK_TICKS and overall.iowait == 10 / CLOCK_TICKS
+    assert [core.idle for core in per_core] == [400 / CLOCK_TICKS] * 2
+    assert procfs.loadavg() == (0.5, 0.25, 0.1)
+
+    physical, swap = procfs.memory()
+    assert physical == {
+        "total": 1024000, "available": 512000, "used": 580 * 1024, "free": 204800,
+        "percent": 50.0, "buffers": 51200, "cached": 170 * 1024, "shared": 10240,
+    }
+    assert swap == {"total": 409600, "used": 102400, "free": 307200, "percent": 25.0, "sin": 3 * 4096, "sout": 7 * 4096}
+
+    total, per_disk = procfs.disk_io()
+    assert sorted(per_disk) == ["nvme0n1", "sda", "sda1"]
+    assert per_disk["sda"] == {
+        "read_count": 10, "write_count": 20, "read_bytes": 80 * 512, "write_bytes": 160 * 512,
+        "read_time": 5, "write_time": 7,
+    }
+    # Partitions are not added to the totals
+    assert total["read_count"] == 11 and total["write_bytes"] == 176 * 512
+
+    interfaces, net_total = procfs.net_io()
+    assert interfaces["eth0"] == {
+        "bytes_sent": 3000, "bytes_recv": 5000, "packets_sent": 30, "packets_recv": 40,
+        "errin": 2, "errout": 3, "dropin": 1, "dropout": 4,
+    }
+    assert net_total["bytes_recv"] == 5100
+
+
+def test_process_stat(fake_proc):
+    procfs, proc = fake_proc
+    (proc / "42").mkdir()
+    # A command name with spaces and parentheses
+    (proc / "42" / "stat").write_text(
+        "42 (a) (b c) S 1 42 42 0 -1 4194560 100 0 0 0 "
+        "300 200 0 0 20 0 1 0 9876 1000000 25 18446744073709551615\n"
+    )
+    assert procfs.process_stat(42) == (500 / CLOCK_TICKS, 9876, 25 * PAGE_SIZE)
+    with pytest.raises(OSError):
+        procfs.process_stat(43)
+
+
+@linux
+def test_process_stat_matches_psutil():
+    procfs = get_procfs()
+    cpu_time, _, rss = procfs.process_stat(os.getpid())
+    times = psutil.Process().cpu_times()
+    assert cpu_time == pytest.approx(times.user + times.system, abs=0.1)
+    assert rss == pytest.approx(psutil.Process().memory_info().rss, rel=0.1)
+
+
+def test_rereads_open_file(fake_proc):
+    procfs, proc = fake_proc
+    (proc / "loadavg").write_text("1.00 2.00 3.00 1/100 1234\n")
+    assert procfs.loadavg() == (1.0, 2.0, 3.0)
+
+
+def test_buffer_grows(tmp_path):
+    path = tmp_path / "big"
+    path.write_bytes(b"x" * 10000)
+    file = ProcFile(str(path), size=64)
+    try:
+        assert file.read() == b"x" * 10000
+        assert file.read() == b"x" * 10000
+    finally:
+        file.close()
+
+
+def test_missing_file_is_reported(tmp_path):
+    with pytest.raises(OSError):
+        ProcFS(str(tmp_path))
+
+
+def test_psutil_backend():
+    assert get_procfs('psutil') is None
+
+
+@linux
+def test_matches_psutil():
+    procfs = get_procfs()
+
+    physical, _ = procfs.memory()
+    assert physical["total"] == psutil.virtual_memory().total
+
+    overall, per_core = procfs.cpu_times()
+    assert len(per_core) == len(psutil.cpu_times(percpu=True))
+    assert overall.user == pytest.approx(psutil.cpu_times().user, abs=5)
+
+    _, per_disk = procfs.disk_io()
+    assert set(per_disk) == set(psutil.disk_io_counters(perdisk=True))
+
+    interfaces, _ = procfs.net_io()
+    assert set(interfaces) == set(psutil.net_io_counters(pernic=True))
+
+
+@linux
+def test_collectors_same_schema_on_both_backends():
+    def shape(value):
+        if isinstance(value, dict):
+            return {key: shape(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [shape(item) for item in value[:1]]
+        return type(value).__name__
+
+    for collect in (cpu.collect_cpu_metrics, memory.collect_memory_metrics, disk.collect_disk_metrics,
+                    network.collect_network_metrics):
+        assert shape(collect(backend='procfs')) == shape(collect(backend='psutil')), collect.__name__
@@ -0,0 +1,188 @@
+"""Unit tests for protobuf snapshot codec."""
+import pytest
+import importlib
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent import protobuf
+
+PROTO_DIR = Path(__file__).parent.parent.parent / "proto"
+
+
+def sample_snapshot():
+    return {
+        "timestamp": "2024-01-01T00:00:00",
+        "hostname": "web-1",
+        "cpu": {
+            "overall_percent": 12.5,
+            "per_core_percent": [10.0, 15.0],
+            "times": {"user": 100.5, "system": 50.25, "idle": 1000.0, "iowait": None},
+            "times_percent": {"user": 8.0, "system": 4.5, "idle": 87.5, "iowait": 0.0},
+            "load_average": {"1min": 0.5, "5min": 0.25, "15min": 0.0},
+            "frequency": {"current": 2400.0},
+        },
+        "memory": {
+            "physical": {"total": 16 * 2**30, "available": 8 * 2**30, "used": 7 * 2**30,
+                         "free": 2**30, "percent": 50.0, "buffers": 1024, "cached": 2048, "shared": None},
+            "swap": {"total": 0, "used": 0, "free": 0, "percent": 0.0, "sin": 0, "sout": 0},
+        },
+        "network": {
+            "interfaces": {"eth0": {"bytes_sent": 10, "bytes_recv": 20, "packets_sent": 1, "packets_recv": 2,
+                                    "errin": 0, "errout": 0, "dropin": 0, "dropout": 0}},
+            "total": None,
+            "connections": {"established": 3, "time_wait": 1, "close_wait": 0, "listen": 2,
+                            "total": 6, "udp": 1, "states": {"ESTABLISHED": 3, "LISTEN": 2}},
+        },
+        "top_cpu_processes": [{"pid": 1, "name": "init", "cpu_percent": 0.5}],
+        "rates": {"swap": {"sin_bytes_per_sec": 0.0, "sout_bytes_per_sec": 4096.0}},
+        "collection": {"cpu": {"status": "ok", "duration_ms": 0.8}},
+        "agent": {
+            "cpu_seconds": {"user": 1.5, "system": 0.25},
+            "cpu_percent": 0.4,
+            "rss_bytes": 30 * 2**20,
+            "threads": 6,
+            "gc": {"collections": [120, 10, 1], "collected": 50, "uncollectable": 0, "pause_ms": 3.5},
+            "bucket_bounds_ms": [1.0, 10.0],
+            "functions": {"collect_cpu_metrics": {"count": 3, "sum_ms": 4.5, "max_ms": 2.0, "buckets": [1, 2, 0]}},
+        },
+    }
+
+
+def test_round_trip():
+    """Test that decoding restores the snapshot dictionary."""
+    snapshot = sample_snapshot()
+
+    assert protobuf.decode_snapshot(protobuf.encode_snapshot(snapshot)) == snapshot
+
+
+def test_schema_codec_fallback(monkeypatch):
+    """Test the schema-driven codec used without the generated classes."""
+    data = protobuf.encode_snapshot(sample_snapshot())
+    monkeypatch.setattr(protobuf, "metrics_pb2", None)
+
+    assert protobuf.decode_snapshot(data) == sample_snapshot()
+    assert protobuf.decode_snapshot(protobuf.encode_snapshot(sample_snapshot())) == sample_snapshot()
+
+
+def test_unknown_keys_are_not_encoded():
+    """Test that keys missing from the schema are left out."""
+    snapshot = sample_snapshot()
+    snapshot["cpu"]["note"] = "not in the schema"
+    snapshot["custom"] = {"anything": [1, 2]}
+
+    assert protobuf.decode_snapshot(protobuf.encode_snapshot(snapshot)) == sample_snapshot()
+
+
+def test_negative_unsigned_value_names_the_field():
+    """Test that a value out of an unsigned field's range fails clearly."""
+    snapshot = sample_snapshot()
+    snapshot["memory"]["physical"]["free"] = -4096
+
+    with pytest.raises(protobuf.EncodeError, match=r"^memory\.physical\.free: -4096 out of uint64 range$"):
+        protobuf.encode_snapshot(snapshot)
+
+
+def test_absent_fields_decode_to_defaults():
+    """Test None/zero handling of fields missing from the wire."""
+    decoded = protobuf.decode_snapshot(protobuf.encode_snapshot({
+        "hostname": "",
+        "cpu": {"overall_percent": None, "per_core_percent": []},
+        "memory": {"physical": {"total": 0, "percent": 0.0}},
+    }))
+
+    assert "disk" not in decoded and "count" not in decoded["cpu"]
+    assert decoded["cpu"]["overall_percent"] is None
+    assert decoded["cpu"]["per_core_percent"] == []
+    assert decoded["cpu"]["load_average"] is None
+    assert decoded["memory"]["physical"]["total"] == 0
+    assert decoded["memory"]["physical"]["buffers"] is None
+    assert decoded["memory"]["swap"] is None
+
+
+def test_smaller_than_json():
+    """Test that protobuf payloads are smaller than compact JSON."""
+    from agent.transport import serialize_snapshot
+
+    snapshot = sample_snapshot()
+
+    assert len(protobuf.encode_snapshot(snapshot)) < len(serialize_snapshot(snapshot)) / 2
+
+
+def test_framing():
+    """Test length-delimited batch framing."""
+    payloads = [b"", b"a", b"x" * 300]
+
+    assert [bytes(m) for m in protobuf.unframe(protobuf.frame(payloads))] == payloads
+
+
+def test_skips_unknown_fields():
+    """Test that fields added by newer schemas are ignored."""
+    data = protobuf.encode_snapshot({"hostname": "web-1"})
+    # field 99: varint 7, field 98: length-delimited "xy"
+    data += bytes([0x98, 0x06, 0x07, 0x92, 0x06, 0x02]) + b"xy"
+
+    assert protobuf.decode_snapshot(data)["hostname"] == "web-1"
+
+
+def test_schema_matches_proto_file():
+    """Test that every schema field is declared in metrics.proto with its number."""
+    source = (PROTO_DIR / "metrics.proto").read_text()
+
+    for message, fields in protobuf.SCHEMA.items():
+        assert f"message {message} {{" in source
+        for field in fields:
+            assert f" {field.name or field.key} = {field.number};" in source
+
+
+def test_compatible_with_protoc(tmp_path, monkeypatch):
+    """Test interoperability with classes generated by protoc."""
+    grpc_tools = pytest.importorskip("grpc_tools.protoc")
+    pytest.importorskip("google.protobuf")
+
+    result = grpc_tools.main([
+        "protoc", f"-I{PROTO_DIR}", f"--python_out={tmp_path}", str(PROTO_DIR / "metrics.proto"),
+    ])
+    assert result == 0
+    monkeypatch.syspath_prepend(str(tmp_path))
+    metrics_pb2 = importlib.import_module("metrics_pb2")
+
+    message = metrics_pb2.Snapshot()
+    message.ParseFromString(protobuf.encode_snapshot(sample_snapshot()))
+    assert message.hostname == "web-1"
+    assert list(message.cpu.per_core_percent) == [10.0, 15.0]
+    assert message.cpu.load_average.one_min == 0.5
+    assert not message.cpu.times.HasField("iowait")
+    assert message.memory.physical.total == 16 * 2**30
+    assert message.network.connections.states["LISTEN"] == 2
+    assert message.collection["cpu"].status == "ok"
+
+    decoded = protobuf.decode_snapshot(message.SerializeToString())
+    assert decoded == sample_snapshot()
+
+
+def test_generated_classes_match_proto_file(tmp_path):
+    """Test that src/agent/metrics_pb2.py was regenerated after metrics.proto changed."""
+    grpc_tools = pytest.importorskip("grpc_tools.protoc")
+    if protobuf.metrics_pb2 is None:
+        pytest.skip("requires the upb protobuf runtime")
+    from google.protobuf import descriptor_pb2
+
+    descriptor_set = tmp_path / "metrics.desc"
+    result = grpc_tools.main([
+        "protoc", f"-I{PROTO_DIR}", f"--descriptor_set_out={descriptor_set}", str(PROTO_DIR / "metrics.proto"),
+    ])
+    assert result == 0
+    generated = descriptor_pb2.FileDescriptorSet.FromString(descriptor_set.read_bytes()).file[0]
+
+    # Generated code leaves out the JSON names protoc adds to descriptor sets
+    def strip_json_names(messages):
+        for message in messages:
+            for field in message.field:
+                field.ClearField("json_name")
+            strip_json_names(message.nested_type)
+
+    strip_json_names(generated.message_type)
+    assert descriptor_pb2.FileDescriptorProto.FromString(protobuf.metrics_pb2.DESCRIPTOR.serialized_pb) == generated
@@ -0,0 +1,102 @@
+"""Unit tests for rate computation."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.rates import counter_delta, RateTracker, RateStage
+
+
+def test_counter_delta():
+    """Test plain counter increase."""
+    assert counter_delta(100, 150) == 50
+    assert counter_delta(100, 100) == 0
+
+
+def test_counter_delta_wraparound():
+    """Test 32-bit and 64-bit counter wraparound."""
+    assert counter_delta(2 ** 32 - 10, 5) == 15
+    assert counter_delta(2 ** 64 - 1, 0) == 1
+
+
+def test_counter_delta_reset():
+    """Test that a counter going back to a small value is a reset."""
+    assert counter_delta(1000, 10) is None
+    assert counter_delta(2 ** 40, 10) is None
+
+
+def test_rate_tracker():
+    """Test rates from successive readings."""
+    tracker = RateTracker()
+
+    assert tracker.update("eth0", (1000, 0), now=10.0) is None
+    assert tracker.update("eth0", (1500, 100), now=15.0) == (100.0, 20.0)
+
+
+def test_rate_tracker_reset_rebaselines():
+    """Test that a reset skips one sample and then continues."""
+    tracker = RateTracker()
+    tracker.update("sda", (1000,), now=0.0)
+
+    assert tracker.update("sda", (10,), now=1.0) is None
+    assert tracker.update("sda", (20,), now=2.0) == (10.0,)
+
+
+def test_rate_tracker_zero_interval():
+    """Test that no rate is produced without elapsed time."""
+    tracker = RateTracker()
+    tracker.update("sda", (1,), now=1.0)
+
+    assert tracker.update("sda", (2,), now=1.0) is None
+
+
+def _snapshot(read_count, bytes_sent, sin):
+    io = {"read_count": read_count, "write_count": 0, "read_bytes": read_count * 4096, "write_bytes": 0}
+    net = {"bytes_sent": bytes_sent, "bytes_recv": 0, "packets_sent": 0, "packets_recv": 0,
+           "errin": 0, "errout": 0, "dropin": 0, "dropout": 0}
+    return {
+        "disk": {"io_stats": io, "per_disk_io": {"sda": io}},
+        "network": {"total": net, "interfaces": {"eth0": net}},
+        "memory": {"swap": {"sin": sin, "sout": 0}},
+    }
+
+
+def test_rate_stage():
+    """Test rates computed for disk, network and swap sections."""
+    stage = RateStage()
+
+    assert stage.process(_snapshot(100, 1000, 0), now=0.0) == {}
+    rates = stage.process(_snapshot(200, 126000, 8192), now=2.0)
+
+    assert rates["disk"]["total"]["read_iops"] == 50.0
+    assert rates["disk"]["total"]["read_bytes_per_sec"] == 50.0 * 4096
+    assert rates["disk"]["per_disk"]["sda"]["read_iops"] == 50.0
+    assert rates["network"]["total"]["bytes_sent_per_sec"] == 62500.0
+    assert rates["network"]["interfaces"]["eth0"]["mbps_sent"] == pytest.approx(0.5)
+    assert rates["swap"]["sin_bytes_per_sec"] == 4096.0
+
+
+def test_rate_stage_uses_section_read_times():
+    """Test that each section's interval runs between its own readings."""
+    stage = RateStage()
+    stage.process(_snapshot(100, 1000, 0), now=1.0, read_at={"disk": 0.0})
+    # The cycle ended 3 s after the disk counters were read on both ticks
+    rates = stage.process(_snapshot(200, 126000, 8192), now=5.0, read_at={"disk": 2.0, "network": 3.0})
+
+    assert rates["disk"]["total"]["read_iops"] == 50.0
+    assert rates["network"]["total"]["bytes_sent_per_sec"] == 62500.0
+    assert rates["swap"]["sin_bytes_per_sec"] == 2048.0
+
+
+def test_rate_stage_forgets_removed_devices():
+    """Test that state of removed devices is dropped."""
+    stage = RateStage()
+    stage.process(_snapshot(100, 1000, 0), now=0.0)
+
+    snapshot = _snapshot(200, 2000, 0)
+    snapshot["disk"]["per_disk_io"] = {}
+    stage.process(snapshot, now=1.0)
+
+    assert ("disk_per_disk", "sda") not in stage._tracker._previous
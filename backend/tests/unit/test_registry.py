@@ -0,0 +1,141 @@
+"""Unit tests for the collector registry."""
+import copy
+import sys
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent import main, protobuf
+from agent.collectors import registry
+from agent.collectors.registry import BUILTIN, CollectorRegistry, CollectorSpec, EXPENSIVE
+from agent.config_loader import DEFAULT_CONFIG, collector_intervals, validate_config
+from agent.main import collect_all_metrics
+
+
+def test_builtin_task_binds_config_options():
+    collectors = CollectorRegistry()
+    assert collectors.names()[:5] == ["cpu", "memory", "disk", "network", "processes"]
+
+    task = collectors.task("disk", {"collector_backend": "psutil"})
+    assert isinstance(task, partial)
+    assert task.func.__name__ == "collect_disk_metrics"
+    assert task.keywords == {"backend": "psutil"}
+
+    task = collectors.task("cpu", {})
+    assert task.keywords == {"include_static": False}
+
+
+def test_target_imported_on_first_task(tmp_path, monkeypatch):
+    (tmp_path / "lazy_collector_mod.py").write_text("def collect(scale=1):\n    return {'value': scale}\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    spec = CollectorSpec("lazy", "lazy_collector_mod:collect", "lazy", options={"scale": "lazy_scale"})
+    collectors = CollectorRegistry([spec])
+
+    assert "lazy" in collectors
+    assert "lazy_collector_mod" not in sys.modules
+    assert collectors.task("lazy", {"lazy_scale": 3})() == {"value": 3}
+    assert "lazy_collector_mod" in sys.modules
+
+
+def test_entry_point_collectors(monkeypatch):
+    spec = CollectorSpec("extra", "os:getpid", "extra", cost=EXPENSIVE, interval=30)
+
+    class Point:
+        name = "extra"
+        loaded = False
+
+        def load(self):
+            Point.loaded = True
+            return spec
+
+    monkeypatch.setattr(registry, "_entry_points", lambda: [Point()])
+    collectors = CollectorRegistry()
+
+    # Listed without being loaded
+    assert "extra" in collectors.names()
+    assert not Point.loaded
+    assert collectors.spec("extra") is spec
+    assert Point.loaded and spec in collectors.specs()
+
+
+def test_entry_point_must_name_a_spec(monkeypatch):
+    class Point:
+        name = "broken"
+
+        def load(self):
+            return object()
+
+    monkeypatch.setattr(registry, "_entry_points", lambda: [Point()])
+    with pytest.raises(KeyError):
+        CollectorRegistry().spec("broken")
+
+
+def test_unknown_cost_rejected():
+    with pytest.raises(ValueError, match="cost must be one of"):
+        CollectorRegistry([CollectorSpec("x", "os:getpid", "x", cost="huge")])
+
+
+def test_intervals_from_registry(monkeypatch):
+    collectors = CollectorRegistry(BUILTIN + (CollectorSpec("slow", "os:getpid", "slow", interval=60),))
+    monkeypatch.setattr(registry, "_registry", collectors)
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["collectors"] = {"disk": True, "slow": True}
+    # The process table scan is dropped: nothing that needs it is enabled
+    assert collector_intervals(config) == {"disk": config["interval"], "slow": 60}
+
+    config["collectors"] = {"slow": {"interval": 10}, "cpu": True}
+    assert collector_intervals(config) == {"processes": config["interval"], "slow": 10, "cpu": config["interval"]}
+
+
+def test_unknown_collector_rejected(monkeypatch):
+    monkeypatch.setattr(registry, "_entry_points", lambda: [])
+    monkeypatch.setattr(registry, "_registry", CollectorRegistry())
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["collectors"]["gpu"] = True
+    with pytest.raises(ValueError, match="collectors.gpu is not a known collector"):
+        validate_config(config)
+
+
+def test_registered_collector_in_snapshot(tmp_path, monkeypatch):
+    (tmp_path / "extra_collector_mod.py").write_text("def collect():\n    return {'answer': 42}\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    collectors = CollectorRegistry(BUILTIN + (CollectorSpec("extra", "extra_collector_mod:collect", "extra"),))
+    monkeypatch.setattr(registry, "_registry", collectors)
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["collectors"] = {"extra": True}
+    metrics = collect_all_metrics(config)
+    assert metrics["extra"] == {"answer": 42}
+    assert "cpu" not in metrics
+
+
+def test_rates_timed_at_counter_read_not_cycle_end(tmp_path, monkeypatch):
+    (tmp_path / "slow_collector_mod.py").write_text(
+        "import time\ndef collect():\n    time.sleep(0.3)\n    return {}\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    collectors = CollectorRegistry(BUILTIN + (CollectorSpec("slow", "slow_collector_mod:collect", "slow"),))
+    monkeypatch.setattr(registry, "_registry", collectors)
+    calls = []
+    monkeypatch.setattr(main._rate_stage, "process", lambda metrics, now, read_at: calls.append((now, read_at)) or {})
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["collectors"] = {"disk": True, "network": True, "slow": True}
+    collect_all_metrics(config)
+
+    now, read_at = calls[0]
+    assert set(read_at) == {"disk", "network"}
+    # The cycle waited for the slow collector; the counters were read before
+    assert now - max(read_at.values()) > 0.2
+
+
+def test_snapshot_fields_follow_registry():
+    numbers = [field.number for field in protobuf.SCHEMA["Snapshot"]]
+    assert len(numbers) == len(set(numbers))
+    keys = {field.key for field in protobuf.SCHEMA["Snapshot"]}
+    assert {spec.section for spec in BUILTIN if spec.schema} <= keys
@@ -0,0 +1,106 @@
+"""Unit tests for concurrent collector runner."""
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.runner import CollectorRunner
+
+
+def test_run_collects_results():
+    """Test that results and status are returned for every collector."""
+    runner = CollectorRunner(max_workers=2)
+    results, status = runner.run({"a": lambda: 1, "b": lambda: "two"}, timeout=1)
+
+    assert results == {"a": 1, "b": "two"}
+    assert status["a"]["status"] == "ok"
+    assert status["b"]["status"] == "ok"
+    assert status["a"]["duration_ms"] >= 0
+
+
+def test_run_in_parallel():
+    """Test that collectors run concurrently."""
+    runner = CollectorRunner(max_workers=4)
+    tasks = {name: (lambda: time.sleep(0.2)) for name in "abcd"}
+
+    start = time.monotonic()
+    results, status = runner.run(tasks, timeout=2)
+    elapsed = time.monotonic() - start
+
+    assert len(results) == 4
+    assert elapsed < 0.6
+
+
+def test_run_timeout_marks_partial_result():
+    """Test that a slow collector is reported as timed out without blocking."""
+    runner = CollectorRunner(max_workers=2)
+    release = threading.Event()
+
+    start = time.monotonic()
+    results, status = runner.run({"slow": release.wait, "fast": lambda: 1}, timeout=0.1)
+    elapsed = time.monotonic() - start
+    release.set()
+
+    assert results == {"fast": 1}
+    assert status["slow"]["status"] == "timeout"
+    assert status["slow"]["duration_ms"] >= 100
+    assert elapsed < 0.5
+
+
+def test_run_per_collector_timeout():
+    """Test per-collector deadline overrides."""
+    runner = CollectorRunner(max_workers=2)
+    results, status = runner.run(
+        {"slow": lambda: time.sleep(0.2), "other": lambda: 1},
+        timeout=1,
+        timeouts={"slow": 0.05},
+    )
+
+    assert status["slow"]["status"] == "timeout"
+    assert status["other"]["status"] == "ok"
+
+
+def test_hung_collector_is_not_resubmitted():
+    """Test that a collector still running is skipped in the next cycle."""
+    runner = CollectorRunner(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def hung():
+        calls.append(1)
+        release.wait()
+
+    runner.run({"hung": hung}, timeout=0.05)
+    results, status = runner.run({"hung": hung}, timeout=0.05)
+    release.set()
+
+    assert len(calls) == 1
+    assert status["hung"]["status"] == "timeout"
+
+
+def test_run_error():
+    """Test that a failing collector is reported as an error."""
+    def broken():
+        raise RuntimeError("boom")
+
+    runner = CollectorRunner(max_workers=1)
+    results, status = runner.run({"broken": broken}, timeout=1)
+
+    assert results == {}
+    assert status["broken"]["status"] == "error"
+
+
+def test_timeout_raised_by_collector_is_an_error():
+    """Test that a collector's own TimeoutError is not taken for a missed deadline."""
+    def times_out():
+        raise TimeoutError("socket timed out")
+
+    runner = CollectorRunner(max_workers=1)
+    results, status = runner.run({"net": times_out}, timeout=1)
+
+    assert status["net"]["status"] == "error"
+    assert status["net"]["duration_ms"] < 1000
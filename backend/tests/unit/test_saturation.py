@@ -0,0 +1,138 @@
+"""Unit tests for the saturation (PSI / vmstat) collector."""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent import protobuf
+from agent.collectors.procfs import FILES, ProcFS, get_procfs
+from agent.collectors.saturation import collect_saturation_metrics
+from agent.exporter import render_openmetrics
+from agent.formatter import format_metrics_cli
+from agent.rates import RateStage
+
+VMSTAT = """nr_free_pages 50
+pswpin {swap}
+pswpout 7
+allocstall_dma 0
+allocstall_normal {stalls}
+allocstall_movable 1
+pgmajfault {faults}
+oom_kill 0
+"""
+
+CPU_PRESSURE = "some avg10=1.50 avg60=0.75 avg300=0.25 total={total}\n"
+IO_PRESSURE = ("some avg10=10.00 avg60=5.00 avg300=1.00 total={total}\n"
+               "full avg10=8.00 avg60=4.00 avg300=0.50 total=1000\n")
+
+
+def write_proc(proc, faults=10, stalls=2, swap=3, cpu_total=500, io_total=2000, pressure=True):
+    (proc / "net").mkdir(parents=True, exist_ok=True)
+    for name in FILES:
+        if not (proc / name).exists():
+            (proc / name).write_text("")
+    (proc / "vmstat").write_text(VMSTAT.format(faults=faults, stalls=stalls, swap=swap))
+    if pressure:
+        (proc / "pressure").mkdir(exist_ok=True)
+        (proc / "pressure" / "cpu").write_text(CPU_PRESSURE.format(total=cpu_total))
+        (proc / "pressure" / "io").write_text(IO_PRESSURE.format(total=io_total))
+
+
+@pytest.fixture
+def proc(tmp_path):
+    proc = tmp_path / "proc"
+    write_proc(proc)
+    return proc
+
+
+def test_pressure_and_vm_events(proc):
+    procfs = ProcFS(str(proc))
+
+    pressure = procfs.pressure()
+    assert pressure["cpu"] == {"some": {"avg10": 1.5, "avg60": 0.75, "avg300": 0.25, "total": 500}, "full": None}
+    assert pressure["io"]["full"]["total"] == 1000
+    # No memory pressure file: reported as unavailable
+    assert pressure["memory"] is None
+
+    # Per-zone allocstall lines are summed
+    assert procfs.vm_events() == {"pgmajfault": 10, "pswpin": 3, "pswpout": 7, "allocstall": 3, "oom_kill": 0}
+
+    # Files are kept open and read again
+    write_proc(proc, faults=25, cpu_total=900)
+    assert procfs.pressure()["cpu"]["some"]["total"] == 900
+    assert procfs.vm_events()["pgmajfault"] == 25
+    procfs.close()
+
+
+def test_without_psi(tmp_path):
+    proc = tmp_path / "proc"
+    write_proc(proc, pressure=False)
+    procfs = ProcFS(str(proc))
+    assert procfs.pressure() == {"cpu": None, "memory": None, "io": None}
+
+    # Missing files are not looked up again
+    write_proc(proc)
+    assert procfs.pressure()["cpu"] is None
+    procfs.close()
+
+
+def test_saturation_rates(proc):
+    procfs = ProcFS(str(proc))
+    stage = RateStage()
+
+    first = {"saturation": dict(procfs.pressure(), vmstat=procfs.vm_events())}
+    assert stage.process(first, now=0.0) == {}
+
+    write_proc(proc, faults=30, stalls=6, cpu_total=200_500, io_total=502_000)
+    second = {"saturation": dict(procfs.pressure(), vmstat=procfs.vm_events())}
+    rates = stage.process(second, now=2.0)["saturation"]
+
+    # 200 ms of CPU stall over 2 s
+    assert rates["cpu_some_percent"] == 10.0
+    assert rates["io_some_percent"] == 25.0
+    # No CPU "full" line and no memory pressure file: unknown, not 0%
+    assert rates["cpu_full_percent"] is None
+    assert rates["memory_some_percent"] is None
+    assert rates["pgmajfault_per_sec"] == 10.0
+    assert rates["allocstall_per_sec"] == 2.0
+    procfs.close()
+
+
+def test_saturation_rates_without_psi(tmp_path):
+    proc = tmp_path / "proc"
+    write_proc(proc, pressure=False)
+    procfs = ProcFS(str(proc))
+    stage = RateStage()
+
+    stage.process({"saturation": dict(procfs.pressure(), vmstat=procfs.vm_events())}, now=0.0)
+    write_proc(proc, faults=30, pressure=False)
+    metrics = {"timestamp": "2026-01-01T00:00:00", "hostname": "host",
+               "saturation": dict(procfs.pressure(), vmstat=procfs.vm_events())}
+    metrics["rates"] = stage.process(metrics, now=2.0)
+    rates = metrics["rates"]["saturation"]
+
+    assert all(rates[f"{field}_percent"] is None
+               for field in ("cpu_some", "cpu_full", "memory_some", "memory_full", "io_some", "io_full"))
+    assert rates["pgmajfault_per_sec"] == 10.0
+    assert protobuf.decode_snapshot(protobuf.encode_snapshot(metrics)) == metrics
+    assert "Stalled: CPU n/a, memory n/a (n/a full), I/O n/a (n/a full)" in format_metrics_cli(metrics)
+    procfs.close()
+
+
+def test_exported_as_counters(proc):
+    procfs = ProcFS(str(proc))
+    page = render_openmetrics({"saturation": dict(procfs.pressure(), vmstat=procfs.vm_events())}).decode()
+    assert 'system_pressure_stall_seconds_total{resource="cpu",kind="some"} 0.0005' in page
+    assert 'system_vm_events_total{event="pgmajfault"} 10' in page
+    procfs.close()
+
+
+@pytest.mark.skipif(get_procfs() is None, reason="requires a readable /proc")
+def test_collect_round_trip():
+    metrics = collect_saturation_metrics()
+    assert set(metrics) == {"cpu", "memory", "io", "vmstat"}
+    snapshot = {"timestamp": "2026-01-01T00:00:00", "hostname": "host", "saturation": metrics}
+    assert protobuf.decode_snapshot(protobuf.encode_snapshot(snapshot)) == snapshot
@@ -0,0 +1,119 @@
+"""Unit tests for fixed-rate scheduler."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.scheduler import FixedRateScheduler, CollectorSchedule
+
+
+class FakeClock:
+    """Monotonic clock advanced by sleep() and by simulated work."""
+
+    def __init__(self, start=100.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_scheduler(interval, wall=1000.0):
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(
+        interval,
+        clock=clock,
+        wall_clock=lambda: wall,
+        sleep=clock.sleep,
+    )
+    return scheduler, clock
+
+
+def test_ticks_are_aligned_and_evenly_spaced():
+    """Test that work time does not add to the period."""
+    scheduler, clock = make_scheduler(5, wall=1002.0)
+
+    ticks = []
+    for _ in range(4):
+        ticks.append(scheduler.wait())
+        clock.now += 1.3  # collection + formatting time
+
+    assert ticks == [1005.0, 1010.0, 1015.0, 1020.0]
+    assert scheduler.overruns == 0
+    assert scheduler.stats()["jitter_max_ms"] == 0.0
+
+
+def test_overrun_skips_missed_ticks():
+    """Test that a long cycle skips ticks instead of bursting."""
+    scheduler, clock = make_scheduler(1)
+
+    assert scheduler.wait() == 1000.0
+    clock.now += 2.5  # cycle overruns two boundaries
+    assert scheduler.wait() == 1003.0
+    clock.now += 0.1
+    assert scheduler.wait() == 1004.0
+
+    stats = scheduler.stats()
+    assert stats["ticks"] == 3
+    assert stats["overruns"] == 1
+    assert stats["skipped_ticks"] == 2
+
+
+def test_jitter_is_recorded():
+    """Test that late wake-ups are exported as jitter."""
+    clock = FakeClock()
+
+    def late_sleep(seconds):
+        clock.now += seconds + 0.004
+
+    scheduler = FixedRateScheduler(1, clock=clock, wall_clock=lambda: 1000.5, sleep=late_sleep)
+    scheduler.wait()
+    scheduler.wait()
+
+    stats = scheduler.stats()
+    assert stats["jitter_last_ms"] == pytest.approx(4.0)
+    assert stats["jitter_max_ms"] == pytest.approx(4.0)
+
+
+def test_invalid_interval():
+    """Test that a non-positive interval is rejected."""
+    with pytest.raises(ValueError, match="interval must be greater than 0"):
+        FixedRateScheduler(0)
+
+
+def test_collector_schedule_base_interval():
+    """Test that the base tick divides every collector interval."""
+    schedule = CollectorSchedule({"cpu": 1, "network": 5, "disk": 60})
+    assert schedule.base_interval == 1
+
+    schedule = CollectorSchedule({"memory": 10, "network": 15})
+    assert schedule.base_interval == 5
+
+    schedule = CollectorSchedule({"cpu": 0.5, "disk": 2})
+    assert schedule.base_interval == 0.5
+
+
+def test_collector_schedule_due():
+    """Test that collectors run on their own interval boundaries."""
+    schedule = CollectorSchedule({"cpu": 1, "network": 5, "disk": 60})
+
+    # First tick runs everything
+    assert schedule.due(1000.0) == ["cpu", "network", "disk"]
+    assert schedule.due(1001.0) == ["cpu"]
+    assert schedule.due(1004.0) == ["cpu"]
+    assert schedule.due(1005.0) == ["cpu", "network"]
+    assert schedule.due(1020.0) == ["cpu", "network", "disk"]
+
+
+def test_collector_schedule_skipped_ticks():
+    """Test that a collector runs once after several missed boundaries."""
+    schedule = CollectorSchedule({"network": 5})
+
+    assert schedule.due(1000.0) == ["network"]
+    assert schedule.due(1017.0) == ["network"]
+    assert schedule.due(1019.0) == []
+    assert schedule.due(1020.0) == ["network"]
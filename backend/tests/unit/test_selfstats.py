@@ -0,0 +1,84 @@
+"""Unit tests for agent self-instrumentation."""
+import gc
+import sys
+import threading
+from functools import partial
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.selfstats import LatencyHistogram, SelfMonitor
+
+
+def test_histogram_buckets():
+    """Test that durations land in the first bucket whose bound they do not exceed."""
+    histogram = LatencyHistogram(bounds=(1.0, 10.0))
+    for ms in (0.5, 1.0, 5.0, 50.0):
+        histogram.observe(ms)
+
+    assert histogram.as_dict() == {"count": 4, "sum_ms": 56.5, "max_ms": 50.0, "buckets": [2, 1, 1]}
+
+
+def test_timed_records_by_function_name():
+    """Test that wrapped functions, partials and failing calls are recorded."""
+    monitor = SelfMonitor(bounds=(1.0,))
+    try:
+        def collect_thing(value):
+            return value * 2
+
+        def broken():
+            raise RuntimeError("boom")
+
+        assert monitor.timed(collect_thing)(2) == 4
+        assert monitor.timed(partial(collect_thing, 3))() == 6
+        assert monitor.call(collect_thing, 1) == 2
+        try:
+            monitor.timed(broken)()
+        except RuntimeError:
+            pass
+
+        functions = monitor.stats()["functions"]
+        assert functions["collect_thing"]["count"] == 3
+        assert functions["broken"]["count"] == 1
+    finally:
+        monitor.close()
+
+
+def test_observe_from_threads():
+    """Test that concurrent observations are all counted."""
+    monitor = SelfMonitor()
+    try:
+        threads = [
+            threading.Thread(target=lambda: [monitor.observe("collect", 0.001) for _ in range(1000)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert monitor.stats()["functions"]["collect"]["count"] == 4000
+    finally:
+        monitor.close()
+
+
+def test_stats_section():
+    """Test process CPU, memory and GC figures of the agent section."""
+    monitor = SelfMonitor()
+    try:
+        first = monitor.stats(now=100.0)
+        assert "cpu_percent" not in first
+        assert first["rss_bytes"] > 0
+        assert first["threads"] >= 1
+        assert len(first["gc"]["collections"]) == 3
+        assert first["bucket_bounds_ms"] == sorted(first["bucket_bounds_ms"])
+
+        gc.collect()
+        second = monitor.stats(now=101.0)
+        assert second["cpu_percent"] >= 0
+        assert second["gc"]["collections"][2] > first["gc"]["collections"][2]
+        assert second["gc"]["pause_ms"] > first["gc"]["pause_ms"]
+    finally:
+        monitor.close()
+    assert monitor._on_gc not in gc.callbacks
@@ -0,0 +1,372 @@
+"""Unit tests for the ingest server."""
+import asyncio
+import gzip
+import http.client
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent import protobuf
+from agent.delta import DeltaEncoder
+from alerts.engine import build_rules
+from server.app import IngestServer
+from server.ingest import PayloadDecoder, PayloadError, PayloadTooLarge, decompress
+from server.storage import SQLiteBackend, StorageBackend, create_backend
+
+
+def snapshot(host="web-1", second=0, cpu=10.0):
+    return {
+        "timestamp": f"2026-01-01T00:00:{second:02d}+00:00",
+        "hostname": host,
+        "cpu": {"overall_percent": cpu},
+        "memory": {"physical": {"total": 1000, "used": 400}},
+    }
+
+
+EPOCH = 1767225600.0  # 2026-01-01T00:00:00Z
+
+
+class StalledBackend(SQLiteBackend):
+    """Backend whose writes block until released."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.release = threading.Event()
+
+    def write_batch(self, rows):
+        self.release.wait(10)
+        super().write_batch(rows)
+
+
+class RunningServer:
+    """Ingest server on an event loop in a background thread."""
+
+    def __init__(self, backend, **options):
+        self.loop = asyncio.new_event_loop()
+        self.server = IngestServer(backend, **options)
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.call(self.server.start("127.0.0.1", 0))
+        self.port = self.server.port
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(10)
+
+    def request(self, method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+    def post(self, body, content_type="application/json", **headers):
+        return self.request("POST", "/api/metrics", body, {"Content-Type": content_type, **headers})
+
+    def get_json(self, path):
+        status, _, body = self.request("GET", path)
+        assert status == 200, body
+        return json.loads(body)
+
+    def close(self):
+        self.call(self.server.stop())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture
+def running(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "metrics.db"))
+    running = RunningServer(backend)
+    yield running
+    running.close()
+    backend.close()
+
+
+def wait_written(server, count):
+    deadline = time.monotonic() + 5
+    while server.written < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.written == count
+
+
+def test_decode_formats():
+    decoder = PayloadDecoder()
+    one, two = snapshot(second=1), snapshot(second=2)
+
+    assert [row[:2] for row in decoder.decode(json.dumps(one).encode(), "application/json")] == [("web-1", EPOCH + 1)]
+    assert len(decoder.decode(json.dumps([one, two]).encode(), "application/json")) == 2
+
+    ndjson = gzip.compress(b"\n".join(json.dumps(s).encode() for s in (one, two)))
+    rows = decoder.decode(ndjson, "application/x-ndjson", "gzip")
+    assert [row[2] for row in rows] == [one, two]
+
+    framed = protobuf.frame([protobuf.encode_snapshot(one), protobuf.encode_snapshot(two)])
+    rows = decoder.decode(framed, "application/x-protobuf")
+    assert [row[2]["cpu"]["overall_percent"] for row in rows] == [10.0, 10.0]
+
+
+def test_decode_delta_stream_per_sender():
+    decoder = PayloadDecoder()
+    encoder = DeltaEncoder(keyframe_interval=10)
+    first = protobuf.frame([encoder.encode(snapshot(second=s, cpu=float(s))) for s in range(3)])
+    second = protobuf.frame([encoder.encode(snapshot(second=3, cpu=3.0))])
+
+    assert [row[2]["cpu"]["overall_percent"] for row in decoder.decode(first, "application/x-metrics-delta", stream_key="a")] == [0.0, 1.0, 2.0]
+    # Another sender has no keyframe yet
+    assert decoder.decode(second, "application/x-metrics-delta", stream_key="b") == []
+    assert decoder.decode(second, "application/x-metrics-delta", stream_key="a")[0][2] == snapshot(second=3, cpu=3.0)
+    with pytest.raises(PayloadError):
+        decoder.decode(second, "application/x-metrics-delta")
+
+
+def test_decode_delta_batch_retried_after_lost_response():
+    decoder = PayloadDecoder()
+    encoder = DeltaEncoder(keyframe_interval=60)
+    frames = [encoder.encode(snapshot(second=s, cpu=float(s))) for s in range(6)]
+    delta = "application/x-metrics-delta"
+
+    assert len(decoder.decode(protobuf.frame(frames[:3]), delta, stream_key="a")) == 3
+    # The 202 for frames 3-4 never reached the agent: it sends them again
+    assert len(decoder.decode(protobuf.frame(frames[3:5]), delta, stream_key="a")) == 2
+    assert decoder.decode(protobuf.frame(frames[3:5]), delta, stream_key="a") == []
+    rows = decoder.decode(protobuf.frame(frames[3:6]), delta, stream_key="a")
+    assert [row[2] for row in rows] == [snapshot(second=5, cpu=5.0)]
+    assert decoder.stream_gaps == 0
+
+
+def test_decode_rejects_invalid():
+    decoder = PayloadDecoder()
+    with pytest.raises(PayloadError):
+        decoder.decode(b"{not json", "application/json")
+    with pytest.raises(PayloadError):
+        decoder.decode(json.dumps({"timestamp": "2026-01-01T00:00:00"}).encode(), "application/json")
+    with pytest.raises(PayloadError):
+        decoder.decode(json.dumps({"hostname": "a", "timestamp": "yesterday"}).encode(), "application/json")
+    with pytest.raises(PayloadError):
+        decoder.decode(b"", "text/plain")
+
+
+def test_create_backend(tmp_path):
+    backend = create_backend(f"sqlite:///{tmp_path}/a.db")
+    backend.write_batch([("h", 1.0, "{}")])
+    assert backend.hosts() == [("h", 1.0)]
+    backend.close()
+    with pytest.raises(ValueError):
+        create_backend("nosuch://x")
+
+
+def test_incomplete_backend_rejected():
+    class WriteOnly(StorageBackend):
+        def write_batch(self, rows):
+            pass
+
+    with pytest.raises(TypeError):
+        WriteOnly()
+
+
+def test_retried_rows_stored_once(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "metrics.db"))
+    backend.write_batch([("h", 1.0, '{"a":1}'), ("h", 2.0, "{}")])
+    # A batch re-sent after its response was lost
+    backend.write_batch([("h", 2.0, "{}"), ("h", 3.0, "{}")])
+    assert [ts for ts, _ in backend.history("h", 0.0, 10.0, 10)] == [1.0, 2.0, 3.0]
+    backend.close()
+
+
+def test_unique_index_added_to_existing_database(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE snapshots (host TEXT NOT NULL, ts REAL NOT NULL, data TEXT NOT NULL)")
+    connection.execute("CREATE INDEX snapshots_host_ts ON snapshots (host, ts)")
+    connection.executemany("INSERT INTO snapshots VALUES (?, ?, ?)", [("h", 1.0, "{}"), ("h", 1.0, "{}")])
+    connection.commit()
+    connection.close()
+
+    backend = SQLiteBackend(path)
+    assert backend.history("h", 0.0, 10.0, 10) == [(1.0, "{}")]
+    backend.close()
+
+
+def test_post_current_and_history(running):
+    status, _, body = running.post(json.dumps([snapshot(second=s, cpu=float(s)) for s in range(5)]))
+    assert status == 202
+    assert json.loads(body) == {"accepted": 5}
+    running.post(json.dumps(snapshot(host="db-1")))
+    wait_written(running.server, 6)
+
+    current = running.get_json("/api/metrics/current")
+    assert [s["hostname"] for s in current] == ["db-1", "web-1"]
+    assert running.get_json("/api/metrics/current?host=web-1")["cpu"]["overall_percent"] == 4.0
+    assert running.request("GET", "/api/metrics/current?host=nosuch")[0] == 404
+
+    history = running.get_json(f"/api/metrics/history?host=web-1&start={EPOCH + 1}&end={EPOCH + 4}")
+    assert [s["cpu"]["overall_percent"] for s in history["snapshots"]] == [1.0, 2.0, 3.0]
+
+    history = running.get_json(
+        "/api/metrics/history?host=web-1&start=2026-01-01T00:00:00Z&end=2026-01-01T00:01:00Z&metric=cpu&limit=2&offset=1"
+    )
+    assert history["snapshots"] == [
+        {"hostname": "web-1", "timestamp": snapshot(second=s)["timestamp"], "cpu": {"overall_percent": float(s)}}
+        for s in (1, 2)
+    ]
+
+    servers = running.get_json("/api/servers")
+    assert [s["hostname"] for s in servers] == ["db-1", "web-1"]
+    assert servers[1]["last_seen"] == "2026-01-01T00:00:04+00:00"
+
+
+def test_delta_streams_keyed_by_agent_id(running):
+    # Two agents behind one address (NAT) share the peer IP
+    encoders = {host: DeltaEncoder() for host in ("web-1", "web-2")}
+    for second in range(3):
+        for host, encoder in encoders.items():
+            body = protobuf.frame([encoder.encode(snapshot(host=host, second=second, cpu=float(second)))])
+            status, _, _ = running.post(body, "application/x-metrics-delta", **{"X-Agent-Id": host})
+            assert status == 202
+    wait_written(running.server, 6)
+    assert running.server.decoder.stream_gaps == 0
+    assert running.get_json("/api/metrics/current?host=web-2")["cpu"]["overall_percent"] == 2.0
+
+    body = protobuf.frame([encoders["web-1"].encode(snapshot(second=3))])
+    assert running.post(body, "application/x-metrics-delta")[0] == 400
+
+
+def test_bad_requests(running):
+    assert running.post(b"{", "application/json")[0] == 400
+    assert running.request("GET", "/api/metrics/history")[0] == 400
+    assert running.request("GET", "/api/metrics")[0] == 405
+    assert running.request("GET", "/nosuch")[0] == 404
+    assert running.server.accepted == 0
+
+
+def test_body_size_limit(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "metrics.db"))
+    running = RunningServer(backend, max_body_size=100)
+    try:
+        assert running.post(json.dumps(snapshot()) * 10)[0] == 413
+    finally:
+        running.close()
+        backend.close()
+
+
+def test_gzip_bomb_rejected(tmp_path):
+    bomb = gzip.compress(b"\0" * (4 * 1024 * 1024))
+    assert len(bomb) < 10_000
+    with pytest.raises(PayloadTooLarge):
+        decompress(bomb, "gzip", limit=1024 * 1024)
+    # Members after the first count towards the same limit
+    with pytest.raises(PayloadTooLarge):
+        decompress(gzip.compress(b"a" * 1000) * 2, "gzip", limit=1500)
+    assert decompress(gzip.compress(b"a") + gzip.compress(b"b"), "gzip") == b"ab"
+    with pytest.raises(PayloadError):
+        decompress(gzip.compress(b"abc" * 1000)[:-20], "gzip")
+
+    backend = SQLiteBackend(str(tmp_path / "metrics.db"))
+    running = RunningServer(backend, max_decompressed_size=1024 * 1024)
+    try:
+        assert running.post(bomb, **{"Content-Encoding": "gzip"})[0] == 413
+        assert running.server.accepted == 0
+    finally:
+        running.close()
+        backend.close()
+
+
+def test_backpressure(tmp_path):
+    backend = StalledBackend(str(tmp_path / "metrics.db"))
+    running = RunningServer(backend, max_pending=3, retry_after=7)
+    try:
+        assert running.post(json.dumps([snapshot(second=s) for s in range(3)]))[0] == 202
+        status, headers, _ = running.post(json.dumps(snapshot(second=3)))
+        assert status == 503
+        assert headers["Retry-After"] == "7"
+        # Reads keep working while the write path is full
+        assert running.get_json("/api/metrics/current?host=web-1")["timestamp"] == snapshot(second=2)["timestamp"]
+
+        backend.release.set()
+        wait_written(running.server, 3)
+        assert running.post(json.dumps(snapshot(second=3)))[0] == 202
+        wait_written(running.server, 4)
+        assert running.server.stats()["rejected"] == 1
+    finally:
+        backend.release.set()
+        running.close()
+        backend.close()
+
+
+def test_backpressure_bound_holds_for_concurrent_posts(tmp_path):
+    backend = StalledBackend(str(tmp_path / "metrics.db"))
+    running = RunningServer(backend, max_pending=3)
+    decode = running.server.decoder.decode
+    both_admitted = threading.Barrier(2, timeout=5)
+
+    def decode_together(*args, **kwargs):
+        # Both posts passed the check before decoding
+        both_admitted.wait()
+        return decode(*args, **kwargs)
+
+    running.server.decoder.decode = decode_together
+    results = []
+    posts = [
+        threading.Thread(target=lambda s=s: results.append(
+            running.post(json.dumps([snapshot(second=s), snapshot(second=s + 1)]))[0]))
+        for s in (0, 10)
+    ]
+    try:
+        for post in posts:
+            post.start()
+        for post in posts:
+            post.join(10)
+        assert sorted(results) == [202, 503]
+        assert running.server.pending == 2 and running.server.reserved == 0
+    finally:
+        backend.release.set()
+        running.close()
+        backend.close()
+
+
+def test_writes_are_batched(tmp_path):
+    backend = StalledBackend(str(tmp_path / "metrics.db"))
+    running = RunningServer(backend, write_batch_size=100)
+    try:
+        for second in range(10):
+            assert running.post(json.dumps(snapshot(second=second)))[0] == 202
+        backend.release.set()
+        wait_written(running.server, 10)
+        # The first post's write was in flight; everything queued behind it
+        # is committed in one transaction
+        assert running.server.batches == 2
+    finally:
+        backend.release.set()
+        running.close()
+        backend.close()
+
+
+def test_alerts_evaluated_on_ingest(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "metrics.db"))
+    rules = build_rules({"rules": [{"name": "cpu_high", "expr": "cpu.overall_percent > 90 for 10s", "severity": "critical"}]})
+    running = RunningServer(backend, rules=rules)
+    try:
+        # Out of order within the batch; a replayed snapshot is ignored
+        batch = [snapshot(second=10, cpu=95.0), snapshot(second=0, cpu=95.0), snapshot(second=5, cpu=95.0)]
+        assert running.post(json.dumps(batch))[0] == 202
+        assert running.post(json.dumps(snapshot(second=5, cpu=10.0)))[0] == 202
+
+        alerts = running.get_json("/api/alerts")
+        assert [(a["host"], a["rule"], a["state"]) for a in alerts["recent"]] == [("web-1", "cpu_high", "firing")]
+        assert alerts["active"][0]["since"] == "2026-01-01T00:00:00+00:00"
+
+        running.post(json.dumps(snapshot(second=20, cpu=10.0)))
+        alerts = running.get_json("/api/alerts")
+        assert alerts["active"] == []
+        assert alerts["recent"][-1]["state"] == "resolved"
+    finally:
+        running.close()
+        backend.close()
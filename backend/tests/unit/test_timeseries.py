@@ -0,0 +1,164 @@
+"""Unit tests for embedded time-series store."""
+import math
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent.timeseries import DAY, Tier, TimeSeriesStore, numeric_fields, snapshot_time
+
+T0 = 1_700_000_040  # start of a minute
+
+
+def test_numeric_fields():
+    """Test flattening of snapshot sections into series names."""
+    fields = numeric_fields({
+        "timestamp": "2024-01-01T00:00:00",
+        "cpu": {"overall_percent": 5, "per_core_percent": [1.0, 2.0], "load_average": {"1min": None}},
+        "disk": {"partitions": [{"total": 1}], "per_disk_io": {"sda": {"read_bytes": 10}}},
+        "top_cpu_processes": [{"pid": 1, "cpu_percent": 3.0}],
+        "inventory": {"version": 2},
+        "process_scan": {"count": 3},
+        "agent": {
+            "rss_bytes": 100,
+            "bucket_bounds_ms": [1.0, 10.0],
+            "functions": {"collect": {"count": 2, "sum_ms": 3.0, "max_ms": 2.0, "buckets": [1, 1, 0]}},
+        },
+    })
+
+    assert fields == {
+        "cpu.overall_percent": 5.0,
+        "cpu.per_core_percent.0": 1.0,
+        "cpu.per_core_percent.1": 2.0,
+        "disk.per_disk_io.sda.read_bytes": 10.0,
+        "process_scan.count": 3.0,
+        "agent.rss_bytes": 100.0,
+        "agent.functions.collect.count": 2.0,
+        "agent.functions.collect.sum_ms": 3.0,
+        "agent.functions.collect.max_ms": 2.0,
+    }
+
+
+def test_snapshot_time():
+    """Test that snapshot timestamps are read as UTC."""
+    assert snapshot_time({"timestamp": "1970-01-01T00:01:00"}) == 60
+
+
+def test_raw_query(tmp_path):
+    """Test appending and reading back raw samples."""
+    store = TimeSeriesStore(str(tmp_path))
+    for i in range(100):
+        values = {"cpu": float(i)}
+        if i >= 50:
+            values["new"] = 1.0
+        assert store.append(T0 + i, values)
+
+    timestamps, values = store.query("cpu", T0 + 10, T0 + 20, tier="raw")
+    assert list(timestamps) == [T0 + i for i in range(10, 20)]
+    assert list(values) == [float(i) for i in range(10, 20)]
+
+    _, values = store.query("new", T0 + 48, T0 + 52, tier="raw")
+    assert math.isnan(values[0]) and math.isnan(values[1]) and list(values[2:]) == [1.0, 1.0]
+
+    _, values = store.query("missing", T0, T0 + 3, tier="raw")
+    assert len(values) == 3 and all(math.isnan(v) for v in values)
+
+
+def test_rejects_out_of_order(tmp_path):
+    """Test that samples must move forward in time."""
+    store = TimeSeriesStore(str(tmp_path))
+    assert store.append(T0 + 5, {"a": 1.0})
+    assert not store.append(T0 + 5, {"a": 2.0})
+    assert not store.append(T0, {"a": 3.0})
+    assert store.dropped == 2
+
+
+def test_rollups(tmp_path):
+    """Test that 1m and 1h tiers hold min/max/avg/last of each bucket."""
+    store = TimeSeriesStore(str(tmp_path))
+    for i in range(180):
+        store.append(T0 + i, {"a": float(i)})
+    store.flush()
+
+    timestamps, averages = store.query("a", T0, T0 + 180, tier="1m")
+    assert list(timestamps) == [T0, T0 + 60, T0 + 120]
+    assert list(averages) == [29.5, 89.5, 149.5]
+    assert list(store.query("a", T0, T0 + 180, tier="1m", stat="min")[1]) == [0.0, 60.0, 120.0]
+    assert list(store.query("a", T0, T0 + 180, tier="1m", stat="max")[1]) == [59.0, 119.0, 179.0]
+    assert list(store.query("a", T0, T0 + 180, tier="1m", stat="last")[1]) == [59.0, 119.0, 179.0]
+
+    hour = T0 - T0 % 3600
+    _, counts = store.query("a", hour, hour + 3600, tier="1h", stat="count")
+    assert list(counts) == [180.0]
+
+    with pytest.raises(ValueError):
+        store.query("a", T0, T0 + 60, tier="1m", stat="median")
+
+
+def test_reopen_continues_segments_and_buckets(tmp_path):
+    """Test that a restart resumes the segment and merges the open bucket."""
+    store = TimeSeriesStore(str(tmp_path))
+    for i in range(30):
+        store.append(T0 + i, {"a": 1.0})
+    store.close()
+
+    store = TimeSeriesStore(str(tmp_path))
+    assert not store.append(T0 + 29, {"a": 5.0})
+    for i in range(30, 60):
+        store.append(T0 + i, {"a": 3.0})
+    store.close()
+
+    store = TimeSeriesStore(str(tmp_path))
+    assert len(store.query("a", T0, T0 + 60, tier="raw")[0]) == 60
+    assert list(store.query("a", T0, T0 + 60, tier="1m")[1]) == [2.0]
+    assert list(store.query("a", T0, T0 + 60, tier="1m", stat="count")[1]) == [60.0]
+
+
+def test_open_rollups_written_without_close(tmp_path):
+    """Test that the open 1h bucket survives an agent that never closes."""
+    store = TimeSeriesStore(str(tmp_path))
+    for i in range(90):
+        store.append(T0 + i, {"a": 1.0})
+    # No close(): the process dies here
+
+    hour = T0 - T0 % 3600
+    reader = TimeSeriesStore(str(tmp_path))
+    # Written when the first minute closed; the second is still open
+    assert list(reader.query("a", hour, hour + 3600, tier="1h", stat="count")[1]) == [60.0]
+
+    # The restarted agent merges the rest of the hour into the same row
+    for i in range(120, 180):
+        reader.append(T0 + i, {"a": 3.0})
+    reader.close()
+    _, averages = reader.query("a", hour, hour + 3600, tier="1h")
+    assert list(averages) == [2.0]
+    assert list(reader.query("a", hour, hour + 3600, tier="1h", stat="count")[1]) == [120.0]
+
+
+def test_segments_rotate_and_expire(tmp_path):
+    """Test that retention deletes whole segment directories."""
+    tiers = (Tier("raw", 0, 2 * 3600, 3600, 3600), Tier("1m", 60, DAY, DAY, DAY // 60))
+    store = TimeSeriesStore(str(tmp_path), tiers=tiers)
+    start = T0 - T0 % 3600
+    for hour in range(4):
+        store.append(start + hour * 3600, {"a": float(hour)})
+
+    # The fourth hour's rotation dropped the first segment
+    assert sorted(os.listdir(tmp_path / "raw")) == [f"{start + h * 3600:012d}" for h in (1, 2, 3)]
+    assert store.expire(start + 6 * 3600) == 2
+    timestamps, _ = store.query("a", start, start + 4 * 3600, tier="raw")
+    assert list(timestamps) == [start + 3 * 3600]
+
+
+def test_choose_tier(tmp_path):
+    """Test automatic tier selection by retention."""
+    store = TimeSeriesStore(str(tmp_path))
+    now = T0 + 400 * DAY
+
+    assert store.choose_tier(now - DAY, now).name == "raw"
+    assert store.choose_tier(now - 10 * DAY, now).name == "1m"
+    assert store.choose_tier(now - 90 * DAY, now).name == "1h"
@@ -0,0 +1,233 @@
+"""Unit tests for HTTP shipper."""
+import pytest
+import sys
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from agent import protobuf
+from agent.buffer import MetricBuffer
+from agent.delta import DeltaDecoder
+from agent.transport import HttpShipper, backoff_delay, create_shipper, get_compressor
+
+
+class StandInServer:
+    """Local HTTP server recording metric batches."""
+
+    def __init__(self, fail_first=0, status=503):
+        self.batches = []
+        self.agent_ids = set()
+        self.connections = set()
+        self.fail_first = fail_first
+        self.status = status
+        self.delta_decoder = DeltaDecoder()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                server.connections.add(self.client_address)
+                server.agent_ids.add(self.headers.get("X-Agent-Id"))
+                if server.fail_first > 0:
+                    server.fail_first -= 1
+                    self.send_response(server.status)
+                else:
+                    if self.headers.get("Content-Encoding") == "gzip":
+                        body = gzip.decompress(body)
+                    if self.headers["Content-Type"] == "application/x-protobuf":
+                        batch = [protobuf.decode_snapshot(m) for m in protobuf.unframe(body)]
+                    elif self.headers["Content-Type"] == "application/x-metrics-delta":
+                        batch = [server.delta_decoder.decode(m) for m in protobuf.unframe(body)]
+                    else:
+                        batch = [json.loads(line) for line in body.splitlines()]
+                    server.batches.append(batch)
+                    self.send_response(202)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+def make_shipper(url, **kwargs):
+    options = dict(batch_size=3, batch_interval=60, compression="gzip", retry_attempts=2, retry_delay=0.01)
+    options.update(kwargs)
+    return HttpShipper(url, MetricBuffer(capacity=100), **options)
+
+
+def test_batches_snapshots(server):
+    """Test that snapshots are sent as compressed batches."""
+    shipper = make_shipper(server.url)
+    for i in range(7):
+        shipper.submit({"seq": i})
+
+    assert shipper.flush() is True
+    assert [len(batch) for batch in server.batches] == [3, 3, 1]
+    assert [s["seq"] for batch in server.batches for s in batch] == list(range(7))
+    assert len(shipper.buffer) == 0
+
+
+def test_ships_protobuf_when_enabled(server):
+    """Test that use_protobuf sends length-delimited Snapshot messages."""
+    config = {
+        "server_url": server.url, "use_protobuf": True, "batch_size": 2,
+        "compression": "gzip", "retry_attempts": 1, "retry_delay": 0.01, "timeout": 5,
+    }
+    shipper = create_shipper(config, MetricBuffer(capacity=100))
+    for i in range(3):
+        shipper.submit({"timestamp": f"t{i}", "hostname": "web-1"})
+
+    assert shipper.flush() is True
+    assert [[s["timestamp"] for s in batch] for batch in server.batches] == [["t0", "t1"], ["t2"]]
+    assert server.batches[0][0]["hostname"] == "web-1"
+
+
+def test_ships_delta_stream_when_enabled(server):
+    """Test that delta_encoding sends a keyframe followed by delta frames."""
+    config = {
+        "server_url": server.url, "delta_encoding": True, "keyframe_interval": 10, "batch_size": 2,
+        "compression": "none", "retry_attempts": 1, "retry_delay": 0.01, "timeout": 5, "agent_id": "agent-7",
+    }
+    shipper = create_shipper(config, MetricBuffer(capacity=100))
+    snapshots = [{"timestamp": f"t{i}", "hostname": "web-1", "bytes": 1000 * i} for i in range(3)]
+    for snapshot in snapshots:
+        shipper.submit(snapshot)
+
+    assert shipper.flush() is True
+    assert [s for batch in server.batches for s in batch] == snapshots
+    assert server.agent_ids == {"agent-7"}
+
+
+def test_reuses_keep_alive_connection(server):
+    """Test that batches share one pooled connection."""
+    shipper = make_shipper(server.url)
+    for i in range(9):
+        shipper.submit({"seq": i})
+    shipper.flush()
+
+    assert shipper.pool.created == 1
+    assert len(server.connections) == 1
+
+
+def test_retries_until_success():
+    """Test that transient server errors are retried."""
+    server = StandInServer(fail_first=2)
+    try:
+        shipper = make_shipper(server.url)
+        shipper.submit({"seq": 0})
+
+        assert shipper.send_batch() is True
+        assert shipper.failed_attempts == 2
+        assert len(server.batches) == 1
+    finally:
+        server.close()
+
+
+def test_keeps_payloads_when_server_down():
+    """Test that undeliverable batches stay buffered for replay."""
+    server = StandInServer(fail_first=100)
+    try:
+        shipper = make_shipper(server.url, retry_attempts=1)
+        shipper.submit({"seq": 0})
+
+        assert shipper.flush() is False
+        assert len(shipper.buffer) == 1
+
+        server.fail_first = 0
+        assert shipper.flush() is True
+        assert server.batches == [[{"seq": 0}]]
+    finally:
+        server.close()
+
+
+def test_rejected_batch_is_dropped():
+    """Test that a permanently rejected batch does not block the queue."""
+    server = StandInServer(fail_first=1, status=400)
+    try:
+        shipper = make_shipper(server.url, batch_size=1)
+        shipper.submit({"seq": 0})
+        shipper.submit({"seq": 1})
+
+        assert shipper.flush() is True
+        assert server.batches == [[{"seq": 1}]]
+    finally:
+        server.close()
+
+
+def test_rejected_delta_batch_restarts_with_keyframe():
+    """Test that the frame after a dropped batch decodes on the server."""
+    server = StandInServer(fail_first=1, status=400)
+    try:
+        config = {
+            "server_url": server.url, "delta_encoding": True, "batch_size": 1,
+            "compression": "none", "retry_attempts": 0, "retry_delay": 0.01, "timeout": 5,
+        }
+        shipper = create_shipper(config, MetricBuffer(capacity=100))
+        shipper.submit({"hostname": "web-1", "bytes": 0})
+        assert shipper.flush() is True
+
+        # The keyframe was dropped: the next frame must not be a delta against it
+        snapshot = {"hostname": "web-1", "bytes": 1000}
+        shipper.submit(snapshot)
+        assert shipper.flush() is True
+        assert server.batches == [[snapshot]]
+    finally:
+        server.close()
+
+
+def test_background_thread_sends_on_batch_size(server):
+    """Test that the sender thread ships once a batch is full."""
+    shipper = make_shipper(server.url)
+    shipper.start()
+    try:
+        for i in range(3):
+            shipper.submit({"seq": i})
+        for _ in range(100):
+            if server.batches:
+                break
+            threading.Event().wait(0.02)
+    finally:
+        shipper.stop()
+
+    assert server.batches == [[{"seq": 0}, {"seq": 1}, {"seq": 2}]]
+
+
+def test_backoff_delay_bounds():
+    """Test that backoff grows exponentially and stays under the cap."""
+    for attempt in range(10):
+        delay = backoff_delay(attempt, base=1, cap=30)
+        assert 0 <= delay <= min(30, 2 ** attempt)
+
+
+def test_get_compressor():
+    """Test compression settings."""
+    encoding, compress = get_compressor("gzip")
+    assert encoding == "gzip"
+    assert gzip.decompress(compress(b"data")) == b"data"
+
+    assert get_compressor("none")[0] is None
+
+    with pytest.raises(ValueError):
+        get_compressor("brotli")